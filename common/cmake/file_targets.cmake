@@ -141,7 +141,9 @@ function(GET_VERILOG_INCLUDES var file)
   execute_process(
     COMMAND
       ${PYTHON_EXECUTABLE} ${f4pga-arch-defs_SOURCE_DIR}/utils/deps_verilog.py
-      --file_per_line ${CMAKE_CURRENT_SOURCE_DIR}/${file}
+      --file_per_line
+      --index ${CMAKE_BINARY_DIR}/deps_index.db
+      ${CMAKE_CURRENT_SOURCE_DIR}/${file}
     WORKING_DIRECTORY ${f4pga-arch-defs_SOURCE_DIR}
     OUTPUT_VARIABLE INCLUDES
   )
@@ -178,7 +180,9 @@ function(GET_XML_INCLUDES var file)
   execute_process(
     COMMAND
       ${PYTHON_EXECUTABLE} ${f4pga-arch-defs_SOURCE_DIR}/utils/deps_xml.py
-      --file_per_line ${CMAKE_CURRENT_SOURCE_DIR}/${file}
+      --file_per_line
+      --index ${CMAKE_BINARY_DIR}/deps_index.db
+      ${CMAKE_CURRENT_SOURCE_DIR}/${file}
     WORKING_DIRECTORY ${f4pga-arch-defs_SOURCE_DIR}
     OUTPUT_VARIABLE INCLUDES
   )
@@ -46,6 +46,7 @@ function(icestorm_setup)
     \${PYTHON3} ${f4pga-arch-defs_SOURCE_DIR}/lattice/ice40/utils/ice40_import_routing_from_icebox.py \
     --device=\${DEVICE} \
     --read_rr_graph \${OUT_RRXML_VIRT} \
+    --cache_dir ${CMAKE_BINARY_DIR}/ice40_routing_cache \
     --write_rr_graph \${OUT_RRXML_REAL}"
     PLACE_TOOL_CMD "\${QUIET_CMD}  \${CMAKE_COMMAND} -E env  ${PYPATH_ARG} \
     \${PYTHON3} ${f4pga-arch-defs_SOURCE_DIR}/lattice/ice40/utils/ice40_create_ioplace.py \
@@ -63,7 +64,9 @@ function(icestorm_setup)
     BIT_TIME_CMD "${ICETIME} -v -t -p \${INPUT_IO_FILE} -d \${DEVICE} \${OUT_BITSTREAM} -o \${OUT_TIME_VERILOG}"
     FASM_TO_BIT fasm2asc_deps
     FASM_TO_BIT_CMD "\${QUIET_CMD}  \${CMAKE_COMMAND} -E env  ${PYPATH_ARG} \
-    \${PYTHON3} ${FASM2ASC} --device \${DEVICE} \${OUT_FASM} \${OUT_BITSTREAM}"
+    \${PYTHON3} ${FASM2ASC} --device \${DEVICE} \
+    --index_cache_dir ${CMAKE_BINARY_DIR}/fasm_icebox_index \
+    \${OUT_FASM} \${OUT_BITSTREAM}"
     USE_FASM
     ROUTE_CHAN_WIDTH 100
     NO_PLACE_CONSTR
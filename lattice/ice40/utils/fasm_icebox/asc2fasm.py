@@ -1,12 +1,36 @@
 #!/usr/bin/env python3
 import sys
+import argparse
 from fasm_icebox_utils import asc_to_fasm
 
 
 def main(args):
-    # parse args
-    with open(args[1], "w") as f:
-        asc_to_fasm(args[0], f)
+    parser = argparse.ArgumentParser(
+        description="Convert ice40 asc format to FASM"
+    )
+    parser.add_argument("input_asc", help="Input ASC file", nargs="?")
+    parser.add_argument("output_fasm", help="Output FASM file", nargs="?")
+    parser.add_argument(
+        "--batch",
+        help="File listing 'input_asc output_fasm' pairs to convert",
+        type=argparse.FileType("r")
+    )
+    parser.add_argument(
+        "--index_cache_dir",
+        help="Cache directory of the per-device FASM indexes"
+    )
+
+    args = parser.parse_args(args)
+
+    if args.batch is not None:
+        pairs = [line.split() for line in args.batch if line.strip()]
+    else:
+        assert args.input_asc is not None and args.output_fasm is not None
+        pairs = [(args.input_asc, args.output_fasm)]
+
+    for input_asc, output_fasm in pairs:
+        with open(output_fasm, "w") as f:
+            asc_to_fasm(input_asc, f, index_cache_dir=args.index_cache_dir)
 
 
 if __name__ == "__main__":
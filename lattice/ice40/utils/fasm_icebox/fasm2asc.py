@@ -10,17 +10,52 @@ def main(args):
     )
     parser.add_argument("--device", help="Device type (eg 1k, 8k)")
     parser.add_argument(
-        "input_fasm", help="Input FASM file", type=argparse.FileType("r")
+        "input_fasm",
+        help="Input FASM file",
+        nargs="?",
+        type=argparse.FileType("r")
     )
     parser.add_argument(
         "output_asc",
         help="Output ASC file",
+        nargs="?",
         type=argparse.FileType("w"),
         default=sys.stdout,
     )
+    parser.add_argument(
+        "--batch",
+        help="File listing 'input_fasm output_asc' pairs to convert",
+        type=argparse.FileType("r")
+    )
+    parser.add_argument(
+        "--index_cache_dir",
+        help="Cache directory of the per-device FASM indexes"
+    )
 
-    args = parser.parse_args()
-    fasm_to_asc(args.input_fasm, args.output_asc, device=args.device)
+    args = parser.parse_args(args)
+
+    if args.batch is not None:
+        for line in args.batch:
+            if not line.strip():
+                continue
+
+            input_fasm, output_asc = line.split()
+            with open(input_fasm) as f_in, open(output_asc, "w") as f_out:
+                fasm_to_asc(
+                    f_in,
+                    f_out,
+                    device=args.device,
+                    index_cache_dir=args.index_cache_dir
+                )
+        return
+
+    assert args.input_fasm is not None
+    fasm_to_asc(
+        args.input_fasm,
+        args.output_asc,
+        device=args.device,
+        index_cache_dir=args.index_cache_dir
+    )
 
 
 if __name__ == "__main__":
@@ -15,13 +15,19 @@ Exceptions:
 """
 
 from io import StringIO
+import hashlib
+import os
 import re
+import sys
 import unittest
+import zipfile
 import numpy as np
 
 import icebox
+import iceboxdb
 import fasm
 from ice40_feature import Feature, IceDbEntry, FasmEntry
+from lib.file_cache import temp_file_for
 
 # hardcoded permutation
 # * https://github.com/YosysHQ/nextpnr/blob/343569105ddf7c97316922774dc4d70d1d4f7c9f/ice40/bitstream.cc#L460-L468
@@ -35,6 +41,21 @@ LUT_CTRL = {
     "AsyncSetReset": 19
 }
 
+# RAM data of a RAMB tile, 16 rows of 256 bits
+RAM_DATA_ROWS = 16
+RAM_DATA_COLS = 256
+
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+HEX_VALUES = np.zeros(256, dtype=np.uint8)
+HEX_VALUES[np.frombuffer(b"0123456789abcdef", dtype=np.uint8)] = range(16)
+HEX_VALUES[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = range(10, 16)
+
+# Bump when the content of the FASM index changes to invalidate caches.
+FASM_INDEX_VERSION = 1
+
+# FasmIndex of each device, shared by the conversions of a process
+_FASM_INDEXES = {}
+
 
 def _nibbles_to_bits(line):
     """Convert from icebox hex string for ramdata in asc files to an array of Bool"""
@@ -59,31 +80,6 @@ def _bits_to_nibbles(arr):
     return "".join(res)
 
 
-def _tile_to_array(tile, is_hex=False):
-    """Convert text icedb tile to a numpy array"""
-
-    if is_hex:
-        array = np.array([_nibbles_to_bits(line) for line in tile], dtype=bool)
-    else:
-        array = np.array(
-            [[int(xx) for xx in line] for line in tile], dtype=bool
-        )
-    return array
-
-
-def _array_to_tile(tile_bits, tile, is_hex=False):
-    """Convert a numpy array to text icedb tile
-
-    Modifies tile in place to simplify updating of iceconfig
-    """
-    if is_hex:
-        for ii, xx in enumerate(tile_bits):
-            tile[ii] = _bits_to_nibbles(xx)
-    else:
-        for ii, xx in enumerate(tile_bits):
-            tile[ii] = tile_bits.shape[1] * "%d" % tuple(xx)
-
-
 def _lut_to_lc(lut, ctrl):
     """Convert lut and ctrl dict to permuted lc bits"""
 
@@ -103,49 +99,6 @@ def _lc_to_lut(lc):
     return lut, ctrl
 
 
-def _get_feature_bits(tile, cond):
-    """Get bitmask and values for the tile from an icebox db entry"""
-
-    bm = np.zeros(tile.shape, dtype=bool)
-    bp = np.zeros(tile.shape, dtype=bool)
-    for ii in cond:
-        neg, x, y = ii
-        bm[x][y] = True
-        bp[x][y] = neg != "!"
-    return bm, bp
-
-
-def _set_feature_bits(ic, loc, bits):
-    """Set bits for a specifc location in an iceconfig"""
-
-    tile = ic.tile(*loc)
-    tile_bits = _tile_to_array(tile)
-    bm, bv = _get_feature_bits(tile_bits, bits)
-    tile_bits[bm] = bv[bm]
-    _array_to_tile(tile_bits, tile)
-
-
-def _get_iceconfig_bits(tile, cond):
-    """Get bitmask and values for the tile from an icebox db entry"""
-
-    bm = np.zeros(tile.shape, dtype=bool)
-    bp = np.zeros(tile.shape, dtype=bool)
-    for ii in cond:
-        mm = re.match(r"([\!]?)B([0-9]+)\[([0-9]*)\]", ii)
-        neg = mm.group(1)
-        inds = [int(mm.group(ii)) for ii in range(2, 4)]
-        bm[inds[0]][inds[1]] = 1
-        bp[inds[0]][inds[1]] = neg != "!"
-    return bm, bp
-
-
-def _check_iceconfig_entry(tile, entry):
-    """Check an entry is set for a tile"""
-
-    bm, bp = _get_iceconfig_bits(tile, entry[0])
-    return np.all(bp[bm] == tile[bm])
-
-
 def _inv_bit_tuple(bit_tuple):
     if bit_tuple[0] == "":
         neg = "!"
@@ -164,17 +117,9 @@ class FeatureAccumulator(dict):
             self, tile_type, tile_loc, bits, names, idx, negate=False
     ):
 
-        if negate:
-            feature = Feature.from_icedb_entry(
-                IceDbEntry(tile_type, tile_loc, bits, names, idx)
-            )
-            feature.bit_tuples = [
-                _inv_bit_tuple(bt) for bt in feature.bit_tuples
-            ]
-        else:
-            feature = Feature.from_icedb_entry(
-                IceDbEntry(tile_type, tile_loc, bits, names, idx)
-            )
+        feature = _make_ice_feature(
+            tile_type, tile_loc, bits, names, idx, negate=negate
+        )
 
         self.append_feature(feature)
         return feature
@@ -193,13 +138,27 @@ class FeatureAccumulator(dict):
         return outf
 
 
-def read_ice_db(ic):
-    """Read icebox database from iceconfig and construct a dictionary of features"""
+def _make_ice_feature(tile_type, tile_loc, bits, names, idx, negate=False):
+    """Create a Feature from an icebox db entry, optionally inverting its bits"""
+
+    feature = Feature.from_icedb_entry(
+        IceDbEntry(tile_type, tile_loc, bits, names, idx)
+    )
+    if negate:
+        feature.bit_tuples = [_inv_bit_tuple(bt) for bt in feature.bit_tuples]
+    return feature
+
+
+def _yield_ice_db_features(ic):
+    """Yield (feature, always_set) for each feature of the icebox database
+
+    always_set marks the features reported by iceconfig_to_fasm without
+    checking their bits.
+    """
 
     # TODO: undo Hack to invert some specific signals
     device_1k = ic.device == "1k"
 
-    accum = FeatureAccumulator()
     locs = [(x, y) for x in range(ic.max_x + 1) for y in range(ic.max_y + 1)]
 
     for tile_loc in locs:
@@ -213,37 +172,37 @@ def read_ice_db(ic):
                 lut, ctrl = _lc_to_lut(entry[0])
                 for ii, bit in enumerate(lut):
                     names = entry[1:] + ["INIT"]
-                    accum.append_ice_entry(
+                    yield _make_ice_feature(
                         tile_type, tile_loc, [bit], names, ii
-                    )
+                    ), False
 
                 for name, bit in ctrl.items():
                     names = entry[1:] + [name]
-                    accum.append_ice_entry(
+                    yield _make_ice_feature(
                         tile_type, tile_loc, [bit], names, None
-                    )
+                    ), False
 
             # entries to generate the negated case
             elif (
                     tile_type == "IO" and device_1k and
                 (entry[-1].startswith("IE_") or entry[-1].startswith("REN_"))):
-                accum.append_ice_entry(
+                yield _make_ice_feature(
                     tile_type,
                     tile_loc,
                     entry[0],
                     entry[1:],
                     None,
                     negate=True
-                )
+                ), True
             elif device_1k and tile_type == "RAMB" and entry[-1] == "PowerUp":
-                accum.append_ice_entry(
+                yield _make_ice_feature(
                     tile_type,
                     tile_loc,
                     entry[0],
                     entry[1:],
                     None,
                     negate=True
-                )
+                ), True
             elif tile_type == "RAMT" and entry[-1].startswith("CBIT"):
                 matches = re.match(r"CBIT_([0-9]+)", entry[-1])
                 assert matches is not None, "Expected 'CBIT_n' received {}".format(
@@ -260,34 +219,412 @@ def read_ice_db(ic):
                 val = cbit_translation.get(cbit_offset)
                 if val is not None:
                     ramb_tile_loc = (tile_loc[0], tile_loc[1] - 1)
-                    accum.append_ice_entry(
+                    yield _make_ice_feature(
                         "RAMB", ramb_tile_loc, entry[0], [val[0]], val[1]
-                    )
+                    ), True
                 else:
-                    accum.append_ice_entry(
+                    yield _make_ice_feature(
                         tile_type, tile_loc, entry[0], entry[1:], None
-                    )
+                    ), True
             else:
-                accum.append_ice_entry(
+                yield _make_ice_feature(
                     tile_type, tile_loc, entry[0], entry[1:], None
-                )
+                ), False
 
     # add RAM data entries features
     tile_type = "RAMB"
     for ram_loc in ic.ramb_tiles:
-        for i in range(16):
+        for i in range(RAM_DATA_ROWS):
             feature_name = "INIT{:X}".format(i)
-            for j in range(256):
+            for j in range(RAM_DATA_COLS):
                 bit = "B{}[{}]".format(i, j)
-                accum.append_ice_entry(
+                yield _make_ice_feature(
                     tile_type, ram_loc, [bit], [feature_name], j
-                )
+                ), False
 
     # TODO: extra bits?
 
+
+def read_ice_db(ic):
+    """Read icebox database from iceconfig and construct a dictionary of features"""
+
+    accum = FeatureAccumulator()
+    for feature, _ in _yield_ice_db_features(ic):
+        accum.append_feature(feature)
+
     return accum
 
 
+def _yield_default_entries(ic):
+    """Yield (tile_loc, entry) for the icebox entries set in an empty device
+
+    Sets input enable defaults, RAM powerup, and enables all ColBufCtrl (until
+    modeled in VPR see: #464)
+    """
+
+    device_1k = ic.device == "1k"
+
+    # TODO: upstream init "default" bitstream
+    locs = [(x, y) for x in range(ic.max_x + 1) for y in range(ic.max_y + 1)]
+    for tile_loc in locs:
+        if ic.tile(*tile_loc) is None:
+            continue
+        tile_type = ic.tile_type(*tile_loc)
+        for entry in ic.tile_db(*tile_loc):
+            if (device_1k and
+                ((tile_type == "IO" and entry[-1] in ["IE_0", "IE_1"]) or
+                 (tile_type == "RAMB" and entry[-1] == "PowerUp"))
+                    or (entry[-2] == "ColBufCtrl")):
+                yield tile_loc, entry
+
+
+def _hex_rows_to_bits(rows):
+    """Convert icebox hex strings for ramdata to a 2D array of bool
+
+    Vectorized _nibbles_to_bits over all the rows.
+    """
+
+    chars = np.frombuffer("".join(rows).encode("ascii"), dtype=np.uint8)
+    nibbles = HEX_VALUES[chars].reshape(len(rows), -1)[:, ::-1]
+    bits = (nibbles[:, :, np.newaxis] >> np.arange(4, dtype=np.uint8)) & 1
+    return bits.reshape(len(rows), -1).astype(bool)
+
+
+def _bits_to_hex_rows(bits):
+    """Convert a 2D array of bool to icebox hex strings for ramdata
+
+    Vectorized _bits_to_nibbles over all the rows.
+    """
+
+    nibbles = bits.reshape(bits.shape[0], -1, 4).astype(np.uint8)
+    nibbles = (nibbles << np.arange(4, dtype=np.uint8)).sum(
+        axis=2, dtype=np.uint8
+    )
+    chars = HEX_DIGITS[nibbles[:, ::-1]].tobytes().decode("ascii")
+    width = nibbles.shape[1]
+    return [chars[ii:ii + width] for ii in range(0, len(chars), width)]
+
+
+class FasmIndex(object):
+    """Index of the FASM features of an ice40 device
+
+    The configuration bits of every tile, followed by the RAM data of every
+    RAMB tile, are laid out in one device bit array.  Each entry of the icebox
+    database is a range of (bit_index, bit_value) pairs into that array, so
+    conversions become mask operations on the device bit array instead of
+    round-trips through the text tiles of an iceconfig.
+
+    Entries are in read_ice_db order, feature names may repeat.
+    """
+
+    ARRAYS = (
+        "tile_locs",
+        "tile_shapes",
+        "tile_offsets",
+        "ram_locs",
+        "ram_offsets",
+        "default_bits",
+        "entry_offsets",
+        "entry_tiles",
+        "always_set",
+        "bit_index",
+        "bit_value",
+        "ieren",
+    )
+
+    def __init__(self, names, **arrays):
+        self.names = names
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+        # Later entries win, like in read_ice_db.
+        self.feature_entries = {
+            name: entry
+            for entry, name in enumerate(names)
+        }
+        self.bit_entries = np.repeat(
+            np.arange(len(names)), np.diff(self.entry_offsets)
+        )
+        self.ram_offset = {
+            tuple(loc): offset
+            for loc, offset in
+            zip(self.ram_locs.tolist(), self.ram_offsets.tolist())
+        }
+        self.ieren_map = {}
+        for row in self.ieren.tolist():
+            ieren = self.ieren_map.setdefault(tuple(row[:3]), [])
+            ieren.append(tuple(row[3:]))
+
+    @classmethod
+    def from_iceconfig(cls, ic):
+        """Build the index of an empty iceconfig"""
+
+        tile_index = {}
+        tile_locs = []
+        tile_shapes = []
+        tile_offsets = []
+        chars = []
+        offset = 0
+
+        locs = [
+            (x, y) for x in range(ic.max_x + 1) for y in range(ic.max_y + 1)
+        ]
+        for tile_loc in locs:
+            tile = ic.tile(*tile_loc)
+            if tile is None:
+                continue
+
+            tile_index[tile_loc] = len(tile_locs)
+            tile_locs.append(tile_loc)
+            tile_shapes.append((len(tile), len(tile[0])))
+            tile_offsets.append(offset)
+            chars.append("".join(tile))
+            offset += len(tile) * len(tile[0])
+
+        ram_locs = []
+        ram_offsets = []
+        for ram_loc in ic.ramb_tiles:
+            ram_locs.append(ram_loc)
+            ram_offsets.append(offset)
+            chars.append("0" * RAM_DATA_ROWS * RAM_DATA_COLS)
+            offset += RAM_DATA_ROWS * RAM_DATA_COLS
+
+        default_bits = np.frombuffer(
+            "".join(chars).encode("ascii"), dtype=np.uint8
+        ) == ord("1")
+
+        def bit_offsets(tile_loc, bit_tuples):
+            tile = tile_index[tile_loc]
+            cols = tile_shapes[tile][1]
+            for neg, x, y in bit_tuples:
+                yield tile_offsets[tile] + x * cols + y, neg != "!"
+
+        for tile_loc, entry in _yield_default_entries(ic):
+            feature = _make_ice_feature(None, tile_loc, entry[0], [], None)
+            for bit, value in bit_offsets(tile_loc, feature.bit_tuples):
+                default_bits[bit] = value
+
+        ram_offset = dict(zip(ram_locs, ram_offsets))
+
+        names = []
+        entry_offsets = [0]
+        entry_tiles = []
+        always_set = []
+        bit_index = []
+        bit_value = []
+        for feature, always in _yield_ice_db_features(ic):
+            tile_loc = tuple(feature.loc)
+            if feature.tile_type == "RAMB" and feature.parts[-1].startswith(
+                    "INIT"):
+                base = ram_offset[tile_loc]
+                for neg, x, y in feature.bit_tuples:
+                    bit_index.append(base + x * RAM_DATA_COLS + y)
+                    bit_value.append(neg != "!")
+            else:
+                if feature.tile_type == "RAMB" and feature.parts[-1].endswith(
+                        "_MODE"):
+                    # RAM modes are set in the RAMT tile
+                    tile_loc = (tile_loc[0], tile_loc[1] + 1)
+
+                for bit, value in bit_offsets(tile_loc, feature.bit_tuples):
+                    bit_index.append(bit)
+                    bit_value.append(value)
+
+            names.append(feature.to_fasm_entry().feature)
+            entry_offsets.append(len(bit_index))
+            entry_tiles.append(tile_index[tile_loc])
+            always_set.append(always)
+
+        return cls(
+            names,
+            tile_locs=np.array(tile_locs, dtype=np.int32).reshape(-1, 2),
+            tile_shapes=np.array(tile_shapes, dtype=np.int32).reshape(-1, 2),
+            tile_offsets=np.array(tile_offsets, dtype=np.int64),
+            ram_locs=np.array(ram_locs, dtype=np.int32).reshape(-1, 2),
+            ram_offsets=np.array(ram_offsets, dtype=np.int64),
+            default_bits=default_bits,
+            entry_offsets=np.array(entry_offsets, dtype=np.int64),
+            entry_tiles=np.array(entry_tiles, dtype=np.int32),
+            always_set=np.array(always_set, dtype=bool),
+            bit_index=np.array(bit_index, dtype=np.int64),
+            bit_value=np.array(bit_value, dtype=bool),
+            ieren=np.array(
+                [tuple(xx) for xx in ic.ieren_db()], dtype=np.int32
+            ).reshape(-1, 6),
+        )
+
+    def save(self, fname, key):
+        """Write the index to fname, tagged with key"""
+
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        names = np.frombuffer(
+            "\n".join(self.names).encode("utf-8"), dtype=np.uint8
+        )
+
+        tmp_file = temp_file_for(fname)
+        try:
+            with open(tmp_file, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    version=np.array(FASM_INDEX_VERSION),
+                    key=np.array(key),
+                    names=names,
+                    **arrays
+                )
+            os.replace(tmp_file, fname)
+        except BaseException:
+            os.unlink(tmp_file)
+            raise
+
+    @classmethod
+    def load(cls, fname, key):
+        """Read an index from fname
+
+        Returns None if fname is missing, unreadable or was not saved with
+        key.
+        """
+
+        try:
+            with np.load(fname) as data:
+                if int(data["version"]) != FASM_INDEX_VERSION:
+                    return None
+                if str(data["key"]) != key:
+                    return None
+
+                names = data["names"].tobytes().decode("utf-8").split("\n")
+                arrays = {name: data[name] for name in cls.ARRAYS}
+        except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+
+        return cls(names, **arrays)
+
+    def read_tiles(self, ic):
+        """Return the device bits of an iceconfig and which tiles it has
+
+        RAM data is not read.
+        """
+
+        present = np.ones(len(self.tile_locs), dtype=bool)
+        chars = []
+        for tile, ((x, y), (rows, cols)) in enumerate(zip(
+                self.tile_locs.tolist(), self.tile_shapes.tolist())):
+            bits = ic.tile(x, y)
+            if bits is None:
+                present[tile] = False
+                chars.append("0" * rows * cols)
+            else:
+                chars.append("".join(bits))
+
+        chars.append("0" * len(self.ram_locs) * RAM_DATA_ROWS * RAM_DATA_COLS)
+
+        bits = np.frombuffer(
+            "".join(chars).encode("ascii"), dtype=np.uint8
+        ) == ord("1")
+        assert len(bits) == len(self.default_bits)
+
+        return bits, present
+
+    def write_tiles(self, ic, bits, ram_locs):
+        """Write device bits to the tiles of an iceconfig
+
+        Only the RAM data of the RAMB tiles in ram_locs is written.
+        """
+
+        chars = (bits.view(np.uint8) + ord("0")).tobytes().decode("ascii")
+        for (x, y), (rows, cols), offset in zip(self.tile_locs.tolist(),
+                                                self.tile_shapes.tolist(),
+                                                self.tile_offsets.tolist()):
+            tile = ic.tile(x, y)
+            tile[:] = [
+                chars[offset + ii * cols:offset + (ii + 1) * cols]
+                for ii in range(rows)
+            ]
+
+        for ram_loc in ram_locs:
+            offset = self.ram_offset[ram_loc]
+            ram_bits = bits[offset:offset + RAM_DATA_ROWS * RAM_DATA_COLS]
+            ic.ram_data[ram_loc] = _bits_to_hex_rows(
+                ram_bits.reshape(RAM_DATA_ROWS, RAM_DATA_COLS)
+            )
+
+    def set_entries(self, bits, entries):
+        """Set the bits of entries in device bits, later entries win"""
+
+        if not entries:
+            return
+
+        entries = np.array(entries, dtype=np.int64)
+        starts = self.entry_offsets[entries]
+        lengths = self.entry_offsets[entries + 1] - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths,
+                              lengths) + np.arange(lengths.sum())
+
+        bit_index = self.bit_index[positions][::-1]
+        bit_value = self.bit_value[positions][::-1]
+        bit_index, last = np.unique(bit_index, return_index=True)
+        bits[bit_index] = bit_value[last]
+
+    def match_entries(self, bits, present):
+        """Return the mask of entries set in device bits"""
+
+        mismatch = bits[self.bit_index] != self.bit_value
+        mismatches = np.bincount(
+            self.bit_entries[mismatch], minlength=len(self.names)
+        )
+        return (self.always_set |
+                (mismatches == 0)) & present[self.entry_tiles]
+
+
+def _get_fasm_index_key(device):
+    """Hash of the sources the FASM index of a device is built from"""
+
+    h = hashlib.sha256()
+    h.update("{} {}".format(FASM_INDEX_VERSION, device).encode("utf-8"))
+    for module in (icebox, iceboxdb, sys.modules[__name__]):
+        with open(module.__file__, "rb") as f:
+            h.update(f.read())
+
+    return h.hexdigest()
+
+
+def get_fasm_index(device, cache_dir=None):
+    """Return the FasmIndex of an ice40 device (eg 1k, 8k)
+
+    Indexes are kept for the life of the process, and in cache_dir when
+    given.
+    """
+
+    if device in _FASM_INDEXES:
+        return _FASM_INDEXES[device]
+
+    index = None
+    if cache_dir is not None:
+        key = _get_fasm_index_key(device)
+        fname = os.path.join(cache_dir, "{}.npz".format(device))
+        index = FasmIndex.load(fname, key)
+
+    if index is None:
+        index = FasmIndex.from_iceconfig(_empty_iceconfig(device))
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            index.save(fname, key)
+
+    _FASM_INDEXES[device] = index
+    return index
+
+
+def _empty_iceconfig(device):
+    """Create an iceconfig for an empty device (eg 1k, 8k)"""
+
+    ic = icebox.iceconfig()
+    init_method_name = "setup_empty_{}".format(device)
+    assert hasattr(
+        ic, init_method_name
+    ), "no icebox method to init empty device"
+    getattr(ic, init_method_name)()
+    return ic
+
+
 def _iceboxdb_to_fasmdb(ic, outf=StringIO()):
     """Read in an icebox config and output the exhaustive list of bits with fasm compatible names
 
@@ -301,171 +638,75 @@ def _iceboxdb_to_fasmdb(ic, outf=StringIO()):
 def generate_fasm_db(outf, device):
     """Generate FASM style DB for a ice40 device"""
 
-    ic = icebox.iceconfig()
-    init_method_name = "setup_empty_{}".format(device.lower()[2:])
-    assert hasattr(
-        ic, init_method_name
-    ), "no icebox method to init empty device"
-    getattr(ic, init_method_name)()
+    ic = _empty_iceconfig(device.lower()[2:])
 
     return _iceboxdb_to_fasmdb(ic, outf)
 
 
-def asc_to_fasm(filename, outf=StringIO()):
+def asc_to_fasm(filename, outf=StringIO(), index_cache_dir=None):
     """Generate a fasm output from an asc"""
 
     ic = icebox.iceconfig()
     ic.read_file(filename)
 
-    return iceconfig_to_fasm(ic, outf)
+    return iceconfig_to_fasm(ic, outf, index_cache_dir)
 
 
-def iceconfig_to_fasm(ic, outf=StringIO()):
+def iceconfig_to_fasm(ic, outf=StringIO(), index_cache_dir=None):
     """Read iceconfig and generate FASM features.
 
     Useful for generating FASM from ASC file.
     """
 
-    # TODO: undo Hack to invert some specific signals
-    device_1k = ic.device == "1k"
-
-    accum = FeatureAccumulator()
-
-    locs = [(x, y) for x in range(ic.max_x + 1) for y in range(ic.max_y + 1)]
-    for tile_loc in locs:
-        bits = ic.tile(*tile_loc)
-        if bits is None:
-            continue
-        tile_bits = _tile_to_array(bits)
-        tile_type = ic.tile_type(*tile_loc)
-
-        for entry in ic.tile_db(*tile_loc):
-            # LC_ entries are treated differently as it's not a match, but a pattern
-            if entry[1].startswith("LC_"):
-                bm, _ = _get_iceconfig_bits(tile_bits, entry[0])
-                bits = tile_bits[bm]
-                if np.any(bits):
-                    lut, ctrl = _lc_to_lut(bits)
-                    for ii, bit in enumerate(lut):
-                        if bit:
-                            names = entry[1:] + ["INIT"]
-                            accum.append_ice_entry(
-                                tile_type, tile_loc, [], names, ii
-                            )
-
-                    for name, bit in ctrl.items():
-                        if bit:
-                            names = entry[1:] + [name]
-                            accum.append_ice_entry(
-                                tile_type, tile_loc, [], names, None
-                            )
-
-            elif (
-                    tile_type == "IO" and device_1k and
-                (entry[-1].startswith("IE_") or entry[-1].startswith("REN_"))):
-                accum.append_ice_entry(
-                    tile_type,
-                    tile_loc,
-                    entry[0],
-                    entry[1:],
-                    None,
-                    negate=True
-                )
-            elif device_1k and tile_type == "RAMB" and entry[-1] == "PowerUp":
-                accum.append_ice_entry(
-                    tile_type,
-                    tile_loc,
-                    entry[0],
-                    entry[1:],
-                    None,
-                    negate=True
-                )
-            elif tile_type == "RAMT" and entry[-1].startswith("CBIT"):
-                matches = re.match(r"CBIT_([0-9]+)", entry[-1])
-                assert matches is not None, "Expected 'CBIT_n' received {}".format(
-                    entry[-1]
-                )
-
-                cbit_offset = matches.group(1)
-                cbit_translation = {
-                    "0": ("WRITE_MODE", 0),
-                    "1": ("WRITE_MODE", 1),
-                    "2": ("READ_MODE", 0),
-                    "3": ("READ_MODE", 1),
-                }
-                val = cbit_translation.get(cbit_offset)
-                if val is not None:
-                    ramb_tile_loc = (tile_loc[0], tile_loc[1] - 1)
-                    accum.append_ice_entry(
-                        "RAMB", ramb_tile_loc, entry[0], [val[0]], val[1]
-                    )
-                else:
-                    accum.append_ice_entry(
-                        tile_type, tile_loc, entry[0], entry[1:], None
-                    )
+    index = get_fasm_index(ic.device, index_cache_dir)
 
-            else:
-                if _check_iceconfig_entry(tile_bits, entry):
-                    accum.append_ice_entry(
-                        tile_type, tile_loc, entry[0], entry[1:], None
-                    )
+    bits, present = index.read_tiles(ic)
+    entries = np.flatnonzero(index.match_entries(bits, present))
+    features = set(index.names[entry] for entry in entries.tolist())
 
     # ram data
     for tile_loc, hexd in ic.ram_data.items():
-        tile_bits = _tile_to_array(hexd, is_hex=True)
-        tile_type = "RAMB"
+        tile_bits = _hex_rows_to_bits(hexd)
 
         for x, y in zip(*np.where(tile_bits)):
-            feature_name = "INIT{:X}".format(x)
-            bit = "B{}[{}]".format(x, y)
-            entry = [[bit], feature_name]
-            feature = Feature.from_icedb_entry(
-                IceDbEntry(tile_type, tile_loc, entry[0], entry[1:], y)
+            print(
+                "RAMB_X{}_Y{}.INIT{:X}[{}]".format(*tile_loc, x, y), file=outf
             )
-            print(feature.to_fasm_entry().feature, file=outf)
 
     # TODO: extra_bits
 
-    return accum.as_fasm(outf)
+    for feature in sorted(features):
+        print(feature, file=outf)
+    return outf
 
 
-def fasm_to_asc(in_fasm, outf, device):
+def fasm_to_asc(in_fasm, outf, device, index_cache_dir=None):
     """Convert an FASM input to an ASC file
 
     Set input enable defaults, RAM powerup, and enables all ColBufCtrl (until modeled in VPR see: #464)
     """
 
-    ic = icebox.iceconfig()
+    ic = _empty_iceconfig(device.lower()[2:])
+    index = get_fasm_index(ic.device, index_cache_dir)
 
-    init_method_name = "setup_empty_{}".format(device.lower()[2:])
-    assert hasattr(
-        ic, init_method_name
-    ), "no icebox method to init empty device"
-    getattr(ic, init_method_name)()
+    bits = index.default_bits.copy()
+    entries = []
+    ram_locs = set()
 
-    device_1k = ic.device == "1k"
+    def add_feature(feature):
+        entries.append(index.feature_entries[feature.to_fasm_entry().feature])
 
-    fasmdb = read_ice_db(ic)
-    # TODO: upstream init "default" bitstream
-    locs = [(x, y) for x in range(ic.max_x + 1) for y in range(ic.max_y + 1)]
-    for tile_loc in locs:
-        tile = ic.tile(*tile_loc)
-        if tile is None:
-            continue
-        db = ic.tile_db(*tile_loc)
-        tile_type = ic.tile_type(*tile_loc)
-        for entry in db:
-            if (device_1k and
-                ((tile_type == "IO" and entry[-1] in ["IE_0", "IE_1"]) or
-                 (tile_type == "RAMB" and entry[-1] == "PowerUp"))
-                    or (entry[-2] == "ColBufCtrl")):
-                tile_bits = _tile_to_array(tile)
-                tile_type = ic.tile_type(*tile_loc)
-                bm, bv = _get_iceconfig_bits(tile_bits, entry[0])
-                tile_bits[bm] = bv[bm]
-                _array_to_tile(tile_bits, tile)
+    def find_ieren(loc, iob):
+        tmap = index.ieren_map.get(tuple(loc) + (iob, ), [])
+        assert len(tmap) < 2, "expected 1 IEREN_DB entry found {}".format(
+            len(tmap)
+        )
+
+        if len(tmap) == 0:
+            print("no ieren found for {}".format((tuple(loc) + (iob, ))))
+            return
+        return tmap[0]
 
-    missing_features = []
     for line in fasm.parse_fasm_string(in_fasm.read()):
         if not line.set_feature:
             continue
@@ -477,86 +718,49 @@ def fasm_to_asc(in_fasm, outf, device):
             FasmEntry(line.set_feature.feature, [])
         )
 
-        def find_ieren(ic, loc, iob):
-            tmap = [
-                xx[3:]
-                for xx in ic.ieren_db()
-                if xx[:3] == (tuple(loc) + (iob, ))
-            ]
-            assert len(tmap) < 2, "expected 1 IEREN_DB entry found {}".format(
-                len(tmap)
-            )
-
-            if len(tmap) == 0:
-                print("no ieren found for {}".format((tile_loc + (iob, ))))
-                return
-            return tmap[0]
-
         # fix up for IO
         if feature.parts[-1] == "SimpleInput":
             iob = int(feature.parts[-2][-1])
-            new_ieren = find_ieren(ic, feature.loc, iob)
+            new_ieren = find_ieren(feature.loc, iob)
 
             feature.parts[-1] = "PINTYPE_0"
-            db_entry = fasmdb[feature.to_fasm_entry().feature]
-            _set_feature_bits(ic, db_entry.loc, db_entry.bit_tuples)
+            add_feature(feature)
 
             feature.loc = new_ieren[:2]
             feature.parts[-2] = "IoCtrl"
             feature.parts[-1] = "IE_{}".format(new_ieren[2])
-            db_entry = fasmdb[feature.to_fasm_entry().feature]
-            _set_feature_bits(ic, db_entry.loc, db_entry.bit_tuples)
+            add_feature(feature)
             feature.parts[-1] = "REN_{}".format(new_ieren[2])
-            db_entry = fasmdb[feature.to_fasm_entry().feature]
-            _set_feature_bits(ic, db_entry.loc, db_entry.bit_tuples)
+            add_feature(feature)
             continue
 
         if feature.parts[-1] == "SimpleOutput":
             iob = int(feature.parts[-2][-1])
-            new_ieren = find_ieren(ic, feature.loc, iob)
+            new_ieren = find_ieren(feature.loc, iob)
 
             feature.parts[-1] = "PINTYPE_3"
-            db_entry = fasmdb[feature.to_fasm_entry().feature]
-            _set_feature_bits(ic, db_entry.loc, db_entry.bit_tuples)
+            add_feature(feature)
             feature.parts[-1] = "PINTYPE_4"
-            db_entry = fasmdb[feature.to_fasm_entry().feature]
-            _set_feature_bits(ic, db_entry.loc, db_entry.bit_tuples)
+            add_feature(feature)
 
             feature.loc = new_ieren[:2]
             feature.parts[-2] = "IoCtrl"
             feature.parts[-1] = "REN_{}".format(new_ieren[2])
-            db_entry = fasmdb[feature.to_fasm_entry().feature]
-            _set_feature_bits(ic, db_entry.loc, db_entry.bit_tuples)
+            add_feature(feature)
             continue
 
         ## special case for RAM INIT values
-        tile_type, loc = feature.tile_type, feature.loc
-        if tile_type == "RAMB" and feature.parts[-1].startswith("INIT"):
-            tloc = tuple(loc)
-            if tloc not in ic.ram_data:
-                ic.ram_data[tloc] = [64 * "0" for _ in range(16)]
-            tile = ic.ram_data[tloc]
-            tile_bits = _tile_to_array(tile, is_hex=True)
-        elif tile_type == "RAMB" and feature.parts[-1].endswith("_MODE"):
-            # hack to force modes to the RAMT
-            tile = ic.tile(loc[0], loc[1] + 1)
-            tile_bits = _tile_to_array(tile)
-        else:
-            tile = ic.tile(*loc)
-            tile_bits = _tile_to_array(tile)
+        if feature.tile_type == "RAMB" and feature.parts[-1].startswith("INIT"
+                                                                        ):
+            ram_locs.add(tuple(feature.loc))
 
         # lookup feature and convert
         for canonical_feature in fasm.canonical_features(line.set_feature):
             key = fasm.set_feature_to_str(canonical_feature)
-            feature = fasmdb[key]
-            bm, bv = _get_feature_bits(tile_bits, feature.bit_tuples)
-
-            tile_bits[bm] = bv[bm]
+            entries.append(index.feature_entries[key])
 
-        if tile_type == "RAMB" and feature.parts[-1].startswith("INIT"):
-            _array_to_tile(tile_bits, tile, is_hex=True)
-        else:
-            _array_to_tile(tile_bits, tile)
+    index.set_entries(bits, entries)
+    index.write_tiles(ic, bits, ram_locs)
 
     # TODO: would be nice to upstream a way to write to non-files
     ic.write_file(outf.name)
@@ -564,7 +768,6 @@ def fasm_to_asc(in_fasm, outf, device):
 
 if __name__ == "__main__":
     import argparse
-    import sys
 
     parser = argparse.ArgumentParser(description="Dump FASM DB from icebox")
     parser.add_argument("device", help="Device type (eg lp1k, hx8k)")
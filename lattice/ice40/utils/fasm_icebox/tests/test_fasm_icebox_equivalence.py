@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Run: python3 -m unittest ice40.utils.fasm_icebox.tests.test_fasm_icebox_equivalence
+
+from io import StringIO
+import os
+import random
+import tempfile
+import unittest
+
+try:
+    import icebox
+    import fasm  # noqa: F401
+except ImportError:
+    icebox = None
+else:
+    from ..ice40_feature import Feature, FasmEntry
+    from .. import fasm_icebox_utils
+    from . import legacy_fasm_icebox_utils
+
+
+def simple_io_features(index):
+    """Return the SimpleInput and SimpleOutput features of a device
+
+    Only IOBs with an IE/REN location and all the features the pseudo
+    features are expanded to are returned.
+    """
+
+    features = []
+    for name in sorted(set(index.names)):
+        if not name.endswith(".PINTYPE_0"):
+            continue
+
+        feature = Feature.from_fasm_entry(FasmEntry(name, []))
+        if not feature.parts[-2][-1].isdigit():
+            continue
+
+        iob = int(feature.parts[-2][-1])
+        ieren = index.ieren_map.get(tuple(feature.loc) + (iob, ))
+        if ieren is None or len(ieren) != 1:
+            continue
+
+        prefix = name[:-len("PINTYPE_0")]
+        ioctrl = "{}_X{}_Y{}.IoCtrl.".format(feature.tile_type, *ieren[0][:2])
+        expanded = [
+            prefix + "PINTYPE_3",
+            prefix + "PINTYPE_4",
+            ioctrl + "IE_{}".format(ieren[0][2]),
+            ioctrl + "REN_{}".format(ieren[0][2]),
+        ]
+        if all(name in index.feature_entries for name in expanded):
+            features.append(prefix + "SimpleInput")
+            features.append(prefix + "SimpleOutput")
+
+    return features
+
+
+@unittest.skipIf(icebox is None, "icebox and fasm are not installed")
+class TestEquivalence(unittest.TestCase):
+    """Convert random designs with the legacy per-feature conversions and
+    the FasmIndex ones, and compare the outputs.
+    """
+
+    def check_device(self, device, seed=0, count=2000):
+        index = fasm_icebox_utils.get_fasm_index(device[2:])
+
+        rng = random.Random(seed)
+        features = rng.sample(sorted(set(index.names)), count)
+        io_features = simple_io_features(index)
+        features += rng.sample(io_features, min(8, len(io_features)))
+        rng.shuffle(features)
+        in_fasm = "\n".join(features) + "\n"
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ascs = []
+            for name, module in (("legacy", legacy_fasm_icebox_utils),
+                                 ("index", fasm_icebox_utils)):
+                fname = os.path.join(tmpdir, "{}.asc".format(name))
+                with open(fname, "w") as outf:
+                    module.fasm_to_asc(StringIO(in_fasm), outf, device)
+                with open(fname) as f:
+                    ascs.append(f.read())
+
+            self.assertEqual(ascs[0], ascs[1])
+
+            ic = icebox.iceconfig()
+            ic.read_file(fname)
+            legacy_fasm = legacy_fasm_icebox_utils.iceconfig_to_fasm(
+                ic, StringIO()
+            ).getvalue()
+            index_fasm = fasm_icebox_utils.asc_to_fasm(fname,
+                                                       StringIO()).getvalue()
+
+        self.assertEqual(legacy_fasm, index_fasm)
+
+    def test_384(self):
+        self.check_device("lp384")
+
+    def test_1k(self):
+        self.check_device("hx1k")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 # Run: python3 -m unittest ice40.utils.fasm_icebox.tests.test_fasm_icebox_utils
 
+import os
+import tempfile
 import unittest
+import numpy as np
 from ..ice40_feature import Feature, FasmEntry, IceDbEntry
 from .. import fasm_icebox_utils
 
@@ -25,6 +28,80 @@ class TestConversion(unittest.TestCase):
         nibbles = fasm_icebox_utils._bits_to_nibbles(bits)
         self.assertEqual(nibbles, test_vec)
 
+    def test_hex_rows_x_bits(self):
+        rows = ["0123456789abcdef", "fedcba9876543210"]
+        bits = fasm_icebox_utils._hex_rows_to_bits(rows)
+        self.assertEqual(
+            bits.tolist(),
+            [fasm_icebox_utils._nibbles_to_bits(row) for row in rows]
+        )
+        self.assertEqual(fasm_icebox_utils._bits_to_hex_rows(bits), rows)
+
+    def make_index(self):
+        # One 1x4 tile, entries A=!0_0 0_1, B=0_0, C=0_1 !0_2, A again
+        return fasm_icebox_utils.FasmIndex(
+            ["T.A", "T.B", "T.C", "T.A"],
+            tile_locs=np.array([[1, 1]]),
+            tile_shapes=np.array([[1, 4]]),
+            tile_offsets=np.array([0]),
+            ram_locs=np.zeros((0, 2), dtype=int),
+            ram_offsets=np.zeros(0, dtype=int),
+            default_bits=np.array([False, False, True, True]),
+            entry_offsets=np.array([0, 2, 3, 5, 6]),
+            entry_tiles=np.array([0, 0, 0, 0]),
+            always_set=np.array([False, False, False, True]),
+            bit_index=np.array([0, 1, 0, 1, 2, 3]),
+            bit_value=np.array([False, True, True, True, False, True]),
+            ieren=np.zeros((0, 6), dtype=int),
+        )
+
+    def test_index_entries(self):
+        index = self.make_index()
+        self.assertEqual(index.feature_entries["T.A"], 3)
+
+        # Later entries win
+        bits = index.default_bits.copy()
+        index.set_entries(bits, [0, 1])
+        self.assertEqual(bits.tolist(), [True, True, True, True])
+        index.set_entries(bits, [2])
+        self.assertEqual(bits.tolist(), [True, True, False, True])
+
+        present = np.array([True])
+        self.assertEqual(
+            index.match_entries(bits, present).tolist(),
+            [False, True, True, True]
+        )
+        self.assertEqual(
+            index.match_entries(bits, ~present).tolist(),
+            [False, False, False, False]
+        )
+
+    def test_index_save_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, "index.npz")
+            self.assertIsNone(fasm_icebox_utils.FasmIndex.load(fname, "key"))
+
+            self.make_index().save(fname, "key")
+            self.assertEqual(os.listdir(tmpdir), ["index.npz"])
+            self.assertIsNone(fasm_icebox_utils.FasmIndex.load(fname, "other"))
+
+            index = fasm_icebox_utils.FasmIndex.load(fname, "key")
+            self.assertEqual(index.names, ["T.A", "T.B", "T.C", "T.A"])
+            self.assertEqual(
+                index.bit_index.tolist(),
+                self.make_index().bit_index.tolist()
+            )
+
+            # Truncated and corrupt indexes are rebuilt.
+            with open(fname, "rb") as f:
+                data = f.read()
+            for corrupt in (data[:len(data) // 2], b"not an index"):
+                with open(fname, "wb") as f:
+                    f.write(corrupt)
+                self.assertIsNone(
+                    fasm_icebox_utils.FasmIndex.load(fname, "key")
+                )
+
     def test_ram(self):
 
         self.helper(
@@ -3,12 +3,13 @@ timing in the architecture file.
 """
 
 import argparse
-from sdf_timing.sdfparse import parse as sdf_parse
 from sdf_timing.utils import get_scale_seconds
 import lxml.etree as ET
 import logging
 from collections import namedtuple
 
+from lib.sdf_cache import SdfCache, load_sdf
+
 
 class PinMap(namedtuple('PinMap', 'sdf arch is_clk')):
     """Mapping of names between sdf file and arch_def. Contains names in each
@@ -135,6 +136,9 @@ def main():
         type=argparse.FileType('r'),
         help='sdf file to read timing from'
     )
+    parser.add_argument(
+        '--sdf_cache_dir', help='cache directory of parsed sdf files'
+    )
     parser.add_argument(
         '--read_arch_xml',
         type=argparse.FileType('r'),
@@ -151,7 +155,12 @@ def main():
     logging.basicConfig(level=logging.WARNING)
 
     args = parser.parse_args()
-    timing = sdf_parse(args.read_sdf.read())
+
+    sdf_cache = None
+    if args.sdf_cache_dir is not None:
+        sdf_cache = SdfCache(args.sdf_cache_dir)
+
+    timing = load_sdf(args.read_sdf.read(), sdf_cache, args.read_sdf.name)
 
     tree = ET.parse(args.read_arch_xml, ET.XMLParser(remove_blank_text=True))
 
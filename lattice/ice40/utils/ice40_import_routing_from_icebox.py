@@ -70,8 +70,11 @@ Then add globals, then neighbourhood
 """
 
 # Python libs
+import functools
+import hashlib
 import logging
 import operator
+import os
 import sys
 from collections import defaultdict
 
@@ -87,12 +90,17 @@ import lib.rr_graph.channel as channel
 import lib.rr_graph.graph as graph
 import lib.rr_graph.points as points
 from lib.rr_graph import Offset
+from lib.rr_graph_graph2_writer import write_graph2
 from lib.asserts import assert_type
+from lib.file_cache import read_pickle, write_pickle
 
 NP = points.NamedPosition
 
 ic = None
 
+# Bump when the content of the device cache changes to invalidate caches.
+DEVICE_CACHE_VERSION = 1
+
 
 class PositionIcebox(graph.Position):
     def __str__(self):
@@ -193,6 +201,54 @@ def tiles(ic):
             yield p
 
 
+def get_device_cache_key(device):
+    """Hash of the sources the device cache is built from."""
+    h = hashlib.sha256()
+    h.update("{} {}".format(DEVICE_CACHE_VERSION, device).encode('utf-8'))
+    for module in (icebox, icebox_asc2hlc):
+        with open(module.__file__, 'rb') as f:
+            h.update(f.read())
+
+    return h.hexdigest()
+
+
+def load_segments(ic, cache_dir=None):
+    """Return the icebox segment groups of the device.
+
+    Grouping the segments of a device is slow, so the groups are kept in
+    cache_dir when given.
+    """
+    if cache_dir is None:
+        return ic.group_segments(list(tiles(ic)))
+
+    key = get_device_cache_key(ic.device)
+    fname = os.path.join(cache_dir, 'segments_{}.pickle'.format(ic.device))
+    entry = read_pickle(fname)
+    if entry is not None:
+        cache_key, segments = entry
+        if cache_key == key:
+            return segments
+
+    segments = ic.group_segments(list(tiles(ic)))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    write_pickle(fname, (key, segments))
+
+    return segments
+
+
+@functools.lru_cache(maxsize=None)
+def translate_netname(x, y, name):
+    """icebox_asc2hlc.translate_netname for the current device.
+
+    The same local names are translated for every pin and edge, so the
+    results are kept until init sets up another device.
+    """
+    return icebox_asc2hlc.translate_netname(
+        x, y, ic.max_x - 1, ic.max_y - 1, name
+    )
+
+
 def filter_track_names(group):
     """Filter out unusable icebox track names."""
     assert_type(group, list)
@@ -223,15 +279,12 @@ def filter_track_names(group):
 def group_hlc_name(group):
     """Get the HLC "global name" from a group local names."""
     assert_type(group, list)
-    global ic
     hlcnames = defaultdict(int)
     hlcnames_details = []
     for ipos, localnames in group:
         for name in localnames:
             assert_type(ipos, PositionIcebox)
-            hlcname = icebox_asc2hlc.translate_netname(
-                *ipos, ic.max_x - 1, ic.max_y - 1, name
-            )
+            hlcname = translate_netname(ipos.x, ipos.y, name)
 
             if hlcname != name:
                 hlcnames_details.append((ipos, name, hlcname))
@@ -354,6 +407,7 @@ def init(device_name, read_rr_graph):
         '1k': ic.setup_empty_1k,
         '384': ic.setup_empty_384,
     }[device_name]()
+    translate_netname.cache_clear()
 
     print('Loading rr_graph')
     g = graph.Graph(read_rr_graph, clear_fabric=True)
@@ -366,8 +420,9 @@ def init(device_name, read_rr_graph):
     return ic, g
 
 
-def add_pin_aliases(g, ic):
-    """Create icebox local names from the architecture pin names."""
+@functools.lru_cache(maxsize=None)
+def get_pin_aliases():
+    """Return map of architecture pin names to icebox local names."""
     name_rr2local = {}
 
     # PLB - http://www.clifford.at/icestorm/logic_tile.html
@@ -443,37 +498,12 @@ def add_pin_aliases(g, ic):
             add_ram_pin('W', 'DATA', ind)
             add_ram_pin('', 'MASK', ind)
 
-    # RAM
-    for top_bottom in 'BT':
-        # rdata, wdata, and mask ranges are the same based on Top/Bottom
-        if top_bottom == 'T':
-            data_range = range(8, 16)
-            # top has Read clock and enbable and address
-            rw = 'R'
-        else:
-            data_range = range(0, 8)
-            # top has Read clock and enbable and address
-            rw = 'W'
-
-        def add_ram_pin(rw, sig, ind=None):
-            if ind is None:
-                name_rr2local['RAM.{}{}[{}]'.format(rw, sig, 0)
-                              ] = 'ram/{}{}'.format(rw, sig)
-            else:
-                name_rr2local['RAM.{}{}[{}]'.format(rw, sig, ind)
-                              ] = 'ram/{}{}_{}'.format(rw, sig, ind)
-
-        add_ram_pin(rw, 'CLK')
-        add_ram_pin(rw, 'CLKE')
-        add_ram_pin(rw, 'E')
+    return name_rr2local
 
-        for ind in range(11):
-            add_ram_pin(rw, 'ADDR', ind)
 
-        for ind in data_range:
-            add_ram_pin('R', 'DATA', ind)
-            add_ram_pin('W', 'DATA', ind)
-            add_ram_pin('', 'MASK', ind)
+def add_pin_aliases(g, ic):
+    """Create icebox local names from the architecture pin names."""
+    name_rr2local = get_pin_aliases()
 
     for block in g.block_grid:
         for pin in block.pins:
@@ -1199,7 +1229,14 @@ def get_pin_meta(block, pin):
     assert False, (block, pin)
 
 
-def main(part, read_rr_graph, write_rr_graph):
+def main(
+        part,
+        read_rr_graph,
+        write_rr_graph,
+        cache_dir=None,
+        use_graph2=False,
+        capnp_schema_dir=None
+):
     global ic
 
     print('Importing input g', part)
@@ -1252,7 +1289,7 @@ def main(part, read_rr_graph, write_rr_graph):
     print('=' * 80)
     add_pin_aliases(g, ic)
 
-    segments = ic.group_segments(list(tiles(ic)))
+    segments = load_segments(ic, cache_dir)
     add_tracks(g, ic, segments, segtype_filter="local")
     add_tracks(g, ic, segments, segtype_filter="neigh")
     add_tracks(g, ic, segments, segtype_filter="span4")
@@ -1267,9 +1304,18 @@ def main(part, read_rr_graph, write_rr_graph):
     print_nodes_edges(g)
     print()
     print('Saving')
-    open(write_rr_graph, 'w').write(
-        ET.tostring(g.to_xml(), pretty_print=True).decode('ascii')
-    )
+    if use_graph2:
+        write_graph2(
+            g,
+            read_rr_graph,
+            write_rr_graph,
+            new_switches=(short.name, driver.name),
+            capnp_schema_dir=capnp_schema_dir
+        )
+    else:
+        open(write_rr_graph, 'w').write(
+            ET.tostring(g.to_xml(), pretty_print=True).decode('ascii')
+        )
     print()
     print('Exiting')
     sys.exit(0)
@@ -1285,6 +1331,19 @@ if __name__ == '__main__':
     parser.add_argument('--device', help='')
     parser.add_argument('--read_rr_graph', help='')
     parser.add_argument('--write_rr_graph', default='out.xml', help='')
+    parser.add_argument(
+        '--cache_dir', help='Directory caching the icebox segment groups'
+    )
+    parser.add_argument(
+        '--graph2',
+        action='store_true',
+        help='Write the rr graph with the graph2 serializers'
+    )
+    parser.add_argument(
+        '--vpr_capnp_schema_dir',
+        help='Directory containing VPR schema files, writes a capnp rr graph'
+        ' when used with --graph2'
+    )
 
     args = parser.parse_args()
 
@@ -1295,4 +1354,11 @@ if __name__ == '__main__':
     logging.basicConfig(level=loglevel)
 
     mode = args.device.lower()[2:]
-    main(mode, args.read_rr_graph, args.write_rr_graph)
+    main(
+        mode,
+        args.read_rr_graph,
+        args.write_rr_graph,
+        cache_dir=args.cache_dir,
+        use_graph2=args.graph2,
+        capnp_schema_dir=args.vpr_capnp_schema_dir,
+    )
@@ -164,9 +164,11 @@ function(QUICKLOGIC_DEFINE_DEVICE_TYPE)
 
   add_custom_command(
       OUTPUT ${RAM_MODEL_XML} ${RAM_PBTYPE_XML} ${RAM_CELLS_SIM} ${RAM_CELLS_MAP}
-      COMMAND ${PYTHON3} ${RAM_GENERATOR}
+      COMMAND ${CMAKE_COMMAND} -E env PYTHONPATH=${f4pga-arch-defs_SOURCE_DIR}/utils
+        ${PYTHON3} ${RAM_GENERATOR}
           --device ${DEVICE}
           --sdf ${RAM_SDF_FILE}
+          --sdf-cache-dir ${CMAKE_BINARY_DIR}/sdf_cache
           --mode-defs ${RAM_MODE_DEFS}
           --xml-path ${CMAKE_CURRENT_BINARY_DIR}
           --vlog-path ${CMAKE_CURRENT_BINARY_DIR}
@@ -206,6 +208,7 @@ function(QUICKLOGIC_DEFINE_DEVICE_TYPE)
     ${PYTHON3} ${UPDATE_ARCH_TIMINGS} \
         --sdf_dir ${SDF_TIMING_DIR} \
         --bels_map ${BELS_MAP} \
+        --sdf_cache_dir ${CMAKE_BINARY_DIR}/sdf_cache \
         --out_arch /dev/stdout \
         --input_arch /dev/stdin \
     ")
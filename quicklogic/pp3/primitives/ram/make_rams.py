@@ -5,11 +5,12 @@ import re
 import json
 
 import lxml.etree as ET
-import sdf_timing.sdfparse
 from sdf_timing.utils import get_scale_seconds
 
 from termcolor import colored
 
+from lib.sdf_cache import SdfCache, load_sdf
+
 DEBUG = 0
 
 
@@ -1361,6 +1362,12 @@ def main():
     parser.add_argument(
         "--sdf", type=str, required=True, help="An SDF file with timing data"
     )
+    parser.add_argument(
+        "--sdf-cache-dir",
+        type=str,
+        default=None,
+        help="Cache directory of parsed SDF files"
+    )
     parser.add_argument(
         "--xml-path", type=str, default="./", help="Output path for XML files"
     )
@@ -1383,8 +1390,12 @@ def main():
         ram_tree = json.load(fp)
 
     # Load RAM timings
+    sdf_cache = None
+    if args.sdf_cache_dir is not None:
+        sdf_cache = SdfCache(args.sdf_cache_dir)
+
     with open(args.sdf, "r") as fp:
-        ram_timings = sdf_timing.sdfparse.parse(fp.read())
+        ram_timings = load_sdf(fp.read(), sdf_cache, args.sdf)
         timescale = get_scale_seconds(ram_timings["header"]["timescale"])
 
     # Make port definition for a single ram
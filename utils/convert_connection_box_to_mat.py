@@ -3,8 +3,7 @@
 
 import argparse
 import capnp
-from lib.connection_box_tools import load_connection_box, \
-    iterate_connection_box, connection_box_to_numpy
+from lib.connection_box_tools import load_connection_box_map
 import scipy.io as sio
 import lib.rr_graph_xml.graph2
 
@@ -20,11 +19,16 @@ def main():
     parser.add_argument('--lookahead_map', required=True)
     parser.add_argument('--rrgraph', required=True)
     parser.add_argument('--outmat', required=True)
+    parser.add_argument(
+        '--outnpz', help='Also write the decoded lookahead arrays to a .npz'
+    )
 
     args = parser.parse_args()
 
-    with open(args.lookahead_map, 'rb') as f:
-        cost_map = load_connection_box(args.schema_path, f)
+    cost_map = load_connection_box_map(args.schema_path, args.lookahead_map)
+
+    if args.outnpz:
+        cost_map.save_npz(args.outnpz)
 
     mat_data = {
         'segments': {},
@@ -59,13 +63,15 @@ def main():
                 element.attrib['id']
             )
 
-    for segment, connection_box, offset, m in iterate_connection_box(cost_map):
+    for segment, connection_box, _ in cost_map.connection_boxes():
 
         segment_str = segments[segment]
         box_str = connection_boxes[connection_box]
         print('Processing {} to {}'.format(segment_str, box_str))
 
-        x, y, delay, congestion, fill = connection_box_to_numpy(offset, m)
+        x, y, delay, congestion, fill = cost_map.connection_box(
+            segment, connection_box
+        )
 
         if segment_str not in mat_data:
             mat_data[segment_str] = {}
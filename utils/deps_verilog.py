@@ -12,16 +12,25 @@ from io import StringIO
 
 from lib.deps import add_dependency
 from lib.deps import write_deps
+from lib.deps_index import DependencyIndex
 
 parser = argparse.ArgumentParser()
-parser.add_argument(
-    "inputfile", type=argparse.FileType('r'), help="Input Verilog file"
-)
+parser.add_argument("inputfiles", nargs='+', help="Input Verilog files")
 parser.add_argument(
     "--file_per_line",
     action='store_true',
     help="Output dependencies file per line, rather than Make .d format."
 )
+parser.add_argument(
+    "--index",
+    help="Dependency index database, files unchanged since they were "
+    "indexed are not scanned again."
+)
+parser.add_argument(
+    "--transitive",
+    action='store_true',
+    help="Output the dependencies of included files too."
+)
 
 v_include = re.compile(r'`include[ ]*"([^"]*)"|\$readmem[bh]\("(.*)",(.*)\)')
 
@@ -52,23 +61,37 @@ def read_dependencies(inputfile):
         yield includefile[0] + includefile[1]
 
 
+def scan_dependencies(inputpath):
+    """Returns the absolute paths of the files included by a verilog file."""
+    inputdir = os.path.dirname(inputpath)
+    with open(inputpath, 'r') as f:
+        return [
+            os.path.abspath(os.path.join(inputdir, includefile))
+            for includefile in read_dependencies(f)
+        ]
+
+
 def main(argv):
     args = parser.parse_args(argv[1:])
-    inputpath = os.path.abspath(args.inputfile.name)
-    inputdir = os.path.dirname(inputpath)
 
-    if args.file_per_line:
-        for dep in read_dependencies(args.inputfile):
-            print(os.path.abspath(os.path.join(inputdir, dep)))
-    else:
-        data = StringIO()
-        for includefile in read_dependencies(args.inputfile):
-            add_dependency(
-                data, inputpath,
-                os.path.abspath(os.path.join(inputdir, includefile))
-            )
-
-        write_deps(args.inputfile.name, data)
+    with DependencyIndex(args.index, 'verilog', scan_dependencies) as index:
+        for inputfile in args.inputfiles:
+            inputpath = os.path.abspath(inputfile)
+
+            if args.transitive:
+                deps = index.transitive_dependencies(inputpath)
+            else:
+                deps = index.dependencies(inputpath)
+
+            if args.file_per_line:
+                for dep in deps:
+                    print(dep)
+            else:
+                data = StringIO()
+                for includefile in deps:
+                    add_dependency(data, inputpath, includefile)
+
+                write_deps(inputfile, data)
 
 
 if __name__ == "__main__":
@@ -8,6 +8,8 @@ import re
 import json
 import os
 
+from lib.build_stats import ScanIndex, find_dirs, scan_files, scan_json
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -25,25 +27,36 @@ def main():
         help=  # noqa: E251
         "Python regular expression used to filter the complete path to block_usage.json files."
     )
+    parser.add_argument(
+        '--index',
+        help="Index of scanned block_usage.json files, reused between runs."
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        help="Number of processes reading files, defaults to all CPUs."
+    )
 
     args = parser.parse_args()
 
     filt = re.compile(args.filter)
 
-    usage_logs = {}
-
-    for root, dirs, files in os.walk(args.root_dir):
-        if 'block_usage.json' not in files:
-            continue
-
+    block_usage_jsons = []
+    for root in find_dirs(args.root_dir, 'block_usage.json'):
         block_usage_json = os.path.join(root, 'block_usage.json')
 
-        if not filt.search(block_usage_json):
-            continue
+        if filt.search(block_usage_json):
+            block_usage_jsons.append(block_usage_json)
 
-        with open(block_usage_json):
-            block_usage = json.loads(block_usage_json)
+    index = ScanIndex(args.index)
+    block_usages = scan_files(
+        block_usage_jsons, scan_json, index=index, jobs=args.jobs
+    )
+    index.save()
+
+    usage_logs = {}
 
+    for block_usage_json, block_usage in zip(block_usage_jsons, block_usages):
         parent_dir, _ = os.path.split(block_usage_json)
         pparent_dir, device_tuple = os.path.split(parent_dir)
         _, target = os.path.split(pparent_dir)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Scanner of the statistics files of a build tree.
+
+Reports like print_qor.py and gather_usage.py read a handful of files from
+each of the thousands of variants of a build tree.  Files are scanned by a
+process pool, and the results are kept in a persistent index keyed by the
+file path, modification time and size, so repeated reports only scan files
+that changed since the previous report.
+"""
+
+import json
+import multiprocessing
+import os
+import re
+
+from lib.file_cache import read_pickle, write_pickle
+
+# Bump when the results of the scanners change to invalidate indexes.
+SCAN_INDEX_VERSION = 1
+
+MAX_RSS_RE = re.compile(r'max_rss ([0-9.]+) MiB')
+
+
+def scan_vpr_log(fname):
+    """ Scans a VPR log in a single pass.
+
+    Returns
+    -------
+    stats : dict
+        step_runtime : dict of str to float
+            Runtime in sec of each VPR step (e.g. "Packing"), from the last
+            "# <step> took" line of the step.
+        total_runtime : float
+            Runtime in sec of the entire VPR flow, 0 if missing.
+        max_rss : float
+            Largest max_rss reported by VPR in MiB, None if not reported.
+        cpd : float
+            Final critical path delay in nsec.
+        fmax : float
+            Fmax in MHz.
+        cpd_geomean : float or str
+            Final geomean intra-domain period in nsec, "N/A" when VPR
+            reports nan.
+        fmax_geomean : float or str
+            Fmax of cpd_geomean in MHz.
+
+    """
+    stats = {
+        'step_runtime': {},
+        'total_runtime': 0,
+        'max_rss': None,
+        'cpd': 0.0,
+        'fmax': 0.0,
+        'cpd_geomean': 0.0,
+        'fmax_geomean': 0.0,
+    }
+
+    with open(fname, 'r') as f:
+        for line in f:
+            if line.startswith('# '):
+                parts = line.split()
+                if len(parts) > 3 and parts[2] == 'took':
+                    stats['step_runtime'][parts[1]] = float(parts[3])
+            elif line.startswith('The entire flow of VPR took'):
+                stats['total_runtime'] = float(line.split()[6])
+            elif line.startswith('Final critical path delay'):
+                parts = line.split()
+                if len(parts) >= 9:
+                    # Final critical path delay (least slack): 16.8182 ns, Fmax: 59.4592 MHz
+                    stats['cpd'] = float(parts[6])
+                    stats['fmax'] = float(parts[9])
+                elif len(parts) == 8 and parts[7].strip() == 'ns':
+                    # Final critical path delay (least slack): 17.9735 ns
+                    stats['cpd'] = float(parts[6])
+                    stats['fmax'] = 1000. / stats['cpd']
+                continue
+            elif line.startswith(
+                    'Final geomean non-virtual intra-domain period'):
+                parts = line.split()
+                if parts[5] == 'nan':
+                    stats['cpd_geomean'] = 'N/A'
+                    stats['fmax_geomean'] = 'N/A'
+                else:
+                    stats['cpd_geomean'] = float(parts[5])
+                    stats['fmax_geomean'] = 1000. / stats['cpd_geomean']
+                continue
+            else:
+                continue
+
+            m = MAX_RSS_RE.search(line)
+            if m is not None:
+                max_rss = float(m.group(1))
+                if stats['max_rss'] is None or max_rss > stats['max_rss']:
+                    stats['max_rss'] = max_rss
+
+    return stats
+
+
+def scan_json(fname):
+    """ Returns the content of a JSON file. """
+    with open(fname, 'r') as f:
+        return json.load(f)
+
+
+class ScanIndex(object):
+    """ Persistent results of scanned files.
+
+    Results are stored by scanner name and file path, and are only returned
+    while the modification time and size of the file are unchanged.
+
+    Parameters
+    ----------
+    index_file : str
+        Location of the index, None to keep the index in memory only.
+
+    """
+
+    def __init__(self, index_file=None):
+        self.index_file = index_file
+        self.entries = {}
+        self.modified = False
+
+        if index_file is None:
+            return
+
+        entry = read_pickle(index_file)
+        if entry is None:
+            return
+
+        version, entries = entry
+        if version == SCAN_INDEX_VERSION:
+            self.entries = entries
+
+    def get(self, scanner, fname, stat):
+        """ Returns (True, result) of a file scanned with scanner, or
+        (False, None) when not in the index.
+        """
+        key = (scanner.__name__, fname)
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+
+        mtime_ns, size, result = entry
+        if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+            return False, None
+
+        return True, result
+
+    def put(self, scanner, fname, stat, result):
+        key = (scanner.__name__, fname)
+        self.entries[key] = (stat.st_mtime_ns, stat.st_size, result)
+        self.modified = True
+
+    def save(self):
+        """ Writes the index if it was modified. """
+        if self.index_file is None or not self.modified:
+            return
+
+        write_pickle(self.index_file, (SCAN_INDEX_VERSION, self.entries))
+        self.modified = False
+
+
+def scan_files(fnames, scanner, index=None, jobs=None):
+    """ Returns the result of scanner for each file of fnames, None for
+    missing files.
+
+    Files missing from the index are scanned by jobs processes, all CPUs when
+    jobs is None.  scanner must be a module level function so it can be sent
+    to the pool.
+
+    """
+    if index is None:
+        index = ScanIndex()
+
+    results = {}
+    missing = []
+    stats = {}
+    for fname in fnames:
+        if fname in results or fname in stats:
+            continue
+
+        try:
+            stat = os.stat(fname)
+        except FileNotFoundError:
+            results[fname] = None
+            continue
+
+        found, result = index.get(scanner, fname, stat)
+        if found:
+            results[fname] = result
+        else:
+            stats[fname] = stat
+            missing.append(fname)
+
+    if jobs == 1 or len(missing) < 2:
+        scanned = [scanner(fname) for fname in missing]
+    else:
+        with multiprocessing.Pool(jobs) as pool:
+            scanned = pool.map(scanner, missing, chunksize=16)
+
+    for fname, result in zip(missing, scanned):
+        results[fname] = result
+        index.put(scanner, fname, stats[fname], result)
+
+    return [results[fname] for fname in fnames]
+
+
+def find_dirs(root_dir, fname):
+    """ Returns the directories below root_dir containing fname, in os.walk
+    order.
+    """
+    return [root for root, _, files in os.walk(root_dir) if fname in files]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import os
+import unittest
+
+from .build_stats import (
+    ScanIndex, find_dirs, scan_files, scan_json, scan_vpr_log
+)
+from .tempdir_test_case import TempDirTestCase
+
+ROUTE_LOG = """\
+# Routing took 5.5 seconds (max_rss 48.0 MiB, delta_rss +8.0 MiB)
+Final critical path delay (least slack): 16.8182 ns, Fmax: 59.4592 MHz
+Final geomean non-virtual intra-domain period: 12.5 ns (80 MHz)
+The entire flow of VPR took 7.5 seconds (max_rss 52.5 MiB)
+"""
+
+
+class TestBuildStats(TempDirTestCase):
+    def write_file(self, name, content):
+        fname = self.path(name)
+        os.makedirs(os.path.dirname(fname), exist_ok=True)
+        with open(fname, 'w') as f:
+            f.write(content)
+
+        return fname
+
+    def test_scan_vpr_log(self):
+        stats = scan_vpr_log(self.write_file('route.log', ROUTE_LOG))
+
+        self.assertEqual(stats['step_runtime'], {'Routing': 5.5})
+        self.assertEqual(stats['total_runtime'], 7.5)
+        self.assertEqual(stats['max_rss'], 52.5)
+        self.assertEqual(stats['cpd'], 16.8182)
+        self.assertEqual(stats['fmax'], 59.4592)
+        self.assertEqual(stats['cpd_geomean'], 12.5)
+        self.assertEqual(stats['fmax_geomean'], 80.0)
+
+    def test_scan_vpr_log_without_fmax(self):
+        stats = scan_vpr_log(
+            self.write_file(
+                'route.log', """\
+Final critical path delay (least slack): 20 ns
+Final geomean non-virtual intra-domain period: nan ns (nan MHz)
+"""
+            )
+        )
+
+        self.assertEqual(stats['cpd'], 20.0)
+        self.assertEqual(stats['fmax'], 50.0)
+        self.assertEqual(stats['cpd_geomean'], 'N/A')
+        self.assertEqual(stats['fmax_geomean'], 'N/A')
+        self.assertIsNone(stats['max_rss'])
+
+    def test_index(self):
+        index_file = self.path('index.pickle')
+        a = self.write_file('a/block_usage.json', '[1]')
+        b = self.write_file('b/block_usage.json', '[2]')
+        missing = self.path('c/block_usage.json')
+
+        index = ScanIndex(index_file)
+        self.assertEqual(
+            scan_files([a, b, missing], scan_json, index=index, jobs=2),
+            [[1], [2], None]
+        )
+        index.save()
+
+        # Indexed results are reused, changed files are scanned again.
+        index = ScanIndex(index_file)
+        stat = os.stat(a)
+        self.assertEqual(index.get(scan_json, a, stat), (True, [1]))
+        self.assertEqual(index.get(scan_vpr_log, a, stat), (False, None))
+
+        self.write_file('b/block_usage.json', '[20]')
+        self.assertEqual(scan_files([b], scan_json, index=index), [[20]])
+
+    def test_find_dirs(self):
+        self.write_file('a/pack.log', '')
+        self.write_file('b/c/pack.log', '')
+        self.write_file('b/route.log', '')
+
+        self.assertEqual(
+            sorted(find_dirs(self.tmpdir, 'pack.log')), [
+                self.path('a'),
+                self.path('b', 'c'),
+            ]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Numpy decoding of capnp messages.
+
+pycapnp accesses messages one element at a time, which is slow for the large
+matrices of the VPR lookahead and placement delay model files.  This module
+memory maps an unpacked capnp message and decodes the pointers and struct
+fields of whole lists at once with numpy.
+
+Pointers and fields are addressed by position (pointer index and bit offset
+of a field), which can be taken from the pycapnp schema, see field_slot.
+Only struct and list pointers are supported, non-zero field defaults are not
+applied.
+
+See https://capnproto.org/encoding.html for the message encoding.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+NULL_POINTER = -1
+STRUCT_POINTER = 0
+LIST_POINTER = 1
+FAR_POINTER = 2
+
+# List pointer element size of lists of structs.
+COMPOSITE_LIST = 7
+
+_U32_MASK = np.uint64(0xffffffff)
+_OFFSET_MASK = np.uint64(0x1fffffff)
+
+
+class Structs(namedtuple('Structs', 'target data_words pointer_words')):
+    """ Arrays locating structs in a message.
+
+    target is the word index of the data section of each struct.  Null
+    structs have no data and pointer words, so all their fields read as
+    zero.
+    """
+
+
+class Lists(namedtuple('Lists',
+                       'target count element_size data_words pointer_words')):
+    """ Arrays locating lists in a message.
+
+    target is the word index of the first element of each list.  For lists of
+    structs, data_words and pointer_words are the size of each element.
+    """
+
+
+def _u64(value):
+    return np.uint64(value)
+
+
+def _pointer_offset(ptr):
+    """ Returns the signed word offset of struct and list pointers. """
+    return (ptr & _U32_MASK).astype(np.uint32).view(np.int32) >> 2
+
+
+def field_slot(struct_type, name):
+    """ Returns (type, offset) of the field name of a pycapnp struct type.
+
+    type is the schema type name (e.g. 'float32' or 'struct').  offset is in
+    multiples of the field size for data fields, and the pointer index for
+    pointer fields.
+    """
+    for field in struct_type.schema.node.struct.fields:
+        if field.name == name:
+            return field.slot.type.which(), field.slot.offset
+
+    raise KeyError(name)
+
+
+class CapnpMessage(object):
+    """ Read only, memory mapped capnp message.
+
+    Parameters
+    ----------
+    fname : str
+        File containing a single unpacked capnp message.
+
+    """
+
+    def __init__(self, fname):
+        data = np.memmap(fname, dtype=np.uint8, mode='r')
+        self.words = data[:len(data) // 8 * 8].view('<u8')
+
+        segment_count = int(data[:4].view('<u4')[0]) + 1
+        segment_sizes = data[4:4 + 4 * segment_count].view('<u4')
+        header_words = (4 + 4 * segment_count + 7) // 8
+
+        self.segment_starts = header_words + np.concatenate(
+            [[0], np.cumsum(segment_sizes, dtype=np.int64)[:-1]]
+        )
+
+    def resolve(self, positions):
+        """ Decodes the pointers at the word indexes positions.
+
+        Far pointers are followed to their landing pads.  Negative positions
+        are decoded as null pointers.
+
+        Returns
+        -------
+        kind : numpy.array of int
+            Pointer kind, NULL_POINTER, STRUCT_POINTER or LIST_POINTER.
+        target : numpy.array of int
+            Word index of the pointed content.
+        ptr : numpy.array of uint64
+            Pointer word describing the layout of the pointed content.
+
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        valid = positions >= 0
+        ptr = np.zeros(len(positions), dtype=np.uint64)
+        ptr[valid] = self.words[positions[valid]]
+
+        null = ptr == 0
+        kind = (ptr & _u64(3)).astype(np.int64)
+        target = positions + 1 + _pointer_offset(ptr)
+
+        far = kind == FAR_POINTER
+        if far.any():
+            far_ptr = ptr[far]
+            pad = self.segment_starts[(far_ptr >> _u64(32)).astype(
+                np.int64
+            )] + ((far_ptr >> _u64(3)) & _OFFSET_MASK).astype(np.int64)
+
+            # The landing pad of single far pointers is a regular pointer.
+            pad_ptr = self.words[pad]
+            pad_target = pad + 1 + _pointer_offset(pad_ptr)
+
+            # The landing pad of double far pointers is a far pointer to the
+            # content, followed by a tag describing the content.
+            double = ((far_ptr >> _u64(2)) & _u64(1)).astype(bool)
+            if double.any():
+                content_ptr = pad_ptr[double]
+                pad_target[double] = self.segment_starts[
+                    (content_ptr >> _u64(32)).astype(np.int64)
+                ] + ((content_ptr >> _u64(3)) & _OFFSET_MASK).astype(np.int64)
+                pad_ptr[double] = self.words[pad[double] + 1]
+
+            ptr[far] = pad_ptr
+            target[far] = pad_target
+            kind[far] = (pad_ptr & _u64(3)).astype(np.int64)
+
+        kind[null] = NULL_POINTER
+
+        return kind, target, ptr
+
+    def structs(self, positions):
+        """ Returns the Structs pointed by the pointers at positions. """
+        kind, target, ptr = self.resolve(positions)
+        assert np.all((kind == STRUCT_POINTER) | (kind == NULL_POINTER))
+
+        data_words = ((ptr >> _u64(32)) & _u64(0xffff)).astype(np.int64)
+        pointer_words = (ptr >> _u64(48)).astype(np.int64)
+
+        return Structs(
+            target=target,
+            data_words=data_words,
+            pointer_words=pointer_words,
+        )
+
+    def root(self):
+        """ Returns the Structs of the root struct of the message. """
+        return self.structs([self.segment_starts[0]])
+
+    def pointer_positions(self, structs, index):
+        """ Returns the positions of pointer index of structs, -1 for structs
+        without that pointer.
+        """
+        return np.where(
+            structs.pointer_words > index,
+            structs.target + structs.data_words + index, -1
+        )
+
+    def field(self, structs, offset, dtype):
+        """ Returns the data field of structs at offset.
+
+        offset is in multiples of the size of dtype, like the slot offsets of
+        the capnp schema.  Booleans are read with dtype bool.
+        """
+        dtype = np.dtype(dtype)
+        bits = 1 if dtype == np.bool_ else dtype.itemsize * 8
+        bit_offset = offset * bits
+        word = bit_offset // 64
+
+        valid = structs.data_words > word
+        raw = np.zeros(len(structs.target), dtype=np.uint64)
+        raw[valid] = self.words[structs.target[valid] + word]
+        raw >>= _u64(bit_offset % 64)
+
+        if dtype == np.bool_:
+            return (raw & _u64(1)).astype(bool)
+        elif bits < 64:
+            raw &= _u64((1 << bits) - 1)
+
+        return raw.astype('<u{}'.format(dtype.itemsize)).view(dtype)
+
+    def lists(self, positions):
+        """ Returns the Lists pointed by the pointers at positions. """
+        kind, target, ptr = self.resolve(positions)
+        assert np.all((kind == LIST_POINTER) | (kind == NULL_POINTER))
+
+        element_size = ((ptr >> _u64(32)) & _u64(7)).astype(np.int64)
+        count = (ptr >> _u64(35)).astype(np.int64)
+        count[kind == NULL_POINTER] = 0
+        data_words = np.zeros(len(target), dtype=np.int64)
+        pointer_words = np.zeros(len(target), dtype=np.int64)
+
+        # Lists of structs start with a tag word holding the element count
+        # and the size of the elements.
+        composite = (element_size == COMPOSITE_LIST) & (kind == LIST_POINTER)
+        if composite.any():
+            tag = self.words[target[composite]]
+            count[composite] = _pointer_offset(tag)
+            data_words[composite] = ((tag >> _u64(32)) & _u64(0xffff)).astype(
+                np.int64
+            )
+            pointer_words[composite] = (tag >> _u64(48)).astype(np.int64)
+            target[composite] += 1
+
+        return Lists(
+            target=target,
+            count=count,
+            element_size=element_size,
+            data_words=data_words,
+            pointer_words=pointer_words,
+        )
+
+    def list_values(self, lists, dtype):
+        """ Returns the concatenated elements of lists of 64-bit values.
+
+        The elements of a single list are returned as a view of the memory
+        mapped message, without copy.
+        """
+        assert np.all((lists.element_size == 5) | (lists.count == 0))
+
+        if len(lists.target) == 1:
+            start = lists.target[0]
+            return self.words[start:start + lists.count[0]].view(dtype)
+
+        return self.words[_list_indexes(lists.target, lists.count)].view(dtype)
+
+    def list_structs(self, lists):
+        """ Returns the Structs of the concatenated elements of lists of
+        structs.
+        """
+        assert np.all(
+            (lists.element_size == COMPOSITE_LIST)
+            | (lists.count == 0)
+        )
+
+        size = lists.data_words + lists.pointer_words
+        index = _list_indexes(np.zeros(len(size), dtype=np.int64), lists.count)
+        list_index = np.repeat(np.arange(len(size)), lists.count)
+
+        return Structs(
+            target=lists.target[list_index] + index * size[list_index],
+            data_words=lists.data_words[list_index],
+            pointer_words=lists.pointer_words[list_index],
+        )
+
+
+def _list_indexes(starts, counts):
+    """ Returns the concatenation of arange(start, start + count). """
+    offsets = np.cumsum(counts) - counts
+    return np.arange(
+        np.sum(counts), dtype=np.int64
+    ) + np.repeat(starts - offsets, counts)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import struct
+import unittest
+
+import numpy as np
+
+from .capnp_numpy import CapnpMessage
+from .tempdir_test_case import TempDirTestCase
+
+
+def struct_pointer(pos, target, data_words, pointer_words):
+    offset = (target - pos - 1) << 2
+    return (offset & 0xffffffff) | (data_words << 32) | (pointer_words << 48)
+
+
+def list_pointer(pos, target, element_size, count):
+    offset = (target - pos - 1) << 2
+    return (offset & 0xffffffff) | 1 | (element_size << 32) | (count << 35)
+
+
+def far_pointer(segment, pad, double=False):
+    return 2 | (int(double) << 2) | (pad << 3) | (segment << 32)
+
+
+def floats(low, high):
+    return struct.unpack('<Q', struct.pack('<ff', low, high))[0]
+
+
+class TestCapnpMessage(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+
+        segment0 = [
+            struct_pointer(0, 1, 1, 2),
+            42,
+            list_pointer(2, 4, 5, 2),
+            list_pointer(3, 6, 7, 4),
+            3,
+            (-5) & 0xffffffffffffffff,
+            # Tag of a list of 4 structs of 0 data and 1 pointer words.
+            (4 << 2) | (1 << 48),
+            struct_pointer(7, 11, 2, 0),
+            far_pointer(1, 0),
+            0,
+            far_pointer(1, 3, double=True),
+            floats(1.5, 2.5),
+            1,
+        ]
+        segment1 = [
+            struct_pointer(0, 1, 2, 0),
+            floats(4.0, 0.25),
+            0,
+            far_pointer(1, 5),
+            struct_pointer(0, 0, 2, 0),
+            floats(7.0, 8.0),
+            1,
+        ]
+
+        self.fname = self.path('message.bin')
+        with open(self.fname, 'wb') as f:
+            f.write(struct.pack('<IIII', 1, len(segment0), len(segment1), 0))
+            for word in segment0 + segment1:
+                f.write(struct.pack('<Q', word))
+
+    def test_message(self):
+        message = CapnpMessage(self.fname)
+        root = message.root()
+
+        self.assertEqual(message.field(root, 0, np.int64).tolist(), [42])
+        self.assertEqual(message.field(root, 1, np.int64).tolist(), [0])
+
+        values = message.list_values(
+            message.lists(message.pointer_positions(root, 0)), np.int64
+        )
+        self.assertEqual(values.tolist(), [3, -5])
+
+        # Pointers past the pointer section are null.
+        self.assertEqual(
+            message.lists(message.pointer_positions(root, 2)).count.tolist(),
+            [0]
+        )
+
+        entries = message.list_structs(
+            message.lists(message.pointer_positions(root, 1))
+        )
+        self.assertEqual(len(entries.target), 4)
+
+        costs = message.structs(message.pointer_positions(entries, 0))
+        self.assertEqual(
+            message.field(costs, 0, np.float32).tolist(), [1.5, 4.0, 0.0, 7.0]
+        )
+        self.assertEqual(
+            message.field(costs, 1, np.float32).tolist(),
+            [2.5, 0.25, 0.0, 8.0]
+        )
+        self.assertEqual(
+            message.field(costs, 64, np.bool_).tolist(),
+            [True, False, False, True]
+        )
+
+    def test_concatenated_lists(self):
+        message = CapnpMessage(self.fname)
+        root = message.root()
+
+        lists = message.lists(np.repeat(message.pointer_positions(root, 0), 2))
+        self.assertEqual(
+            message.list_values(lists, np.int64).tolist(), [3, -5, 3, -5]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,11 @@
 import capnp
 import os.path
+from collections import namedtuple
+
 import numpy as np
 
+from lib.capnp_numpy import CapnpMessage, field_slot
+
 # Remove magic import hook.
 capnp.remove_import_hook()
 
@@ -104,3 +108,191 @@ def connection_box_to_numpy(offset, m):
             assert y[y_idx][x_idx] == y_val
 
     return x, y, delay, congestion, fill
+
+
+class MatrixLayout(namedtuple('MatrixLayout', 'dims data value')):
+    """ Pointer indexes of the VPR Matrix struct (dims and data) and of its
+    Entry struct (value), see matrix.capnp.
+    """
+
+
+def load_matrix_layout(schema_path):
+    """ Returns the MatrixLayout of matrix.capnp in schema_path. """
+    matrix = capnp.load(os.path.join(schema_path, 'matrix.capnp'))
+
+    return MatrixLayout(
+        dims=field_slot(matrix.Matrix, 'dims')[1],
+        data=field_slot(matrix.Matrix, 'data')[1],
+        value=field_slot(matrix.Matrix.Entry, 'value')[1],
+    )
+
+
+def read_matrices(message, matrices, layout):
+    """ Reads VPR Matrix structs from a CapnpMessage.
+
+    Arguments
+    ---------
+    message : lib.capnp_numpy.CapnpMessage
+    matrices : lib.capnp_numpy.Structs
+        Matrix structs to read.
+    layout : MatrixLayout
+
+    Returns
+    -------
+    dims : numpy.array of int
+        Dimensions of each matrix, one row per matrix.
+    values : lib.capnp_numpy.Structs
+        Values of all matrices, concatenated in the order of matrices.  The
+        values of a matrix are in row major order.
+
+    """
+    dims_lists = message.lists(
+        message.pointer_positions(matrices, layout.dims)
+    )
+    assert len(set(dims_lists.count)) <= 1, 'Matrices of different rank'
+    dims = message.list_values(dims_lists, np.int64)
+
+    entries = message.list_structs(
+        message.lists(message.pointer_positions(matrices, layout.data))
+    )
+    values = message.structs(message.pointer_positions(entries, layout.value))
+
+    return dims.reshape(len(matrices.target), -1), values
+
+
+class ConnectionBoxMap(object):
+    """ Connection box lookahead decoded into numpy arrays.
+
+    The cost matrices of all (segment, connection box) pairs are concatenated
+    into the flat delay, congestion and fill arrays.
+
+    Attributes
+    ----------
+    offsets : numpy.array of int
+        dx/dy of the first element of each cost matrix, indexed by
+        [segment, connection_box].
+    sizes : numpy.array of int
+        x/y dimensions of each cost matrix, indexed by
+        [segment, connection_box].
+    starts : numpy.array of int
+        Index of the first element of each cost matrix in the flat arrays,
+        indexed by [segment, connection_box].
+    delay : numpy.array of float
+        Delays in seconds.
+    congestion : numpy.array of float
+    fill : numpy.array of bool
+
+    """
+
+    ARRAYS = ('offsets', 'sizes', 'starts', 'delay', 'congestion', 'fill')
+
+    def __init__(self, offsets, sizes, starts, delay, congestion, fill):
+        self.offsets = offsets
+        self.sizes = sizes
+        self.starts = starts
+        self.delay = delay
+        self.congestion = congestion
+        self.fill = fill
+
+    def connection_boxes(self):
+        """ Yields (segment, connection_box, offset) of each cost matrix. """
+        nsegment, nconnection_box = self.starts.shape
+        for segment_idx in range(nsegment):
+            for connection_box_idx in range(nconnection_box):
+                x_off, y_off = self.offsets[segment_idx, connection_box_idx]
+                yield segment_idx, connection_box_idx, (int(x_off), int(y_off))
+
+    def connection_box(self, segment, connection_box):
+        """ Returns the arrays of a cost matrix, like connection_box_to_numpy.
+
+        delay, congestion and fill are views of the flat arrays.
+
+        """
+        x_off, y_off = self.offsets[segment, connection_box]
+        x_dim, y_dim = self.sizes[segment, connection_box]
+        start = self.starts[segment, connection_box]
+        end = start + x_dim * y_dim
+
+        y, x = np.mgrid[slice(y_off, y_off + y_dim),
+                        slice(x_off, x_off + x_dim)]
+
+        # Values are stored with x as the first dimension, transpose to
+        # put y first, per numpy plotting convention.
+        delay = self.delay[start:end].reshape(x_dim, y_dim).T
+        congestion = self.congestion[start:end].reshape(x_dim, y_dim).T
+        fill = self.fill[start:end].reshape(x_dim, y_dim).T
+
+        return x, y, delay, congestion, fill
+
+    def save_npz(self, fname):
+        """ Writes the arrays to a .npz file. """
+        np.savez(fname, **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load_npz(cls, fname):
+        """ Reads a ConnectionBoxMap written by save_npz. """
+        with np.load(fname, allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in cls.ARRAYS})
+
+
+def load_connection_box_map(schema_path, fname):
+    """ Reads a connection box lookahead file into a ConnectionBoxMap.
+
+    The file is memory mapped and decoded with numpy, instead of visiting
+    each cost entry through pycapnp.
+
+    """
+    connection_map = capnp.load(
+        os.path.join(schema_path, 'connection_map.capnp')
+    )
+    matrix_layout = load_matrix_layout(schema_path)
+
+    message = CapnpMessage(fname)
+    root = message.root()
+
+    cost_map = message.structs(
+        message.pointer_positions(
+            root,
+            field_slot(connection_map.VprCostMap, 'costMap')[1]
+        )
+    )
+    offset = message.structs(
+        message.pointer_positions(
+            root,
+            field_slot(connection_map.VprCostMap, 'offset')[1]
+        )
+    )
+
+    map_dims, cost_matrices = read_matrices(message, cost_map, matrix_layout)
+    offset_dims, offset_values = read_matrices(message, offset, matrix_layout)
+    assert np.array_equal(map_dims, offset_dims)
+    shape = tuple(map_dims[0])
+
+    offsets = np.stack(
+        [
+            message.field(
+                offset_values,
+                field_slot(connection_map.VprVector2D, name)[1], np.int64
+            ) for name in ('x', 'y')
+        ],
+        axis=1
+    )
+
+    sizes, values = read_matrices(message, cost_matrices, matrix_layout)
+    counts = sizes[:, 0] * sizes[:, 1]
+    starts = np.cumsum(counts) - counts
+
+    def cost_field(name, dtype):
+        return message.field(
+            values,
+            field_slot(connection_map.VprCostEntry, name)[1], dtype
+        )
+
+    return ConnectionBoxMap(
+        offsets=offsets.reshape(shape + (2, )),
+        sizes=sizes.reshape(shape + (2, )),
+        starts=starts.reshape(shape),
+        delay=cost_field('delay', np.float32),
+        congestion=cost_field('congestion', np.float32),
+        fill=cost_field('fill', np.bool_),
+    )
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Persistent index of file include dependencies.
+
+Scanning a file for includes requires reading and parsing it.  The index
+stores the direct dependencies of each scanned file in an sqlite database
+keyed by the file path, modification time and size, so files are only
+rescanned when they change.  Transitive dependencies are resolved from the
+index.
+"""
+
+import json
+import os
+import sqlite3
+
+
+class DependencyIndex(object):
+    """ Index of the direct dependencies of files.
+
+    Parameters
+    ----------
+    filename : str or None
+        Location of the index database.  If None, the index only lives in
+        memory for the duration of the process.
+    scanner_name : str
+        Name of the scanner, allows multiple scanners to share one index.
+    scanner : callable
+        Called with an absolute file path, returns the absolute paths of the
+        files it directly depends on.
+
+    """
+
+    def __init__(self, filename, scanner_name, scanner):
+        if filename is None:
+            filename = ":memory:"
+
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute(
+            """
+CREATE TABLE IF NOT EXISTS deps(
+    path TEXT,
+    scanner TEXT,
+    mtime_ns INTEGER,
+    size INTEGER,
+    deps TEXT,
+    PRIMARY KEY (path, scanner)
+);"""
+        )
+        self.scanner_name = scanner_name
+        self.scanner = scanner
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def dependencies(self, path):
+        """ Returns the direct dependencies of path, scanning it if needed. """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+
+        cur = self.conn.execute(
+            """
+SELECT mtime_ns, size, deps FROM deps WHERE path = ? AND scanner = ?;""",
+            (path, self.scanner_name)
+        )
+        row = cur.fetchone()
+        if row is not None:
+            mtime_ns, size, deps = row
+            if mtime_ns == st.st_mtime_ns and size == st.st_size:
+                return json.loads(deps)
+
+        deps = list(self.scanner(path))
+        self.conn.execute(
+            """
+INSERT OR REPLACE INTO deps(path, scanner, mtime_ns, size, deps)
+VALUES (?, ?, ?, ?, ?);""", (
+                path, self.scanner_name, st.st_mtime_ns, st.st_size,
+                json.dumps(deps)
+            )
+        )
+
+        return deps
+
+    def transitive_dependencies(self, path):
+        """ Returns all dependencies of path, in discovery order.
+
+        Dependencies that do not exist (e.g. generated files) are reported
+        but not expanded.
+        """
+        path = os.path.abspath(path)
+
+        seen = set([path])
+        result = []
+        to_visit = [path]
+        while to_visit:
+            current = to_visit.pop()
+            for dep in self.dependencies(current):
+                if dep in seen:
+                    continue
+
+                seen.add(dep)
+                result.append(dep)
+                if os.path.isfile(dep):
+                    to_visit.append(dep)
+
+        return result
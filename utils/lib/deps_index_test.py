@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import os
+
+from .deps_index import DependencyIndex
+from .tempdir_test_case import TempDirTestCase
+
+
+class TestDependencyIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.scanned = []
+
+    def write(self, name, deps):
+        with open(self.path(name), 'w') as f:
+            for dep in deps:
+                f.write(dep + '\n')
+
+    def scanner(self, path):
+        self.scanned.append(os.path.basename(path))
+        with open(path) as f:
+            return [self.path(line.strip()) for line in f if line.strip()]
+
+    def test_rescan_only_changed(self):
+        self.write('a', ['b'])
+        self.write('b', [])
+        index_file = self.path('index.db')
+
+        with DependencyIndex(index_file, 'test', self.scanner) as index:
+            self.assertEqual(
+                index.dependencies(self.path('a')), [self.path('b')]
+            )
+        self.assertEqual(self.scanned, ['a'])
+
+        with DependencyIndex(index_file, 'test', self.scanner) as index:
+            self.assertEqual(
+                index.dependencies(self.path('a')), [self.path('b')]
+            )
+        self.assertEqual(self.scanned, ['a'])
+
+        self.write('a', ['b', 'c'])
+        with DependencyIndex(index_file, 'test', self.scanner) as index:
+            self.assertEqual(
+                index.dependencies(self.path('a')),
+                [self.path('b'), self.path('c')]
+            )
+        self.assertEqual(self.scanned, ['a', 'a'])
+
+    def test_transitive(self):
+        self.write('a', ['b', 'c'])
+        self.write('b', ['c', 'missing'])
+        self.write('c', ['a'])
+
+        with DependencyIndex(None, 'test', self.scanner) as index:
+            deps = index.transitive_dependencies(self.path('a'))
+
+        self.assertEqual(
+            sorted(deps),
+            [self.path('b'),
+             self.path('c'),
+             self.path('missing')]
+        )
+        self.assertEqual(sorted(self.scanned), ['a', 'b', 'c'])
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Helpers of on-disk caches shared by concurrent build steps.
+
+Cache files are written to a unique temporary file in the cache directory and
+renamed into place, so concurrent writers never see or clobber a partial
+file.  Cache directories are bounded by evicting the least recently used
+files.
+"""
+
+import os
+import pickle
+import tempfile
+
+
+def temp_file_for(fname):
+    """ Returns a new, empty, uniquely named file next to fname.
+
+    The file can be written and then moved over fname with os.replace.
+    """
+    fd, tmp_file = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(fname)),
+        prefix='{}.'.format(os.path.basename(fname)),
+        suffix='.tmp'
+    )
+    os.close(fd)
+
+    return tmp_file
+
+
+def write_pickle(fname, obj):
+    """ Atomically replaces fname with obj pickled. """
+    tmp_file = temp_file_for(fname)
+    try:
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, fname)
+    except BaseException:
+        os.unlink(tmp_file)
+        raise
+
+
+def read_pickle(fname):
+    """ Returns the object pickled in fname, None if missing or unreadable.
+
+    Pickles of classes or modules that were since renamed are unreadable as
+    well.  Files read are marked as used for evict_lru.
+    """
+    try:
+        with open(fname, 'rb') as f:
+            obj = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+            ImportError, IndexError, TypeError, ValueError):
+        return None
+
+    try:
+        os.utime(fname)
+    except OSError:
+        pass
+
+    return obj
+
+
+def evict_lru(cache_dir, max_size, suffix):
+    """ Removes the least recently used files of cache_dir ending with suffix
+    until they fit in max_size bytes.
+    """
+    entries = []
+    for f in os.listdir(cache_dir):
+        if not f.endswith(suffix):
+            continue
+
+        fname = os.path.join(cache_dir, f)
+        try:
+            stat = os.stat(fname)
+        except FileNotFoundError:
+            # Evicted by another process.
+            continue
+
+        entries.append((stat.st_mtime, stat.st_size, fname))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, fname in sorted(entries):
+        if total_size <= max_size:
+            break
+
+        try:
+            os.unlink(fname)
+        except FileNotFoundError:
+            pass
+
+        total_size -= size
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import os
+import unittest
+
+from .file_cache import evict_lru, read_pickle, temp_file_for, write_pickle
+from .tempdir_test_case import TempDirTestCase
+
+
+class TestFileCache(TempDirTestCase):
+    def test_temp_files_are_unique(self):
+        fname = self.path('a.pickle')
+        tmp_a = temp_file_for(fname)
+        tmp_b = temp_file_for(fname)
+
+        self.assertNotEqual(tmp_a, tmp_b)
+        self.assertEqual(os.path.dirname(tmp_a), self.tmpdir)
+        self.assertTrue(os.path.exists(tmp_a))
+        self.assertFalse(os.path.exists(fname))
+
+    def test_round_trip(self):
+        fname = self.path('a.pickle')
+        self.assertIsNone(read_pickle(fname))
+
+        write_pickle(fname, (1, {'a': [1, 2]}))
+        write_pickle(fname, (2, {'b': [3]}))
+
+        self.assertEqual(read_pickle(fname), (2, {'b': [3]}))
+        self.assertEqual(os.listdir(self.tmpdir), ['a.pickle'])
+
+    def test_corrupt_file(self):
+        fname = self.path('a.pickle')
+        with open(fname, 'wb') as f:
+            f.write(b'not a pickle')
+
+        self.assertIsNone(read_pickle(fname))
+
+    def test_stale_pickle(self):
+        # Pickles of os.no_such_attribute and of a missing module.
+        for data in [b'cos\nno_such_attribute\n.', b'cno_such_module\nA\n.']:
+            fname = self.path('a.pickle')
+            with open(fname, 'wb') as f:
+                f.write(data)
+
+            self.assertIsNone(read_pickle(fname))
+
+    def test_evict_least_recently_used(self):
+        for idx, name in enumerate(['a', 'b', 'c']):
+            fname = self.path('{}.pickle'.format(name))
+            with open(fname, 'wb') as f:
+                f.write(b'x' * 100)
+            os.utime(fname, (idx, idx))
+
+        with open(self.path('other.txt'), 'wb') as f:
+            f.write(b'x' * 1000)
+
+        evict_lru(self.tmpdir, 200, '.pickle')
+
+        self.assertEqual(
+            sorted(os.listdir(self.tmpdir)),
+            ['b.pickle', 'c.pickle', 'other.txt']
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,12 @@
 """ Library for parsing route output from VPR route files. """
+import array
+import os
 from collections import namedtuple
 
+import numpy as np
+
+from lib.file_cache import temp_file_for
+
 Node = namedtuple('Node', 'inode x_low y_low x_high y_high ptc')
 
 
@@ -14,7 +20,8 @@ def format_name(s):
 def format_coordinates(coord):
     """ Parses coordinates from VPR route file in format of (x,y). """
     coord = format_name(coord)
-    x, y = coord.split(',')
+    # Newer VPR versions append the layer, (x,y,layer).
+    x, y = coord.split(',')[:2]
     return int(x), int(y)
 
 
@@ -53,3 +60,285 @@ def find_net_sources(f):
 
                 yield net, Node(inode, x, y, x2, y2, ptc)
                 net = None
+
+
+# Node types of the node_type column, as written in VPR route files.
+NODE_TYPES = ('SOURCE', 'SINK', 'IPIN', 'OPIN', 'CHANX', 'CHANY')
+NODE_TYPE_INDEX = {node_type: idx for idx, node_type in enumerate(NODE_TYPES)}
+
+# Columns of a Route, with the array typecode they are parsed into.
+#
+# net is the index of the net in Route.net_ids / Route.net_names, pin is the
+# index of the pin name in Route.pin_names (-1 for nodes without pin name).
+COLUMNS = (
+    ('net', 'i'),
+    ('inode', 'q'),
+    ('node_type', 'b'),
+    ('x_low', 'i'),
+    ('y_low', 'i'),
+    ('x_high', 'i'),
+    ('y_high', 'i'),
+    ('ptc', 'i'),
+    ('switch', 'i'),
+    ('pin', 'i'),
+)
+
+# Bump when the parsed columns change to invalidate cached routes.
+ROUTE_CACHE_VERSION = 1
+
+
+class Route(object):
+    """ Columnar representation of a VPR route file.
+
+    Every routed node of every net is a row, stored in one numpy array per
+    entry of COLUMNS.  Rows are in route file order, so the nodes of net index
+    i are rows net_offsets[i]:net_offsets[i+1].
+
+    Attributes
+    ----------
+    net_ids : numpy.array of int
+        VPR net ids, in route file order.
+    net_names : list of str
+        Net names, in route file order.
+    net_offsets : numpy.array of int
+        First row of each net, followed by the total number of rows.
+    pin_names : list of str
+        Pin names referred to by the pin column.
+
+    """
+
+    def __init__(self, net_ids, net_names, net_offsets, pin_names, columns):
+        self.net_ids = net_ids
+        self.net_names = net_names
+        self.net_offsets = net_offsets
+        self.pin_names = pin_names
+
+        for name, _ in COLUMNS:
+            setattr(self, name, columns[name])
+
+        self._net_index = None
+        self._inode_order = None
+        self._sorted_inodes = None
+
+    def __len__(self):
+        return len(self.inode)
+
+    def net_index(self, net):
+        """ Returns the index of a net given by VPR net id or name. """
+        if self._net_index is None:
+            self._net_index = {}
+            for idx, (net_id, name) in enumerate(zip(self.net_ids,
+                                                     self.net_names)):
+                self._net_index[int(net_id)] = idx
+                self._net_index[name] = idx
+
+        return self._net_index[net]
+
+    def net_rows(self, net):
+        """ Returns the slice of rows of a net given by VPR net id or name. """
+        idx = self.net_index(net)
+        return slice(self.net_offsets[idx], self.net_offsets[idx + 1])
+
+    def net_inodes(self, net):
+        """ Returns the rr node ids used by a net, in route file order. """
+        return self.inode[self.net_rows(net)]
+
+    def nets_through_inode(self, inode):
+        """ Returns the sorted VPR net ids of the nets using rr node inode. """
+        if self._inode_order is None:
+            self._inode_order = np.argsort(self.inode, kind='stable')
+            self._sorted_inodes = self.inode[self._inode_order]
+
+        lo, hi = np.searchsorted(self._sorted_inodes, [inode, inode + 1])
+        nets = np.unique(self.net[self._inode_order[lo:hi]])
+        return self.net_ids[nets]
+
+    def node_utilization(self):
+        """ Returns the number of nets using each used rr node.
+
+        Returns
+        -------
+        inodes : numpy.array of int
+            Sorted rr node ids used by at least one net.
+        counts : numpy.array of int
+            Number of distinct nets using each node of inodes.
+
+        """
+        pairs = np.unique(np.stack([self.inode, self.net], axis=1), axis=0)
+        return np.unique(pairs[:, 0], return_counts=True)
+
+    def utilization_histogram(self):
+        """ Returns an array whose entry n is the number of rr nodes used by
+        exactly n nets.
+        """
+        _, counts = self.node_utilization()
+        return np.bincount(counts)
+
+    def net_sources(self):
+        """ Yields tuple of (net string, Node namedtuple) of the first SOURCE
+        node of each net, like find_net_sources.
+        """
+        source = NODE_TYPE_INDEX['SOURCE']
+        for idx, name in enumerate(self.net_names):
+            start, end = self.net_offsets[idx], self.net_offsets[idx + 1]
+            rows = np.flatnonzero(self.node_type[start:end] == source)
+            if len(rows) == 0:
+                continue
+
+            row = start + rows[0]
+            yield name, Node(
+                int(self.inode[row]),
+                int(self.x_low[row]),
+                int(self.y_low[row]),
+                int(self.x_high[row]),
+                int(self.y_high[row]),
+                int(self.ptc[row]),
+            )
+
+
+def parse_route(f):
+    """ Parses a VPR route file object into a Route.
+
+    Lines are streamed into typed arrays, so the file is never held in
+    memory as python objects.
+
+    """
+    net_ids = array.array('q')
+    net_names = []
+    net_offsets = array.array('q')
+    pin_names = []
+    pin_index = {}
+    columns = {name: array.array(code) for name, code in COLUMNS}
+
+    append = {name: columns[name].append for name, _ in COLUMNS}
+
+    for e in f:
+        tokens = e.split()
+        if not tokens:
+            continue
+        elif tokens[0] == 'Net':
+            net_ids.append(int(tokens[1]))
+            # Global nets are written as "Net 5 (clk): global net ...".
+            net_names.append(format_name(tokens[2].rstrip(':')))
+            net_offsets.append(len(columns['inode']))
+        elif tokens[0] == 'Node:':
+            x, y = format_coordinates(tokens[3])
+            if tokens[4] == 'to':
+                x2, y2 = format_coordinates(tokens[5])
+                offset = 2
+            else:
+                x2, y2 = x, y
+                offset = 0
+
+            # Tokens after the ptc are an optional pin name and the switch.
+            assert tokens[-2] == 'Switch:', e
+            pin = -1
+            if len(tokens) > 8 + offset:
+                pin_name = ' '.join(tokens[6 + offset:-2])
+                pin = pin_index.get(pin_name)
+                if pin is None:
+                    pin = len(pin_names)
+                    pin_index[pin_name] = pin
+                    pin_names.append(pin_name)
+
+            append['net'](len(net_names) - 1)
+            append['inode'](int(tokens[1]))
+            append['node_type'](NODE_TYPE_INDEX[tokens[2]])
+            append['x_low'](x)
+            append['y_low'](y)
+            append['x_high'](x2)
+            append['y_high'](y2)
+            append['ptc'](int(tokens[5 + offset]))
+            append['switch'](int(tokens[-1]))
+            append['pin'](pin)
+
+    net_offsets.append(len(columns['inode']))
+
+    return Route(
+        net_ids=np.frombuffer(net_ids, dtype=np.int64),
+        net_names=net_names,
+        net_offsets=np.frombuffer(net_offsets, dtype=np.int64),
+        pin_names=pin_names,
+        columns={
+            name: np.frombuffer(columns[name], dtype=code)
+            for name, code in COLUMNS
+        },
+    )
+
+
+def route_cache_file(route_file):
+    """ Returns the name of the cache of a route file. """
+    return route_file + '.npz'
+
+
+def route_file_stamp(route_file):
+    """ Returns the values identifying the route file content of a cache. """
+    stat = os.stat(route_file)
+    return np.array(
+        [ROUTE_CACHE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64
+    )
+
+
+def read_route_cache(route_file):
+    """ Returns the cached Route of a route file, None if not up to date. """
+    try:
+        with np.load(route_cache_file(route_file), allow_pickle=False) as data:
+            if not np.array_equal(data['stamp'], route_file_stamp(route_file)):
+                return None
+
+            return Route(
+                net_ids=data['net_ids'],
+                net_names=data['net_names'].tolist(),
+                net_offsets=data['net_offsets'],
+                pin_names=data['pin_names'].tolist(),
+                columns={name: data[name]
+                         for name, _ in COLUMNS},
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def write_route_cache(route_file, route):
+    """ Writes the cache of a route file, ignoring unwritable locations. """
+    fname = route_cache_file(route_file)
+    try:
+        tmp_file = temp_file_for(fname)
+    except OSError:
+        return
+
+    try:
+        with open(tmp_file, 'wb') as f:
+            np.savez(
+                f,
+                stamp=route_file_stamp(route_file),
+                net_ids=route.net_ids,
+                net_names=np.array(route.net_names, dtype=str),
+                net_offsets=route.net_offsets,
+                pin_names=np.array(route.pin_names, dtype=str),
+                **{name: getattr(route, name)
+                   for name, _ in COLUMNS}
+            )
+        os.replace(tmp_file, fname)
+    except OSError:
+        os.unlink(tmp_file)
+
+
+def load_route(route_file, use_cache=True):
+    """ Returns the Route of a route file.
+
+    The parsed columns are cached next to the route file, and reused while
+    the route file size and modification time are unchanged.
+
+    """
+    if use_cache:
+        route = read_route_cache(route_file)
+        if route is not None:
+            return route
+
+    with open(route_file) as f:
+        route = parse_route(f)
+
+    if use_cache:
+        write_route_cache(route_file, route)
+
+    return route
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import unittest
+
+import numpy as np
+
+from .parse_route import (
+    NODE_TYPE_INDEX, Node, find_net_sources, load_route, parse_route,
+    route_cache_file
+)
+from .tempdir_test_case import TempDirTestCase
+
+ROUTE_FILE = """\
+Placement_File: top.place Placement_ID: 0123
+Array size: 4 x 4 logic blocks.
+
+Routing:
+
+Net 0 (a)
+
+Node:\t1\tSOURCE (1,1)  Class: 0  Switch: 0
+Node:\t3\t  OPIN (1,1)  Pin: 2   clb.O[0] Switch: 1
+Node:\t10\t CHANX (1,1) to (3,1)  Track: 4  Switch: 2
+Node:\t20\t  IPIN (3,1)  Pin: 5   clb.I[1] Switch: 3
+Node:\t21\t  SINK (3,1)  Class: 1  Switch: -1
+
+
+Net 1 (clk): global net connecting:
+
+Block clk (#2) at (0, 1), Pin class 0.
+
+
+Net 2 (b)
+
+Node:\t2\tSOURCE (2,1,0)  Class: 0  Switch: 0
+Node:\t10\t CHANX (1,1) to (3,1)  Track: 4  Switch: 2
+Node:\t22\t  SINK (3,1)  Class: 1  Switch: -1
+Node:\t10\t CHANX (1,1) to (3,1)  Track: 4  Switch: 2
+Node:\t23\t  SINK (1,1)  Class: 1  Switch: -1
+"""
+
+
+class TestParseRoute(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.route_file = self.path('top.route')
+        with open(self.route_file, 'w') as f:
+            f.write(ROUTE_FILE)
+
+    def test_columns(self):
+        route = parse_route(io.StringIO(ROUTE_FILE))
+
+        self.assertEqual(len(route), 10)
+        self.assertEqual(route.net_ids.tolist(), [0, 1, 2])
+        self.assertEqual(route.net_names, ['a', 'clk', 'b'])
+        self.assertEqual(route.net_offsets.tolist(), [0, 5, 5, 10])
+        self.assertEqual(route.pin_names, ['clb.O[0]', 'clb.I[1]'])
+
+        self.assertEqual(route.node_type[2], NODE_TYPE_INDEX['CHANX'])
+        self.assertEqual(
+            (route.x_low[2], route.y_low[2], route.x_high[2], route.y_high[2]),
+            (1, 1, 3, 1)
+        )
+        self.assertEqual(route.ptc.tolist()[:5], [0, 2, 4, 5, 1])
+        self.assertEqual(route.switch.tolist()[:5], [0, 1, 2, 3, -1])
+        self.assertEqual(route.pin.tolist()[:5], [-1, 0, -1, 1, -1])
+        self.assertEqual(route.net.tolist(), [0] * 5 + [2] * 5)
+
+    def test_queries(self):
+        route = parse_route(io.StringIO(ROUTE_FILE))
+
+        self.assertEqual(route.net_inodes('b').tolist(), [2, 10, 22, 10, 23])
+        self.assertEqual(route.net_inodes(0).tolist(), [1, 3, 10, 20, 21])
+        self.assertEqual(route.net_inodes('clk').tolist(), [])
+
+        self.assertEqual(route.nets_through_inode(10).tolist(), [0, 2])
+        self.assertEqual(route.nets_through_inode(22).tolist(), [2])
+        self.assertEqual(route.nets_through_inode(4).tolist(), [])
+
+        inodes, counts = route.node_utilization()
+        self.assertEqual(inodes.tolist(), [1, 2, 3, 10, 20, 21, 22, 23])
+        self.assertEqual(counts.tolist(), [1, 1, 1, 2, 1, 1, 1, 1])
+        self.assertEqual(route.utilization_histogram().tolist(), [0, 7, 1])
+
+    def test_net_sources(self):
+        route = parse_route(io.StringIO(ROUTE_FILE))
+
+        self.assertEqual(
+            list(route.net_sources()), [
+                ('a', Node(1, 1, 1, 1, 1, 0)),
+                ('b', Node(2, 2, 1, 2, 1, 0)),
+            ]
+        )
+
+        with open(self.route_file) as f:
+            self.assertEqual(
+                next(route.net_sources()), next(find_net_sources(f))
+            )
+
+    def test_cache(self):
+        route = load_route(self.route_file)
+        self.assertTrue(os.path.exists(route_cache_file(self.route_file)))
+
+        cached = load_route(self.route_file)
+        self.assertEqual(cached.net_names, route.net_names)
+        self.assertEqual(cached.pin_names, route.pin_names)
+        np.testing.assert_array_equal(cached.net_offsets, route.net_offsets)
+        np.testing.assert_array_equal(cached.inode, route.inode)
+        np.testing.assert_array_equal(cached.pin, route.pin)
+
+        # Changing the route file invalidates the cache.
+        with open(self.route_file, 'w') as f:
+            f.write(ROUTE_FILE.split('\n\nNet 1')[0])
+
+        self.assertEqual(load_route(self.route_file).net_names, ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -62,6 +62,11 @@ from ..collections_extra import MostlyReadOnly
 
 _DEFAULT_MARKER = []
 
+# Tooling of the rr graphs written by Graph.to_xml.
+DEFAULT_TOOLING = dict(
+    name="g.py", version="dev", comment="Generated from black magic"
+)
+
 
 def dict_next_id(d):
     current_ids = [-1] + list(d.keys())
@@ -2985,7 +2990,7 @@ class Graph:
 
     def to_xml(self):
         """Return an ET object representing this rr_graph"""
-        self.set_tooling("g.py", "dev", "Generated from black magic")
+        self.set_tooling(**DEFAULT_TOOLING)
 
         # <rr_nodes>, <rr_edges>, and <switches> should be good as is
         # note <rr_nodes> includes channel tracks, but not width definitions
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Synthetic rr graph benchmark of the lib.rr_graph flow.
+
+A synthetic graph is a grid of identical tiles surrounded by EMPTY tiles.
+Each tile has input and output pins and channel_width CHANX and CHANY tracks
+of track_length tiles starting at it.  Output pins drive fanout tracks of
+their tile, input pins are driven by fanout tracks of their tile and each
+track drives fanout tracks starting at its end tile.  Connections are drawn
+from a seeded random generator, so a given set of parameters always produces
+the same graph.
+
+run_benchmark walks the same steps as the architecture import flows: read the
+base (pins only) graph, add the tracks and edges, pack the tracks into
+channels, remap the node ids, then write and read back the complete graph.
+Each stage records its duration, the number of items it processed and the
+peak RSS of the process after the stage.
+"""
+
+from collections import namedtuple
+import contextlib
+import math
+import os.path
+import random
+import resource
+import time
+
+from lib.rr_graph.tracks import Track
+from lib.rr_graph_xml import graph2 as xml_graph2
+
+SyntheticParams = namedtuple(
+    'SyntheticParams',
+    'width height channel_width pins fanout track_length seed'
+)
+
+DELAYLESS_SWITCH = '__vpr_delayless_switch__'
+ROUTING_SWITCH = 'routing'
+SEGMENT = 'dummy'
+TILE = 'TILE'
+
+
+def edges_per_tile(channel_width, pins, fanout):
+    """ Returns the number of edges each tile adds to a synthetic graph. """
+    # SOURCE -> OPIN and IPIN -> SINK
+    pin_edges = 2 * pins
+
+    # OPIN -> track, track -> IPIN and track -> track
+    routing_edges = fanout * (2 * pins + 2 * channel_width)
+
+    return pin_edges + routing_edges
+
+
+def params_for_edges(
+        edges,
+        channel_width=8,
+        pins=8,
+        fanout=4,
+        track_length=4,
+        seed=0,
+):
+    """ Returns the parameters of a square synthetic graph with approximately
+    the given number of edges.
+    """
+    side = max(
+        1,
+        int(
+            math.ceil(
+                math.sqrt(edges / edges_per_tile(channel_width, pins, fanout))
+            )
+        )
+    )
+
+    return SyntheticParams(
+        width=side,
+        height=side,
+        channel_width=channel_width,
+        pins=pins,
+        fanout=fanout,
+        track_length=track_length,
+        seed=seed,
+    )
+
+
+def write_base_xml(fname, params):
+    """ Writes the pins only rr graph of a synthetic graph to fname.
+
+    This is the graph VPR would generate for the architecture before the
+    routing import adds the tracks.
+    """
+    pins = params.pins
+
+    with open(fname, 'w') as f:
+        f.write(
+            '<rr_graph tool_name="vpr" tool_version="synthetic" '
+            'tool_comment="rr graph benchmark">\n'
+        )
+        f.write(
+            '<channels><channel chan_width_max="0" x_min="0" y_min="0" '
+            'x_max="0" y_max="0"/></channels>\n'
+        )
+
+        f.write('<switches>\n')
+        f.write(
+            '<switch id="0" name="{}" type="short"><timing R="0" Cin="0" '
+            'Cout="0" Tdel="0"/><sizing mux_trans_size="0" buf_size="0"/>'
+            '</switch>\n'.format(DELAYLESS_SWITCH)
+        )
+        f.write(
+            '<switch id="1" name="{}" type="mux"><timing R="100" Cin="1e-15" '
+            'Cout="1e-15" Tdel="5e-11"/><sizing mux_trans_size="1" '
+            'buf_size="1"/></switch>\n'.format(ROUTING_SWITCH)
+        )
+        f.write('</switches>\n')
+
+        f.write(
+            '<segments><segment id="0" name="{}"><timing R_per_meter="1" '
+            'C_per_meter="1"/></segment></segments>\n'.format(SEGMENT)
+        )
+
+        # Pin class 0 holds the input pins, pin class 1 the output pins.
+        f.write('<block_types>\n')
+        f.write('<block_type id="0" name="EMPTY" width="1" height="1"/>\n')
+        f.write(
+            '<block_type id="1" name="{}" width="1" height="1">\n'.
+            format(TILE)
+        )
+        f.write('<pin_class type="INPUT">')
+        for pin in range(pins):
+            f.write('<pin ptc="{}">{}.I[{}]</pin>'.format(pin, TILE, pin))
+        f.write('</pin_class>\n')
+        f.write('<pin_class type="OUTPUT">')
+        for pin in range(pins):
+            f.write(
+                '<pin ptc="{}">{}.O[{}]</pin>'.format(pins + pin, TILE, pin)
+            )
+        f.write('</pin_class>\n')
+        f.write('</block_type>\n')
+        f.write('</block_types>\n')
+
+        f.write('<grid>\n')
+        for x in range(params.width + 2):
+            for y in range(params.height + 2):
+                interior = 1 <= x <= params.width and 1 <= y <= params.height
+                f.write(
+                    '<grid_loc x="{}" y="{}" block_type_id="{}" '
+                    'width_offset="0" height_offset="0"/>\n'.format(
+                        x, y, 1 if interior else 0
+                    )
+                )
+        f.write('</grid>\n')
+
+        node_id = 0
+        f.write('<rr_nodes>\n')
+        for x in range(1, params.width + 1):
+            for y in range(1, params.height + 1):
+                for node_type, ptc, side in ([
+                    ('SINK', 0, None), ('SOURCE', 1, None)
+                ] + [('IPIN', pin, 'LEFT') for pin in range(pins)] + [
+                    ('OPIN', pins + pin, 'RIGHT') for pin in range(pins)
+                ]):
+                    f.write(
+                        '<node id="{}" type="{}" capacity="1"><loc xlow="{x}" '
+                        'ylow="{y}" xhigh="{x}" yhigh="{y}" ptc="{}"{}/>'
+                        '<timing R="0" C="0"/></node>\n'.format(
+                            node_id,
+                            node_type,
+                            ptc,
+                            ' side="{}"'.format(side) if side else '',
+                            x=x,
+                            y=y
+                        )
+                    )
+                    node_id += 1
+        f.write('</rr_nodes>\n')
+
+        f.write('<rr_edges/>\n')
+        f.write('</rr_graph>\n')
+
+
+def add_synthetic_routing(graph, params):
+    """ Adds the tracks and routing edges of a synthetic graph to graph.
+
+    Returns the number of tracks and edges added.
+    """
+    rng = random.Random(params.seed)
+    pins = params.pins
+    segment_id = graph.get_segment_id_from_name(SEGMENT)
+    switch_id = graph.get_switch_id(ROUTING_SWITCH)
+
+    tile_tracks = {}
+    track_ends = []
+    for x in range(1, params.width + 1):
+        for y in range(1, params.height + 1):
+            tracks = []
+            x_high = min(x + params.track_length - 1, params.width)
+            y_high = min(y + params.track_length - 1, params.height)
+
+            for _ in range(params.channel_width):
+                tracks.append(
+                    graph.add_track(
+                        track=Track(
+                            direction='X',
+                            x_low=x,
+                            x_high=x_high,
+                            y_low=y,
+                            y_high=y
+                        ),
+                        segment_id=segment_id
+                    )
+                )
+                track_ends.append((tracks[-1], (x_high, y)))
+
+                tracks.append(
+                    graph.add_track(
+                        track=Track(
+                            direction='Y',
+                            x_low=x,
+                            x_high=x,
+                            y_low=y,
+                            y_high=y_high
+                        ),
+                        segment_id=segment_id
+                    )
+                )
+                track_ends.append((tracks[-1], (x, y_high)))
+
+            tile_tracks[(x, y)] = tracks
+
+    # Edges are stored as plain tuples, as yielded by the edge generators of
+    # the import flows.
+    num_edges = len(graph.edges)
+    fanout = min(params.fanout, 2 * params.channel_width)
+    for (x, y), tracks in tile_tracks.items():
+        for pin in range(pins):
+            for ipin, _ in graph.loc_pin_map[(x, y, pin)]:
+                for track in rng.sample(tracks, fanout):
+                    graph.edges.append((track, ipin, switch_id, None))
+
+            for opin, _ in graph.loc_pin_map[(x, y, pins + pin)]:
+                for track in rng.sample(tracks, fanout):
+                    graph.edges.append((opin, track, switch_id, None))
+
+    for track, end in track_ends:
+        for sink_track in rng.sample(tile_tracks[end], fanout):
+            if sink_track != track:
+                graph.edges.append((track, sink_track, switch_id, None))
+
+    return len(track_ends), len(graph.edges) - num_edges
+
+
+def create_locality_remap(nodes):
+    """ Returns a node id remap that numbers nodes by location.
+
+    Stands in for the space filling curve remaps of the import flows, which
+    are also lookups into a precomputed table.
+    """
+    order = sorted(
+        range(len(nodes)),
+        key=lambda idx: (nodes[idx].loc.x_low, nodes[idx].loc.y_low)
+    )
+
+    id_map = [0] * len(nodes)
+    for new_id, old_id in enumerate(order):
+        id_map[nodes[old_id].id] = new_id
+
+    return id_map.__getitem__
+
+
+def peak_rss_mb():
+    """ Returns the peak resident set size of the process in MiB. """
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextlib.contextmanager
+def stage(stages, name):
+    """ Times the enclosed block as the stage name.
+
+    The caller sets the 'items' key of the yielded dict to the number of
+    items processed by the stage.
+    """
+    result = {'name': name, 'items': 0}
+    start = time.perf_counter()
+    yield result
+    result['seconds'] = time.perf_counter() - start
+    result['items_per_second'] = (
+        result['items'] / result['seconds'] if result['seconds'] > 0 else None
+    )
+    result['peak_rss_mb'] = peak_rss_mb()
+    stages.append(result)
+
+
+def capnp_writer(rr_graph_schema_fname, xml_graph, output_file_name):
+    """ Returns a capnp Graph writing the graph of xml_graph.
+
+    Synthetic graphs have no capnp input file, so the capnp Graph is built
+    from the content of the in memory graph.
+    """
+    from lib.rr_graph_capnp import graph2 as capnp_graph2
+
+    graph = xml_graph.graph
+    return capnp_graph2.Graph(
+        rr_graph_schema_fname,
+        input_file_name=None,
+        output_file_name=output_file_name,
+        progressbar=xml_graph.progressbar,
+        build_pin_edges=False,
+        rebase_nodes=False,
+        graph_input=dict(
+            root_attrib=xml_graph.root_attrib,
+            switches=graph.switches,
+            segments=graph.segments,
+            block_types=graph.block_types,
+            grid=graph.grid,
+            nodes=graph.nodes,
+            edges=graph.edges,
+        ),
+    )
+
+
+def run_benchmark(params, tmp_dir, rr_graph_schema_fname=None, pool=None):
+    """ Runs all stages on the synthetic graph of params.
+
+    Intermediate files are written to tmp_dir.  The capnp stages only run if
+    the VPR capnp schema is given.  If pool is given, channels are packed in
+    parallel.
+
+    Returns the list of stage results.
+    """
+    stages = []
+
+    base_xml = os.path.join(tmp_dir, 'base.rr_graph.xml')
+    output_xml = os.path.join(tmp_dir, 'rr_graph.xml')
+    output_capnp = os.path.join(tmp_dir, 'rr_graph.bin')
+
+    with stage(stages, 'write_base_xml') as result:
+        write_base_xml(base_xml, params)
+        result['items'] = params.width * params.height
+
+    with stage(stages, 'read_xml') as result:
+        xml_graph = xml_graph2.Graph(base_xml, output_file_name=output_xml)
+        graph = xml_graph.graph
+        result['items'] = len(graph.nodes) + len(graph.edges)
+
+    with stage(stages, 'add_routing') as result:
+        num_tracks, num_edges = add_synthetic_routing(graph, params)
+        result['items'] = num_tracks + num_edges
+
+    with stage(stages, 'create_channels') as result:
+        channels = graph.create_channels(
+            pad_segment=graph.get_segment_id_from_name(SEGMENT), pool=pool
+        )
+        result['items'] = len(graph.tracks)
+
+    with stage(stages, 'node_remap') as result:
+        node_remap = create_locality_remap(graph.nodes)
+        result['items'] = len(graph.nodes)
+
+    num_items = len(graph.nodes) + len(graph.edges)
+
+    with stage(stages, 'write_xml') as result:
+        xml_graph.serialize_to_xml(
+            channels_obj=channels,
+            nodes_obj=graph.nodes,
+            edges_obj=graph.edges,
+            node_remap=node_remap
+        )
+        result['items'] = num_items
+
+    if rr_graph_schema_fname is not None:
+        with stage(stages, 'write_capnp') as result:
+            writer = capnp_writer(
+                rr_graph_schema_fname, xml_graph, output_capnp
+            )
+            writer.serialize_to_capnp(
+                channels_obj=channels,
+                num_nodes=len(graph.nodes),
+                nodes_obj=graph.nodes,
+                num_edges=len(graph.edges),
+                edges_obj=graph.edges,
+                node_remap=node_remap
+            )
+            result['items'] = num_items
+
+        rr_graph_schema = writer.rr_graph_schema
+        del writer
+
+    del xml_graph, graph, channels, node_remap
+
+    with stage(stages, 'read_xml_full') as result:
+        graph_input = xml_graph2.graph_from_xml(
+            output_xml, filter_nodes=False, load_edges=True
+        )
+        result['items'] = len(graph_input['nodes']) + len(graph_input['edges'])
+        del graph_input
+
+    if rr_graph_schema_fname is not None:
+        with stage(stages, 'read_capnp_full') as result:
+            from lib.rr_graph_capnp import graph2 as capnp_graph2
+
+            graph_input = capnp_graph2.graph_from_capnp(
+                rr_graph_schema,
+                output_capnp,
+                filter_nodes=False,
+                load_edges=True
+            )
+            result['items'] = len(graph_input['nodes']
+                                  ) + len(graph_input['edges'])
+            del graph_input
+
+    return stages
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from .rr_graph_benchmark import (
+    SyntheticParams, add_synthetic_routing, edges_per_tile, run_benchmark,
+    write_base_xml
+)
+from .rr_graph_xml import graph2 as xml_graph2
+from .tempdir_test_case import TempDirTestCase
+
+PARAMS = SyntheticParams(
+    width=3,
+    height=2,
+    channel_width=2,
+    pins=2,
+    fanout=2,
+    track_length=2,
+    seed=1,
+)
+
+
+class TestRrGraphBenchmark(TempDirTestCase):
+    def synthetic_graph(self):
+        fname = self.path('base.xml')
+        write_base_xml(fname, PARAMS)
+        graph = xml_graph2.Graph(fname).graph
+        add_synthetic_routing(graph, PARAMS)
+
+        return graph
+
+    def test_synthetic_graph_is_deterministic(self):
+        graph = self.synthetic_graph()
+        tiles = PARAMS.width * PARAMS.height
+
+        self.assertEqual(len(graph.tracks), tiles * 2 * PARAMS.channel_width)
+        # Track to track edges looping back to the same track are skipped.
+        self.assertLessEqual(
+            len(graph.edges),
+            tiles *
+            edges_per_tile(PARAMS.channel_width, PARAMS.pins, PARAMS.fanout)
+        )
+        self.assertEqual(graph.edges, self.synthetic_graph().edges)
+
+    def test_run_benchmark(self):
+        stages = run_benchmark(PARAMS, self.tmpdir)
+
+        self.assertEqual(
+            [stage['name'] for stage in stages], [
+                'write_base_xml', 'read_xml', 'add_routing', 'create_channels',
+                'node_remap', 'write_xml', 'read_xml_full'
+            ]
+        )
+
+        # The complete graph is read back.
+        stages = dict((stage['name'], stage) for stage in stages)
+        self.assertEqual(
+            stages['write_xml']['items'], stages['read_xml_full']['items']
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
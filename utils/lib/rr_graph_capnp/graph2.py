@@ -285,6 +285,7 @@ class Graph(object):
             build_pin_edges=True,
             rebase_nodes=True,
             filter_nodes=True,
+            graph_input=None,
     ):
         if progressbar is None:
             progressbar = lambda x: x  # noqa: E731
@@ -298,13 +299,24 @@ class Graph(object):
             imports=[os.path.dirname(os.path.dirname(capnp.__file__))]
         )
 
-        graph_input = graph_from_capnp(
-            rr_graph_schema=self.rr_graph_schema,
-            input_file_name=input_file_name,
-            progressbar=progressbar,
-            filter_nodes=filter_nodes,
-            rebase_nodes=rebase_nodes,
-        )
+        # graph_input may be the output of an earlier graph_from_xml or
+        # graph_from_capnp call, in which case input_file_name is not read.
+        if graph_input is None:
+            graph_input = graph_from_capnp(
+                rr_graph_schema=self.rr_graph_schema,
+                input_file_name=input_file_name,
+                progressbar=progressbar,
+                filter_nodes=filter_nodes,
+                rebase_nodes=rebase_nodes,
+            )
+        else:
+            graph_input = dict(graph_input)
+            if rebase_nodes:
+                graph_input['nodes'] = [
+                    node._replace(id=idx)
+                    for idx, node in enumerate(graph_input['nodes'])
+                ]
+
         graph_input['build_pin_edges'] = build_pin_edges
 
         self.root_attrib = graph_input["root_attrib"]
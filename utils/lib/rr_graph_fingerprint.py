@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Order independent fingerprints of routing resource graphs.
+
+A graph is streamed as canonical records, one per switch, segment, block
+type, grid location, node, edge and metadata entry.  Records do not refer to
+ids: nodes are identified by (type, loc, side, ptc), edges by the keys of
+their end nodes and the switch name, so renumbering or reordering the graph
+does not change its fingerprint.
+
+Each section of the graph is fingerprinted as the count of its records and
+the sum of their 64-bit hashes, which is independent of the record order.
+When two graphs differ, the records of the differing sections are sorted
+(externally, for graphs larger than memory) and merged to report only the
+differing records.
+
+XML and capnp graphs are supported.  Fingerprints are only comparable
+between graphs of the same format, as the formats do not store identical
+floating point values and optional fields.
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import tempfile
+
+import lxml.etree as ET
+import numpy
+
+from lib.rr_graph import graph2
+from lib.rr_graph import tracks
+
+SECTIONS = (
+    'header',
+    'channels',
+    'switches',
+    'segments',
+    'block_types',
+    'grid',
+    'nodes',
+    'edges',
+    'metadata',
+)
+
+HASH_MASK = (1 << 64) - 1
+
+
+def record_to_line(record):
+    """ Returns the canonical single line representation of a record. """
+    return json.dumps(record, separators=(',', ':'))
+
+
+def line_hash(line):
+    """ Returns the 64-bit hash of a record line. """
+    return int.from_bytes(
+        hashlib.blake2b(line.encode('utf-8'), digest_size=8).digest(), 'little'
+    )
+
+
+class SectionFingerprint(object):
+    """ Order independent fingerprint of a multiset of records. """
+
+    def __init__(self):
+        self.count = 0
+        self.digest = 0
+
+    def add(self, line):
+        self.count += 1
+        self.digest = (self.digest + line_hash(line)) & HASH_MASK
+
+    def hexdigest(self):
+        return '{:016x}'.format(self.digest)
+
+    def __eq__(self, other):
+        return self.count == other.count and self.digest == other.digest
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class ExternalSorter(object):
+    """ Sorts lines that may not fit in memory.
+
+    Lines are kept in memory until chunk_size lines have been added, then
+    sorted and written to a temporary file.  Iterating merges the sorted
+    runs.  Lines must not contain newlines.
+    """
+
+    def __init__(self, chunk_size=1000000, tmp_dir=None):
+        self.chunk_size = chunk_size
+        self.tmp_dir = tmp_dir
+        self.chunk = []
+        self.runs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.chunk = []
+
+    def add(self, line):
+        self.chunk.append(line)
+        if len(self.chunk) >= self.chunk_size:
+            self._write_run()
+
+    def _write_run(self):
+        self.chunk.sort()
+
+        run = tempfile.TemporaryFile(
+            mode='w+', encoding='utf-8', dir=self.tmp_dir
+        )
+        for line in self.chunk:
+            run.write(line)
+            run.write('\n')
+        run.seek(0)
+
+        self.runs.append(run)
+        self.chunk = []
+
+    def __iter__(self):
+        if not self.runs:
+            return iter(sorted(self.chunk))
+
+        if self.chunk:
+            self._write_run()
+
+        for run in self.runs:
+            run.seek(0)
+
+        return heapq.merge(*[(line[:-1] for line in run) for run in self.runs])
+
+
+def diff_sorted(a, b):
+    """ Yields ('-', line) for lines only in a and ('+', line) for lines only
+    in b.  Both inputs must be sorted.  Duplicate lines are matched one to
+    one.
+    """
+    a = iter(a)
+    b = iter(b)
+
+    line_a = next(a, None)
+    line_b = next(b, None)
+    while line_a is not None or line_b is not None:
+        if line_b is None or (line_a is not None and line_a < line_b):
+            yield '-', line_a
+            line_a = next(a, None)
+        elif line_a is None or line_b < line_a:
+            yield '+', line_b
+            line_b = next(b, None)
+        else:
+            line_a = next(a, None)
+            line_b = next(b, None)
+
+
+class NodeKeys(object):
+    """ Maps node ids to node keys, stored in arrays to fit large graphs. """
+
+    COLUMNS = 7
+
+    def __init__(self):
+        self.keys = numpy.full((1024, self.COLUMNS), -1, dtype=numpy.int64)
+        self.names = []
+        self.name_codes = {}
+
+    def _code(self, name):
+        if name not in self.name_codes:
+            self.name_codes[name] = len(self.names)
+            self.names.append(name)
+
+        return self.name_codes[name]
+
+    def add(self, node_id, key):
+        node_type, x_low, y_low, x_high, y_high, side, ptc = key
+
+        if node_id >= len(self.keys):
+            size = len(self.keys)
+            while size <= node_id:
+                size *= 2
+
+            keys = numpy.full((size, self.COLUMNS), -1, dtype=numpy.int64)
+            keys[:len(self.keys)] = self.keys
+            self.keys = keys
+
+        self.keys[node_id] = (
+            self._code(node_type), x_low, y_low, x_high, y_high,
+            self._code(side), ptc
+        )
+
+    def key(self, node_id):
+        node_type, x_low, y_low, x_high, y_high, side, ptc = self.keys[
+            node_id].tolist()
+        assert node_type != -1, node_id
+
+        return [
+            self.names[node_type], x_low, y_low, x_high, y_high,
+            self.names[side], ptc
+        ]
+
+
+def metadata_records(kind, key, metas):
+    for name, value in metas:
+        yield 'metadata', [kind, key, name, value]
+
+
+def enum_name(enum_type, s):
+    return enum_type[s.upper()].name
+
+
+def read_xml_records(input_file_name):
+    """ Yields (section, record) for every record of an XML rr graph. """
+
+    switch_names = {}
+    segment_names = {}
+    block_type_names = {}
+    node_keys = NodeKeys()
+
+    doc = ET.iterparse(input_file_name, events=('start', 'end'))
+    for event, element in doc:
+        tag = element.tag
+
+        if event == 'start':
+            if tag == 'rr_graph':
+                yield 'header', sorted(element.attrib.items())
+            continue
+
+        parent = element.getparent()
+        if parent is None:
+            continue
+
+        if tag == 'channel':
+            yield 'channels', [
+                'channel',
+                sorted((k, int(v)) for k, v in element.attrib.items())
+            ]
+        elif tag in ['x_list', 'y_list']:
+            yield 'channels', [
+                tag,
+                int(element.attrib['index']),
+                int(element.attrib['info'])
+            ]
+        elif tag == 'switch':
+            switch_names[int(element.attrib['id'])] = element.attrib['name']
+
+            timing = element.find('timing')
+            sizing = element.find('sizing')
+            yield 'switches', [
+                element.attrib['name'],
+                enum_name(graph2.SwitchType, element.attrib['type']),
+                sorted((k, float(v)) for k, v in timing.attrib.items())
+                if timing is not None else None,
+                sorted((k, float(v)) for k, v in sizing.attrib.items())
+                if sizing is not None else None,
+            ]
+        elif tag == 'segment' and parent.tag == 'segments':
+            segment_names[int(element.attrib['id'])] = element.attrib['name']
+
+            timing = element.find('timing')
+            yield 'segments', [
+                element.attrib['name'],
+                sorted((k, float(v)) for k, v in timing.attrib.items())
+                if timing is not None else None,
+            ]
+        elif tag == 'block_type':
+            block_type_names[int(element.attrib['id'])
+                             ] = element.attrib['name']
+
+            pin_classes = []
+            for pin_class in element.iter('pin_class'):
+                pin_classes.append(
+                    [
+                        enum_name(graph2.PinType, pin_class.attrib['type']),
+                        [
+                            [int(pin.attrib['ptc']), pin.text]
+                            for pin in pin_class.iter('pin')
+                        ]
+                    ]
+                )
+
+            yield 'block_types', [
+                element.attrib['name'],
+                int(element.attrib['width']),
+                int(element.attrib['height']),
+                pin_classes,
+            ]
+        elif tag == 'grid_loc':
+            yield 'grid', [
+                int(element.attrib['x']),
+                int(element.attrib['y']),
+                block_type_names[int(element.attrib['block_type_id'])],
+                int(element.attrib['width_offset']),
+                int(element.attrib['height_offset']),
+            ]
+        elif tag == 'node':
+            loc = element.find('loc')
+            side = loc.attrib.get('side')
+            key = [
+                enum_name(graph2.NodeType, element.attrib['type']),
+                int(loc.attrib['xlow']),
+                int(loc.attrib['ylow']),
+                int(loc.attrib['xhigh']),
+                int(loc.attrib['yhigh']),
+                enum_name(tracks.Direction, side) if side else None,
+                int(loc.attrib['ptc']),
+            ]
+            node_keys.add(int(element.attrib['id']), key)
+
+            direction = element.attrib.get('direction')
+            timing = element.find('timing')
+            segment = element.find('segment')
+            yield 'nodes', key + [
+                enum_name(graph2.NodeDirection, direction)
+                if direction else None,
+                int(element.attrib['capacity']),
+                float(timing.attrib['R']) if timing is not None else None,
+                float(timing.attrib['C']) if timing is not None else None,
+                segment_names[int(segment.attrib['segment_id'])]
+                if segment is not None else None,
+            ]
+
+            yield from metadata_records(
+                'node', key, (
+                    (meta.attrib['name'], meta.text)
+                    for meta in element.iter('meta')
+                )
+            )
+        elif tag == 'edge':
+            key = [
+                node_keys.key(int(element.attrib['src_node'])),
+                node_keys.key(int(element.attrib['sink_node'])),
+                switch_names[int(element.attrib['switch_id'])],
+            ]
+            yield 'edges', key
+
+            yield from metadata_records(
+                'edge', key, (
+                    (meta.attrib['name'], meta.text)
+                    for meta in element.iter('meta')
+                )
+            )
+        else:
+            continue
+
+        # Processed elements are no longer needed.
+        element.clear()
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def read_capnp_records(rr_graph_schema, input_file_name):
+    """ Yields (section, record) for every record of a capnp rr graph. """
+    from lib.rr_graph_capnp.graph2 import enum_from_string
+
+    def capnp_enum_name(enum_type, s):
+        value = enum_from_string(enum_type, s)
+        return value.name if value is not None else None
+
+    def capnp_metas(metadata):
+        return [(str(m.name), str(m.value)) for m in metadata.metas]
+
+    switch_names = {}
+    segment_names = {}
+    block_type_names = {}
+    node_keys = NodeKeys()
+
+    with open(input_file_name, 'rb') as f:
+        graph = rr_graph_schema.RrGraph.read(
+            f, traversal_limit_in_words=2**63 - 1
+        )
+
+        yield 'header', sorted(
+            [
+                ('tool_comment', str(graph.toolComment)),
+                ('tool_name', str(graph.toolName)),
+                ('tool_version', str(graph.toolVersion)),
+            ]
+        )
+
+        channel = graph.channels.channel
+        yield 'channels', [
+            'channel',
+            sorted(
+                [
+                    ('chan_width_max', channel.chanWidthMax),
+                    ('x_max', channel.xMax),
+                    ('x_min', channel.xMin),
+                    ('y_max', channel.yMax),
+                    ('y_min', channel.yMin),
+                ]
+            )
+        ]
+        for x_list in graph.channels.xLists:
+            yield 'channels', ['x_list', x_list.index, x_list.info]
+        for y_list in graph.channels.yLists:
+            yield 'channels', ['y_list', y_list.index, y_list.info]
+
+        for sw in graph.switches.switches:
+            switch_names[sw.id] = str(sw.name)
+            yield 'switches', [
+                str(sw.name),
+                capnp_enum_name(graph2.SwitchType, sw.type),
+                sorted(
+                    [
+                        ('Cin', sw.timing.cin),
+                        ('Cinternal', sw.timing.cinternal),
+                        ('Cout', sw.timing.cout),
+                        ('R', sw.timing.r),
+                        ('Tdel', sw.timing.tdel),
+                    ]
+                ),
+                sorted(
+                    [
+                        ('buf_size', sw.sizing.bufSize),
+                        ('mux_trans_size', sw.sizing.muxTransSize),
+                    ]
+                ),
+            ]
+
+        for seg in graph.segments.segments:
+            segment_names[seg.id] = str(seg.name)
+            yield 'segments', [
+                str(seg.name),
+                sorted(
+                    [
+                        ('C_per_meter', seg.timing.cPerMeter),
+                        ('R_per_meter', seg.timing.rPerMeter),
+                    ]
+                ),
+            ]
+
+        for block_type in graph.blockTypes.blockTypes:
+            block_type_names[block_type.id] = str(block_type.name)
+            yield 'block_types', [
+                str(block_type.name),
+                block_type.width,
+                block_type.height,
+                [
+                    [
+                        capnp_enum_name(graph2.PinType, pin_class.type),
+                        [[pin.ptc, str(pin.value)] for pin in pin_class.pins]
+                    ] for pin_class in block_type.pinClasses
+                ],
+            ]
+
+        for grid_loc in graph.grid.gridLocs:
+            yield 'grid', [
+                grid_loc.x,
+                grid_loc.y,
+                block_type_names[grid_loc.blockTypeId],
+                grid_loc.widthOffset,
+                grid_loc.heightOffset,
+            ]
+
+        for node in graph.rrNodes.nodes:
+            loc = node.loc
+            key = [
+                capnp_enum_name(graph2.NodeType, node.type),
+                loc.xlow,
+                loc.ylow,
+                loc.xhigh,
+                loc.yhigh,
+                capnp_enum_name(tracks.Direction, loc.side),
+                loc.ptc,
+            ]
+            node_keys.add(node.id, key)
+
+            yield 'nodes', key + [
+                capnp_enum_name(graph2.NodeDirection, node.direction),
+                node.capacity,
+                node.timing.r,
+                node.timing.c,
+                segment_names.get(node.segment.segmentId),
+            ]
+
+            yield from metadata_records(
+                'node', key, capnp_metas(node.metadata)
+            )
+
+        for edge in graph.rrEdges.edges:
+            key = [
+                node_keys.key(edge.srcNode),
+                node_keys.key(edge.sinkNode),
+                switch_names[edge.switchId],
+            ]
+            yield 'edges', key
+
+            yield from metadata_records(
+                'edge', key, capnp_metas(edge.metadata)
+            )
+
+        del graph
+
+
+def fingerprint_records(records, sorters=None):
+    """ Fingerprints (section, record) tuples.
+
+    Returns a dict of section name to SectionFingerprint.  If sorters is
+    given, the record lines of each section in sorters are also added to its
+    ExternalSorter.
+    """
+    fingerprints = dict(
+        (section, SectionFingerprint()) for section in SECTIONS
+    )
+
+    if sorters is None:
+        sorters = {}
+
+    for section, record in records:
+        line = record_to_line(record)
+        fingerprints[section].add(line)
+
+        if section in sorters:
+            sorters[section].add(line)
+
+    return fingerprints
+
+
+def graph_digest(fingerprints):
+    """ Returns a digest of the whole graph from its section fingerprints. """
+    h = hashlib.blake2b(digest_size=16)
+    for section in SECTIONS:
+        h.update(
+            '{} {} {}\n'.format(
+                section, fingerprints[section].count,
+                fingerprints[section].hexdigest()
+            ).encode('utf-8')
+        )
+
+    return h.hexdigest()
+
+
+def diff_records(
+        records_a, records_b, sections, chunk_size=1000000, tmp_dir=None
+):
+    """ Yields (section, '-' or '+', line) for the records of sections that
+    are only in a ('-') or only in b ('+').
+
+    records_a and records_b are callables returning the (section, record)
+    iterators of each graph.
+    """
+    sorters_a = dict(
+        (section, ExternalSorter(chunk_size, tmp_dir)) for section in sections
+    )
+    sorters_b = dict(
+        (section, ExternalSorter(chunk_size, tmp_dir)) for section in sections
+    )
+
+    try:
+        fingerprint_records(records_a(), sorters_a)
+        fingerprint_records(records_b(), sorters_b)
+
+        for section in sections:
+            for sign, line in diff_sorted(sorters_a[section],
+                                          sorters_b[section]):
+                yield section, sign, line
+    finally:
+        for sorter in itertools.chain(sorters_a.values(), sorters_b.values()):
+            sorter.close()
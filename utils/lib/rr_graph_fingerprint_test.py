@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from .rr_graph_fingerprint import (
+    ExternalSorter, diff_records, diff_sorted, fingerprint_records,
+    read_xml_records
+)
+from .tempdir_test_case import TempDirTestCase
+
+HEADER = """<rr_graph tool_name="vpr" tool_version="test" tool_comment="">
+  <channels>
+    <channel chan_width_max="2" x_min="2" y_min="2" x_max="2" y_max="2"/>
+    <x_list index="0" info="2"/>
+    <y_list index="0" info="2"/>
+  </channels>
+  <switches>
+    <switch id="{sw_a}" name="sw_a" type="mux">
+      <timing R="1" Cin="0" Cout="0" Tdel="1e-11"/>
+      <sizing mux_trans_size="1" buf_size="0"/>
+    </switch>
+    <switch id="{sw_b}" name="sw_b" type="short">
+      <timing R="0" Cin="0" Cout="0" Tdel="0"/>
+      <sizing mux_trans_size="0" buf_size="0"/>
+    </switch>
+  </switches>
+  <segments>
+    <segment id="0" name="seg">
+      <timing R_per_meter="1" C_per_meter="1"/>
+    </segment>
+  </segments>
+  <block_types>
+    <block_type id="0" name="EMPTY" width="1" height="1"/>
+  </block_types>
+  <grid>
+    <grid_loc x="0" y="0" block_type_id="0" width_offset="0" height_offset="0"/>
+  </grid>
+  <rr_nodes>
+{nodes}
+  </rr_nodes>
+  <rr_edges>
+{edges}
+  </rr_edges>
+</rr_graph>
+"""
+
+NODE = """    <node id="{id}" type="CHANX" direction="INC_DIR" capacity="1">
+      <loc xlow="{x}" ylow="1" xhigh="{x}" yhigh="1" ptc="0"/>
+      <timing R="0" C="0"/>
+      <segment segment_id="0"/>
+    </node>"""
+
+EDGE = '    <edge src_node="{src}" sink_node="{sink}" switch_id="{switch}"/>'
+
+
+class TestRrGraphFingerprint(TempDirTestCase):
+    def write_graph(self, name, node_ids, edges, sw_a=0, sw_b=1):
+        """ Writes a graph of 3 CHANX nodes at x = 0, 1, 2.
+
+        node_ids gives the id of the node at each x, edges are
+        (src x, sink x, switch name) tuples.
+        """
+        switch_ids = {'sw_a': sw_a, 'sw_b': sw_b}
+
+        nodes = '\n'.join(
+            NODE.format(id=node_id, x=x) for x, node_id in
+            sorted(enumerate(node_ids), key=lambda x_id: x_id[1])
+        )
+        edges = '\n'.join(
+            EDGE.format(
+                src=node_ids[src],
+                sink=node_ids[sink],
+                switch=switch_ids[switch]
+            ) for src, sink, switch in edges
+        )
+
+        fname = self.path(name)
+        with open(fname, 'w') as f:
+            f.write(
+                HEADER.format(sw_a=sw_a, sw_b=sw_b, nodes=nodes, edges=edges)
+            )
+
+        return fname
+
+    def test_renumbered_graph_is_identical(self):
+        a = self.write_graph(
+            'a.xml', [0, 1, 2], [(0, 1, 'sw_a'), (1, 2, 'sw_b')]
+        )
+        b = self.write_graph(
+            'b.xml', [2, 0, 1], [(1, 2, 'sw_b'), (0, 1, 'sw_a')],
+            sw_a=1,
+            sw_b=0
+        )
+
+        fingerprints_a = fingerprint_records(read_xml_records(a))
+        fingerprints_b = fingerprint_records(read_xml_records(b))
+
+        self.assertEqual(fingerprints_a['nodes'].count, 3)
+        self.assertEqual(fingerprints_a['edges'].count, 2)
+        self.assertEqual(fingerprints_a, fingerprints_b)
+
+    def test_changed_edge_is_reported(self):
+        a = self.write_graph(
+            'a.xml', [0, 1, 2], [(0, 1, 'sw_a'), (1, 2, 'sw_b')]
+        )
+        b = self.write_graph(
+            'b.xml', [0, 1, 2], [(0, 1, 'sw_a'), (1, 2, 'sw_a')]
+        )
+
+        fingerprints_a = fingerprint_records(read_xml_records(a))
+        fingerprints_b = fingerprint_records(read_xml_records(b))
+        self.assertEqual(fingerprints_a['nodes'], fingerprints_b['nodes'])
+        self.assertNotEqual(fingerprints_a['edges'], fingerprints_b['edges'])
+
+        diffs = list(
+            diff_records(
+                lambda: read_xml_records(a),
+                lambda: read_xml_records(b), ['edges'],
+                chunk_size=1
+            )
+        )
+        # Differences are reported in record order.
+        self.assertEqual(
+            [(section, sign) for section, sign, _ in diffs],
+            [('edges', '+'), ('edges', '-')]
+        )
+        self.assertTrue(diffs[0][2].endswith('"sw_a"]'))
+        self.assertTrue(diffs[1][2].endswith('"sw_b"]'))
+
+    def test_external_sorter(self):
+        lines = ['d', 'a', 'c', 'a', 'e', 'b']
+        with ExternalSorter(chunk_size=2) as sorter:
+            for line in lines:
+                sorter.add(line)
+            self.assertEqual(list(sorter), sorted(lines))
+
+    def test_diff_sorted_duplicates(self):
+        self.assertEqual(
+            list(diff_sorted(['a', 'a', 'b'], ['a', 'b', 'c'])),
+            [('-', 'a'), ('+', 'c')]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
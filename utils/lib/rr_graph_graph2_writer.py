@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Writes a lib.rr_graph.graph.Graph with the graph2 XML or capnp serializers.
+
+The legacy writer serializes the whole rr graph XML document into a string
+before writing it.  write_graph2 instead converts the nodes and edges of the
+graph while they are written, and produces the same rr graph.
+"""
+
+import os.path
+
+import lib.rr_graph.graph as graph
+from lib.rr_graph import graph2
+from lib.rr_graph import tracks
+import lib.rr_graph_xml.graph2 as xml_graph2
+
+
+def graph2_node(node_xml):
+    """Convert an rr graph node element to a graph2.Node."""
+    loc_xml = node_xml.find('loc')
+    side = loc_xml.get('side')
+    if side is not None:
+        side = tracks.Direction[side]
+
+    direction = node_xml.get('direction')
+    if direction is not None:
+        direction = graph2.NodeDirection[direction]
+    else:
+        direction = graph2.NodeDirection.NO_DIR
+
+    timing = None
+    timing_xml = node_xml.find('timing')
+    if timing_xml is not None:
+        timing = graph2.NodeTiming(
+            r=float(timing_xml.get('R')),
+            c=float(timing_xml.get('C')),
+        )
+
+    segment = None
+    segment_xml = node_xml.find('segment')
+    if segment_xml is not None:
+        segment = graph2.NodeSegment(
+            segment_id=int(segment_xml.get('segment_id'))
+        )
+
+    metadata = [
+        graph2.NodeMetadata(
+            name=meta.get('name'),
+            x_offset=0,
+            y_offset=0,
+            z_offset=0,
+            value=meta.text,
+        ) for meta in node_xml.iterfind('metadata/meta')
+    ]
+
+    return graph2.Node(
+        id=int(node_xml.get('id')),
+        type=graph2.NodeType[node_xml.get('type')],
+        direction=direction,
+        capacity=int(node_xml.get('capacity')),
+        loc=graph2.NodeLoc(
+            x_low=int(loc_xml.get('xlow')),
+            y_low=int(loc_xml.get('ylow')),
+            x_high=int(loc_xml.get('xhigh')),
+            y_high=int(loc_xml.get('yhigh')),
+            side=side,
+            ptc=int(loc_xml.get('ptc')),
+        ),
+        timing=timing,
+        metadata=metadata,
+        segment=segment,
+    )
+
+
+def graph2_edges(g, out_graph):
+    """Yield the rr graph edges as graph2 serializer edge tuples.
+
+    Switch ids are remapped by name to the switches of out_graph.
+    """
+    switch_ids = {}
+    for edge_xml in g.routing._xml_parent(graph.RoutingEdge):
+        switch_id = int(edge_xml.get('switch_id'))
+        if switch_id not in switch_ids:
+            switch_ids[switch_id] = out_graph.get_switch_id(
+                g.switches[switch_id].name
+            )
+
+        metadata = [
+            (meta.get('name'), meta.text)
+            for meta in edge_xml.iterfind('metadata/meta')
+        ]
+
+        yield (
+            int(edge_xml.get('src_node')), int(edge_xml.get('sink_node')),
+            switch_ids[switch_id], metadata
+        )
+
+
+def graph2_channels(g):
+    """Return the channels of the rr graph as graph2.Channels."""
+    x_min, x_max, x_lists = g.channels.x.channel_widths()
+    y_min, y_max, y_lists = g.channels.y.channel_widths()
+
+    return graph2.Channels(
+        chan_width_max=max(x_max, y_max),
+        x_min=x_min,
+        y_min=y_min,
+        x_max=x_max,
+        y_max=y_max,
+        x_list=[
+            graph2.ChannelList(index, info)
+            for index, info in enumerate(x_lists)
+        ],
+        y_list=[
+            graph2.ChannelList(index, info)
+            for index, info in enumerate(y_lists)
+        ],
+    )
+
+
+def graph2_switch(switch):
+    """Convert an rr graph Switch to a graph2.Switch."""
+    return graph2.Switch(
+        id=None,
+        name=switch.name,
+        type=graph2.SwitchType[switch.type.name],
+        timing=graph2.SwitchTiming(
+            r=switch.timing.R,
+            c_in=switch.timing.Cin,
+            c_out=switch.timing.Cout,
+            c_internal=0,
+            t_del=switch.timing.Tdel,
+        ),
+        sizing=graph2.SwitchSizing(
+            mux_trans_size=switch.sizing.mux_trans_size,
+            buf_size=switch.sizing.buf_size,
+        ),
+    )
+
+
+def write_graph2(
+        g, read_rr_graph, write_rr_graph, new_switches=(),
+        capnp_schema_dir=None
+):
+    """Write the rr graph with the graph2 XML or capnp serializer.
+
+    Nodes and edges are converted while they are written, instead of
+    serializing the whole XML document into a string first.  The switches,
+    segments, block types and grid are read from the input rr graph, the
+    switches named in new_switches are the ones added to g since.
+    """
+    # Graph.to_xml sets the same tooling on the legacy output.
+    g.set_tooling(**graph.DEFAULT_TOOLING)
+
+    graph_input = xml_graph2.graph_from_xml(read_rr_graph)
+    graph_input['root_attrib'].update(g._xml_graph.getroot().attrib)
+
+    if capnp_schema_dir is None:
+        out = xml_graph2.Graph(
+            input_file_name=read_rr_graph,
+            output_file_name=write_rr_graph,
+            build_pin_edges=False,
+            graph_input=graph_input,
+        )
+    else:
+        import lib.rr_graph_capnp.graph2 as capnp_graph2
+
+        out = capnp_graph2.Graph(
+            rr_graph_schema_fname=os.path.join(
+                capnp_schema_dir, 'rr_graph_uxsdcxx.capnp'
+            ),
+            input_file_name=read_rr_graph,
+            output_file_name=write_rr_graph,
+            build_pin_edges=False,
+            graph_input=graph_input,
+        )
+
+    for name in new_switches:
+        try:
+            out.graph.get_switch_id(name)
+        except KeyError:
+            out.add_switch(graph2_switch(g.switches[name]))
+
+    channels_obj = graph2_channels(g)
+    nodes_xml = g.routing._xml_parent(graph.RoutingNode)
+    nodes_obj = (graph2_node(node_xml) for node_xml in nodes_xml)
+    edges_obj = graph2_edges(g, out.graph)
+
+    if capnp_schema_dir is None:
+        out.serialize_to_xml(
+            channels_obj=channels_obj,
+            nodes_obj=nodes_obj,
+            edges_obj=edges_obj,
+        )
+    else:
+        out.serialize_to_capnp(
+            channels_obj=channels_obj,
+            num_nodes=len(nodes_xml),
+            nodes_obj=nodes_obj,
+            num_edges=len(g.routing._xml_parent(graph.RoutingEdge)),
+            edges_obj=edges_obj,
+        )
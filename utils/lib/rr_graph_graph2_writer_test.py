@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import unittest
+
+import lxml.etree as ET
+
+from .rr_graph import graph
+from .rr_graph_graph2_writer import write_graph2
+from .rr_graph_xml import graph2 as xml_graph2
+from .tempdir_test_case import TempDirTestCase
+
+
+class TestWriteGraph2(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.read_rr_graph = self.path('rr_graph.xml')
+        write_xml(self.read_rr_graph, graph.simple_test_graph().to_xml())
+
+    def make_graph(self):
+        g = graph.Graph(self.read_rr_graph)
+        g.set_tooling(name="test", version="1", comment="Set by the import")
+
+        short = graph.Switch(
+            id=g.switches.next_id(),
+            type=graph.SwitchType.SHORT,
+            name="short",
+            timing=graph.SwitchTiming(R=0, Cin=0, Cout=0, Tdel=0),
+            sizing=graph.SwitchSizing(mux_trans_size=0, buf_size=0),
+        )
+        g.add_switch(short)
+        g.routing.create_edge_with_ids(8, 10, short)
+
+        return g
+
+    def test_matches_legacy_writer(self):
+        graph2_rr_graph = self.path('graph2.xml')
+        write_graph2(
+            self.make_graph(),
+            self.read_rr_graph,
+            graph2_rr_graph,
+            new_switches=('short', )
+        )
+
+        legacy_rr_graph = self.path('legacy.xml')
+        write_xml(legacy_rr_graph, self.make_graph().to_xml())
+
+        legacy = xml_graph2.graph_from_xml(
+            legacy_rr_graph, filter_nodes=False, load_edges=True
+        )
+        graph2_out = xml_graph2.graph_from_xml(
+            graph2_rr_graph, filter_nodes=False, load_edges=True
+        )
+
+        self.assertEqual(
+            legacy['root_attrib']['tool_name'], graph.DEFAULT_TOOLING['name']
+        )
+        self.assertEqual(legacy.keys(), graph2_out.keys())
+        for key in legacy:
+            self.assertEqual(legacy[key], graph2_out[key], key)
+
+        self.assertIn(
+            (8, 10, graph2_out['switches'][-1].id, None), graph2_out['edges']
+        )
+
+        self.assertEqual(channels(legacy_rr_graph), channels(graph2_rr_graph))
+
+
+def write_xml(fname, xml):
+    with open(fname, 'wb') as f:
+        f.write(ET.tostring(xml, pretty_print=True))
+
+
+def channels(fname):
+    return [
+        (element.tag, dict(element.attrib))
+        for element in ET.parse(fname).getroot().find('channels')
+    ]
+
+
+if __name__ == '__main__':
+    unittest.main()
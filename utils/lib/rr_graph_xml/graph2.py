@@ -284,6 +284,7 @@ class Graph(object):
             build_pin_edges=True,
             rebase_nodes=True,
             filter_nodes=True,
+            graph_input=None,
     ):
         if progressbar is None:
             progressbar = lambda x: x  # noqa: E731
@@ -292,9 +293,15 @@ class Graph(object):
         self.progressbar = progressbar
         self.output_file_name = output_file_name
 
-        graph_input = graph_from_xml(
-            input_file_name, progressbar, filter_nodes=filter_nodes
-        )
+        # graph_input may be the output of an earlier graph_from_xml or
+        # graph_from_capnp call, in which case input_file_name is not read.
+        if graph_input is None:
+            graph_input = graph_from_xml(
+                input_file_name, progressbar, filter_nodes=filter_nodes
+            )
+        else:
+            graph_input = dict(graph_input)
+
         graph_input['build_pin_edges'] = build_pin_edges
 
         self.root_attrib = graph_input["root_attrib"]
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Cache of parsed SDF files.
+
+Parsing large SDF files with sdf_timing dominates the runtime of the timing
+importers.  The cache stores each parsed SDF as a pickle named after the
+sha256 of the SDF content, so an SDF is only parsed again when it changes.
+The least recently used entries are removed when the cache grows over its
+size limit.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import sys
+
+from lib.file_cache import evict_lru, read_pickle, write_pickle
+
+# Bump when the content of cache entries changes to invalidate caches.
+SDF_CACHE_VERSION = 1
+
+# Default size limit of a cache directory, in bytes.
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+
+
+class SdfCache(object):
+    """ Directory of parsed SDF files keyed by the SDF content hash.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Location of the cache, created if missing.  Can be shared by
+        concurrent processes.
+    max_size : int
+        Size limit of the cache in bytes.
+
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, '{}.pickle'.format(key))
+
+    def get(self, key):
+        """ Returns the parsed SDF for key, None if not cached. """
+        entry = read_pickle(self.entry_path(key))
+        if entry is None:
+            return None
+
+        version, timings = entry
+        if version != SDF_CACHE_VERSION:
+            return None
+
+        return timings
+
+    def put(self, key, timings):
+        """ Stores the parsed SDF for key and evicts old entries. """
+        write_pickle(self.entry_path(key), (SDF_CACHE_VERSION, timings))
+
+        self.evict()
+
+    def evict(self):
+        """ Removes the least recently used entries until the cache fits in
+        max_size.
+        """
+        evict_lru(self.cache_dir, self.max_size, '.pickle')
+
+
+def get_sdf_key(content):
+    """ Returns the cache key of SDF content. """
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def parse_sdf(content, name='<sdf>'):
+    """ Parses SDF content, reporting name on failure. """
+    # Importing sdfparse builds the parser, only do it when parsing.
+    from sdf_timing import sdfparse
+
+    try:
+        return sdfparse.parse(content)
+    except Exception as ex:
+        print("{}:".format(name), file=sys.stderr)
+        print(repr(ex), file=sys.stderr)
+        raise
+
+
+def load_sdf(content, cache=None, name='<sdf>'):
+    """ Returns parsed SDF content, from cache when possible. """
+    if cache is None:
+        return parse_sdf(content, name)
+
+    key = get_sdf_key(content)
+    timings = cache.get(key)
+    if timings is None:
+        timings = parse_sdf(content, name)
+        cache.put(key, timings)
+
+    return timings
+
+
+def load_sdf_files(sdf_files, cache=None, jobs=1):
+    """ Returns the parsed SDF files, in the order of sdf_files.
+
+    Files missing from the cache are parsed by jobs processes, all CPUs when
+    jobs is None.  Files with identical content are only parsed once.
+
+    """
+    keys = []
+    contents = {}
+    names = {}
+    for f in sdf_files:
+        with open(f, 'r') as fp:
+            content = fp.read()
+
+        key = get_sdf_key(content)
+        keys.append(key)
+        contents[key] = content
+        names[key] = f
+
+    timings = {}
+    if cache is not None:
+        for key in contents:
+            cached_timings = cache.get(key)
+            if cached_timings is not None:
+                timings[key] = cached_timings
+
+    missing = [key for key in contents if key not in timings]
+    args = [(contents[key], names[key]) for key in missing]
+    if jobs == 1 or len(missing) < 2:
+        parsed = [parse_sdf(*arg) for arg in args]
+    else:
+        with multiprocessing.Pool(jobs) as pool:
+            parsed = pool.starmap(parse_sdf, args)
+
+    for key, parsed_timings in zip(missing, parsed):
+        timings[key] = parsed_timings
+        if cache is not None:
+            cache.put(key, parsed_timings)
+
+    return [timings[key] for key in keys]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import os
+import pickle
+import unittest
+
+from .sdf_cache import SdfCache, get_sdf_key, load_sdf, load_sdf_files
+from .tempdir_test_case import TempDirTestCase
+
+
+class TestSdfCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = self.path('cache')
+
+    def write_sdf(self, name, content):
+        fname = self.path(name)
+        with open(fname, 'w') as f:
+            f.write(content)
+
+        return fname
+
+    def test_round_trip(self):
+        cache = SdfCache(self.cache_dir)
+        self.assertIsNone(cache.get('a'))
+
+        cache.put('a', {'cells': {'LUT': {}}})
+        self.assertEqual(cache.get('a'), {'cells': {'LUT': {}}})
+
+    def test_version_mismatch(self):
+        cache = SdfCache(self.cache_dir)
+        with open(cache.entry_path('a'), 'wb') as f:
+            pickle.dump((-1, {'cells': {}}), f)
+
+        self.assertIsNone(cache.get('a'))
+
+    def test_evict_least_recently_used(self):
+        cache = SdfCache(self.cache_dir)
+        for key in 'abc':
+            cache.put(key, 'x' * 1000)
+            os.utime(cache.entry_path(key), (0, ord(key)))
+
+        size = os.path.getsize(cache.entry_path('a'))
+        cache.max_size = 2 * size
+
+        # Using a makes b the least recently used entry.
+        cache.get('a')
+        cache.evict()
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_load_cached_files(self):
+        cache = SdfCache(self.cache_dir)
+        sdf_a = self.write_sdf('a.sdf', '(DELAYFILE a)')
+        sdf_b = self.write_sdf('b.sdf', '(DELAYFILE b)')
+        sdf_c = self.write_sdf('c.sdf', '(DELAYFILE a)')
+
+        cache.put(get_sdf_key('(DELAYFILE a)'), {'cells': 'a'})
+        cache.put(get_sdf_key('(DELAYFILE b)'), {'cells': 'b'})
+
+        # Cached files are not parsed.
+        self.assertEqual(
+            load_sdf_files([sdf_a, sdf_b, sdf_c], cache, jobs=2),
+            [{
+                'cells': 'a'
+            }, {
+                'cells': 'b'
+            }, {
+                'cells': 'a'
+            }]
+        )
+        self.assertEqual(load_sdf('(DELAYFILE b)', cache), {'cells': 'b'})
+
+
+if __name__ == '__main__':
+    unittest.main()
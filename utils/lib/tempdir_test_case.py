@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    """ TestCase with a temporary directory per test.
+
+    self.tmpdir is the name of the directory, it is removed with its contents
+    after each test.
+    """
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+
+    def path(self, *names):
+        """ Returns the path of names in the temporary directory. """
+        return os.path.join(self.tmpdir, *names)
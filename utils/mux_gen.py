@@ -8,8 +8,12 @@ MUXes come in two types,
 """
 
 import argparse
+import csv
+import io
 import itertools
+import json
 import lxml.etree as ET
+import multiprocessing
 import os
 import sys
 
@@ -132,9 +136,35 @@ parser.add_argument(
     '--subckt', default=None, help="""Override the subcircuit name."""
 )
 
+parser.add_argument(
+    '--batch',
+    default=None,
+    help="""JSON or CSV manifest of muxes to generate, see read_manifest."""
+)
 
-def main(argv):
-    args = parser.parse_args()
+parser.add_argument(
+    '--jobs',
+    type=int,
+    default=None,
+    help="""Number of processes generating the --batch muxes, defaults to
+all CPUs."""
+)
+
+
+def generate_mux(argv):
+    """ Generates the mux described by the command line argv.
+
+    Returns
+    -------
+    name_mux : str
+        Name of the mux.
+    outdir : str
+        Directory the outputs belong to.
+    outputs : list of (str, str)
+        Filename and content of each output.
+
+    """
+    args = parser.parse_args(argv[1:])
 
     def output_block(name, s):
         if args.verbose:
@@ -184,8 +214,6 @@ def main(argv):
         args.name_inputs = [
             args.name_input + str(i) for i in range(args.width)
         ]
-        parser.name_inputs.default = args.name_inputs
-        assert_eq(parser.get_default("name_inputs"), args.name_inputs)
 
     if args.name_selects:
         assert_eq(args.name_select, parser.get_default("name_select"))
@@ -201,10 +229,8 @@ def main(argv):
         args.name_selects = [
             args.name_select + str(i) for i in range(args.width_bits)
         ]
-        parser.name_selects.default = args.name_selects
-        assert_eq(parser.get_default("name_selects"), args.name_selects)
 
-    os.makedirs(outdir, exist_ok=True)
+    output_files = []
 
     # Generated headers
     generated_with = """
@@ -276,9 +302,8 @@ Generated with %s
     # Generate the techmap Verilog module
     # ------------------------------------------------------------------------
     techmap_filename = '%s.techmap.v' % args.outfilename
-    techmap_pathname = os.path.join(outdir, techmap_filename)
     if args.type == 'routing':
-        with open(techmap_pathname, "w") as f:
+        with io.StringIO() as f:
             module_args = []
             for port in port_names:
                 if args.type == 'routing' and port.pin_type == mux_lib.MuxPinType.SELECT:
@@ -326,11 +351,12 @@ Generated with %s
             f.write("\tendgenerate\n")
             f.write("endmodule")
 
+            output_files.append((techmap_filename, f.getvalue()))
+
     # ------------------------------------------------------------------------
     # Generate the sim.v Verilog module
     # ------------------------------------------------------------------------
-    sim_pathname = os.path.join(outdir, sim_filename)
-    with open(sim_pathname, "w") as f:
+    with io.StringIO() as f:
         module_args = []
         for port in port_names:
             if args.type == 'routing' and port.pin_type == mux_lib.MuxPinType.SELECT:
@@ -466,7 +492,10 @@ Generated with %s
 
         f.write('endmodule\n')
 
-    output_block(sim_filename, open(sim_pathname).read())
+        sim_str = f.getvalue()
+
+    output_block(sim_filename, sim_str)
+    output_files.append((sim_filename, sim_str))
 
     if args.type == 'logic':
         subckt = args.subckt or args.name_mux
@@ -511,8 +540,7 @@ Generated with %s
         models_str = "<models><!-- No models for routing elements.--></models>"
 
     output_block(model_xml_filename, models_str)
-    with open(os.path.join(outdir, model_xml_filename), "w") as f:
-        f.write(models_str)
+    output_files.append((model_xml_filename, models_str))
 
     # ------------------------------------------------------------------------
     # Generate the pb_type XML form.
@@ -529,10 +557,132 @@ Generated with %s
 
     pb_type_str = ET.tostring(pb_type_xml, pretty_print=True).decode('utf-8')
     output_block(pbtype_xml_filename, pb_type_str)
-    with open(os.path.join(outdir, pbtype_xml_filename), "w") as f:
-        f.write(pb_type_str)
+    output_files.append((pbtype_xml_filename, pb_type_str))
+
+    return args.name_mux, outdir, output_files
+
+
+def write_outputs(outdir, outputs, skip_unchanged=False):
+    """ Writes the outputs of generate_mux into outdir.
+
+    With skip_unchanged, files that already have the output content are not
+    rewritten, so their modification time is kept.  Returns the number of
+    files written.
+
+    """
+    os.makedirs(outdir, exist_ok=True)
+
+    written = 0
+    for filename, content in outputs:
+        pathname = os.path.join(outdir, filename)
+        if skip_unchanged:
+            try:
+                with open(pathname) as f:
+                    if f.read() == content:
+                        continue
+            except FileNotFoundError:
+                pass
+
+        with open(pathname, "w") as f:
+            f.write(content)
+        written += 1
+
+    return written
+
+
+def spec_to_args(spec):
+    """ Converts a manifest mux specification to command line arguments.
+
+    A specification is either a list of command line arguments, or a dict
+    from argument name (e.g. "name_mux" for --name-mux) to value.  Lists of
+    names (e.g. "name_inputs") can be given as lists.  Boolean arguments
+    (e.g. "split_inputs") take a boolean or a string such as "true" or "0",
+    and become a bare --split-inputs or --no-split-inputs flag.
+
+    Each option and its value are separate arguments, as when mux_gen.py is
+    run by hand, so that the "Generated with" comment of the outputs reads
+    the same.
+    """
+    if isinstance(spec, list):
+        return [str(arg) for arg in spec]
+
+    actions = {action.dest: action for action in parser._actions}
+
+    args = []
+    for dest, value in spec.items():
+        action = actions[dest]
+        option = action.option_strings[0]
+        if isinstance(action, ActionStoreBool):
+            if isinstance(value, str):
+                value = action.value(value)[0]
+            if not value:
+                option = '--no-' + option[2:]
+            args.append(option)
+            continue
+
+        if isinstance(value, list):
+            value = ','.join(value)
+        args.extend([option, str(value)])
+
+    return args
+
+
+def read_manifest(fname):
+    """ Returns the command line arguments of each mux of a manifest.
+
+    JSON manifests are a list of specifications, see spec_to_args.  CSV
+    manifests have one column per argument name and one row per mux, empty
+    cells are left to their default.  Relative paths are relative to the
+    current directory.
+    """
+    if fname.endswith('.csv'):
+        with open(fname, newline='') as f:
+            specs = [
+                {dest: value
+                 for dest, value in row.items()
+                 if value != ''}
+                for row in csv.DictReader(f)
+            ]
+    else:
+        with open(fname) as f:
+            specs = json.load(f)
+
+    return [spec_to_args(spec) for spec in specs]
+
+
+def generate_batch(argvs, jobs=None):
+    """ Generates the muxes of each command line of argvs.
+
+    Muxes are generated by jobs processes, all CPUs when jobs is None, and
+    only outputs with a changed content are written.
+    """
+    if jobs == 1 or len(argvs) < 2:
+        muxes = [generate_mux(argv) for argv in argvs]
+    else:
+        with multiprocessing.Pool(jobs) as pool:
+            muxes = pool.map(generate_mux, argvs)
+
+    for name_mux, outdir, outputs in muxes:
+        if write_outputs(outdir, outputs, skip_unchanged=True):
+            print("Generated mux {} in {}".format(name_mux, outdir))
+        else:
+            print("Mux {} in {} is up to date".format(name_mux, outdir))
+
+
+def main(argv):
+    args = parser.parse_args(argv[1:])
+
+    if args.batch:
+        generate_batch(
+            [argv[:1] + spec for spec in read_manifest(args.batch)],
+            jobs=args.jobs
+        )
+        return
+
+    name_mux, outdir, outputs = generate_mux(argv)
+    write_outputs(outdir, outputs)
 
-    print("Generated mux {} in {}".format(args.name_mux, outdir))
+    print("Generated mux {} in {}".format(name_mux, outdir))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import tempfile
+import unittest
+
+import mux_gen
+
+
+class TestSpecToArgs(unittest.TestCase):
+    def test_list(self):
+        self.assertEqual(
+            mux_gen.spec_to_args(['--width', 2, '--type=routing']),
+            ['--width', '2', '--type=routing']
+        )
+
+    def test_dict(self):
+        self.assertEqual(
+            mux_gen.spec_to_args(
+                {
+                    'width': 2,
+                    'name_mux': 'MUX2',
+                    'name_inputs': ['I0', 'I1'],
+                }
+            ),
+            ['--width', '2', '--name-mux', 'MUX2', '--name-inputs', 'I0,I1']
+        )
+
+    def test_bool(self):
+        self.assertEqual(
+            mux_gen.spec_to_args(
+                {
+                    'split_inputs': True,
+                    'split_selects': False,
+                    'verbose': 'true',
+                }
+            ), ['--split-inputs', '--no-split-selects', '--verbose']
+        )
+        self.assertEqual(
+            mux_gen.spec_to_args({
+                'split_inputs': '0',
+                'split_selects': '1'
+            }), ['--no-split-inputs', '--split-selects']
+        )
+
+    def test_parse(self):
+        args = mux_gen.parser.parse_args(
+            mux_gen.spec_to_args(
+                {
+                    'width': 3,
+                    'type': 'routing',
+                    'split_selects': 'yes',
+                    'name_inputs': ['A', 'B', 'C'],
+                }
+            )
+        )
+        self.assertEqual(args.width, 3)
+        self.assertEqual(args.type, 'routing')
+        self.assertFalse(args.split_inputs)
+        self.assertTrue(args.split_selects)
+        self.assertEqual(args.name_inputs, 'A,B,C')
+
+
+class TestReadManifest(unittest.TestCase):
+    def test_json(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, 'muxes.json')
+            with open(fname, 'w') as f:
+                json.dump(
+                    [
+                        ['--width', 2],
+                        {
+                            'width': 4,
+                            'split_inputs': True
+                        },
+                    ], f
+                )
+
+            self.assertEqual(
+                mux_gen.read_manifest(fname), [
+                    ['--width', '2'],
+                    ['--width', '4', '--split-inputs'],
+                ]
+            )
+
+    def test_csv(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, 'muxes.csv')
+            with open(fname, 'w') as f:
+                f.write('width,name_mux,split_inputs\n')
+                f.write('2,MUX2,true\n')
+                f.write('4,,0\n')
+
+            self.assertEqual(
+                mux_gen.read_manifest(fname), [
+                    ['--width', '2', '--name-mux', 'MUX2', '--split-inputs'],
+                    ['--width', '4', '--no-split-inputs'],
+                ]
+            )
+
+
+class TestWriteOutputs(unittest.TestCase):
+    def test_skip_unchanged(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outdir = os.path.join(tmpdir, 'mux')
+            outputs = [('a.v', 'module a;\n'), ('b.v', 'module b;\n')]
+
+            self.assertEqual(
+                mux_gen.write_outputs(outdir, outputs, skip_unchanged=True), 2
+            )
+
+            a_path = os.path.join(outdir, 'a.v')
+            b_path = os.path.join(outdir, 'b.v')
+            os.utime(a_path, ns=(0, 0))
+            os.utime(b_path, ns=(0, 0))
+
+            outputs[1] = ('b.v', 'module b2;\n')
+            self.assertEqual(
+                mux_gen.write_outputs(outdir, outputs, skip_unchanged=True), 1
+            )
+            self.assertEqual(os.stat(a_path).st_mtime_ns, 0)
+            self.assertNotEqual(os.stat(b_path).st_mtime_ns, 0)
+            with open(b_path) as f:
+                self.assertEqual(f.read(), 'module b2;\n')
+
+            self.assertEqual(mux_gen.write_outputs(outdir, outputs), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,25 +1,17 @@
 #!/usr/bin/env python3
 """ Plot a connection box delay matrix using matplotlib. """
 import argparse
-from lib.connection_box_tools import load_connection_box, \
-    iterate_connection_box, connection_box_to_numpy
+from lib.connection_box_tools import load_connection_box_map
 
 import matplotlib.pyplot as plt
 from matplotlib.colors import BoundaryNorm
 from matplotlib.ticker import MaxNLocator
 
 
-def get_connection_box(cost_map, segment, connection_box):
-    for segment_idx, connection_box_idx, offset, m in iterate_connection_box(
-            cost_map):
-        if segment == segment_idx and connection_box_idx == connection_box:
-            return offset, m
-
-
 def plot_connection_box(cost_map, segment, connection_box):
-    offset, m = get_connection_box(cost_map, segment, connection_box)
-
-    x, y, delay, congestion = connection_box_to_numpy(offset, m)
+    x, y, delay, congestion, fill = cost_map.connection_box(
+        segment, connection_box
+    )
 
     print(delay)
 
@@ -67,8 +59,7 @@ def main():
 
     args = parser.parse_args()
 
-    with open(args.lookahead_map, 'rb') as f:
-        cost_map = load_connection_box(args.schema_path, f)
+    cost_map = load_connection_box_map(args.schema_path, args.lookahead_map)
 
     plot_connection_box(cost_map, args.segment, args.connection_box)
 
@@ -3,7 +3,7 @@
 
 import argparse
 import capnp
-from lib.connection_box_tools import load_connection_box, iterate_connection_box
+from lib.connection_box_tools import load_connection_box_map
 
 # Remove magic import hook.
 capnp.remove_import_hook()
@@ -18,31 +18,29 @@ def main():
 
     args = parser.parse_args()
 
-    with open(args.lookahead_map, 'rb') as f:
-        cost_map = load_connection_box(args.schema_path, f)
+    cost_map = load_connection_box_map(args.schema_path, args.lookahead_map)
 
-    for segment, connection_box, (
-            x_off, y_off), m in iterate_connection_box(cost_map):
-        assert len(m.dims) == 2
-        x_dim = m.dims[0]
-        y_dim = m.dims[1]
+    for segment, connection_box, (x_off, y_off) in cost_map.connection_boxes():
+        x_dim, y_dim = cost_map.sizes[segment, connection_box]
+        start = cost_map.starts[segment, connection_box]
+        end = start + x_dim * y_dim
 
         print(
             'Cost map for segment {} connection box {} (size {}, {}, offset {}, {})'
             .format(segment, connection_box, x_dim, y_dim, x_off, y_off)
         )
 
-        itr = iter(m.data)
+        delays = iter(cost_map.delay[start:end].tolist())
+        congestions = iter(cost_map.congestion[start:end].tolist())
 
         for x in range(x_dim):
             for y in range(y_dim):
-                value = next(itr)
                 print(
                     '({}, {}) = {{ delay = {}, congestion = {} }}'.format(
                         x + x_off,
                         y + y_off,
-                        value.value.delay,
-                        value.value.congestion,
+                        next(delays),
+                        next(congestions),
                     )
                 )
 
@@ -1,5 +1,5 @@
 import argparse
-from lib.parse_route import find_net_sources
+from lib.parse_route import load_route
 
 
 def main():
@@ -8,12 +8,17 @@ def main():
     )
 
     parser.add_argument('route_file')
+    parser.add_argument(
+        '--no_cache',
+        action='store_true',
+        help='Do not read or write the parsed route cache'
+    )
 
     args = parser.parse_args()
 
-    with open(args.route_file) as f:
-        for net, node in find_net_sources(f):
-            print(net, node)
+    route = load_route(args.route_file, use_cache=not args.no_cache)
+    for net, node in route.net_sources():
+        print(net, node)
 
 
 if __name__ == "__main__":
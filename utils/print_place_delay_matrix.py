@@ -4,6 +4,11 @@ import argparse
 import capnp
 import os.path
 
+import numpy as np
+
+from lib.capnp_numpy import CapnpMessage, field_slot
+from lib.connection_box_tools import load_matrix_layout, read_matrices
+
 # Remove magic import hook.
 capnp.remove_import_hook()
 
@@ -23,19 +28,24 @@ def main():
         os.path.join(args.schema_path, 'place_delay_model.capnp')
     )
 
-    with open(args.place_delay_matrix, 'rb') as f:
-        delay_model = place_delay_model.VprOverrideDelayModel.read(f)
-
-    x_dim = delay_model.delays.dims[0]
-    y_dim = delay_model.delays.dims[1]
-    itr = iter(delay_model.delays.data)
-    for x in range(x_dim):
-        row = []
-        for y in range(y_dim):
-            value = next(itr)
-            row.append(str(value.value.value))
-
-        print(','.join(row))
+    message = CapnpMessage(args.place_delay_matrix)
+    delays = message.structs(
+        message.pointer_positions(
+            message.root(),
+            field_slot(place_delay_model.VprOverrideDelayModel, 'delays')[1]
+        )
+    )
+    dims, values = read_matrices(
+        message, delays, load_matrix_layout(args.schema_path)
+    )
+    x_dim, y_dim = dims[0]
+    delay = message.field(
+        values,
+        field_slot(place_delay_model.VprFloatEntry, 'value')[1], np.float32
+    ).reshape(x_dim, y_dim)
+
+    for row in delay.tolist():
+        print(','.join(str(value) for value in row))
 
 
 if __name__ == "__main__":
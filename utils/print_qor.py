@@ -6,29 +6,22 @@ import os
 import sys
 import subprocess
 
+from lib.build_stats import ScanIndex, find_dirs, scan_files, scan_vpr_log
 
-def scan_runtime(step, fname):
-    """ Find runtime of VPR log (if any), else returns empty str. """
-    try:
-        with open(fname, 'r') as f:
-            step_runtime = 0
-            total_runtime = 0
-            for line in f:
-                if line.startswith("# {} took".format(step)):
-                    step_runtime = float(line.split()[3])
 
-                if line.startswith('The entire flow of VPR took'):
-                    total_runtime = float(line.split()[6])
+def format_runtime(stats, step):
+    """ Returns the runtime of step and the rest of the VPR flow as str. """
+    if stats is None:
+        return "", ""
 
-            step_overhead = total_runtime - step_runtime
+    step_runtime = stats['step_runtime'].get(step, 0)
+    step_overhead = stats['total_runtime'] - step_runtime
 
-            return str(step_runtime), str(step_overhead)
-    except FileNotFoundError:
-        return ""
+    return str(step_runtime), str(step_overhead)
 
 
-def scan_critical(fname):
-    """ Find critical path and Fmax from VPR log (if any).
+def format_critical(stats):
+    """ Returns the critical path and Fmax of a route log as str.
 
     Returns
     -------
@@ -36,49 +29,27 @@ def scan_critical(fname):
         Critical path delay in nsec
     fmax : str
         Fmax in MHz.
+    critical_path_geomean : str
+        Geomean critical path delay in nsec
+    fmax_geomean : str
+        Geomean Fmax in MHz.
 
     """
-    try:
-        with open(fname, 'r') as f:
-            final_cpd = 0.0
-            final_fmax = 0.0
-
-            final_cpd_geomean = 0.0
-            final_fmax_geomean = 0.0
-
-            for line in f:
-                if line.startswith('Final critical path delay'):
-                    parts = line.split()
-                    if len(parts) >= 9:
-                        # Final critical path delay (least slack): 16.8182 ns, Fmax: 59.4592 MHz
-                        final_cpd = float(parts[6])
-                        final_fmax = float(parts[9])
-                    elif len(parts) == 8 and parts[7].strip() == 'ns':
-                        # Final critical path delay (least slack): 17.9735 ns
-                        final_cpd = float(parts[6])
-                        final_fmax = 1000. / final_cpd
+    if stats is None:
+        return "", "", "", ""
 
-                if line.startswith(
-                        'Final geomean non-virtual intra-domain period'):
-                    parts = line.split()
+    return str(stats['cpd']), str(stats['fmax']), str(
+        stats['cpd_geomean']
+    ), str(stats['fmax_geomean'])
 
-                    final_cpd_geomean = parts[5]
 
-                    if final_cpd_geomean == "nan":
-                        final_cpd_geomean = "N/A"
-                        final_fmax_geomean = "N/A"
-                        continue
-
-                    final_cpd_geomean = float(parts[5])
-                    final_fmax_geomean = 1000. / final_cpd_geomean
-
-            return str(final_cpd), str(final_fmax), str(
-                final_cpd_geomean
-            ), str(final_fmax_geomean)
-    except FileNotFoundError:
-        pass
+def format_max_rss(*stats):
+    """ Returns the largest max_rss of VPR logs as str. """
+    max_rss = [s['max_rss'] for s in stats if s and s['max_rss'] is not None]
+    if not max_rss:
+        return ""
 
-    return "", ""
+    return str(max(max_rss))
 
 
 def get_last_n_dirs(path, n):
@@ -89,6 +60,14 @@ def get_last_n_dirs(path, n):
 def main():
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("build_dir")
+    parser.add_argument(
+        "--index", help="Index of scanned VPR logs, reused between runs."
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of processes scanning logs, defaults to all CPUs"
+    )
 
     args = parser.parse_args()
 
@@ -104,6 +83,7 @@ def main():
         "Fmax (MHz)",
         "t_crit geomean (ns)",
         "Fmax geomean (MHz)",
+        "max_rss (MiB)",
     ]
 
     print(
@@ -115,41 +95,47 @@ def main():
     )
     w = csv.DictWriter(sys.stdout, fields)
     w.writeheader()
+    index = ScanIndex(args.index)
+
+    roots = find_dirs(args.build_dir, 'pack.log')
+    logs = []
+    for root in roots:
+        for log in ['pack.log', 'place.log', 'route.log']:
+            logs.append(os.path.join(root, log))
+
+    log_stats = scan_files(logs, scan_vpr_log, index=index, jobs=args.jobs)
+    index.save()
+
     rows = list()
-    for root, dirs, files in os.walk(args.build_dir):
-        if 'pack.log' in files:
-            d = {}
-
-            # Get step runtimes with the respective overhead
-            pack_time, pack_overhead = scan_runtime(
-                "Packing", os.path.join(root, 'pack.log')
-            )
-
-            place_time, place_overhead = scan_runtime(
-                "Placement", os.path.join(root, 'place.log')
-            )
-
-            route_time, route_overhead = scan_runtime(
-                "Routing", os.path.join(root, 'route.log')
-            )
-
-            final_cpd, final_fmax, final_cpd_geomean, final_fmax_geomean = scan_critical(
-                os.path.join(root, 'route.log')
-            )
-
-            d['path'] = get_last_n_dirs(root, 2)
-            d['pack time (sec)'] = pack_time
-            d['pack overhead (sec)'] = pack_overhead
-            d['place time (sec)'] = place_time
-            d['place overhead (sec)'] = place_overhead
-            d['route time (sec)'] = route_time
-            d['route overhead (sec)'] = route_overhead
-            d['t_crit (ns)'] = final_cpd
-            d['Fmax (MHz)'] = final_fmax
-            d['t_crit geomean (ns)'] = final_cpd_geomean
-            d['Fmax geomean (MHz)'] = final_fmax_geomean
-
-            rows.append(d)
+    for idx, root in enumerate(roots):
+        pack_stats, place_stats, route_stats = log_stats[3 * idx:3 * idx + 3]
+        d = {}
+
+        # Get step runtimes with the respective overhead
+        pack_time, pack_overhead = format_runtime(pack_stats, "Packing")
+        place_time, place_overhead = format_runtime(place_stats, "Placement")
+        route_time, route_overhead = format_runtime(route_stats, "Routing")
+
+        final_cpd, final_fmax, final_cpd_geomean, final_fmax_geomean = format_critical(
+            route_stats
+        )
+
+        d['path'] = get_last_n_dirs(root, 2)
+        d['pack time (sec)'] = pack_time
+        d['pack overhead (sec)'] = pack_overhead
+        d['place time (sec)'] = place_time
+        d['place overhead (sec)'] = place_overhead
+        d['route time (sec)'] = route_time
+        d['route overhead (sec)'] = route_overhead
+        d['t_crit (ns)'] = final_cpd
+        d['Fmax (MHz)'] = final_fmax
+        d['t_crit geomean (ns)'] = final_cpd_geomean
+        d['Fmax geomean (MHz)'] = final_fmax_geomean
+        d['max_rss (MiB)'] = format_max_rss(
+            pack_stats, place_stats, route_stats
+        )
+
+        rows.append(d)
 
     rows = sorted(rows, key=lambda row: row['path'])
 
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the lib.rr_graph readers, writers, channel packer and node remap
+on synthetic rr graphs (see lib.rr_graph_benchmark).
+
+Each requested graph size is benchmarked in a fresh process, so the reported
+peak RSS only covers that graph.  Results can be appended to a JSON history
+file.  When the history holds an earlier run with the same parameters, the
+throughput of each stage is compared against it.
+
+No device database is required, e.g.:
+
+    rr_graph_benchmark.py --edges 1000000 10000000 --history bench.json
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import tempfile
+
+from lib.rr_graph_benchmark import params_for_edges, run_benchmark
+
+
+def benchmark_job(job):
+    """ Runs one benchmark, returns its history entry. """
+    params, tmp_dir, rr_graph_schema, jobs = job
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as work_dir:
+        if jobs is not None and jobs > 1:
+            with multiprocessing.Pool(jobs) as pool:
+                stages = run_benchmark(
+                    params, work_dir, rr_graph_schema, pool=pool
+                )
+        else:
+            stages = run_benchmark(params, work_dir, rr_graph_schema)
+
+    return {
+        'params': params._asdict(),
+        'jobs': jobs,
+        'stages': stages,
+    }
+
+
+def run_job(job, result_queue):
+    """ Process target of benchmark_job, None is sent on failure. """
+    try:
+        result_queue.put(benchmark_job(job))
+    except BaseException:
+        result_queue.put(None)
+        raise
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(fname):
+    if fname is None or not os.path.exists(fname):
+        return []
+
+    with open(fname) as f:
+        return json.load(f)
+
+
+def find_previous(history, entry):
+    """ Returns the latest history entry run with the same parameters. """
+    for previous in reversed(history):
+        if previous['params'] == entry['params'] and \
+                previous['jobs'] == entry['jobs']:
+            return previous
+
+    return None
+
+
+def print_entry(entry, previous):
+    params = entry['params']
+    print(
+        '{width}x{height} tiles, channel width {channel_width}, '
+        '{pins} pins, fanout {fanout}'.format(**params)
+    )
+
+    previous_stages = {}
+    if previous is not None:
+        print(
+            'Compared to {} ({})'.format(previous['time'], previous['label'])
+        )
+        previous_stages = dict(
+            (stage['name'], stage) for stage in previous['stages']
+        )
+
+    print(
+        '{:16s} {:>10s} {:>10s} {:>12s} {:>10s} {:>8s}'.format(
+            'stage', 'items', 'seconds', 'items/s', 'peak MiB', 'speedup'
+        )
+    )
+    for stage in entry['stages']:
+        speedup = ''
+        previous_stage = previous_stages.get(stage['name'])
+        if previous_stage is not None and previous_stage['items_per_second'] \
+                and stage['items_per_second']:
+            speedup = '{:.2f}x'.format(
+                stage['items_per_second'] / previous_stage['items_per_second']
+            )
+
+        print(
+            '{:16s} {:10d} {:10.3f} {:12.0f} {:10.1f} {:>8s}'.format(
+                stage['name'], stage['items'], stage['seconds'],
+                stage['items_per_second'] or 0, stage['peak_rss_mb'], speedup
+            )
+        )
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        '--edges',
+        type=int,
+        nargs='+',
+        default=[1000000],
+        help='Approximate number of edges of each benchmarked graph'
+    )
+    parser.add_argument('--channel_width', type=int, default=8)
+    parser.add_argument('--pins', type=int, default=8)
+    parser.add_argument('--fanout', type=int, default=4)
+    parser.add_argument('--track_length', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--rr_graph_schema',
+        help='VPR rr_graph_uxsdcxx.capnp schema, enables the capnp stages'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=None,
+        help='Number of processes used to pack channels'
+    )
+    parser.add_argument(
+        '--tmp_dir', help='Directory for the generated rr graph files'
+    )
+    parser.add_argument('--history', help='JSON history file to append to')
+    parser.add_argument(
+        '--label', default='', help='Label of this run in the history'
+    )
+
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+
+    jobs = []
+    for edges in args.edges:
+        params = params_for_edges(
+            edges,
+            channel_width=args.channel_width,
+            pins=args.pins,
+            fanout=args.fanout,
+            track_length=args.track_length,
+            seed=args.seed,
+        )
+        jobs.append((params, args.tmp_dir, args.rr_graph_schema, args.jobs))
+
+    time = datetime.datetime.now().isoformat()
+    revision = git_revision()
+
+    # Each benchmark runs in a new process so its peak RSS is its own.  The
+    # channel packing pool is created by the benchmark process, so the
+    # benchmark processes cannot be daemonic pool workers.
+    ctx = multiprocessing.get_context('spawn')
+    entries = []
+    for job in jobs:
+        result_queue = ctx.SimpleQueue()
+        process = ctx.Process(
+            target=run_job, args=(job, result_queue), daemon=False
+        )
+        process.start()
+        entry = result_queue.get()
+        process.join()
+        assert entry is not None and process.exitcode == 0, process.exitcode
+
+        entry.update(
+            {
+                'time': time,
+                'label': args.label,
+                'revision': revision,
+                'python': platform.python_version(),
+            }
+        )
+        print_entry(entry, find_previous(history, entry))
+        entries.append(entry)
+
+    if args.history is not None:
+        with open(args.history, 'w') as f:
+            json.dump(history + entries, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Computes order independent fingerprints of rr graphs and compares them.
+
+With one graph, prints the record count and hash of each section of the
+graph (see lib.rr_graph_fingerprint).  With two graphs, compares their
+fingerprints and, for the sections that differ, prints the records only
+present in the first graph ("-") or only in the second graph ("+").  The exit
+status is 1 if the graphs differ, so the tool can gate changes to the rr graph
+generation flow on an unchanged output.
+
+Graphs ending in .xml are read as XML, other graphs as capnp, which requires
+--rr_graph_schema.
+"""
+import argparse
+import os.path
+import sys
+
+from lib.rr_graph_fingerprint import (
+    SECTIONS, read_xml_records, read_capnp_records, fingerprint_records,
+    graph_digest, diff_records
+)
+
+
+def graph_records(rr_graph, rr_graph_schema):
+    """ Returns a callable returning the (section, record) iterator of a
+    graph.
+    """
+    if rr_graph.endswith('.xml'):
+        return lambda: read_xml_records(rr_graph)
+
+    assert rr_graph_schema is not None, \
+        '--rr_graph_schema is required to read {}'.format(rr_graph)
+    return lambda: read_capnp_records(rr_graph_schema, rr_graph)
+
+
+def print_fingerprints(fingerprints, f=sys.stdout):
+    for section in SECTIONS:
+        print(
+            '{:12s} {:10d} {}'.format(
+                section, fingerprints[section].count,
+                fingerprints[section].hexdigest()
+            ),
+            file=f
+        )
+    print(
+        '{:12s} {:10s} {}'.format('graph', '', graph_digest(fingerprints)),
+        file=f
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('rr_graph', help='rr graph to fingerprint')
+    parser.add_argument(
+        'other_rr_graph', nargs='?', help='rr graph to compare against'
+    )
+    parser.add_argument(
+        '--rr_graph_schema',
+        help='VPR rr_graph_uxsdcxx.capnp schema, required for capnp graphs'
+    )
+    parser.add_argument(
+        '--max_report',
+        type=int,
+        default=100,
+        help='Maximum number of differing records printed per section'
+    )
+    parser.add_argument(
+        '--chunk_size',
+        type=int,
+        default=1000000,
+        help='Number of records sorted in memory before spilling to disk'
+    )
+    parser.add_argument(
+        '--tmp_dir', help='Directory for the external sort temporary files'
+    )
+
+    args = parser.parse_args()
+
+    rr_graph_schema = None
+    if args.rr_graph_schema is not None:
+        import capnp
+        capnp.remove_import_hook()
+        rr_graph_schema = capnp.load(
+            args.rr_graph_schema,
+            imports=[os.path.dirname(os.path.dirname(capnp.__file__))]
+        )
+
+    records_a = graph_records(args.rr_graph, rr_graph_schema)
+    fingerprints_a = fingerprint_records(records_a())
+
+    if args.other_rr_graph is None:
+        print_fingerprints(fingerprints_a)
+        return
+
+    records_b = graph_records(args.other_rr_graph, rr_graph_schema)
+    fingerprints_b = fingerprint_records(records_b())
+
+    different_sections = []
+    for section in SECTIONS:
+        a = fingerprints_a[section]
+        b = fingerprints_b[section]
+        if a != b:
+            different_sections.append(section)
+
+        print(
+            '{:12s} {:10d} {:10d} {}'.format(
+                section, a.count, b.count, 'same' if a == b else 'DIFFERENT'
+            )
+        )
+
+    if not different_sections:
+        return
+
+    reported = dict((section, 0) for section in different_sections)
+    differences = dict((section, 0) for section in different_sections)
+    for section, sign, line in diff_records(
+            records_a, records_b, different_sections,
+            chunk_size=args.chunk_size, tmp_dir=args.tmp_dir):
+        differences[section] += 1
+        if reported[section] < args.max_report:
+            reported[section] += 1
+            print('{} {} {}'.format(section, sign, line))
+
+    for section in different_sections:
+        print('{}: {} differing records'.format(section, differences[section]))
+
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ be provided.  The initial grid should be provided as a map of 2 element int
 tuples to Tile objects.  Tile objects should already contain their initial
 sites prior to construction of the Grid object.
 
+ArrayGrid provides the same operations on a grid stored as a list of columns,
+which avoids walking the linked mesh for every row/column access.
+
 """
 from enum import Enum
 from collections import namedtuple
@@ -682,3 +685,349 @@ class Grid(object):
         """ Verifies that grid linked list model still represents valid grid.
         """
         self.output_grid()
+
+
+class ArrayGrid(object):
+    """ Array backed alternative to Grid.
+
+    Tiles are stored as a list of columns, so a tile at (x, y) is
+    columns[x][y].  Coordinate lookups are O(1), and inserting empty
+    rows/columns is a bulk list insertion instead of relinking the mesh.
+
+    Rows and columns are identified by their current index rather than the
+    Tile object at their top.  Tile.neighboors is not maintained, use to_mesh
+    to get a Grid view of the current grid.
+
+    Parameters
+    ----------
+
+    grid_loc_map : Dict of 2 int tuple to Tile objects
+        Initial grid of Tile objects.
+    empty_tile_type_pkey : int
+        tile_type_pkey to use when creating new empty tiles during tile splits.
+
+    """
+
+    def __init__(self, grid_loc_map, empty_tile_type_pkey):
+        # Make sure initial grid is sane
+        check_grid_loc(grid_loc_map)
+
+        xs, ys = zip(*grid_loc_map.keys())
+        self.columns = [
+            [grid_loc_map[(x, y)]
+             for y in range(max(ys) + 1)]
+            for x in range(max(xs) + 1)
+        ]
+
+        # Keep list of the initial Tile objects, tile types are split and
+        # merged in the same order as Grid.
+        self.items = list(grid_loc_map.values())
+
+        self.empty_tile_type_pkey = empty_tile_type_pkey
+
+    def width(self):
+        return len(self.columns)
+
+    def height(self):
+        return len(self.columns[0])
+
+    def tile_at(self, loc):
+        """ Return Tile object at loc, or None if loc is outside the grid. """
+        x, y = loc
+        if x < 0 or y < 0 or x >= self.width() or y >= self.height():
+            return None
+
+        return self.columns[x][y]
+
+    def tile_locations(self):
+        """ Return map of Tile object id to current location. """
+        tile_locations = {}
+        for x, column in enumerate(self.columns):
+            for y, tile in enumerate(column):
+                tile_locations[id(tile)] = (x, y)
+
+        return tile_locations
+
+    def column(self, x):
+        """ Return list of Tile objects in column x, from top to bottom. """
+        return list(self.columns[x])
+
+    def row(self, y):
+        """ Return list of Tile objects in row y, from left to right. """
+        return [column[y] for column in self.columns]
+
+    def line(self, index, next_dir):
+        """ Return locations of the row/column at index along next_dir. """
+        if next_dir == SOUTH:
+            return [(index, y) for y in range(self.height())]
+        else:
+            assert next_dir == EAST, next_dir
+            return [(x, index) for x in range(self.width())]
+
+    def walk_in_direction(self, loc, direction):
+        """ Yields locations from loc in direction until the end of the grid.
+
+        First location will always be loc.
+        """
+        dx, dy = DIRECTION_OFFSET[direction]
+        x, y = loc
+        while self.tile_at((x, y)) is not None:
+            yield x, y
+            x += dx
+            y += dy
+
+    def split_tile(self, loc, tile_type_pkeys, split_direction, split_map):
+        """ Split tile at loc in specified direction.
+
+        Refer to Grid.split_tile documentation.
+        """
+        tile = self.tile_at(loc)
+        sites = tile.sites
+        tile.tile_type_pkey = self.empty_tile_type_pkey
+        phy_tile_pkeys = set(tile.phy_tile_pkeys)
+        new_tiles = []
+
+        for new_loc in self.walk_in_direction(loc, split_direction):
+            tile = self.tile_at(new_loc)
+            assert tile.tile_type_pkey == self.empty_tile_type_pkey, (
+                tile.tile_type_pkey
+            )
+            tile.phy_tile_pkeys = []
+
+            new_tiles.append(tile)
+
+            if len(new_tiles) >= len(tile_type_pkeys):
+                break
+
+        for tile, new_tile_type_pkey in zip(new_tiles, tile_type_pkeys):
+            tile.tile_type_pkey = new_tile_type_pkey
+            tile.phy_tile_pkeys = list(
+                set(tile.phy_tile_pkeys) | phy_tile_pkeys
+            )
+            tile.sites = []
+            tile.split_sites = True
+
+        for site in sites:
+            site_idx = split_map[site.x, site.y]
+            assert site_idx < len(tile_type_pkeys), (
+                site, site_idx, tile_type_pkeys
+            )
+            new_tiles[site_idx].sites.append(site)
+
+    def insert_empty(self, index, insert_in_direction, count=1):
+        """ Insert empty rows/columns.
+
+        Inserts count rows/columns of empty tiles next to the row/column at
+        index.  The new empty tiles will have tile_type_pkey set to
+        empty_tile_type_pkey, and have phy_tile_pkeys of the tile they were
+        inserted from.
+
+        Parameters
+        ----------
+        index : int
+            Index of row/column adjcent to where new rows/columns should be
+            inserted.
+        insert_in_direction : Direction
+            Direction to insert empty tiles, from perspective of the
+            row/column at index.
+        count : int
+            Number of rows/columns to insert.
+
+        Returns
+        -------
+        insert_at : int
+            Index of the first inserted row/column.  Rows/columns at or after
+            this index before the insertion are shifted by count.
+
+        """
+        if insert_in_direction in (NORTH, WEST):
+            insert_at = index
+        else:
+            insert_at = index + 1
+
+        def empty_tile(tile):
+            return Tile(
+                root_phy_tile_pkeys=[],
+                phy_tile_pkeys=list(tile.phy_tile_pkeys),
+                tile_type_pkey=self.empty_tile_type_pkey,
+                sites=[]
+            )
+
+        if insert_in_direction in (EAST, WEST):
+            column = self.columns[index]
+            self.columns[insert_at:insert_at] = [
+                [empty_tile(tile) for tile in column] for _ in range(count)
+            ]
+        else:
+            for column in self.columns:
+                tile = column[index]
+                column[insert_at:insert_at] = [
+                    empty_tile(tile) for _ in range(count)
+                ]
+
+        return insert_at
+
+    def split_in_dir(
+            self,
+            index,
+            tile_type_pkey,
+            tile_type_pkeys,
+            split_direction,
+            split_map,
+    ):
+        """ Split row/column of tiles.
+
+        Refer to Grid.split_in_dir documentation, the row/column is given by
+        its index.
+
+        Returns
+        -------
+        num_to_insert : int
+            Number of rows/columns inserted.  Rows/columns after index, and
+            the row/column itself if split_direction is NORTH or WEST, are
+            shifted by num_to_insert.
+
+        """
+        next_dir = SPLIT_NEXT_DIRECTIONS[split_direction]
+        line = self.line(index, next_dir)
+
+        # Find how many empty tiles are required to support the split.
+        #
+        # Like Grid.split_in_dir, the tile next to the split tile is checked
+        # even when splitting into one tile.
+        dx, dy = DIRECTION_OFFSET[split_direction]
+        num_to_check = max(len(tile_type_pkeys), 2)
+        num_to_insert = 0
+        for x, y in line:
+            if self.columns[x][y].tile_type_pkey != tile_type_pkey:
+                continue
+
+            for idx in range(1, num_to_check):
+                tile_in_split = self.tile_at((x + dx * idx, y + dy * idx))
+                if tile_in_split is None:
+                    break
+
+                if tile_in_split.tile_type_pkey != self.empty_tile_type_pkey:
+                    num_to_insert = max(num_to_insert, idx)
+
+        if num_to_insert > 0:
+            self.insert_empty(index, split_direction, count=num_to_insert)
+            if split_direction in (NORTH, WEST):
+                index += num_to_insert
+                line = self.line(index, next_dir)
+
+        for loc in line:
+            if self.tile_at(loc).tile_type_pkey != tile_type_pkey:
+                continue
+
+            self.split_tile(loc, tile_type_pkeys, split_direction, split_map)
+
+        return num_to_insert
+
+    def split_tile_type(
+            self, tile_type_pkey, tile_type_pkeys, split_direction, split_map
+    ):
+        """ Split a specified tile type within grid.
+
+        Refer to Grid.split_tile_type documentation.
+        """
+        tile_locations = self.tile_locations()
+
+        # Rows are split for NORTH/SOUTH splits, columns for EAST/WEST splits.
+        line_coord = 1 if split_direction in (NORTH, SOUTH) else 0
+
+        lines = []
+        for tile in self.items:
+            if tile.tile_type_pkey != tile_type_pkey:
+                continue
+
+            index = tile_locations[id(tile)][line_coord]
+            if index not in lines:
+                lines.append(index)
+
+        # Rows/columns inserted by a split shift the rows/columns after the
+        # insertion point.
+        if split_direction in (NORTH, WEST):
+            shift_from = 0
+        else:
+            shift_from = 1
+
+        while lines:
+            index = lines.pop(0)
+            num_inserted = self.split_in_dir(
+                index, tile_type_pkey, tile_type_pkeys, split_direction,
+                split_map
+            )
+
+            lines = [
+                other + num_inserted if other >= index + shift_from else other
+                for other in lines
+            ]
+
+    def merge_in_dir(self, loc, merge_direction):
+        """ Merge tile at loc in specified direction.
+
+        Refer to Grid.merge_in_dir documentation.
+        """
+        tile = self.tile_at(loc)
+        dx, dy = DIRECTION_OFFSET[merge_direction]
+        merge_into = self.tile_at((loc[0] + dx, loc[1] + dy))
+        assert merge_into is not None, (loc, merge_direction)
+
+        merge_into.root_phy_tile_pkeys.extend(tile.root_phy_tile_pkeys)
+        merge_into.phy_tile_pkeys.extend(tile.phy_tile_pkeys)
+        merge_into.sites.extend(tile.sites)
+
+        tile.sites = list()
+        tile.tile_type_pkey = self.empty_tile_type_pkey
+        tile.root_phy_tile_pkeys = list()
+        tile.phy_tile_pkeys = list()
+
+    def merge_tile_type(self, tile_type_pkey, merge_direction):
+        """ Merge tile types in specified direction.
+
+        Parameters
+        ----------
+        tile_type_pkey : Tile type to split.
+        merge_direction : Direction
+            Direction to merge tiles.
+
+        """
+        tile_locations = self.tile_locations()
+        for tile in self.items:
+            if tile.tile_type_pkey == tile_type_pkey:
+                self.merge_in_dir(tile_locations[id(tile)], merge_direction)
+
+    def output_grid(self):
+        """ Convert grid back to coordinate lookup form.
+
+        Returns
+        -------
+        grid_loc_map : Dict of 2 int tuple to Tile objects
+            Output grid of Tile objects.
+
+        """
+        grid_loc_map = {}
+        for x, column in enumerate(self.columns):
+            for y, tile in enumerate(column):
+                grid_loc_map[(x, y)] = tile
+
+        return grid_loc_map
+
+    def check_grid(self):
+        """ Verifies that the grid is still rectangular. """
+        height = self.height()
+        for column in self.columns:
+            assert len(column) == height, (len(column), height)
+
+    def to_mesh(self):
+        """ Returns a Grid view of the current grid.
+
+        Links the Tile.neighboors of the current tiles, so the Grid shares
+        the Tile objects of this grid.
+        """
+        for column in self.columns:
+            for tile in column:
+                tile.neighboors = {}
+
+        return Grid(self.output_grid(), self.empty_tile_type_pkey)
@@ -2,10 +2,12 @@
 # Run `python3 -m unittest utils.lib.rr_graph.tests.test_channel`
 import unittest
 
-from ..grid import Site, Tile, Grid, check_grid_loc, EAST
+from ..grid import Site, Tile, Grid, ArrayGrid, check_grid_loc, EAST, NORTH, WEST
 
 
 class TestGrid(unittest.TestCase):
+    GRID = Grid
+
     def test_good_grids(self):
         check_grid_loc({
             (0, 0): None,
@@ -60,7 +62,7 @@ class TestGrid(unittest.TestCase):
 
         empty_tile_type_pkey = NUM_X * NUM_Y
 
-        grid = Grid(grid_loc_map, empty_tile_type_pkey)
+        grid = self.GRID(grid_loc_map, empty_tile_type_pkey)
         output_grid_loc_map = grid.output_grid()
 
         for x in range(NUM_X):
@@ -108,7 +110,7 @@ class TestGrid(unittest.TestCase):
 
         empty_tile_type_pkey = NUM_X * NUM_Y
 
-        grid = Grid(grid_loc_map, empty_tile_type_pkey)
+        grid = self.GRID(grid_loc_map, empty_tile_type_pkey)
 
         grid.split_tile_type(
             tile_type_pkey=3,
@@ -195,7 +197,7 @@ class TestGrid(unittest.TestCase):
 
         empty_tile_type_pkey = NUM_X * NUM_Y
 
-        grid = Grid(grid_loc_map, empty_tile_type_pkey)
+        grid = self.GRID(grid_loc_map, empty_tile_type_pkey)
 
         for y in range(NUM_Y):
             grid.split_tile_type(
@@ -244,3 +246,85 @@ class TestGrid(unittest.TestCase):
             self.assertEqual(1, len(output_grid_loc_map[(4, y)].sites))
 
             self.assertFalse(output_grid_loc_map[(NUM_X, y)].split_sites)
+
+
+class TestArrayGrid(TestGrid):
+    GRID = ArrayGrid
+
+    def make_grid_loc_map(self, tile_types):
+        grid_loc_map = {}
+        for y, row in enumerate(tile_types):
+            for x, tile_type_pkey in enumerate(row):
+                coord_idx = x + y * len(row)
+                sites = [
+                    Site(
+                        name='{}, {}'.format(x, y),
+                        phy_tile_pkey=coord_idx,
+                        tile_type_pkey=tile_type_pkey,
+                        site_type_pkey=tile_type_pkey,
+                        site_pkey=2 * coord_idx + site_y,
+                        x=0,
+                        y=site_y,
+                    ) for site_y in range(2)
+                ]
+
+                grid_loc_map[(x, y)] = Tile(
+                    root_phy_tile_pkeys=[coord_idx],
+                    phy_tile_pkeys=[coord_idx],
+                    tile_type_pkey=tile_type_pkey,
+                    sites=sites,
+                )
+
+        return grid_loc_map
+
+    def test_matches_mesh_grid(self):
+        # 0 is the empty tile type, 1 is merged west, 2 is split north.
+        tile_types = [
+            [3, 0, 3, 0, 4],
+            [3, 2, 0, 2, 4],
+            [4, 1, 2, 0, 3],
+            [3, 0, 3, 1, 4],
+            [2, 2, 4, 0, 3],
+        ]
+
+        grid_outputs = []
+        for grid_class in (Grid, ArrayGrid):
+            grid = grid_class(self.make_grid_loc_map(tile_types), 0)
+            grid.merge_tile_type(tile_type_pkey=1, merge_direction=WEST)
+            grid.split_tile_type(
+                tile_type_pkey=2,
+                tile_type_pkeys=[5, 6],
+                split_direction=NORTH,
+                split_map={
+                    (0, 0): 1,
+                    (0, 1): 0,
+                },
+            )
+
+            grid_outputs.append(
+                {
+                    loc: (
+                        tile.tile_type_pkey, tile.root_phy_tile_pkeys,
+                        sorted(tile.phy_tile_pkeys),
+                        [site.site_pkey for site in tile.sites],
+                        tile.split_sites
+                    )
+                    for loc, tile in grid.output_grid().items()
+                }
+            )
+
+        self.assertDictEqual(grid_outputs[0], grid_outputs[1])
+
+    def test_to_mesh(self):
+        grid = ArrayGrid(self.make_grid_loc_map([[1, 2], [3, 4]]), 0)
+        grid.insert_empty(0, EAST)
+
+        mesh = grid.to_mesh()
+        self.assertEqual(
+            [
+                tile.tile_type_pkey
+                for tile in mesh.origin.walk_in_direction(EAST)
+            ],
+            [1, 0, 2],
+        )
+        self.assertIs(mesh.output_grid()[(2, 1)], grid.tile_at((2, 1)))
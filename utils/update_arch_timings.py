@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 import lxml.etree as ET
 import argparse
-from sdf_timing import sdfparse
+import hashlib
 from sdf_timing.utils import get_scale_seconds
+from lib.file_cache import read_pickle, write_pickle
 from lib.pb_type import get_pb_type_chain
+from lib.sdf_cache import SdfCache, load_sdf_files
 import re
 import os
 import sys
@@ -174,7 +176,113 @@ def find_timings(timings, bel, location, site, bels, corner, speed_type):
     return bel_timings
 
 
-def get_bel_timings(element, timings, bels, corner, speed_type):
+# Corner / speed type pairs used when annotating arch.xml elements.
+TIMING_CORNERS = (('SLOW', 'max'), ('FAST', 'min'))
+
+# Bump when the content of the timing index changes to invalidate caches.
+TIMING_INDEX_VERSION = 1
+
+
+def build_timing_index(timings, bels):
+    """Resolves the timings of every (site, location, bel) in `bels`
+       for each corner in TIMING_CORNERS.
+
+       Returns a dict keyed by (site, location, bel, corner, speed_type).
+       Entries for which the timings could not be resolved hold the
+       exception raised by `find_timings`, which is re-raised on lookup."""
+    index = dict()
+    for site in bels:
+        for bel in bels[site]:
+            for location in bels[site][bel]:
+                for corner, speed_type in TIMING_CORNERS:
+                    key = (site, location, bel, corner, speed_type)
+                    try:
+                        index[key] = find_timings(
+                            timings, bel, location, site, bels, corner,
+                            speed_type
+                        )
+                    except Exception as ex:
+                        index[key] = ex
+
+    return index
+
+
+def lookup_timings(index, bel, location, site, corner, speed_type):
+    """Returns timings from a timing index, None if not present"""
+    entry = index.get((site, location, bel, corner, speed_type), None)
+    if isinstance(entry, Exception):
+        raise entry
+
+    return entry
+
+
+def get_sdf_files(sdf_dir):
+    return [
+        os.path.join(sdf_dir, f)
+        for f in os.listdir(sdf_dir)
+        if f.endswith('.sdf')
+    ]
+
+
+def read_timings(sdf_files, sdf_cache=None, jobs=1):
+    """Parses and merges timings from all the SDF files"""
+    timings = dict()
+    for tmp in load_sdf_files(sdf_files, sdf_cache, jobs):
+        mergedicts(tmp, timings)
+
+    return timings
+
+
+def get_timing_index_key(sdf_files, bels_map):
+    """Computes a hash of the SDF files and the bels map content"""
+    h = hashlib.sha256()
+    for f in sorted(sdf_files) + [bels_map]:
+        h.update(os.path.basename(f).encode('utf-8'))
+        with open(f, 'rb') as fp:
+            h.update(fp.read())
+
+    return h.hexdigest()
+
+
+def load_timing_index(
+        sdf_dir, bels_map, cache_file=None, sdf_cache=None, jobs=1
+):
+    """Returns the timing index for the SDF files in `sdf_dir`.
+
+       If `cache_file` is given and holds an index built from the same SDF
+       files and bels map it is used, otherwise the index is built and
+       written to `cache_file`.  SDF files are parsed by `jobs` processes
+       and looked up in `sdf_cache` first."""
+    sdf_files = get_sdf_files(sdf_dir)
+
+    key = None
+    if cache_file is not None:
+        key = get_timing_index_key(sdf_files, bels_map)
+        entry = read_pickle(cache_file)
+        if entry is not None:
+            version, cached_key, index = entry
+            if version == TIMING_INDEX_VERSION and cached_key == key:
+                return index
+
+    import json
+    with open(bels_map, 'r') as fp:
+        bels = json.load(fp)
+
+    timings = read_timings(sdf_files, sdf_cache, jobs)
+
+    if DEBUG:
+        with open("/tmp/dump.json", 'w') as fp:
+            json.dump(timings, fp, indent=4)
+
+    index = build_timing_index(timings, bels)
+
+    if cache_file is not None:
+        write_pickle(cache_file, (TIMING_INDEX_VERSION, key, index))
+
+    return index
+
+
+def get_bel_timings(element, index, corner, speed_type):
     """This function returns all the timings for an arch.xml
        `element`. It determines the bel location by traversing
        the pb_type chain"""
@@ -190,9 +298,7 @@ def get_bel_timings(element, timings, bels, corner, speed_type):
     location = pb_chain[-2]
     site = remove_site_number(pb_chain[1])
 
-    result = find_timings(
-        timings, bel, location, site, bels, corner, speed_type
-    )
+    result = lookup_timings(index, bel, location, site, corner, speed_type)
 
     if DEBUG:
         print(site, bel, location, result is not None, file=sys.stderr)
@@ -216,39 +322,42 @@ def main():
         help="VPR <-> timing info bels mapping json file"
     )
 
+    parser.add_argument(
+        '--timing_index',
+        help="Cache file for the timing index built from the SDF files"
+    )
+    parser.add_argument(
+        '--sdf_cache_dir', help="Cache directory of parsed SDF files"
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help="Number of processes parsing SDF files"
+    )
+
     args = parser.parse_args()
 
     arch_xml = ET.ElementTree()
     root_element = arch_xml.parse(args.input_arch)
 
-    # read bels json
-    import json
-    with open(args.bels_map, 'r') as fp:
-        bels = json.load(fp)
-
-    timings = dict()
-    files = os.listdir(args.sdf_dir)
-    for f in files:
-        if not f.endswith('.sdf'):
-            continue
-        with open(args.sdf_dir + '/' + f, 'r') as fp:
-            try:
-                tmp = sdfparse.parse(fp.read())
-            except Exception as ex:
-                print("{}:".format(args.sdf_dir + '/' + f), file=sys.stderr)
-                print(repr(ex), file=sys.stderr)
-                raise
-            mergedicts(tmp, timings)
+    sdf_cache = None
+    if args.sdf_cache_dir is not None:
+        sdf_cache = SdfCache(args.sdf_cache_dir)
 
-    if DEBUG:
-        with open("/tmp/dump.json", 'w') as fp:
-            json.dump(timings, fp, indent=4)
+    index = load_timing_index(
+        args.sdf_dir,
+        args.bels_map,
+        cache_file=args.timing_index,
+        sdf_cache=sdf_cache,
+        jobs=args.jobs
+    )
 
     for dm in root_element.iter('delay_matrix'):
         if dm.attrib['type'] == 'max':
-            bel_timings = get_bel_timings(dm, timings, bels, 'SLOW', 'max')
+            bel_timings = get_bel_timings(dm, index, 'SLOW', 'max')
         elif dm.attrib['type'] == 'min':
-            bel_timings = get_bel_timings(dm, timings, bels, 'FAST', 'min')
+            bel_timings = get_bel_timings(dm, index, 'FAST', 'min')
         else:
             assert dm.attrib['type']
 
@@ -259,32 +368,32 @@ def main():
 
     for dc in root_element.iter('delay_constant'):
         format_s = dc.attrib['max']
-        max_tim = get_bel_timings(dc, timings, bels, 'SLOW', 'max')
+        max_tim = get_bel_timings(dc, index, 'SLOW', 'max')
         if max_tim is not None:
             dc.attrib['max'] = format_s.format(**max_tim)
 
-        min_tim = get_bel_timings(dc, timings, bels, 'FAST', 'min')
+        min_tim = get_bel_timings(dc, index, 'FAST', 'min')
         if min_tim is not None:
             dc.attrib['min'] = format_s.format(**min_tim)
 
     for tq in root_element.iter('T_clock_to_Q'):
         format_s = tq.attrib['max']
-        max_tim = get_bel_timings(tq, timings, bels, 'SLOW', 'max')
+        max_tim = get_bel_timings(tq, index, 'SLOW', 'max')
         if max_tim is not None:
             tq.attrib['max'] = format_s.format(**max_tim)
 
-        min_tim = get_bel_timings(tq, timings, bels, 'FAST', 'min')
+        min_tim = get_bel_timings(tq, index, 'FAST', 'min')
         if min_tim is not None:
             tq.attrib['min'] = format_s.format(**min_tim)
 
     for ts in root_element.iter('T_setup'):
-        bel_timings = get_bel_timings(ts, timings, bels, 'SLOW', 'max')
+        bel_timings = get_bel_timings(ts, index, 'SLOW', 'max')
         if bel_timings is None:
             continue
         ts.attrib['value'] = ts.attrib['value'].format(**bel_timings)
 
     for th in root_element.iter('T_hold'):
-        bel_timings = get_bel_timings(th, timings, bels, 'FAST', 'min')
+        bel_timings = get_bel_timings(th, index, 'FAST', 'min')
         if bel_timings is None:
             continue
         th.attrib['value'] = th.attrib['value'].format(**bel_timings)
@@ -2,98 +2,217 @@
 """
 This utility script allows to visualize VPR placement. It reads a VPR .place
 file and generates a bitmap with the visualization.
+
+Cells can be colored by block (default), by number of blocks placed in a cell
+("count") or by a hash of the block name ("hash"). When a directory is given
+instead of a .place file all placements in it are rendered in parallel, which
+is useful for comparing design sweeps.
 """
 import argparse
+import multiprocessing
+import os
 import re
-import itertools
+import zlib
 
-from PIL import Image, ImageDraw
+import numpy as np
+from PIL import Image, ImageColor
 
 # =============================================================================
 
+RE_PLACEMENT = re.compile(
+    r"^\s*(?P<net>\S+)\s+(?P<x>[0-9]+)\s+(?P<y>[0-9]+)\s+(?P<z>[0-9]+)"
+)
 
-def load_placement(placement_file):
+RE_GRID_SIZE = re.compile(
+    r"Array size:\s+(?P<x>[0-9]+)\s+x\s+(?P<y>[0-9]+)\s+logic blocks"
+)
+
+WHITE = (0xFF, 0xFF, 0xFF)
+BLACK = (0x00, 0x00, 0x00)
+BLOCK_COLOR = "#2080C0"
+
+# Colors of the "count" mode, from a single block to the most occupied cell.
+COUNT_COLOR_LO = (0x20, 0x80, 0xC0)
+COUNT_COLOR_HI = (0xC0, 0x20, 0x20)
+
+
+def read_placement(placement_file):
     """
-    Loads VPR placement file. Returns a tuple with the grid size and a dict
-    indexed by locations that contains top-level block names.
+    Streams a VPR placement file. Returns a tuple with the grid size and a
+    list of (name, x, y) tuples, one for each placed block.
     """
 
-    RE_PLACEMENT = re.compile(
-        r"^\s*(?P<net>\S+)\s+(?P<x>[0-9]+)\s+(?P<y>[0-9]+)\s+(?P<z>[0-9]+)"
-    )
-
-    RE_GRID_SIZE = re.compile(
-        r"Array size:\s+(?P<x>[0-9]+)\s+x\s+(?P<y>[0-9]+)\s+logic blocks"
-    )
+    grid_size = None
+    blocks = []
 
-    # Load the file
     with open(placement_file, "r") as fp:
-        lines = fp.readlines()
+        for line in fp:
+            line = line.strip()
 
-    # Parse
-    grid_size = None
-    placement = {}
+            if line.startswith("#"):
+                continue
 
-    for line in lines:
-        line = line.strip()
+            # Placement
+            match = RE_PLACEMENT.match(line)
+            if match is not None:
+                blocks.append(
+                    (
+                        match.group("net"),
+                        int(match.group("x")),
+                        int(match.group("y")),
+                    )
+                )
 
-        if line.startswith("#"):
-            continue
+            # Grid size
+            match = RE_GRID_SIZE.match(line)
+            if match is not None:
 
-        # Placement
-        match = RE_PLACEMENT.match(line)
-        if match is not None:
+                grid_size = (int(match.group("x")), int(match.group("y")))
 
-            loc = (int(match.group("x")), int(match.group("y")))
+    return grid_size, blocks
 
-            placement[loc] = match.group("net")
 
-        # Grid size
-        match = RE_GRID_SIZE.match(line)
-        if match is not None:
+def load_placement(placement_file):
+    """
+    Loads VPR placement file. Returns a tuple with the grid size and a dict
+    indexed by locations that contains top-level block names.
+    """
 
-            grid_size = (int(match.group("x")), int(match.group("y")))
+    grid_size, blocks = read_placement(placement_file)
+
+    placement = {}
+    for name, x, y in blocks:
+        placement[(x, y)] = name
 
     return grid_size, placement
 
 
-def generate_image(grid_size, placement, block_size=8, colormap=None):
+def name_hash_color(name):
     """
-    Generates a visualization of the placement.
+    Returns a stable RGB color for a block name.
+    """
+    h = zlib.crc32(name.encode("utf-8"))
+    return ((h >> 16) & 0xFF, (h >> 8) & 0xFF, h & 0xFF)
+
+
+def render_cells(cell_colors, block_size=8):
+    """
+    Renders a (height, width, 3) array of cell colors into an RGB image array.
+    Every cell is drawn as a block with a black border separated from its
+    neighbours by a gap.
     """
 
     block_size = max(block_size, 3)
     gap_size = 1
     cell_size = block_size + 2 * gap_size
 
-    # Create new image
-    dx = grid_size[0] * cell_size + 1
-    dy = grid_size[1] * cell_size + 1
-    image = Image.new("RGB", (dx, dy), color="#FFFFFF")
+    grid_h, grid_w, _ = cell_colors.shape
 
-    # Draw stuff
-    draw = ImageDraw.Draw(image)
-    for cx, cy in itertools.product(range(grid_size[0]), range(grid_size[1])):
+    dx = grid_w * cell_size + 1
+    dy = grid_h * cell_size + 1
+    image = np.full((dy, dx, 3), 0xFF, dtype=np.uint8)
 
-        x0 = cx * cell_size + gap_size
-        y0 = cy * cell_size + gap_size
-        x1 = x0 + block_size
-        y1 = y0 + block_size
+    # Expand each cell to cell_size x cell_size pixels
+    cells = np.repeat(
+        np.repeat(cell_colors, cell_size, axis=0), cell_size, axis=1
+    )
 
-        if (cx, cy) in placement:
-            name = placement[(cx, cy)]
-            if colormap is not None and name in colormap:
-                color = colormap[name]
-            else:
-                color = "#2080C0"
-        else:
-            color = "#FFFFFF"
+    # Block borders
+    for ofs in (gap_size, cell_size - gap_size):
+        cells[ofs::cell_size, :] = BLACK
+        cells[:, ofs::cell_size] = BLACK
+
+    # Gaps between blocks
+    cells[0::cell_size, :] = WHITE
+    cells[:, 0::cell_size] = WHITE
 
-        draw.rectangle((x0, y0, x1, y1), color, "#000000")
+    image[:grid_h * cell_size, :grid_w * cell_size] = cells
 
     return image
 
 
+def generate_image(
+        grid_size, placement, block_size=8, colormap=None, mode="block"
+):
+    """
+    Generates a visualization of the placement.
+
+    The placement is either a dict indexed by locations (as returned by
+    load_placement) or a list of (name, x, y) tuples (as returned by
+    read_placement). The "count" mode requires the latter.
+    """
+
+    if isinstance(placement, dict):
+        blocks = [(name, x, y) for (x, y), name in placement.items()]
+    else:
+        blocks = placement
+
+    cell_colors = np.full(
+        (grid_size[1], grid_size[0], 3), 0xFF, dtype=np.uint8
+    )
+
+    if not blocks:
+        return Image.fromarray(render_cells(cell_colors, block_size), "RGB")
+
+    names, xs, ys = zip(*blocks)
+    xs = np.array(xs, dtype=np.int64)
+    ys = np.array(ys, dtype=np.int64)
+
+    if mode == "count":
+        counts = np.zeros((grid_size[1], grid_size[0]), dtype=np.int64)
+        np.add.at(counts, (ys, xs), 1)
+
+        occupied = counts > 0
+        max_count = counts.max()
+        scale = (counts - 1) / max(max_count - 1, 1)
+
+        lo = np.array(COUNT_COLOR_LO, dtype=np.float64)
+        hi = np.array(COUNT_COLOR_HI, dtype=np.float64)
+        colors = lo + scale[..., np.newaxis] * (hi - lo)
+
+        cell_colors[occupied] = colors[occupied].astype(np.uint8)
+
+    else:
+        # Keep the last block placed at each location
+        last = {}
+        for i, loc in enumerate(zip(xs.tolist(), ys.tolist())):
+            last[loc] = i
+        idx = np.array(list(last.values()), dtype=np.int64)
+
+        unique_names, name_idx = np.unique(
+            np.array(names, dtype=object)[idx].astype(str),
+            return_inverse=True
+        )
+
+        palette = np.empty((len(unique_names), 3), dtype=np.uint8)
+        for i, name in enumerate(unique_names):
+            if mode == "hash":
+                palette[i] = name_hash_color(name)
+            elif colormap is not None and name in colormap:
+                palette[i] = ImageColor.getrgb(colormap[name])
+            else:
+                palette[i] = ImageColor.getrgb(BLOCK_COLOR)
+
+        cell_colors[ys[idx], xs[idx]] = palette[name_idx.reshape(-1)]
+
+    return Image.fromarray(render_cells(cell_colors, block_size), "RGB")
+
+
+def render_placement(place_file, image_file, block_size, colormap, mode):
+    """
+    Loads a placement and saves its visualization.
+    """
+    grid_size, blocks = read_placement(place_file)
+    image = generate_image(grid_size, blocks, block_size, colormap, mode)
+    image.save(image_file)
+
+    return image_file
+
+
+def _render_placement(job):
+    return render_placement(*job)
+
+
 # =============================================================================
 
 
@@ -105,20 +224,40 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
 
-    parser.add_argument("place", type=str, help="A VPR .place file")
+    parser.add_argument(
+        "place",
+        type=str,
+        help="A VPR .place file or a directory with .place files"
+    )
 
     parser.add_argument(
-        "-o", type=str, default="placement.png", help="Output image file"
+        "-o",
+        type=str,
+        default=None,
+        help="Output image file or directory in batch mode "
+        "(def. placement.png or the input directory)"
     )
 
     parser.add_argument(
         "--block-size", type=int, default=4, help="Block size (def. 4)"
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--mode",
+        type=str,
+        default="block",
+        choices=["block", "count", "hash"],
+        help="Cell coloring mode (def. block)"
+    )
 
-    # Load placement
-    grid_size, placement = load_placement(args.place)
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of parallel jobs in batch mode"
+    )
+
+    args = parser.parse_args()
 
     # Colormap
     colormap = {
@@ -126,9 +265,40 @@ def main():
         "$false": "#000000",
     }
 
-    # Generate the image
-    image = generate_image(grid_size, placement, args.block_size, colormap)
-    image.save(args.o)
+    # Single placement
+    if not os.path.isdir(args.place):
+        output = args.o if args.o is not None else "placement.png"
+        render_placement(
+            args.place, output, args.block_size, colormap, args.mode
+        )
+        return
+
+    # Batch mode
+    output_dir = args.o if args.o is not None else args.place
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    for fname in sorted(os.listdir(args.place)):
+        if not fname.endswith(".place"):
+            continue
+
+        image_file = os.path.join(
+            output_dir,
+            os.path.splitext(fname)[0] + ".png",
+        )
+        jobs.append(
+            (
+                os.path.join(args.place, fname),
+                image_file,
+                args.block_size,
+                colormap,
+                args.mode,
+            )
+        )
+
+    with multiprocessing.Pool(args.jobs) as pool:
+        for image_file in pool.imap_unordered(_render_placement, jobs):
+            print(image_file)
 
 
 # =============================================================================
@@ -283,7 +283,7 @@ function(ADD_XC_DEVICE_DEFINE_TYPE)
   get_file_target(UPDATE_PACK_PATTERNS_TARGET ${UPDATE_PACK_PATTERNS})
   set(PACK_PATTERN_DEPS ${UPDATE_PACK_PATTERNS_TARGET})
 
-  set(TIMING_IMPORT "${PYTHON3} ${UPDATE_ARCH_TIMINGS} --sdf_dir ${SDF_TIMING_DIRECTORY} --bels_map ${BELS_MAP} --out_arch /dev/stdout --input_arch /dev/stdin")
+  set(TIMING_IMPORT "${PYTHON3} ${UPDATE_ARCH_TIMINGS} --sdf_dir ${SDF_TIMING_DIRECTORY} --bels_map ${BELS_MAP} --timing_index ${CMAKE_CURRENT_BINARY_DIR}/timing_index.pickle --sdf_cache_dir ${CMAKE_BINARY_DIR}/sdf_cache --out_arch /dev/stdout --input_arch /dev/stdin")
 
   get_file_target(BELS_MAP_TARGET ${BELS_MAP})
   get_file_target(UPDATE_ARCH_TIMINGS_TARGET ${UPDATE_ARCH_TIMINGS})
@@ -9,7 +9,9 @@ function(get_project_ray_dependencies db_dir var part element)
 endfunction()
 
 function(PROJECT_RAY_ARCH)
-  set(options)
+  # COMPRESS_LAYOUT option merges identical tiles of the fixed layout into
+  #     <region> elements, see prjxray_arch_import.py --compress_layout.
+  set(options COMPRESS_LAYOUT)
   set(oneValueArgs ARCH PART USE_ROI DEVICE GRAPH_LIMIT USE_OVERLAY)
   set(multiValueArgs TILE_TYPES PB_TYPES)
   cmake_parse_arguments(
@@ -158,6 +160,10 @@ function(PROJECT_RAY_ARCH)
   endif()
 
   append_file_dependency(CHANNELS_DEPS ${GENERIC_CHANNELS})
+  set(EDGE_CACHE
+    ${f4pga-arch-defs_SOURCE_DIR}/xilinx/${FAMILY}/archs/${ARCH}/channels/${PART}/edge_cache.db)
+  append_file_dependency(CHANNELS_DEPS ${EDGE_CACHE})
+  get_file_location(EDGE_CACHE_LOCATION ${EDGE_CACHE})
   append_file_dependency(CHANNELS_DEPS ${f4pga-arch-defs_SOURCE_DIR}/xilinx/${FAMILY}/archs/${ARCH}/pin_assignments.json)
   get_file_location(PIN_ASSIGNMENTS ${f4pga-arch-defs_SOURCE_DIR}/xilinx/${FAMILY}/archs/${ARCH}/pin_assignments.json)
   list(APPEND CHANNELS_DEPS ${PRJRAY_DB_DIR}/${PRJRAY_ARCH}/${FABRIC}/tilegrid.json)
@@ -173,6 +179,7 @@ function(PROJECT_RAY_ARCH)
       --part ${PART}
       --pin_assignments ${PIN_ASSIGNMENTS}
       --connection_database ${CMAKE_CURRENT_BINARY_DIR}/channels.db
+      --edge_cache ${EDGE_CACHE_LOCATION}
       ${ROI_ARG_FOR_CREATE_EDGES}
     DEPENDS
     ${PYTHON3} ${CREATE_EDGES} ${CREATE_EDGES_DEPS} ${CHANNELS_DEPS}
@@ -193,6 +200,11 @@ function(PROJECT_RAY_ARCH)
   string(REPLACE ";" "," TILE_TYPES_COMMA "${PROJECT_RAY_ARCH_TILE_TYPES}")
   string(REPLACE ";" "," PB_TYPES_COMMA "${PROJECT_RAY_ARCH_PB_TYPES}")
 
+  set(COMPRESS_LAYOUT_ARG "")
+  if(PROJECT_RAY_ARCH_COMPRESS_LAYOUT)
+    set(COMPRESS_LAYOUT_ARG --compress_layout)
+  endif()
+
   add_custom_command(
     OUTPUT arch.xml
     COMMAND ${CMAKE_COMMAND} -E env PYTHONPATH=${PRJRAY_DIR}:${f4pga-arch-defs_SOURCE_DIR}/utils
@@ -206,6 +218,7 @@ function(PROJECT_RAY_ARCH)
       --pin_assignments ${PIN_ASSIGNMENTS}
       --device ${DEVICE}
       ${ROI_ARG}
+      ${COMPRESS_LAYOUT_ARG}
     DEPENDS
     ${ARCH_IMPORT}
     ${DEPS}
@@ -291,6 +304,35 @@ function(PROJECT_RAY_PREPARE_DATABASE)
     )
 
   add_file_target(FILE ${PIN_ASSIGNMENTS} GENERATED)
+
+  # Edges of the full device of each part.  They are shared by the ROI,
+  # Overlay and graph limited variants of the part, see PROJECT_RAY_ARCH.
+  set(CREATE_EDGES ${f4pga-arch-defs_SOURCE_DIR}/xilinx/common/utils/prjxray_create_edges.py)
+  foreach(PART ${PROJECT_RAY_PREPARE_DATABASE_PARTS})
+    set(CHANNELS channels/${PART}/channels.db)
+    set(EDGE_CACHE channels/${PART}/edge_cache.db)
+    set(EDGE_CACHE_DEPS "")
+    append_file_dependency(EDGE_CACHE_DEPS ${CHANNELS})
+    append_file_dependency(EDGE_CACHE_DEPS ${PIN_ASSIGNMENTS})
+    add_custom_command(
+      OUTPUT ${EDGE_CACHE}
+      COMMAND ${CMAKE_COMMAND} -E env PYTHONPATH=${PRJRAY_DIR}:${f4pga-arch-defs_SOURCE_DIR}/utils
+      ${PYTHON3} ${CREATE_EDGES}
+      --db_root ${PRJRAY_DB_DIR}/${PRJRAY_ARCH}/
+      --part ${PART}
+      --pin_assignments ${CMAKE_CURRENT_BINARY_DIR}/${PIN_ASSIGNMENTS}
+      --connection_database ${CMAKE_CURRENT_BINARY_DIR}/${CHANNELS}
+      --edge_cache ${CMAKE_CURRENT_BINARY_DIR}/${EDGE_CACHE}
+      --build_edge_cache
+      DEPENDS
+      ${CREATE_EDGES}
+      ${EDGE_CACHE_DEPS}
+      ${DEPS} ${DEPS2} ${DEPS3}
+      ${PYTHON3}
+      )
+
+    add_file_target(FILE ${EDGE_CACHE} GENERATED)
+  endforeach()
 endfunction()
 
 function(PROJECT_RAY_TILE)
@@ -622,8 +664,10 @@ function(PROJECT_RAY_EQUIV_TILE)
     --pb_types ${PROJECT_RAY_EQUIV_TILE_PB_TYPES_ARGS}
     ${EQUIV_ARGS}
     --pin_assignments ${PIN_ASSIGNMENTS}
+    --cache_directory ${CMAKE_CURRENT_BINARY_DIR}/equiv_tiles_cache
     DEPENDS
       ${TILE_IMPORT}
+      ${f4pga-arch-defs_SOURCE_DIR}/xilinx/common/utils/prjxray_tile_import.py
       ${DEPS}
       ${PYTHON3}
     )
@@ -1,66 +1,90 @@
-"""
+""" Annotates the rr inodes of a VPR log read from stdin with their wire names.
+
+Queries are answered by prjxray_query_daemon.py when --daemon_socket is given,
+one batch per chunk of log lines.
 
 """
 import argparse
-import functools
-import pickle
 import re
-import sqlite3
 import sys
 
+from prjxray_query_daemon import (
+    DaemonClient, NodeLookup, connect_read_only, load_node_map
+)
+
+NODE_RE = re.compile('(node|rt_node:) ([1-9][0-9]*)')
+
+# Number of log lines annotated per daemon query.
+CHUNK_LINES = 10000
+
+
+def annotate_lines(lines, inode_names):
+    def replace_inode(match):
+        return match.group(1) + ' ' + inode_names[int(match.group(2))]
+
+    for line in lines:
+        sys.stdout.write(NODE_RE.sub(replace_inode, line))
+
+
+def annotate_with_daemon(client, f):
+    inode_names = {}
 
-def create_lookup_inode(conn, inode_to_graph_map):
-    cur = conn.cursor()
+    def flush(lines):
+        inodes = set()
+        for line in lines:
+            for match in NODE_RE.finditer(line):
+                inode = int(match.group(2))
+                if inode not in inode_names:
+                    inodes.add(inode)
 
-    @functools.lru_cache(maxsize=1024 * 1024)
-    def lookup_inode(inode):
-        if inode not in inode_to_graph_map:
-            return '{}'.format(inode)
-        else:
-            cur.execute(
-                """
-SELECT phy_tile.name, wire_in_tile.name
-FROM graph_node
-INNER JOIN wire ON graph_node.node_pkey = wire.node_pkey
-INNER JOIN wire_in_tile ON wire.wire_in_tile_pkey = wire_in_tile.pkey
-INNER JOIN phy_tile ON wire.phy_tile_pkey = phy_tile.pkey
-WHERE graph_node.pkey = ?
-LIMIT 1;""", (inode_to_graph_map[inode], )
-            )
-            tile, wire = cur.fetchone()
+        inodes = sorted(inodes)
+        for inode, name in zip(inodes, client.query('describe_inodes',
+                                                    inodes=inodes)):
+            inode_names[inode] = name
 
-            return '{}/{} ({})'.format(tile, wire, inode)
+        annotate_lines(lines, inode_names)
 
-    return lookup_inode
+    lines = []
+    for line in f:
+        lines.append(line)
+        if len(lines) >= CHUNK_LINES:
+            flush(lines)
+            lines = []
+
+    flush(lines)
+
+
+class InodeNames(object):
+    """ Mapping of inode to name, looked up on demand. """
+
+    def __init__(self, lookup):
+        self.lookup = lookup
+
+    def __getitem__(self, inode):
+        return self.lookup.describe_inode(inode)
 
 
 def main():
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument('--rrgraph_node_map', required=True)
-    parser.add_argument('--connection_database', required=True)
+    parser.add_argument('--rrgraph_node_map')
+    parser.add_argument('--connection_database')
+    parser.add_argument('--daemon_socket')
 
     args = parser.parse_args()
 
-    with open(args.rrgraph_node_map, 'rb') as f:
-        node_map = pickle.load(f)
+    if args.daemon_socket is not None:
+        with DaemonClient(args.daemon_socket) as client:
+            annotate_with_daemon(client, sys.stdin)
+        return
 
-    inode_to_graph_map = {}
-    for graph_node_pkey, rr_inode in node_map.items():
-        assert rr_inode not in inode_to_graph_map
-        inode_to_graph_map[rr_inode] = graph_node_pkey
+    assert args.rrgraph_node_map is not None
+    assert args.connection_database is not None
 
-    conn = sqlite3.connect(
-        'file:{}?mode=ro'.format(args.connection_database), uri=True
+    lookup = NodeLookup(
+        connect_read_only(args.connection_database),
+        load_node_map(args.rrgraph_node_map)
     )
-
-    lookup_inode = create_lookup_inode(conn, inode_to_graph_map)
-
-    def replace_inode(match):
-        return match.group(1) + ' ' + lookup_inode(int(match.group(2)))
-
-    NODE_RE = re.compile('(node|rt_node:) ([1-9][0-9]*)')
-    for line in sys.stdin:
-        sys.stdout.write(NODE_RE.sub(replace_inode, line))
+    annotate_lines(sys.stdin, InodeNames(lookup))
 
 
 if __name__ == "__main__":
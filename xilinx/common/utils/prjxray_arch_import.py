@@ -11,6 +11,7 @@ IO placement spefications to target the synthetic IO pads.
 """
 from __future__ import print_function
 import argparse
+import copy
 import prjxray.db
 from prjxray.roi import Roi
 from prjxray.overlay import Overlay
@@ -475,28 +476,66 @@ def create_synth_constant_tiles(
     })
 
 
-def get_phy_tiles(conn, tile_pkey):
-    """ Returns the locations of all physical tiles for specified tile. """
-    c = conn.cursor()
-    c2 = conn.cursor()
-
-    phy_locs = []
-    for (phy_tile_pkey, ) in c.execute("""
-SELECT phy_tile_pkey FROM tile_map WHERE tile_pkey = ?""", (tile_pkey, )):
-        c2.execute(
-            "SELECT grid_x, grid_y FROM phy_tile WHERE pkey = ?",
-            (phy_tile_pkey, )
+class LayoutData(object):
+    """ Tile and site data used when emitting the grid layout.
+
+    The data is loaded with one query per table up front, rather than with
+    several queries per tile.
+
+    """
+
+    def __init__(self, conn):
+        c = conn.cursor()
+
+        self.tile_type_names = dict(
+            c.execute("SELECT pkey, name FROM tile_type")
         )
-        loc = c2.fetchone()
-        phy_locs.append(grid_types.GridLoc(*loc))
 
-    return phy_locs
+        self.prohibited_phy_tiles = set(
+            phy_tile_pkey for (phy_tile_pkey, ) in c.execute(
+                """
+SELECT DISTINCT phy_tile_pkey FROM site_instance WHERE prohibited;"""
+            )
+        )
+
+        # Map of tile_pkey to list of (name, tile type, GridLoc) of the
+        # physical tiles in the tile.
+        self.phy_tiles = {}
+        for tile_pkey, phy_tile_name, tile_type, grid_x, grid_y in c.execute(
+                """
+SELECT
+    tile_map.tile_pkey,
+    phy_tile.name,
+    tile_type.name,
+    phy_tile.grid_x,
+    phy_tile.grid_y
+FROM tile_map
+INNER JOIN phy_tile ON tile_map.phy_tile_pkey = phy_tile.pkey
+INNER JOIN tile_type ON phy_tile.tile_type_pkey = tile_type.pkey
+ORDER BY tile_map.tile_pkey, phy_tile.pkey;"""):
+            if tile_pkey not in self.phy_tiles:
+                self.phy_tiles[tile_pkey] = []
+
+            self.phy_tiles[tile_pkey].append(
+                (phy_tile_name, tile_type, grid_types.GridLoc(grid_x, grid_y))
+            )
 
+        # Map of site_as_tile_pkey to (site type name, site x coordinate).
+        self.site_as_tile_sites = {}
+        for site_as_tile_pkey, site_type_name, x in c.execute("""
+SELECT site_as_tile.pkey, site_type.name, site.x_coord
+FROM site_as_tile
+INNER JOIN site ON site_as_tile.site_pkey = site.pkey
+INNER JOIN site_type ON site.site_type_pkey = site_type.pkey;"""):
+            self.site_as_tile_sites[site_as_tile_pkey] = (site_type_name, x)
 
-def is_in_roi(conn, roi, tile_pkey):
+
+def is_in_roi(layout_data, roi, tile_pkey):
     """ Returns if the specified tile is in the ROI. """
-    phy_locs = get_phy_tiles(conn, tile_pkey)
-    return any(roi.tile_in_roi(loc) for loc in phy_locs)
+    return any(
+        roi.tile_in_roi(loc)
+        for _, _, loc in layout_data.phy_tiles.get(tile_pkey, [])
+    )
 
 
 # Map instance type (e.g. IOB_X1Y10) to:
@@ -631,27 +670,16 @@ ORDER BY site_instance.x_coord, site_instance.y_coord, site_type.name;""",
     return " ".join(prefixes)
 
 
-def get_fasm_tile_prefix(conn, g, tile_pkey, site_as_tile_pkey, tile_capacity):
+def get_fasm_tile_prefix(
+        conn, g, layout_data, tile_pkey, site_as_tile_pkey, tile_capacity
+):
     """ Returns FASM prefix of specified tile. """
     c = conn.cursor()
 
-    c.execute(
-        """
-SELECT
-    phy_tile.name,
-    tile_type.name
-FROM phy_tile
-INNER JOIN tile_type
-ON phy_tile.tile_type_pkey = tile_type.pkey
-WHERE
-    phy_tile.pkey IN (SELECT phy_tile_pkey FROM tile_map WHERE tile_pkey = ?);
-        """, (tile_pkey, )
-    )
-
     # If this tile has multiples phy_tile's, make sure only one has bitstream
     # data, otherwise the tile split was invalid.
     tile_type_map = {}
-    for tilename, tile_type in c:
+    for tilename, tile_type, _ in layout_data.phy_tiles.get(tile_pkey, []):
         gridinfo = g.gridinfo_at_tilename(tilename)
         is_vbrk = gridinfo.tile_type.find('VBRK') != -1
         is_pss = gridinfo.tile_type.startswith('PSS')
@@ -685,24 +713,8 @@ WHERE
         # that is embedded in the tile.
         if site_as_tile_pkey is not None:
             assert tile_capacity == 1
-            c.execute(
-                "SELECT site_pkey FROM site_as_tile WHERE pkey = ?",
-                (site_as_tile_pkey, )
-            )
-            site_pkey = c.fetchone()[0]
-
-            c.execute(
-                """
-                SELECT site_type_pkey, x_coord FROM site WHERE pkey = ?
-                """, (site_pkey, )
-            )
-            site_type_pkey, x = c.fetchone()
-
-            c.execute(
-                "SELECT name FROM site_type WHERE pkey = ?",
-                (site_type_pkey, )
-            )
-            site_type_name = c.fetchone()[0]
+            site_type_name, x = layout_data.site_as_tile_sites[
+                site_as_tile_pkey]
 
             tile_prefix = '{}.{}_X{}'.format(tile_prefix, site_type_name, x)
 
@@ -770,8 +782,8 @@ def get_tiles(
 
     """
     c = conn.cursor()
-    c2 = conn.cursor()
 
+    layout_data = LayoutData(conn)
     only_emit_roi = roi is not None
 
     for tile_pkey, grid_x, grid_y, phy_tile_pkey, tile_type_pkey, site_as_tile_pkey in c.execute(
@@ -779,19 +791,10 @@ def get_tiles(
         SELECT pkey, grid_x, grid_y, phy_tile_pkey, tile_type_pkey, site_as_tile_pkey FROM tile
         """):
 
-        if phy_tile_pkey is not None:
-            c2.execute(
-                "SELECT prohibited FROM site_instance WHERE phy_tile_pkey = ?",
-                (phy_tile_pkey, )
-            )
-
-            any_prohibited_sites = any(
-                prohibited for (prohibited, ) in c2.fetchall()
-            )
-
-            # Skip generation of tiles containing prohibited sites
-            if any_prohibited_sites:
-                continue
+        # Skip generation of tiles containing prohibited sites
+        if phy_tile_pkey is not None and \
+                phy_tile_pkey in layout_data.prohibited_phy_tiles:
+            continue
 
         # Just output synth tiles, no additional processing is required here.
         if (grid_x, grid_y) in synth_loc_map:
@@ -800,15 +803,12 @@ def get_tiles(
             yield vpr_tile_type, grid_x, grid_y, lambda x: None
             continue
 
-        c2.execute(
-            "SELECT name FROM tile_type WHERE pkey = ?", (tile_type_pkey, )
-        )
-        tile_type = c2.fetchone()[0]
+        tile_type = layout_data.tile_type_names[tile_type_pkey]
         if tile_type not in tile_types:
             # We don't want this tile
             continue
 
-        if only_emit_roi and not is_in_roi(conn, roi, tile_pkey):
+        if only_emit_roi and not is_in_roi(layout_data, roi, tile_pkey):
             # Tile is outside ROI, skip it
             continue
 
@@ -823,12 +823,100 @@ def get_tiles(
             meta_fun = get_none_tile_prefix
         else:
             meta_fun = get_fasm_tile_prefix(
-                conn, g, tile_pkey, site_as_tile_pkey, tile_capacity[tile_type]
+                conn, g, layout_data, tile_pkey, site_as_tile_pkey,
+                tile_capacity[tile_type]
             )
 
         yield vpr_tile_type, grid_x, grid_y, meta_fun
 
 
+def find_regions(locs):
+    """ Covers a set of grid locations with rectangular regions.
+
+    Locations are first grouped into runs of consecutive rows in each column,
+    then identical runs in consecutive columns are merged.
+
+    Returns
+    -------
+    List of (startx, endx, starty, endy) tuples, inclusive.
+
+    """
+    columns = {}
+    for grid_x, grid_y in locs:
+        if grid_x not in columns:
+            columns[grid_x] = []
+        columns[grid_x].append(grid_y)
+
+    column_runs = {}
+    for grid_x, ys in columns.items():
+        ys.sort()
+        starty = ys[0]
+        for prev_y, grid_y in zip(ys, ys[1:] + [None]):
+            if grid_y != prev_y + 1:
+                run = (starty, prev_y)
+                if run not in column_runs:
+                    column_runs[run] = []
+                column_runs[run].append(grid_x)
+                starty = grid_y
+
+    regions = []
+    for (starty, endy), xs in column_runs.items():
+        xs.sort()
+        startx = xs[0]
+        for prev_x, grid_x in zip(xs, xs[1:] + [None]):
+            if grid_x != prev_x + 1:
+                regions.append((startx, prev_x, starty, endy))
+                startx = grid_x
+
+    return sorted(regions)
+
+
+def add_compressed_layout(fixed_layout_xml, tiles):
+    """ Adds tiles to the fixed layout, merging identical tiles.
+
+    Tiles of the same VPR tile type and with identical metadata are emitted
+    as <region> elements covering them, remaining tiles as <single> elements.
+    VPR attaches the metadata of a region to every tile in it, so tiles with
+    per tile FASM prefixes are not merged.
+
+    """
+    tile_groups = {}
+    for vpr_tile_type, grid_x, grid_y, metadata_function in tiles:
+        metadata_xml = ET.Element('metadata_holder')
+        metadata_function(metadata_xml)
+
+        key = (vpr_tile_type, ET.tostring(metadata_xml))
+        if key not in tile_groups:
+            tile_groups[key] = (metadata_xml, [])
+        tile_groups[key][1].append((grid_x, grid_y))
+
+    for (vpr_tile_type, _), (metadata_xml, locs) in tile_groups.items():
+        for startx, endx, starty, endy in find_regions(locs):
+            if startx == endx and starty == endy:
+                loc_xml = ET.SubElement(
+                    fixed_layout_xml, 'single', {
+                        'priority': '1',
+                        'type': vpr_tile_type,
+                        'x': str(startx),
+                        'y': str(starty),
+                    }
+                )
+            else:
+                loc_xml = ET.SubElement(
+                    fixed_layout_xml, 'region', {
+                        'priority': '1',
+                        'type': vpr_tile_type,
+                        'startx': str(startx),
+                        'endx': str(endx),
+                        'starty': str(starty),
+                        'endy': str(endy),
+                    }
+                )
+
+            for child in metadata_xml:
+                loc_xml.append(copy.deepcopy(child))
+
+
 def add_constant_synthetic_tiles(model_xml, complexblocklist_xml, tiles_xml):
     synth_tile_types = {}
     create_synth_constant_tiles(
@@ -971,6 +1059,11 @@ def main():
         '--graph_limit',
         help='Limit grid to specified dimensions in x_min,y_min,x_max,y_max',
     )
+    parser.add_argument(
+        '--compress_layout',
+        action='store_true',
+        help='Merge identical tiles of the layout into <region> elements',
+    )
 
     args = parser.parse_args()
 
@@ -1180,24 +1273,29 @@ def main():
             }
         )
 
-        for vpr_tile_type, grid_x, grid_y, metadata_function in get_tiles(
-                conn=conn,
-                g=g,
-                roi=roi,
-                synth_loc_map=synth_loc_map,
-                synth_tile_map=synth_tile_map,
-                tile_types=tile_types,
-                tile_capacity=tile_capacity,
-        ):
-            single_xml = ET.SubElement(
-                fixed_layout_xml, 'single', {
-                    'priority': '1',
-                    'type': vpr_tile_type,
-                    'x': str(grid_x),
-                    'y': str(grid_y),
-                }
-            )
-            metadata_function(single_xml)
+        tiles = get_tiles(
+            conn=conn,
+            g=g,
+            roi=roi,
+            synth_loc_map=synth_loc_map,
+            synth_tile_map=synth_tile_map,
+            tile_types=tile_types,
+            tile_capacity=tile_capacity,
+        )
+
+        if args.compress_layout:
+            add_compressed_layout(fixed_layout_xml, tiles)
+        else:
+            for vpr_tile_type, grid_x, grid_y, metadata_function in tiles:
+                single_xml = ET.SubElement(
+                    fixed_layout_xml, 'single', {
+                        'priority': '1',
+                        'type': vpr_tile_type,
+                        'x': str(grid_x),
+                        'y': str(grid_y),
+                    }
+                )
+                metadata_function(single_xml)
 
         switchlist_xml = ET.SubElement(arch_xml, 'switchlist')
 
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+""" Checks the compressed layout of prjxray_arch_import.
+
+Run from xilinx/common/utils, with prjxray and utils in PYTHONPATH.
+"""
+
+import random
+import unittest
+
+import lxml.etree as ET
+
+from prjxray_arch_import import add_compressed_layout, find_regions
+
+
+def region_locs(region):
+    startx, endx, starty, endy = region
+    for grid_x in range(startx, endx + 1):
+        for grid_y in range(starty, endy + 1):
+            yield grid_x, grid_y
+
+
+def make_metadata_function(fasm_prefix):
+    """ Returns a metadata function writing fasm_prefix, None for none. """
+
+    def add_metadata(loc_xml):
+        if fasm_prefix is None:
+            return
+
+        metadata_xml = ET.SubElement(loc_xml, 'metadata')
+        meta_xml = ET.SubElement(metadata_xml, 'meta', {'name': 'fasm_prefix'})
+        meta_xml.text = fasm_prefix
+
+    return add_metadata
+
+
+def expand_layout(fixed_layout_xml):
+    """ Returns a map of each location of the layout to its tile type and
+    metadata, checking that no location is covered twice.
+    """
+    tiles = {}
+    for loc_xml in fixed_layout_xml:
+        if loc_xml.tag == 'single':
+            grid_x = int(loc_xml.attrib['x'])
+            grid_y = int(loc_xml.attrib['y'])
+            region = (grid_x, grid_x, grid_y, grid_y)
+        else:
+            assert loc_xml.tag == 'region', loc_xml.tag
+            region = tuple(
+                int(loc_xml.attrib[attr])
+                for attr in ('startx', 'endx', 'starty', 'endy')
+            )
+
+        fasm_prefixes = [meta.text for meta in loc_xml.iter('meta')]
+        assert len(fasm_prefixes) <= 1, fasm_prefixes
+        fasm_prefix = fasm_prefixes[0] if fasm_prefixes else None
+
+        for loc in region_locs(region):
+            assert loc not in tiles, loc
+            tiles[loc] = (loc_xml.attrib['type'], fasm_prefix)
+
+    return tiles
+
+
+class TestFindRegions(unittest.TestCase):
+    def check_regions(self, locs):
+        regions = find_regions(locs)
+
+        covered = []
+        for region in regions:
+            startx, endx, starty, endy = region
+            self.assertLessEqual(startx, endx)
+            self.assertLessEqual(starty, endy)
+            covered.extend(region_locs(region))
+
+        # Exactly the input locations, each once.
+        self.assertEqual(len(covered), len(set(covered)))
+        self.assertEqual(set(covered), set(locs))
+
+        return regions
+
+    def test_rectangle(self):
+        locs = [(x, y) for x in range(2, 6) for y in range(1, 4)]
+        self.assertEqual(self.check_regions(locs), [(2, 5, 1, 3)])
+
+    def test_columns(self):
+        locs = [(0, 0), (0, 1), (1, 0), (1, 1), (1, 2), (3, 0), (3, 1)]
+        self.assertEqual(
+            self.check_regions(locs), [
+                (0, 0, 0, 1),
+                (1, 1, 0, 2),
+                (3, 3, 0, 1),
+            ]
+        )
+
+    def test_random(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            locs = set()
+            for _ in range(rng.randint(1, 120)):
+                locs.add((rng.randrange(15), rng.randrange(15)))
+
+            self.check_regions(list(locs))
+
+
+class TestAddCompressedLayout(unittest.TestCase):
+    def test_layout(self):
+        rng = random.Random(0)
+
+        tiles = []
+        expected_tiles = {}
+        for grid_x in range(12):
+            for grid_y in range(10):
+                if rng.random() < 0.1:
+                    continue
+
+                tile_type = rng.choice(['INT', 'CLB', 'BRAM'])
+                if tile_type == 'INT':
+                    fasm_prefix = None
+                elif tile_type == 'CLB':
+                    # Per tile prefix, never merged.
+                    fasm_prefix = 'CLB_X{}Y{}'.format(grid_x, grid_y)
+                else:
+                    fasm_prefix = rng.choice(['BRAM_A', 'BRAM_B'])
+
+                tiles.append(
+                    (
+                        tile_type, grid_x, grid_y,
+                        make_metadata_function(fasm_prefix)
+                    )
+                )
+                expected_tiles[grid_x, grid_y] = (tile_type, fasm_prefix)
+
+        fixed_layout_xml = ET.Element('fixed_layout')
+        add_compressed_layout(fixed_layout_xml, tiles)
+
+        self.assertEqual(expand_layout(fixed_layout_xml), expected_tiles)
+
+        tags = set()
+        for loc_xml in fixed_layout_xml:
+            tags.add((loc_xml.attrib['type'], loc_xml.tag))
+        self.assertIn(('INT', 'region'), tags)
+        self.assertIn(('BRAM', 'region'), tags)
+        self.assertNotIn(('CLB', 'region'), tags)
+
+    def test_metadata_is_copied(self):
+        tiles = [
+            ('BRAM', 0, 0, make_metadata_function('BRAM_A')),
+            ('BRAM', 0, 1, make_metadata_function('BRAM_A')),
+            ('BRAM', 1, 0, make_metadata_function('BRAM_B')),
+        ]
+
+        fixed_layout_xml = ET.Element('fixed_layout')
+        add_compressed_layout(fixed_layout_xml, tiles)
+
+        self.assertEqual(
+            sorted(
+                ET.tostring(loc_xml).decode('utf-8')
+                for loc_xml in fixed_layout_xml
+            ), [
+                '<region priority="1" type="BRAM" startx="0" endx="0" '
+                'starty="0" endy="1"><metadata>'
+                '<meta name="fasm_prefix">BRAM_A</meta></metadata></region>',
+                '<single priority="1" type="BRAM" x="1" y="0"><metadata>'
+                '<meta name="fasm_prefix">BRAM_B</meta></metadata></single>',
+            ]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
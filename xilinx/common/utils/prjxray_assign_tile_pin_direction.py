@@ -14,14 +14,14 @@ prjxray_assign_tile_pin_direction.
 
 """
 import argparse
+import multiprocessing
 from collections import namedtuple
 import prjxray.db
 import prjxray.tile
 import simplejson as json
 from lib.rr_graph import tracks
 from lib.connection_database import (
-    NodeClassification, yield_logical_wire_info_from_node, get_track_model,
-    node_to_site_pins, get_pin_name_of_wire
+    NodeClassification, yield_logical_wire_info_from_node, get_track_model
 )
 from prjxray_constant_site_pins import yield_ties_to_wire
 from lib import progressbar_utils
@@ -35,83 +35,241 @@ DirectConnection = namedtuple(
 )
 
 
-def handle_direction_connections(conn, direct_connections, edge_assignments):
-    # Edges with mux should have one source tile and one destination_tile.
-    # The pin from the source_tile should face the destination_tile.
-    #
-    # It is expected that all edges_with_mux will lies in a line (e.g. X only or
-    # Y only).
-    c = conn.cursor()
-    for src_wire_pkey, dest_wire_pkey, pip_in_tile_pkey, switch_pkey in \
-            progressbar_utils.progressbar(
-            c.execute("""
-SELECT src_wire_pkey, dest_wire_pkey, pip_in_tile_pkey, switch_pkey FROM edge_with_mux;"""
-                      )):
+class ConnectionSnapshot(object):
+    """ In-memory snapshot of the connection database used to assign pins.
 
-        c2 = conn.cursor()
+    Holds the tile, tile type, site type, site_as_tile and wire_in_tile
+    tables, the sites pins of the direct connections (edge_with_mux) and the
+    tracks adjacent to each EDGES_TO_CHANNEL node.  Each is loaded with a
+    single query, so assignment does not need per node or per wire queries.
+    """
 
-        # Get the node that is attached to the source.
-        c2.execute(
-            """
-SELECT node_pkey FROM wire WHERE pkey = ?""", (src_wire_pkey, )
-        )
-        (src_node_pkey, ) = c2.fetchone()
+    def __init__(self, conn):
+        cur = conn.cursor()
 
-        # Find the wire connected to the source.
-        src_wire = list(node_to_site_pins(conn, src_node_pkey))
-        assert len(src_wire) == 1
-        source_wire_pkey, src_tile_pkey, src_wire_in_tile_pkey = src_wire[0]
+        self.tile_type_names = {}
+        for pkey, name in cur.execute("SELECT pkey, name FROM tile_type;"):
+            self.tile_type_names[pkey] = name
 
-        c2.execute(
+        self.tiles = {}
+        for pkey, tile_type_pkey, grid_x, grid_y, site_as_tile_pkey in \
+                cur.execute("""
+SELECT pkey, tile_type_pkey, grid_x, grid_y, site_as_tile_pkey FROM tile;"""):
+            self.tiles[pkey] = (
+                tile_type_pkey, grid_x, grid_y, site_as_tile_pkey
+            )
+
+        # (tile_type, site_type) of each site_as_tile.
+        self.site_as_tiles = list(
+            cur.execute(
+                """
+SELECT tile_type.name, site_type.name
+FROM site_as_tile
+INNER JOIN tile_type ON tile_type.pkey = site_as_tile.tile_type_pkey
+INNER JOIN site ON site.pkey = site_as_tile.site_pkey
+INNER JOIN site_type ON site_type.pkey = site.site_type_pkey;"""
+            )
+        )
+
+        self.wire_in_tiles = {}
+        self.wire_in_tile_names = set()
+        self.tile_type_wire_names = {}
+        for pkey, name, tile_type_pkey, site_pin_pkey in cur.execute("""
+SELECT pkey, name, tile_type_pkey, site_pin_pkey FROM wire_in_tile;"""):
+            self.wire_in_tiles[pkey] = (name, site_pin_pkey)
+            self.wire_in_tile_names.add(name)
+
+            if tile_type_pkey not in self.tile_type_wire_names:
+                self.tile_type_wire_names[tile_type_pkey] = []
+            self.tile_type_wire_names[tile_type_pkey].append(name)
+
+        self.site_pin_names = {}
+        for pkey, name in cur.execute("SELECT pkey, name FROM site_pin;"):
+            self.site_pin_names[pkey] = name
+
+        # Wire in tile pkeys that have wires in each tile type.
+        self.tile_type_wires = {}
+        for tile_type_pkey, wire_in_tile_pkey in cur.execute("""
+SELECT DISTINCT tile.tile_type_pkey, wire.wire_in_tile_pkey
+FROM wire
+INNER JOIN tile ON tile.pkey = wire.tile_pkey;"""):
+            if tile_type_pkey not in self.tile_type_wires:
+                self.tile_type_wires[tile_type_pkey] = set()
+            self.tile_type_wires[tile_type_pkey].add(wire_in_tile_pkey)
+
+        cur.execute(
             """
-SELECT tile_type_pkey, grid_x, grid_y FROM tile WHERE pkey = ?""",
-            (src_tile_pkey, )
+SELECT vcc_track_pkey, gnd_track_pkey FROM constant_sources;
+    """
         )
-        src_tile_type_pkey, source_loc_grid_x, source_loc_grid_y = c2.fetchone(
+        vcc_track_pkey, gnd_track_pkey = cur.fetchone()
+        self.const_tracks = {
+            0: gnd_track_pkey,
+            1: vcc_track_pkey,
+        }
+
+        self.load_direct_connections(cur)
+        self.load_edges_to_channels(cur)
+
+    def load_direct_connections(self, cur):
+        # (src_wire_pkey, dest_wire_pkey, switch name) of each edge_with_mux.
+        self.direct_connections = list(
+            cur.execute(
+                """
+SELECT edge_with_mux.src_wire_pkey, edge_with_mux.dest_wire_pkey, switch.name
+FROM edge_with_mux
+INNER JOIN switch ON switch.pkey = edge_with_mux.switch_pkey;"""
+            )
         )
 
-        c2.execute(
+        # Site pin wires in the node of each edge_with_mux wire, as
+        # (wire_pkey, tile_pkey, wire_in_tile_pkey).
+        self.mux_wire_site_pins = {}
+        for wire_pkey, site_wire_pkey, tile_pkey, wire_in_tile_pkey in \
+                cur.execute("""
+WITH mux_wires(pkey) AS (
+  SELECT src_wire_pkey FROM edge_with_mux
+  UNION
+  SELECT dest_wire_pkey FROM edge_with_mux
+)
+SELECT
+  mux_wires.pkey,
+  site_wire.pkey,
+  site_wire.tile_pkey,
+  site_wire.wire_in_tile_pkey
+FROM
+  mux_wires
+  INNER JOIN wire ON wire.pkey = mux_wires.pkey
+  INNER JOIN wire AS site_wire ON site_wire.node_pkey = wire.node_pkey
+  INNER JOIN wire_in_tile ON wire_in_tile.pkey = site_wire.wire_in_tile_pkey
+WHERE
+  wire_in_tile.site_pin_pkey IS NOT NULL;"""):
+            if wire_pkey not in self.mux_wire_site_pins:
+                self.mux_wire_site_pins[wire_pkey] = []
+            self.mux_wire_site_pins[wire_pkey].append(
+                (site_wire_pkey, tile_pkey, wire_in_tile_pkey)
+            )
+
+    def load_edges_to_channels(self, cur):
+        # Wires of each EDGES_TO_CHANNEL node, as (tile_pkey, wire_in_tile_pkey).
+        self.edge_node_wires = {}
+        cur.execute(
             """
-SELECT name FROM tile_type WHERE pkey = ?""", (src_tile_type_pkey, )
+SELECT wire.node_pkey, wire.tile_pkey, wire.wire_in_tile_pkey
+FROM wire
+INNER JOIN node ON node.pkey = wire.node_pkey
+WHERE node.classification = ?
+ORDER BY wire.node_pkey, wire.pkey;""",
+            (NodeClassification.EDGES_TO_CHANNEL.value, )
         )
-        (source_tile_type, ) = c2.fetchone()
+        for node_pkey, tile_pkey, wire_in_tile_pkey in cur:
+            if node_pkey not in self.edge_node_wires:
+                self.edge_node_wires[node_pkey] = []
+            self.edge_node_wires[node_pkey].append(
+                (tile_pkey, wire_in_tile_pkey)
+            )
 
-        source_wire = get_pin_name_of_wire(conn, source_wire_pkey)
+        # Directional pips from the wires of each EDGES_TO_CHANNEL node, as
+        # (pip_pkey, other_wire_in_tile_pkey, other_node_pkey, track_pkey).
+        # other_node_pkey is None if the pip does not reach a wire.
+        self.edge_node_tracks = {}
+        for (node_pkey, pip_pkey, other_wire_in_tile_pkey, other_node_pkey,
+             track_pkey) in cur.execute("""
+WITH wires_from_node(node_pkey, wire_pkey, wire_in_tile_pkey, phy_tile_pkey) AS (
+  SELECT
+    wire.node_pkey,
+    wire.pkey,
+    wire.wire_in_tile_pkey,
+    wire.phy_tile_pkey
+  FROM
+    wire
+  INNER JOIN node ON node.pkey = wire.node_pkey
+  WHERE
+    node.classification = ? AND wire.phy_tile_pkey IS NOT NULL
+)
+SELECT
+  wires_from_node.node_pkey,
+  pip_in_tile.pkey,
+  undirected_pips.other_wire_in_tile_pkey,
+  other_node.pkey,
+  other_node.track_pkey
+FROM
+  wires_from_node
+INNER JOIN undirected_pips ON
+  undirected_pips.wire_in_tile_pkey = wires_from_node.wire_in_tile_pkey
+INNER JOIN pip_in_tile
+ON pip_in_tile.pkey == undirected_pips.pip_in_tile_pkey
+LEFT JOIN wire AS other_wire ON
+  other_wire.phy_tile_pkey = wires_from_node.phy_tile_pkey
+  AND other_wire.wire_in_tile_pkey = undirected_pips.other_wire_in_tile_pkey
+LEFT JOIN node AS other_node ON other_node.pkey = other_wire.node_pkey
+WHERE
+  pip_in_tile.is_directional = 1 AND pip_in_tile.is_pseudo = 0
+ORDER BY
+  wires_from_node.node_pkey,
+  wires_from_node.wire_pkey,
+  undirected_pips.other_wire_in_tile_pkey,
+  undirected_pips.rowid;
+  """, (NodeClassification.EDGES_TO_CHANNEL.value, )):
+            if node_pkey not in self.edge_node_tracks:
+                self.edge_node_tracks[node_pkey] = []
+            self.edge_node_tracks[node_pkey].append(
+                (
+                    pip_pkey, other_wire_in_tile_pkey, other_node_pkey,
+                    track_pkey
+                )
+            )
 
-        # Get the node that is attached to the sink.
-        c2.execute(
-            """
-SELECT node_pkey FROM wire WHERE pkey = ?""", (dest_wire_pkey, )
+    def pin_name_of_wire(self, tile_pkey, wire_in_tile_pkey):
+        """ Returns pin name of wire, see get_pin_name_of_wire. """
+        wire_name, site_pin_pkey = self.wire_in_tiles[wire_in_tile_pkey]
+
+        if site_pin_pkey is None:
+            return None
+
+        if self.tiles[tile_pkey][3] is not None:
+            return self.site_pin_names[site_pin_pkey]
+        else:
+            return wire_name
+
+
+def handle_direction_connections(
+        snapshot, direct_connections, edge_assignments
+):
+    # Edges with mux should have one source tile and one destination_tile.
+    # The pin from the source_tile should face the destination_tile.
+    #
+    # It is expected that all edges_with_mux will lies in a line (e.g. X only or
+    # Y only).
+    for src_wire_pkey, dest_wire_pkey, switch_name in \
+            progressbar_utils.progressbar(snapshot.direct_connections):
+
+        # Find the wire connected to the source.
+        src_wire = snapshot.mux_wire_site_pins.get(src_wire_pkey, [])
+        assert len(src_wire) == 1
+        source_wire_pkey, src_tile_pkey, src_wire_in_tile_pkey = src_wire[0]
+
+        src_tile_type_pkey, source_loc_grid_x, source_loc_grid_y, _ = \
+            snapshot.tiles[src_tile_pkey]
+        source_tile_type = snapshot.tile_type_names[src_tile_type_pkey]
+
+        source_wire = snapshot.pin_name_of_wire(
+            src_tile_pkey, src_wire_in_tile_pkey
         )
-        (dest_node_pkey, ) = c2.fetchone()
 
         # Find the wire connected to the sink.
-        dest_wire = list(node_to_site_pins(conn, dest_node_pkey))
+        dest_wire = snapshot.mux_wire_site_pins.get(dest_wire_pkey, [])
         assert len(dest_wire) == 1
         destination_wire_pkey, dest_tile_pkey, dest_wire_in_tile_pkey = dest_wire[
             0]
 
-        c2.execute(
-            """
-SELECT tile_type_pkey, grid_x, grid_y FROM tile WHERE pkey = ?;""",
-            (dest_tile_pkey, )
-        )
-        dest_tile_type_pkey, destination_loc_grid_x, destination_loc_grid_y = c2.fetchone(
-        )
-
-        c2.execute(
-            """
-SELECT name FROM tile_type WHERE pkey = ?""", (dest_tile_type_pkey, )
-        )
-        (destination_tile_type, ) = c2.fetchone()
-
-        destination_wire = get_pin_name_of_wire(conn, destination_wire_pkey)
+        dest_tile_type_pkey, destination_loc_grid_x, destination_loc_grid_y, _ = \
+            snapshot.tiles[dest_tile_pkey]
+        destination_tile_type = snapshot.tile_type_names[dest_tile_type_pkey]
 
-        c2.execute(
-            "SELECT name FROM switch WHERE pkey = ?"
-            "", (switch_pkey, )
+        destination_wire = snapshot.pin_name_of_wire(
+            dest_tile_pkey, dest_wire_in_tile_pkey
         )
-        switch_name = c2.fetchone()[0]
 
         direct_connections.add(
             DirectConnection(
@@ -145,142 +303,31 @@ SELECT name FROM tile_type WHERE pkey = ?""", (dest_tile_type_pkey, )
 
 
 def handle_edges_to_channels(
-        conn, null_tile_wires, edge_assignments, channel_wires_to_tracks
+        snapshot, edge_assignments, channel_wires_to_tracks
 ):
-    c = conn.cursor()
-
-    c.execute(
-        """
-SELECT vcc_track_pkey, gnd_track_pkey FROM constant_sources;
-    """
-    )
-    vcc_track_pkey, gnd_track_pkey = c.fetchone()
-    const_tracks = {
-        0: gnd_track_pkey,
-        1: vcc_track_pkey,
-    }
+    for node_pkey, wires in progressbar_utils.progressbar(
+            snapshot.edge_node_wires.items()):
+        other_tracks = snapshot.edge_node_tracks.get(node_pkey, [])
 
-    for node_pkey, classification in progressbar_utils.progressbar(c.execute(
-            """
-SELECT pkey, classification FROM node WHERE classification != ?;
-""", (NodeClassification.CHANNEL.value, ))):
-        reason = NodeClassification(classification)
-
-        if reason == NodeClassification.NULL:
-            for (tile_type,
-                 wire) in yield_logical_wire_info_from_node(conn, node_pkey):
-                null_tile_wires.add((tile_type, wire))
-
-        if reason != NodeClassification.EDGES_TO_CHANNEL:
-            continue
+        for tile_pkey, wire_in_tile_pkey in wires:
+            tile_type_pkey, grid_x, grid_y, _ = snapshot.tiles[tile_pkey]
+            tile_type = snapshot.tile_type_names[tile_type_pkey]
 
-        c2 = conn.cursor()
-        for wire_pkey, phy_tile_pkey, tile_pkey, wire_in_tile_pkey in c2.execute(
-                """
-SELECT
-    pkey, phy_tile_pkey, tile_pkey, wire_in_tile_pkey
-FROM
-    wire
-WHERE
-    node_pkey = ?;
-    """, (node_pkey, )):
-            c3 = conn.cursor()
-            c3.execute(
-                """
-SELECT grid_x, grid_y FROM tile WHERE pkey = ?;""", (tile_pkey, )
-            )
-            (grid_x, grid_y) = c3.fetchone()
-
-            c3.execute(
-                """
-SELECT
-  name
-FROM
-  tile_type
-WHERE
-  pkey = (
-    SELECT
-      tile_type_pkey
-    FROM
-      tile
-    WHERE
-      pkey = ?
-  );
-                """, (tile_pkey, )
-            )
-            (tile_type, ) = c3.fetchone()
-
-            wire = get_pin_name_of_wire(conn, wire_pkey)
+            wire = snapshot.pin_name_of_wire(tile_pkey, wire_in_tile_pkey)
             if wire is None:
                 # This node has no site pin, don't need to assign pin direction.
                 continue
 
-            for other_phy_tile_pkey, other_wire_in_tile_pkey, pip_pkey, pip in c3.execute(
-                    """
-WITH wires_from_node(wire_in_tile_pkey, phy_tile_pkey) AS (
-  SELECT
-    wire_in_tile_pkey,
-    phy_tile_pkey
-  FROM
-    wire
-  WHERE
-    node_pkey = ? AND phy_tile_pkey IS NOT NULL
-),
-  other_wires(other_phy_tile_pkey, pip_pkey, other_wire_in_tile_pkey) AS (
-    SELECT
-        wires_from_node.phy_tile_pkey,
-        undirected_pips.pip_in_tile_pkey,
-        undirected_pips.other_wire_in_tile_pkey
-    FROM undirected_pips
-    INNER JOIN wires_from_node ON
-        undirected_pips.wire_in_tile_pkey = wires_from_node.wire_in_tile_pkey)
-SELECT
-  other_wires.other_phy_tile_pkey,
-  other_wires.other_wire_in_tile_pkey,
-  pip_in_tile.pkey,
-  pip_in_tile.name
-FROM
-  other_wires
-INNER JOIN pip_in_tile
-ON pip_in_tile.pkey == other_wires.pip_pkey
-WHERE
-  pip_in_tile.is_directional = 1 AND pip_in_tile.is_pseudo = 0;
-  """, (node_pkey, )):
-                # Need to walk from the wire_in_tile table, to the wire table,
-                # to the node table and get track_pkey.
-                # other_wire_in_tile_pkey -> wire pkey -> node_pkey -> track_pkey
-                c4 = conn.cursor()
-                c4.execute(
-                    """
-SELECT
-  track_pkey,
-  classification
-FROM
-  node
-WHERE
-  pkey = (
-    SELECT
-      node_pkey
-    FROM
-      wire
-    WHERE
-      phy_tile_pkey = ?
-      AND wire_in_tile_pkey = ?
-  );""", (other_phy_tile_pkey, other_wire_in_tile_pkey)
-                )
-                result = c4.fetchone()
-                assert result is not None, (
-                    wire_pkey, pip_pkey, tile_pkey, wire_in_tile_pkey,
+            for (pip_pkey, other_wire_in_tile_pkey, other_node_pkey,
+                 track_pkey) in other_tracks:
+                assert other_node_pkey is not None, (
+                    node_pkey, pip_pkey, tile_pkey, wire_in_tile_pkey,
                     other_wire_in_tile_pkey
                 )
-                (track_pkey, classification) = result
 
                 # Some pips do connect to a track at all, e.g. null node
                 if track_pkey is None:
                     # TODO: Handle weird connections.
-                    # other_node_class = NodeClassification(classification)
-                    # assert other_node_class == NodeClassification.NULL, (
-                    #        node_pkey, pip_pkey, pip, other_node_class)
                     continue
 
                 tracks_model = channel_wires_to_tracks[track_pkey]
@@ -294,7 +341,7 @@ WHERE
 
                 for constant in yield_ties_to_wire(wire):
                     tracks_model = channel_wires_to_tracks[
-                        const_tracks[constant]]
+                        snapshot.const_tracks[constant]]
                     available_pins = set(
                         tracks_model.get_tracks_for_wire_at_coord(
                             (grid_x, grid_y)
@@ -303,18 +350,14 @@ WHERE
                     edge_assignments[(tile_type, wire)].append(available_pins)
 
 
-def initialize_edge_assignments(db, conn):
+def initialize_edge_assignments(db, snapshot):
     """ Create initial edge_assignments map. """
-    c = conn.cursor()
-    c2 = conn.cursor()
-
-    c.execute(
-        """
-SELECT name, pkey FROM tile_type WHERE pkey IN (
-    SELECT DISTINCT tile_type_pkey FROM tile
-    );"""
-    )
-    tiles = dict(c)
+    used_tile_types = set(tile[0] for tile in snapshot.tiles.values())
+
+    tiles = {}
+    for tile_type_pkey, tile_type in snapshot.tile_type_names.items():
+        if tile_type_pkey in used_tile_types:
+            tiles[tile_type] = tile_type_pkey
 
     edge_assignments = {}
     wires_in_tile_types = set()
@@ -324,22 +367,9 @@ SELECT name, pkey FROM tile_type WHERE pkey IN (
     # their sites will get edge assignements.
     sites_as_tiles = set()
     split_tile_types = set()
-    for site_pkey, tile_type_pkey in c.execute("""
-        SELECT site_pkey, tile_type_pkey FROM site_as_tile;
-        """):
-        c2.execute(
-            "SELECT name FROM tile_type WHERE pkey = ?", (tile_type_pkey, )
-        )
-        split_tile_types.add(c2.fetchone()[0])
-
-        c2.execute(
-            """
-SELECT name FROM site_type WHERE pkey = (
-    SELECT site_type_pkey FROM site WHERE pkey = ?
-    );""", (site_pkey, )
-        )
-        site_type_name = c2.fetchone()[0]
-        sites_as_tiles.add(site_type_name)
+    for tile_type, site_type in snapshot.site_as_tiles:
+        split_tile_types.add(tile_type)
+        sites_as_tiles.add(site_type)
 
     # Initialize edge assignments for split tiles
     for site_type in sites_as_tiles:
@@ -356,24 +386,14 @@ SELECT name FROM site_type WHERE pkey = (
         if tile_type not in tiles:
             continue
 
+        tile_type_pkey = tiles[tile_type]
         del tiles[tile_type]
 
         # Skip tile types that are split tiles
         if tile_type in split_tile_types:
             continue
 
-        (tile_type_pkey, ) = c.execute(
-            """
-    SELECT pkey
-    FROM tile_type
-    WHERE name = ?
-        """, (tile_type, )
-        ).fetchone()
-
-        for (wire, ) in c.execute("""
-    SELECT name
-    FROM wire_in_tile
-    WHERE tile_type_pkey = ?""", (tile_type_pkey, )):
+        for wire in snapshot.tile_type_wire_names.get(tile_type_pkey, ()):
             wires_in_tile_types.add((tile_type, wire))
 
         type_obj = db.get_tile_type(tile_type)
@@ -383,49 +403,26 @@ SELECT name FROM site_type WHERE pkey = (
                     continue
 
                 # Skip if this wire is not in the database
-                c.execute(
-                    """
-    SELECT pkey
-    FROM wire_in_tile
-    WHERE name = ?
-""", (site_pin.wire, )
-                )
-                if not c.fetchone():
+                if site_pin.wire not in snapshot.wire_in_tile_names:
                     continue
 
                 key = (tile_type, site_pin.wire)
                 assert key not in edge_assignments, key
                 edge_assignments[key] = []
 
-    for tile_type, tile_pkey in tiles.items():
+    for tile_type, tile_type_pkey in tiles.items():
         assert tile_type not in split_tile_types
 
-        for (wire, ) in c.execute("""
-    SELECT name
-    FROM wire_in_tile
-    WHERE pkey in (
-        SELECT DISTINCT wire_in_tile_pkey
-        FROM wire
-        WHERE tile_pkey IN (
-            SELECT pkey
-            FROM tile
-            WHERE tile_type_pkey = ?)
-        );""", (tile_pkey, )):
+        site_pin_wires = set()
+        for wire_in_tile_pkey in snapshot.tile_type_wires.get(tile_type_pkey,
+                                                              ()):
+            wire, site_pin_pkey = snapshot.wire_in_tiles[wire_in_tile_pkey]
             wires_in_tile_types.add((tile_type, wire))
 
-        for (wire, ) in c.execute("""
-SELECT DISTINCT name
-FROM wire_in_tile
-WHERE pkey in (
-    SELECT DISTINCT wire_in_tile_pkey
-    FROM wire
-    WHERE tile_pkey IN (
-        SELECT pkey
-        FROM tile
-        WHERE tile_type_pkey = ?)
-    )
-    AND
-        site_pin_pkey IS NOT NULL""", (tile_pkey, )):
+            if site_pin_pkey is not None:
+                site_pin_wires.add(wire)
+
+        for wire in site_pin_wires:
             key = (tile_type, wire)
             assert key not in edge_assignments, key
             edge_assignments[key] = []
@@ -433,6 +430,92 @@ WHERE pkey in (
     return edge_assignments, wires_in_tile_types
 
 
+def choose_pin_directions(available_pins):
+    """ Returns the minimal list of directions covering all available_pins.
+
+    Returns None if no pins are available.
+    """
+    available_pins = [pins for pins in available_pins if len(pins) > 0]
+    if len(available_pins) == 0:
+        return None
+
+    pins = set(available_pins[0])
+    for p in available_pins[1:]:
+        pins &= set(p)
+
+    if len(pins) > 0:
+        return [list(pins)[0]]
+
+    # More than 2 pins are required, final the minimal number of pins
+    pins = set()
+    for p in available_pins:
+        pins |= set(p)
+
+    while len(pins) > 2:
+        pins = list(pins)
+
+        prev_len = len(pins)
+
+        for idx in range(len(pins)):
+            pins_subset = list(pins)
+            del pins_subset[idx]
+
+            pins_subset = set(pins_subset)
+
+            bad_subset = False
+            for p in available_pins:
+                if len(pins_subset & set(p)) == 0:
+                    bad_subset = True
+                    break
+
+            if not bad_subset:
+                pins = list(pins_subset)
+                break
+
+        # Failed to remove any pins, stop.
+        if len(pins) == prev_len:
+            break
+
+    return pins
+
+
+def assign_tile_type_pins(job):
+    """ Assigns pin directions to the wires of one tile type.
+
+    job is a tuple of the tile type, a map of wire to available pins and the
+    set of wires that belong to NULL nodes.
+
+    Returns the tile type, a map of wire to pin direction names and the wires
+    that had no available pins without being NULL.
+    """
+    tile_type, wire_assignments, null_wires = job
+
+    pin_directions = {}
+    unassigned_wires = []
+    for wire, available_pins in wire_assignments.items():
+        pins = choose_pin_directions(available_pins)
+
+        if pins is None:
+            if wire not in null_wires:
+                # TODO: Figure out what is going on with these wires.  Appear to
+                # tile internal connections sometimes?
+                unassigned_wires.append(wire)
+
+            pins = [tracks.Direction.RIGHT]
+
+        for required_pins in available_pins:
+            if len(required_pins) == 0:
+                continue
+
+            assert len(set(pins) & set(required_pins)) > 0, (
+                tile_type, wire, pins, required_pins, available_pins
+            )
+
+        pin_directions[wire] = [pin._name_ for pin in pins]
+
+    return tile_type, pin_directions, unassigned_wires
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -450,6 +533,11 @@ def main():
 Output JSON assigning pins to tile types and direction connections""",
         required=True
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        help='Number of processes used to assign pins (default: all CPUs)',
+    )
 
     args = parser.parse_args()
 
@@ -458,19 +546,21 @@ Output JSON assigning pins to tile types and direction connections""",
     edge_assignments = {}
 
     with DatabaseCache(args.connection_database, read_only=True) as conn:
-        c = conn.cursor()
+        print('{} Loading connection database snapshot.'.format(now()))
+        snapshot = ConnectionSnapshot(conn)
 
         edge_assignments, wires_in_tile_types = initialize_edge_assignments(
-            db, conn
+            db, snapshot
         )
 
         direct_connections = set()
         print('{} Processing direct connections.'.format(now()))
         handle_direction_connections(
-            conn, direct_connections, edge_assignments
+            snapshot, direct_connections, edge_assignments
         )
 
         wires_not_in_channels = {}
+        null_tile_wires = set()
         c = conn.cursor()
         print('{} Processing non-channel nodes.'.format(now()))
         for node_pkey, classification in progressbar_utils.progressbar(
@@ -483,6 +573,9 @@ Output JSON assigning pins to tile types and direction connections""",
                  wire) in yield_logical_wire_info_from_node(conn, node_pkey):
                 key = (tile_type, wire)
 
+                if reason == NodeClassification.NULL:
+                    null_tile_wires.add(key)
+
                 # Sometimes nodes in particular tile instances are disconnected,
                 # disregard classification changes if this is the case.
                 if reason != NodeClassification.NULL:
@@ -537,8 +630,6 @@ Output JSON assigning pins to tile types and direction connections""",
         for node in channel_nodes:
             node.verify_tracks()
 
-        null_tile_wires = set()
-
         # Verify that all nodes that are classified as edges to channels have at
         # least one site, and at least one live connection to a channel.
         #
@@ -546,84 +637,34 @@ Output JSON assigning pins to tile types and direction connections""",
         # been marked as NULL during channel formation.
         print('{} Handling edges to channels.'.format(now()))
         handle_edges_to_channels(
-            conn, null_tile_wires, edge_assignments, channel_wires_to_tracks
+            snapshot, edge_assignments, channel_wires_to_tracks
         )
 
         print('{} Processing edge assignments.'.format(now()))
-        final_edge_assignments = {}
-        for key, available_pins in progressbar_utils.progressbar(
-                edge_assignments.items()):
-            (tile_type, wire) = key
-
-            available_pins = [pins for pins in available_pins if len(pins) > 0]
-            if len(available_pins) == 0:
-                if (tile_type, wire) not in null_tile_wires:
-                    # TODO: Figure out what is going on with these wires.  Appear to
-                    # tile internal connections sometimes?
-                    print((tile_type, wire))
-
-                final_edge_assignments[key] = [tracks.Direction.RIGHT]
-                continue
-
-            pins = set(available_pins[0])
-            for p in available_pins[1:]:
-                pins &= set(p)
-
-            if len(pins) > 0:
-                final_edge_assignments[key] = [list(pins)[0]]
-            else:
-                # More than 2 pins are required, final the minimal number of pins
-                pins = set()
-                for p in available_pins:
-                    pins |= set(p)
-
-                while len(pins) > 2:
-                    pins = list(pins)
-
-                    prev_len = len(pins)
-
-                    for idx in range(len(pins)):
-                        pins_subset = list(pins)
-                        del pins_subset[idx]
-
-                        pins_subset = set(pins_subset)
-
-                        bad_subset = False
-                        for p in available_pins:
-                            if len(pins_subset & set(p)) == 0:
-                                bad_subset = True
-                                break
-
-                        if not bad_subset:
-                            pins = list(pins_subset)
-                            break
-
-                    # Failed to remove any pins, stop.
-                    if len(pins) == prev_len:
-                        break
-
-                final_edge_assignments[key] = pins
-
-        for key, available_pins in edge_assignments.items():
-            (tile_type, wire) = key
-            pins = set(final_edge_assignments[key])
-
-            for required_pins in available_pins:
-                if len(required_pins) == 0:
-                    continue
-
-                assert len(pins & set(required_pins)) > 0, (
-                    tile_type, wire, pins, required_pins, available_pins
-                )
+        tile_type_assignments = {}
+        for (tile_type, wire), available_pins in edge_assignments.items():
+            if tile_type not in tile_type_assignments:
+                tile_type_assignments[tile_type] = {}
+            tile_type_assignments[tile_type][wire] = available_pins
+
+        jobs = []
+        for tile_type, wire_assignments in tile_type_assignments.items():
+            null_wires = set(
+                wire for wire in wire_assignments
+                if (tile_type, wire) in null_tile_wires
+            )
+            jobs.append((tile_type, wire_assignments, null_wires))
 
         pin_directions = {}
-        for key, pins in progressbar_utils.progressbar(
-                final_edge_assignments.items()):
-            (tile_type, wire) = key
-            if tile_type not in pin_directions:
-                pin_directions[tile_type] = {}
+        with multiprocessing.Pool(args.jobs) as pool:
+            for tile_type, tile_pin_directions, unassigned_wires in \
+                    progressbar_utils.progressbar(
+                        pool.imap(assign_tile_type_pins, jobs),
+                        max_value=len(jobs)):
+                for wire in unassigned_wires:
+                    print((tile_type, wire))
 
-            pin_directions[tile_type][wire] = [pin._name_ for pin in pins]
+                pin_directions[tile_type] = tile_pin_directions
 
         with open(args.pin_assignments, 'w') as f:
             json.dump(
@@ -27,6 +27,7 @@ import sqlite3
 
 from prjxray_edge_library import (
     create_edges,
+    create_edge_cache,
     build_channels,
     set_track_canonical_loc,
     annotate_pin_feeds,
@@ -64,17 +65,42 @@ def main():
         '--graph_limit',
         help='Limit grid to specified dimensions in x_min,y_min,x_max,y_max',
     )
+    parser.add_argument(
+        '--edge_cache',
+        help='Cache of the edges of the full device, shared by the ROI, '
+        'Overlay and graph limited variants of a part.  Built when missing '
+        'or out of date.',
+    )
+    parser.add_argument(
+        '--build_edge_cache',
+        action='store_true',
+        help='Only (re)build --edge_cache, the connection database is not '
+        'modified.',
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        help='Number of processes used to pack channels (default: all CPUs)',
+    )
 
     args = parser.parse_args()
 
     now = datetime.datetime.now
+
+    if args.build_edge_cache:
+        assert args.edge_cache is not None, '--build_edge_cache requires --edge_cache'
+        print("{}: Building edge cache".format(now()))
+        create_edge_cache(args)
+        print("{}: Edge cache built".format(now()))
+        return
+
     print("{}: Creating edges".format(now()))
     ccio_sites = create_edges(args)
     print("{}: Done with edges".format(now()))
 
     with sqlite3.connect(args.connection_database) as conn:
         print("{}: Build channels".format(now()))
-        build_channels(conn)
+        build_channels(conn, jobs=args.jobs)
         print("{}: Channels built".format(now()))
 
     with sqlite3.connect(args.connection_database) as conn:
@@ -12,6 +12,8 @@ connects those tile pins to each site within the tile.
 
 from __future__ import print_function
 import argparse
+import hashlib
+import multiprocessing
 import os
 import sys
 import prjxray.db
@@ -20,13 +22,16 @@ import os.path
 import simplejson as json
 import re
 import sqlite3
+from collections import namedtuple
 
 import lxml.etree as ET
+from lib.file_cache import evict_lru, read_pickle, write_pickle
 from lib.pb_type_xml import (
     start_pb_type, start_tile, add_vpr_tile_prefix, add_tile_direct,
     object_ref, add_switchblock_locations, write_xml, ModelXml, add_direct,
     XI_INCLUDE, XI_URL
 )
+from prjxray_tile_import import expand_nodes_in_tile_type
 
 
 def find_port(pin_name, ports):
@@ -81,225 +86,6 @@ def parse_site_type_instance(site_types):
     return site_type_instances
 
 
-def expand_nodes_in_tile_type(conn, tile_type_pkey):
-    cur = conn.cursor()
-    cur.execute(
-        """
-CREATE TEMP TABLE phy_tiles AS
-SELECT tile_map.phy_tile_pkey
-FROM tile_map
-INNER JOIN phy_tile
-ON phy_tile.pkey = tile_map.phy_tile_pkey
-WHERE tile_map.tile_pkey IN (
-    SELECT pkey FROM tile WHERE tile_type_pkey = ?
-)
-GROUP BY phy_tile.tile_type_pkey;""", (tile_type_pkey, )
-    )
-
-    # Set of node pkeys to expand
-    cur.execute(
-        """
-SELECT DISTINCT node_pkey
-FROM wire
-WHERE phy_tile_pkey IN (SELECT phy_tile_pkey FROM phy_tiles);"""
-    )
-    nodes_to_expand = set(node_pkey for (node_pkey, ) in cur)
-
-    nodes_to_set = {}
-
-    while len(nodes_to_expand) > 0:
-        node_pkey = nodes_to_expand.pop()
-
-        node_set = nodes_to_set.get(node_pkey, set((node_pkey, )))
-        nodes_to_set[node_pkey] = node_set
-
-        cur.execute(
-            """
-WITH
-other_wires(phy_tile_pkey, pip_in_tile_pkey, other_wire_in_tile_pkey) AS (
-    SELECT
-        wire.phy_tile_pkey,
-        undirected_pips.pip_in_tile_pkey,
-        undirected_pips.other_wire_in_tile_pkey
-    FROM undirected_pips
-    INNER JOIN wire
-    ON wire.wire_in_tile_pkey = undirected_pips.wire_in_tile_pkey
-    INNER JOIN pip_in_tile
-    ON pip_in_tile.pkey = undirected_pips.pip_in_tile_pkey
-    WHERE
-        wire.node_pkey = ?
-    AND
-        NOT pip_in_tile.is_pseudo
-)
-SELECT wire.node_pkey
-FROM wire
-INNER JOIN other_wires
-ON
-    wire.wire_in_tile_pkey = other_wires.other_wire_in_tile_pkey
-AND
-    wire.phy_tile_pkey = other_wires.phy_tile_pkey
-WHERE
-    wire.phy_tile_pkey IN (SELECT phy_tile_pkey FROM phy_tiles);""",
-            (node_pkey, )
-        )
-
-        # Update node sets
-        for (other_node_pkey, ) in cur:
-            node_set |= nodes_to_set.get(
-                other_node_pkey, set((other_node_pkey, ))
-            )
-
-        # Merge node sets
-        for node_pkey in node_set:
-            nodes_to_set[node_pkey] = node_set
-
-    unique_node_sets = {}
-    for node_set in nodes_to_set.values():
-        if id(node_set) not in unique_node_sets:
-            unique_node_sets[id(node_set)] = node_set
-
-    if False:
-        # Print node sets for debugging and inspection.
-        for node_set in unique_node_sets.values():
-            print()
-            print(id(node_set), len(node_set))
-            for node_pkey in node_set:
-                cur.execute(
-                    """
-SELECT name
-FROM wire_in_tile
-WHERE pkey IN (
-    SELECT wire.wire_in_tile_pkey
-    FROM wire
-    WHERE node_pkey = ?
-    )""", (node_pkey, )
-                )
-                print(node_pkey, ' '.join(name for (name, ) in cur))
-
-    cur.execute("""DROP TABLE phy_tiles""")
-
-    return unique_node_sets.values()
-
-
-def find_connections(conn, input_wires, output_wires, tile_type_pkey):
-    """ Remove top-level ports only connected to internal sources and generates
-    tile internal connections."""
-
-    # Create connected node sets
-    node_sets = list(expand_nodes_in_tile_type(conn, tile_type_pkey))
-
-    # Number of site external connections for ports
-    is_top_level_pin_external = {}
-    for wire in input_wires:
-        is_top_level_pin_external[wire] = False
-
-    for wire in output_wires:
-        is_top_level_pin_external[wire] = False
-
-    internal_connections = {}
-    top_level_connections = {}
-
-    wire_to_site_pin = {}
-
-    cur = conn.cursor()
-    for node_set in node_sets:
-        ipin_count = 0
-        opin_count = 0
-        node_set_has_external = False
-
-        pins_used_in_node_sets = set()
-        input_pins = set()
-        output_pins = set()
-
-        for node_pkey in node_set:
-            cur.execute(
-                """
-SELECT
-    tile.tile_type_pkey,
-    wire_in_tile.name,
-    site_type.name,
-    site_pin.name,
-    site_pin.direction,
-    count()
-FROM wire
-INNER JOIN wire_in_tile
-ON wire.wire_in_tile_pkey = wire_in_tile.pkey
-INNER JOIN site_pin
-ON site_pin.pkey = wire_in_tile.site_pin_pkey
-INNER JOIN tile
-ON wire.tile_pkey = tile.pkey
-INNER JOIN site_type
-ON site_type.pkey = site_pin.site_type_pkey
-WHERE
-    wire.node_pkey = ?
-AND
-    wire_in_tile.site_pin_pkey IS NOT NULL
-GROUP BY site_pin.direction;
-        """, (node_pkey, )
-            )
-            for (wire_tile_type_pkey, wire_name, site_type_name, site_pin_name,
-                 direction, count) in cur:
-                if wire_tile_type_pkey == tile_type_pkey:
-                    value = (site_type_name, site_pin_name)
-                    if wire_name in wire_to_site_pin:
-                        assert value == wire_to_site_pin[wire_name], (
-                            wire_name, value, wire_to_site_pin[wire_name]
-                        )
-                    else:
-                        wire_to_site_pin[wire_name] = value
-
-                    pins_used_in_node_sets.add(wire_name)
-                    direction = prjxray.site_type.SitePinDirection(direction)
-
-                    if direction == prjxray.site_type.SitePinDirection.IN:
-                        output_pins.add(wire_name)
-                        opin_count += count
-                    elif direction == prjxray.site_type.SitePinDirection.OUT:
-                        input_pins.add(wire_name)
-                        ipin_count += count
-                    else:
-                        assert False, (node_pkey, direction)
-                else:
-                    node_set_has_external = True
-
-        assert len(input_pins) in [0, 1], input_pins
-
-        if ipin_count == 0 or opin_count == 0 or node_set_has_external:
-            # This node set is connected externally, mark as such
-            for wire_name in pins_used_in_node_sets:
-                is_top_level_pin_external[wire_name] = True
-
-        if ipin_count > 0 and opin_count > 0:
-            # TODO: Add check that pips and site pins on these internal
-            # connections are 0 delay.
-            assert len(input_pins) == 1
-            input_wire = input_pins.pop()
-
-            for wire_name in output_pins:
-                if wire_name in internal_connections:
-                    assert input_wire == internal_connections[wire_name]
-                else:
-                    internal_connections[wire_name] = input_wire
-
-    for wire in sorted(is_top_level_pin_external):
-        if not is_top_level_pin_external[wire]:
-            if wire in input_wires:
-                input_wires.remove(wire)
-            elif wire in output_wires:
-                output_wires.remove(wire)
-            else:
-                assert False, wire
-        else:
-            top_level_connections[wire] = wire_to_site_pin[wire]
-
-    output_internal_connections = {}
-    for output_wire in internal_connections:
-        output_internal_connections[wire_to_site_pin[output_wire]] = \
-            wire_to_site_pin[internal_connections[output_wire]]
-
-    return top_level_connections, output_internal_connections
-
-
 NORMALIZED_TILE_TYPES = {
     "RIOI3": "IOI3_TILE",
     "RIOI3_SING": "IOI3_TILE",
@@ -327,14 +113,12 @@ NORMALIZED_SITE_TYPES = {
 }
 
 
-def get_tile_prefixes(conn, tile_type_pkeys, site_types, site_remap):
+def tile_prefix_sites(conn, tile_type_pkey):
+    """ Returns the (physical tile type, site type pkey, site type) triples
+    used to build FASM prefixes of the sites in a tile type. """
     cur = conn.cursor()
-
-    tile_prefixes = {}
-
-    for tile_type_pkey in tile_type_pkeys:
-        cur.execute(
-            """
+    cur.execute(
+        """
 SELECT
   DISTINCT tile_type.name, site_type.pkey, site_type.name
 FROM
@@ -346,8 +130,17 @@ WHERE
   wire_in_tile.tile_type_pkey = ?
   AND site_pin_pkey IS NOT NULL;
 """, (tile_type_pkey, )
-        )
-        for tile_type_name, site_type_pkey, site_type_name in cur:
+    )
+    return list(cur)
+
+
+def get_tile_prefixes(equiv_db, tile_type_pkeys, site_types, site_remap):
+    tile_prefixes = {}
+
+    for tile_type_pkey in tile_type_pkeys:
+        tile_type_graph = equiv_db.tile_types[tile_type_pkey]
+        for tile_type_name, site_type_pkey, site_type_name in \
+                tile_type_graph.prefix_sites:
             norm_tile = NORMALIZED_TILE_TYPES.get(
                 tile_type_name, tile_type_name
             )
@@ -416,38 +209,205 @@ def yield_mapped_site_sets(site_remaps, site_type_pkeys):
     )
 
 
-def check_site_equiv(conn, general_site_type_pkey, specific_site_type_pkey):
+def check_site_equiv(
+        site_type_pins, general_site_type_pkey, specific_site_type_pkey
+):
     """ Verify assumption that site pin names on specific site are subset of general site.
 
     E.g. every pin on the specific site should be present on the generic site.
 
     """
-    cur = conn.cursor()
+    general_site_pins = site_type_pins[general_site_type_pkey]
+
+    for name in site_type_pins[specific_site_type_pkey]:
+        assert name in general_site_pins, (
+            general_site_pins, name, specific_site_type_pkey
+        )
 
+
+def node_site_pins(conn, node_pkey):
+    """ Returns the site pins attached to a node, grouped by direction. """
+    cur = conn.cursor()
     cur.execute(
-        "SELECT name FROM site_pin WHERE site_type_pkey = ?",
-        (general_site_type_pkey, )
+        """
+SELECT
+    tile.tile_type_pkey,
+    wire_in_tile.name,
+    site_type.pkey,
+    site_type.name,
+    site_pin.name,
+    site_pin.direction,
+    count()
+FROM wire
+INNER JOIN wire_in_tile
+ON wire.wire_in_tile_pkey = wire_in_tile.pkey
+INNER JOIN site_pin
+ON site_pin.pkey = wire_in_tile.site_pin_pkey
+INNER JOIN tile
+ON wire.tile_pkey = tile.pkey
+INNER JOIN site_type
+ON site_type.pkey = site_pin.site_type_pkey
+WHERE
+    wire.node_pkey = ?
+AND
+    wire_in_tile.site_pin_pkey IS NOT NULL
+GROUP BY site_pin.direction;
+        """, (node_pkey, )
     )
-    general_site_pins = set(name for (name, ) in cur)
+    return tuple(cur)
+
 
+def tile_site_pin_wires(conn, tile_type_pkey):
+    """ Returns the names of the tile wires that connect to a site pin. """
+    cur = conn.cursor()
     cur.execute(
-        "SELECT name FROM site_pin WHERE site_type_pkey = ?",
-        (specific_site_type_pkey, )
+        """
+SELECT DISTINCT wire_in_tile.name
+FROM wire_in_tile
+WHERE
+ wire_in_tile.tile_type_pkey = ?
+AND
+ wire_in_tile.site_pin_pkey IS NOT NULL;
+    """, (tile_type_pkey, )
     )
-    for (name, ) in cur:
-        assert name in general_site_pins, (
-            general_site_pins, name, specific_site_type_pkey
-        )
+    return [wire_name for (wire_name, ) in cur]
+
+
+# Connectivity of a tile type, derived from the connection database.
+#
+# node_sets - Sets of nodes connected through non-pseudo pips within the tile.
+# node_site_pins - Map of node pkey to the output of node_site_pins.
+# sites / sites_in_tiles - Output of sites_in_tile_type.
+# site_pin_wires - Output of tile_site_pin_wires.
+# prefix_sites - Output of tile_prefix_sites.
+TileTypeGraph = namedtuple(
+    'TileTypeGraph',
+    'node_sets node_site_pins sites sites_in_tiles site_pin_wires prefix_sites'
+)
 
 
-def create_pb_type(
-        conn, pin_assignments, site_directory, output_directory, pb_type,
-        site_type_pkeys, tile_type_pkeys, site_remaps, site_name_remaps,
-        node_tile_map
+def build_tile_type_graph(conn, tile_type_pkey):
+    node_sets = [
+        frozenset(node_set)
+        for node_set in expand_nodes_in_tile_type(conn, tile_type_pkey)
+    ]
+
+    site_pins = {}
+    for node_set in node_sets:
+        for node_pkey in node_set:
+            site_pins[node_pkey] = node_site_pins(conn, node_pkey)
+
+    sites, sites_in_tiles = sites_in_tile_type(conn, tile_type_pkey)
+
+    return TileTypeGraph(
+        node_sets=node_sets,
+        node_site_pins=site_pins,
+        sites=sites,
+        sites_in_tiles=sites_in_tiles,
+        site_pin_wires=tile_site_pin_wires(conn, tile_type_pkey),
+        prefix_sites=tile_prefix_sites(conn, tile_type_pkey),
+    )
+
+
+# Bump when the content of EquivalenceDatabase changes to invalidate caches.
+EQUIV_CACHE_VERSION = 1
+
+# Size limit of the cache directory, in bytes.
+EQUIV_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+
+class EquivalenceDatabase(object):
+    """ Snapshot of the connection database used to build equivalent tiles.
+
+    Holds the site type names and pins (used to check site equivalences) and
+    the TileTypeGraph of every requested tile type.  Once loaded, creating
+    pb_types and tiles does not need the connection database, so the
+    snapshot can be cached on disk and shared with worker processes.
+    """
+
+    def __init__(self, conn, tile_types):
+        cur = conn.cursor()
+
+        self.site_type_names = {}
+        self.site_type_pkeys = {}
+        for pkey, name in cur.execute("SELECT pkey, name FROM site_type"):
+            self.site_type_names[pkey] = name
+            self.site_type_pkeys[name] = pkey
+
+        site_type_pins = {}
+        for site_type_pkey, name in cur.execute(
+                "SELECT site_type_pkey, name FROM site_pin"):
+            if site_type_pkey not in site_type_pins:
+                site_type_pins[site_type_pkey] = set()
+            site_type_pins[site_type_pkey].add(name)
+
+        self.site_type_pins = {}
+        for site_type_pkey in self.site_type_names:
+            self.site_type_pins[site_type_pkey] = frozenset(
+                site_type_pins.get(site_type_pkey, ())
+            )
+
+        self.tile_type_pkeys = {}
+        for pkey, name in cur.execute("SELECT pkey, name FROM tile_type"):
+            self.tile_type_pkeys[name] = pkey
+
+        self.tile_types = {}
+        for tile_type in tile_types:
+            tile_type_pkey = self.tile_type_pkeys[tile_type]
+            self.tile_types[tile_type_pkey] = build_tile_type_graph(
+                conn, tile_type_pkey
+            )
+
+
+def equivalence_cache_file(cache_directory, connection_database, tile_types):
+    """ Returns the cache file of the EquivalenceDatabase of tile_types.
+
+    The cache is keyed by the path, size and modification time of the
+    connection database and by the requested tile types, so concurrent
+    invocations on different tile types use different files.
+    """
+    stat = os.stat(connection_database)
+
+    h = hashlib.sha256()
+    h.update(
+        '{}\0{}\0{}\0{}'.format(
+            os.path.abspath(connection_database), stat.st_size,
+            stat.st_mtime_ns, ','.join(sorted(tile_types))
+        ).encode('utf-8')
+    )
+
+    return os.path.join(
+        cache_directory, 'equiv_tiles.{}.pickle'.format(h.hexdigest())
+    )
+
+
+def load_equivalence_database(
+        conn, tile_types, cache_file=None, max_size=EQUIV_CACHE_MAX_SIZE
 ):
-    cur = conn.cursor()
-    cur2 = conn.cursor()
+    """ Loads the EquivalenceDatabase of tile_types.
+
+    If cache_file is provided, the snapshot is loaded from it, or built and
+    written to it.  The least recently used caches of the cache_file
+    directory are then removed until they fit in max_size bytes.
+    """
+    if cache_file is not None:
+        entry = read_pickle(cache_file)
+        if entry is not None and entry[0] == EQUIV_CACHE_VERSION:
+            return entry[1]
+
+    equiv_db = EquivalenceDatabase(conn, tile_types)
+
+    if cache_file is not None:
+        write_pickle(cache_file, (EQUIV_CACHE_VERSION, equiv_db))
+        evict_lru(os.path.dirname(cache_file), max_size, '.pickle')
+
+    return equiv_db
 
+
+def create_pb_type(
+        equiv_db, pin_assignments, site_directory, output_directory, pb_type,
+        site_type_pkeys, tile_type_pkeys, site_remaps, site_name_remaps
+):
     wire_to_site_pin = {}
     internal_connections = {}
     top_level_pin_external = set()
@@ -460,7 +420,8 @@ def create_pb_type(
         pb_type_input_pins = set()
         pb_type_output_pins = set()
 
-        for node_set in node_tile_map[tile_type_pkey]:
+        tile_type_graph = equiv_db.tile_types[tile_type_pkey]
+        for node_set in tile_type_graph.node_sets:
             ipin_count = 0
             opin_count = 0
             node_set_has_external = False
@@ -470,34 +431,9 @@ def create_pb_type(
             output_pins = set()
 
             for node_pkey in node_set:
-                cur.execute(
-                    """
-SELECT
-    tile.tile_type_pkey,
-    wire_in_tile.name,
-    site_type.pkey,
-    site_type.name,
-    site_pin.name,
-    site_pin.direction,
-    count()
-FROM wire
-INNER JOIN wire_in_tile
-ON wire.wire_in_tile_pkey = wire_in_tile.pkey
-INNER JOIN site_pin
-ON site_pin.pkey = wire_in_tile.site_pin_pkey
-INNER JOIN tile
-ON wire.tile_pkey = tile.pkey
-INNER JOIN site_type
-ON site_type.pkey = site_pin.site_type_pkey
-WHERE
-    wire.node_pkey = ?
-AND
-    wire_in_tile.site_pin_pkey IS NOT NULL
-GROUP BY site_pin.direction;
-        """, (node_pkey, )
-                )
                 for (wire_tile_type_pkey, wire_name, site_type_pkey,
-                     site_type_name, site_pin_name, direction, count) in cur:
+                     site_type_name, site_pin_name, direction,
+                     count) in tile_type_graph.node_site_pins[node_pkey]:
 
                     if wire_tile_type_pkey == tile_type_pkey:
                         if site_type_pkey not in site_type_pkeys:
@@ -505,11 +441,8 @@ GROUP BY site_pin.direction;
                             site_type_name = site_name_remaps.get(
                                 site_type_name, site_type_name
                             )
-                            cur2.execute(
-                                "SELECT pkey FROM site_type WHERE name = ?",
-                                (site_type_name, )
-                            )
-                            new_site_type_pkey = cur2.fetchone()[0]
+                            new_site_type_pkey = equiv_db.site_type_pkeys[
+                                site_type_name]
                             assert new_site_type_pkey in site_type_pkeys, (
                                 pb_type, tile_type_pkey, node_pkey,
                                 site_type_pkey, new_site_type_pkey,
@@ -602,10 +535,7 @@ GROUP BY site_pin.direction;
     )
 
     for site_type_pkey in site_type_pkeys:
-        cur.execute(
-            "SELECT name FROM site_type WHERE pkey = ?", (site_type_pkey, )
-        )
-        site_type = cur.fetchone()[0]
+        site_type = equiv_db.site_type_names[site_type_pkey]
         model.add_model_include(site_type, site_type)
     model.write_model()
 
@@ -625,17 +555,14 @@ GROUP BY site_pin.direction;
     site_pbtype = site_directory + "/{0}/{1}.pb_type.xml"
 
     site_prefixes = get_tile_prefixes(
-        conn, tile_type_pkeys, site_type_pkeys, site_remaps
+        equiv_db, tile_type_pkeys, site_type_pkeys, site_remaps
     )
 
     cell_names = {}
     site_type_ports = {}
 
     for site_type_pkey in site_type_pkeys:
-        cur.execute(
-            "SELECT name FROM site_type WHERE pkey = ?", (site_type_pkey, )
-        )
-        site_type = cur.fetchone()[0]
+        site_type = equiv_db.site_type_names[site_type_pkey]
         site_prefix = site_prefixes[site_type_pkey]
         site_type_path = site_pbtype.format(
             site_type.lower(), site_type.lower()
@@ -791,25 +718,13 @@ GROUP BY site_pin.direction;
 
 
 def create_tile(
-        conn, tile_type, tile_type_pkey, tile_connections, pb_types,
+        equiv_db, tile_type, tile_type_pkey, tile_connections, pb_types,
         pin_assignments, output_directory
 ):
-    cur = conn.cursor()
-
     input_wires = set()
     output_wires = set()
 
-    cur.execute(
-        """
-SELECT DISTINCT wire_in_tile.name
-FROM wire_in_tile
-WHERE
- wire_in_tile.tile_type_pkey = ?
-AND
- wire_in_tile.site_pin_pkey IS NOT NULL;
-    """, (tile_type_pkey, )
-    )
-    for (wire_name, ) in cur:
+    for wire_name in equiv_db.tile_types[tile_type_pkey].site_pin_wires:
         for pb_type in pb_types:
             if wire_name in tile_connections[pb_type]:
                 site_type_name, site_pin_name, direction = tile_connections[
@@ -870,6 +785,24 @@ AND
     )
 
 
+# EquivalenceDatabase shared by the worker processes of the pool in main.
+_WORKER_EQUIV_DB = None
+
+
+def init_worker(equiv_db):
+    global _WORKER_EQUIV_DB
+    _WORKER_EQUIV_DB = equiv_db
+    ET.register_namespace('xi', XI_URL)
+
+
+def create_pb_type_worker(kwargs):
+    return create_pb_type(equiv_db=_WORKER_EQUIV_DB, **kwargs)
+
+
+def create_tile_worker(kwargs):
+    create_tile(equiv_db=_WORKER_EQUIV_DB, **kwargs)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description=__doc__, fromfile_prefix_chars='@', prefix_chars='-~'
@@ -915,120 +848,126 @@ def main():
         help="Comma seperated list of site equivilances to apply."
     )
 
+    parser.add_argument(
+        '--cache_directory',
+        help=(
+            "Directory used to cache the tile type connectivity extracted " +
+            "from the connection database between runs.  The cache is " +
+            "keyed by the connection database path, size and modification " +
+            "time and the tile types."
+        )
+    )
+
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=None,
+        help="Number of worker processes used to write pb_types and tiles."
+    )
+
     args = parser.parse_args()
 
     with open(args.pin_assignments) as f:
         pin_assignments = json.load(f)
 
-    ET.register_namespace('xi', XI_URL)
+    tile_type_names = args.tile_types.split(',')
+
+    cache_file = None
+    if args.cache_directory is not None:
+        os.makedirs(args.cache_directory, exist_ok=True)
+        cache_file = equivalence_cache_file(
+            args.cache_directory, args.connection_database, tile_type_names
+        )
+
     with sqlite3.connect("file:{}?mode=ro".format(args.connection_database),
                          uri=True) as conn:
+        equiv_db = load_equivalence_database(
+            conn, tile_type_names, cache_file=cache_file
+        )
 
-        cur = conn.cursor()
-        tile_types = {}
-        node_tile_map = {}
-        sites = {}
-        sites_in_tiles = {}
+    tile_types = {}
+    sites = {}
+    sites_in_tiles = {}
 
-        pb_types = {}
+    pb_types = {}
 
-        site_remaps = {}
-        site_name_remaps = {}
+    site_remaps = {}
+    site_name_remaps = {}
 
-        if args.site_equivilances is not None:
-            for site_remap in args.site_equivilances.split(','):
-                general_site, specific_site = site_remap.split('=')
-                assert general_site not in site_name_remaps, general_site
-                site_name_remaps[general_site] = specific_site
+    if args.site_equivilances is not None:
+        for site_remap in args.site_equivilances.split(','):
+            general_site, specific_site = site_remap.split('=')
+            assert general_site not in site_name_remaps, general_site
+            site_name_remaps[general_site] = specific_site
 
-                cur.execute(
-                    "SELECT pkey FROM site_type WHERE name = ?",
-                    (general_site, )
-                )
-                general_site_type_pkey = cur.fetchone()[0]
+            general_site_type_pkey = equiv_db.site_type_pkeys[general_site]
+            specific_site_type_pkey = equiv_db.site_type_pkeys[specific_site]
 
-                cur.execute(
-                    "SELECT pkey FROM site_type WHERE name = ?",
-                    (specific_site, )
-                )
-                specific_site_type_pkey = cur.fetchone()[0]
+            site_remaps[general_site_type_pkey] = specific_site_type_pkey
 
-                site_remaps[general_site_type_pkey] = specific_site_type_pkey
+            check_site_equiv(
+                equiv_db.site_type_pins, general_site_type_pkey,
+                specific_site_type_pkey
+            )
 
-                check_site_equiv(
-                    conn, general_site_type_pkey, specific_site_type_pkey
-                )
+    site_collections_to_pb_type = {}
 
-        site_collections_to_pb_type = {}
+    for pb_type_def_string in args.pb_types:
+        pb_type_name, pb_type_sites = pb_type_def_string.split('=')
+        pb_type_sites = pb_type_sites.split(',')
 
-        for pb_type_def_string in args.pb_types:
-            pb_type_name, pb_type_sites = pb_type_def_string.split('=')
-            pb_type_sites = pb_type_sites.split(',')
+        assert pb_type_name not in pb_types, pb_type_name
+        pb_types[pb_type_name] = []
 
-            assert pb_type_name not in pb_types, pb_type_name
-            pb_types[pb_type_name] = []
+        for site in pb_type_sites:
+            assert site in equiv_db.site_type_pkeys, site
+            pb_types[pb_type_name].append(equiv_db.site_type_pkeys[site])
 
-            for site in pb_type_sites:
-                cur.execute(
-                    "SELECT pkey FROM site_type WHERE name = ?", (site, )
-                )
-                result = cur.fetchone()
-                assert result is not None, site
-                site_type_pkey = result[0]
-                pb_types[pb_type_name].append(site_type_pkey)
+        pb_types[pb_type_name] = frozenset(pb_types[pb_type_name])
 
-            pb_types[pb_type_name] = frozenset(pb_types[pb_type_name])
+        assert pb_types[pb_type_name] not in site_collections_to_pb_type, (
+            pb_type_name, pb_types[pb_type_name]
+        )
 
-            assert pb_types[pb_type_name] not in site_collections_to_pb_type, (
-                pb_type_name, pb_types[pb_type_name]
-            )
+        site_collections_to_pb_type[pb_types[pb_type_name]] = pb_type_name
 
-            site_collections_to_pb_type[pb_types[pb_type_name]] = pb_type_name
+    pb_types_in_tile = {}
 
-        pb_types_in_tile = {}
+    tiles_that_instance_pb_type = {}
 
-        tiles_that_instance_pb_type = {}
+    for tile_type in tile_type_names:
+        tile_type_pkey = equiv_db.tile_type_pkeys[tile_type]
+        tile_types[tile_type] = tile_type_pkey
+        tile_type_graph = equiv_db.tile_types[tile_type_pkey]
+        sites[tile_type_pkey] = tile_type_graph.sites
+        sites_in_tiles[tile_type_pkey] = tile_type_graph.sites_in_tiles
 
-        for tile_type in args.tile_types.split(','):
-            cur.execute(
-                "SELECT pkey FROM tile_type WHERE name = ?", (tile_type, )
-            )
-            tile_type_pkey = cur.fetchone()[0]
-            tile_types[tile_type] = tile_type_pkey
-            node_tile_map[tile_type_pkey] = expand_nodes_in_tile_type(
-                conn, tile_type_pkey
-            )
-            sites[tile_type_pkey], sites_in_tiles[
-                tile_type_pkey] = sites_in_tile_type(conn, tile_type_pkey)
-
-            seen_sets = set()
-            site_type_pkeys = frozenset(sites[tile_type_pkey].keys())
-            seen_sets.add(site_type_pkeys)
+        seen_sets = set()
+        site_type_pkeys = frozenset(sites[tile_type_pkey].keys())
+        seen_sets.add(site_type_pkeys)
 
-            pb_types_in_tile[tile_type_pkey] = [
-                site_collections_to_pb_type[site_type_pkeys]
-            ]
+        pb_types_in_tile[tile_type_pkey] = [
+            site_collections_to_pb_type[site_type_pkeys]
+        ]
 
-            for site_set in yield_mapped_site_sets(site_remaps,
-                                                   site_type_pkeys):
-                if site_set in seen_sets:
-                    continue
-
-                pb_types_in_tile[tile_type_pkey].append(
-                    site_collections_to_pb_type[site_set]
-                )
+        for site_set in yield_mapped_site_sets(site_remaps, site_type_pkeys):
+            if site_set in seen_sets:
+                continue
 
-            for pb_type in pb_types_in_tile[tile_type_pkey]:
-                if pb_type not in tiles_that_instance_pb_type:
-                    tiles_that_instance_pb_type[pb_type] = []
+            pb_types_in_tile[tile_type_pkey].append(
+                site_collections_to_pb_type[site_set]
+            )
 
-                tiles_that_instance_pb_type[pb_type].append(tile_type_pkey)
+        for pb_type in pb_types_in_tile[tile_type_pkey]:
+            if pb_type not in tiles_that_instance_pb_type:
+                tiles_that_instance_pb_type[pb_type] = []
 
-        tile_connections = {}
+            tiles_that_instance_pb_type[pb_type].append(tile_type_pkey)
 
-        for pb_type in tiles_that_instance_pb_type:
-            tile_connections[pb_type] = create_pb_type(
-                conn=conn,
+    pb_type_jobs = []
+    for pb_type in tiles_that_instance_pb_type:
+        pb_type_jobs.append(
+            dict(
                 pin_assignments=pin_assignments,
                 site_directory=args.site_directory,
                 output_directory=args.output_directory,
@@ -1037,21 +976,40 @@ def main():
                 tile_type_pkeys=tiles_that_instance_pb_type[pb_type],
                 site_remaps=site_remaps,
                 site_name_remaps=site_name_remaps,
-                node_tile_map=node_tile_map
             )
+        )
+
+    jobs = args.jobs
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    jobs = max(1, min(jobs, max(len(pb_type_jobs), len(tile_types))))
+
+    ET.register_namespace('xi', XI_URL)
+    with multiprocessing.Pool(jobs, initializer=init_worker,
+                              initargs=(equiv_db, )) as pool:
+        tile_connections = dict(
+            zip(
+                tiles_that_instance_pb_type.keys(),
+                pool.map(create_pb_type_worker, pb_type_jobs)
+            )
+        )
 
+        tile_jobs = []
         for tile_type in tile_types:
             tile_type_pkey = tile_types[tile_type]
-            create_tile(
-                conn=conn,
-                tile_type=tile_type,
-                tile_type_pkey=tile_type_pkey,
-                tile_connections=tile_connections,
-                pb_types=pb_types_in_tile[tile_type_pkey],
-                output_directory=args.output_directory,
-                pin_assignments=pin_assignments,
+            tile_jobs.append(
+                dict(
+                    tile_type=tile_type,
+                    tile_type_pkey=tile_type_pkey,
+                    tile_connections=tile_connections,
+                    pb_types=pb_types_in_tile[tile_type_pkey],
+                    output_directory=args.output_directory,
+                    pin_assignments=pin_assignments,
+                )
             )
 
+        pool.map(create_tile_worker, tile_jobs)
+
 
 if __name__ == '__main__':
     main()
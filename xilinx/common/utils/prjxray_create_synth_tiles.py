@@ -2,8 +2,10 @@ import argparse
 import prjxray.db
 from prjxray.roi import Roi
 import simplejson as json
+import numpy
 
 from prjxray_db_cache import DatabaseCache
+from prjxray_edge_library import fetch_int_array
 
 
 def map_tile_to_vpr_coord(conn, tile):
@@ -36,56 +38,102 @@ WHERE tile_map.phy_tile_pkey = ? AND tile_type.name != 'NULL'
     return grid_x, grid_y
 
 
-def tile_in_roi(conn, g, roi, tile_pkey):
-    """
-    Checks if the given tile_pkey is at a location within the specified roi
+def pkey_array(pkeys, values, default=-1):
+    """ Returns an array of values indexed by pkey.
+
+    The array ends with an extra default entry, selected by the -1 pkey of
+    NULL references.
     """
-    c = conn.cursor()
-    c.execute(
-        """
-SELECT name FROM phy_tile WHERE pkey =
-(SELECT phy_tile_pkey FROM tile WHERE pkey = ?)
-""", (tile_pkey, )
-    )
-    tile, = c.fetchone()
-    loc = g.loc_of_tilename(tile)
-    return roi.tile_in_roi(loc)
+    size = pkeys.max() + 2 if len(pkeys) else 1
+    lookup = numpy.full(size, default, dtype=numpy.int64)
+    lookup[pkeys] = values
 
+    return lookup
 
-def wire_in_roi(conn, g, roi, wire_pkey):
-    """
-    Checks if the given wire_pkey is at a location within the specified roi
-    """
-    c = conn.cursor()
-    c.execute("""
-SELECT tile_pkey FROM wire WHERE pkey = ?
-""", (wire_pkey, ))
-    tile_pkey, = c.fetchone()
-    return tile_in_roi(conn, g, roi, tile_pkey)
 
+class WireIndex(object):
+    """ Spatial index of the wires in the connection database.
 
-def wire_manhattan_distance(conn, wire_pkey1, wire_pkey2):
-    """
-    Determines the manhattan distance between two tiles containing
-    the given wire_pkeys
+    Maps each wire to its VPR tile and grid location, and each node to its
+    wires, so that in-ROI checks and wire distances are array lookups
+    instead of queries per wire.  The ROI membership of physical tiles is
+    computed once per ROI.
+
+    Wires without a tile select the sentinel entry of the tile arrays, which
+    has no physical tile and so is never in a ROI.
     """
-    c = conn.cursor()
-    c.execute(
+
+    def __init__(self, conn, g):
+        cur = conn.cursor()
+
+        rows = fetch_int_array(
+            cur.execute(
+                """
+SELECT pkey, grid_x, grid_y, IFNULL(phy_tile_pkey, -1) FROM tile;"""
+            ), 4
+        )
+        self.tile_grid_x = pkey_array(rows[:, 0], rows[:, 1])
+        self.tile_grid_y = pkey_array(rows[:, 0], rows[:, 2])
+        self.tile_phy_tile = pkey_array(rows[:, 0], rows[:, 3])
+
+        self.phy_tile_locs = {}
+        for pkey, name in cur.execute("SELECT pkey, name FROM phy_tile;"):
+            self.phy_tile_locs[pkey] = g.loc_of_tilename(name)
+
+        rows = fetch_int_array(
+            cur.execute(
+                """
+SELECT pkey, IFNULL(node_pkey, -1), IFNULL(tile_pkey, -1) FROM wire
+ORDER BY pkey;"""
+            ), 3
+        )
+        self.wire_tile = pkey_array(rows[:, 0], rows[:, 2])
+
+        # Wires sorted by node, in pkey order within a node.
+        order = numpy.argsort(rows[:, 1], kind='stable')
+        self.wire_nodes = rows[order, 1]
+        self.node_wire_pkeys = rows[order, 0]
+
+        self.roi_masks = {}
+
+    def node_wires(self, node_pkey):
+        """ Returns the wire pkeys of a node, in pkey order. """
+        lo, hi = numpy.searchsorted(
+            self.wire_nodes, [node_pkey, node_pkey + 1]
+        )
+        return self.node_wire_pkeys[lo:hi]
+
+    def roi_mask(self, roi):
+        """ Returns a boolean array indexed by phy_tile pkey, True in ROI.
+
+        The last entry is False and is selected by tiles without a physical
+        tile.
         """
-SELECT grid_x, grid_y FROM tile WHERE pkey = (SELECT tile_pkey FROM wire WHERE pkey = ?)
-""", (wire_pkey1, )
-    )
-    x1, y1 = c.fetchone()
-    c.execute(
+        if roi not in self.roi_masks:
+            size = max(self.phy_tile_locs, default=-1) + 2
+            mask = numpy.zeros(size, dtype=bool)
+            for pkey, loc in self.phy_tile_locs.items():
+                mask[pkey] = roi.tile_in_roi(loc)
+
+            self.roi_masks[roi] = mask
+
+        return self.roi_masks[roi]
+
+    def wires_in_roi(self, roi, wire_pkeys):
+        """ Returns a boolean array, True for wires within the specified roi.
         """
-SELECT grid_x, grid_y FROM tile WHERE pkey = (SELECT tile_pkey FROM wire WHERE pkey = ?)
-""", (wire_pkey2, )
-    )
-    x2, y2 = c.fetchone()
-    return abs(x1 - x2) + abs(y1 - y2)
+        phy_tile_pkeys = self.tile_phy_tile[self.wire_tile[wire_pkeys]]
+        return self.roi_mask(roi)[phy_tile_pkeys]
+
+    def wire_locs(self, wire_pkeys):
+        """ Returns the grid_x and grid_y arrays of the tiles of the wires. """
+        tile_pkeys = self.wire_tile[wire_pkeys]
+        assert numpy.all(tile_pkeys >= 0), wire_pkeys[tile_pkeys < 0]
 
+        return self.tile_grid_x[tile_pkeys], self.tile_grid_y[tile_pkeys]
 
-def find_wire_from_node(conn, g, roi, node_name, overlay=False):
+
+def find_wire_from_node(conn, wire_index, roi, node_name, overlay=False):
     """
     Finds a pair on wires in the given node such that:
     1. One wire is inside the roi and the other is outside
@@ -108,52 +156,38 @@ phy_tile_pkey = (SELECT pkey FROM phy_tile WHERE name = ?)
     results = cur.fetchall()
     assert len(results) == 1
     wire_pkey, node_pkey = results[0]
+
+    wire_pkeys = wire_index.node_wires(node_pkey)
+    in_roi = overlay ^ wire_index.wires_in_roi(roi, wire_pkeys)
+
+    # Pairs are considered in set iteration order and the first pair with the
+    # minimum distance wins.
+    ins = {w for w, v in zip(wire_pkeys.tolist(), in_roi.tolist()) if v}
+    outs = {w for w, v in zip(wire_pkeys.tolist(), in_roi.tolist()) if not v}
+
+    assert ins and outs, node_name
+
+    ins = numpy.array(list(ins), dtype=numpy.int64)
+    outs = numpy.array(list(outs), dtype=numpy.int64)
+
+    in_x, in_y = wire_index.wire_locs(ins)
+    out_x, out_y = wire_index.wire_locs(outs)
+    dist_x = numpy.abs(in_x[:, numpy.newaxis] - out_x)
+    dist_y = numpy.abs(in_y[:, numpy.newaxis] - out_y)
+    dist = dist_x + dist_y
+
+    _, out_idx = numpy.unravel_index(numpy.argmin(dist), dist.shape)
+    correct_wire = int(outs[out_idx])
+
     cur.execute(
         """
-SELECT pkey FROM wire WHERE node_pkey = ?
-""", (node_pkey, )
-    )
-    wire_pkeys = cur.fetchall()
-    in_outs = {
-        w: (overlay ^ wire_in_roi(conn, g, roi, w))
-        for w, in wire_pkeys
-    }
-    ins = {i for i, v in in_outs.items() if v}
-    outs = {i for i, v in in_outs.items() if not v}
-    min_manhattan_dist = 1000000
-    correct_wire = None
-    for i in ins:
-        for j in outs:
-            d = wire_manhattan_distance(conn, i, j)
-            if d < min_manhattan_dist:
-                min_manhattan_dist = d
-                correct_wire = j
-
-    assert correct_wire is not None, node_name
-    cur.execute(
-        """
-SELECT node_pkey, phy_tile_pkey, wire_in_tile_pkey FROM wire WHERE pkey = ?
+SELECT phy_tile.name, wire_in_tile.name FROM wire
+INNER JOIN phy_tile ON phy_tile.pkey = wire.phy_tile_pkey
+INNER JOIN wire_in_tile ON wire_in_tile.pkey = wire.wire_in_tile_pkey
+WHERE wire.pkey = ?
 """, (correct_wire, )
     )
-    node_pkey_correct_wire, phy_tile_pkey, wire_in_tile_pkey = cur.fetchone()
-    cur.execute(
-        """
-SELECT name, tile_type_pkey FROM wire_in_tile WHERE pkey = ?
-""", (wire_in_tile_pkey, )
-    )
-    wire, tile_type_pkey = cur.fetchone()
-    cur.execute(
-        """
-SELECT name FROM tile_type WHERE pkey = ?
-""", (tile_type_pkey, )
-    )
-    tile_type, = cur.fetchone()
-    cur.execute(
-        """
-SELECT name FROM phy_tile WHERE pkey = ?
-""", (phy_tile_pkey, )
-    )
-    tile, = cur.fetchone()
+    tile, wire = cur.fetchone()
     return tile, wire
 
 
@@ -212,6 +246,13 @@ def main():
         assert False, 'Synth tiles must be for roi or overlay'
 
     with DatabaseCache(args.connection_database, read_only=True) as conn:
+        # Only needed when a port names a node instead of a wire.
+        wire_index = None
+        for j in rois.values():
+            if any('wire' not in port for port in j['ports']):
+                wire_index = WireIndex(conn, g)
+                break
+
         tile_in_use = set()
         num_synth_tiles = 0
 
@@ -237,7 +278,11 @@ def main():
 
                 if 'wire' not in port:
                     tile, wire = find_wire_from_node(
-                        conn, g, roi, port['node'], overlay=bool(args.overlay)
+                        conn,
+                        wire_index,
+                        roi,
+                        port['node'],
+                        overlay=bool(args.overlay)
                     )
                 else:
                     tile, wire = port['wire'].split('/')
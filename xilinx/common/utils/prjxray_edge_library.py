@@ -6,6 +6,9 @@ import simplejson as json
 from lib import progressbar_utils
 import datetime
 import functools
+import hashlib
+import itertools
+import multiprocessing
 from collections import namedtuple
 from lib.rr_graph import tracks
 from lib.rr_graph import graph2
@@ -16,7 +19,10 @@ from lib.rr_graph.graph2 import NodeType
 import re
 import math
 import numpy
+import os
+import sqlite3
 
+from lib.file_cache import temp_file_for
 from prjxray_db_cache import DatabaseCache
 
 now = datetime.datetime.now
@@ -1242,25 +1248,32 @@ def direction_to_enum(pin):
     assert False
 
 
-def build_channels(conn):
-    x_channel_models = {}
-    y_channel_models = {}
+def pack_channel(channel):
+    """ Packs the tracks of one channel.
+
+    Returns the channel key and the graph_node pkeys of each packed tree,
+    tree index is the ptc of the graph_nodes.
+    """
+    key, data = channel
+    channel_model = graph2.process_track(data)
+
+    return key, [[i[2] for i in tree] for tree in channel_model.trees]
 
-    cur = conn.cursor()
 
+def load_channel_tracks(conn):
+    """ Returns the tracks of all alive CHANX and CHANY graph_nodes.
+
+    Tracks are grouped by channel, CHANX by y_low and CHANY by x_low.  Within
+    a channel tracks are in graph_node pkey order.  Returns a list of
+    ((graph_node_type, channel), [(low, high, pkey), ...]).
+    """
+    cur = conn.cursor()
     cur.execute(
         """
-SELECT MIN(x_low), MAX(x_high), MIN(y_low), MAX(y_high) FROM graph_node
-INNER JOIN track
-ON track.pkey = graph_node.track_pkey
-WHERE track.alive;"""
-    )
-    x_min, x_max, y_min, y_max = cur.fetchone()
-
-    for x in progressbar_utils.progressbar(range(x_min, x_max + 1)):
-        cur.execute(
-            """
 SELECT
+    graph_node.graph_node_type,
+    graph_node.x_low,
+    graph_node.x_high,
     graph_node.y_low,
     graph_node.y_high,
     graph_node.pkey
@@ -1272,68 +1285,96 @@ WHERE
 AND
     track.alive
 AND
-    graph_node_type = ?
-AND
-    x_low = ?;""", (graph2.NodeType.CHANY.value, x)
+    graph_node_type IN (?, ?);""",
+        (graph2.NodeType.CHANX.value, graph2.NodeType.CHANY.value)
+    )
+    rows = fetch_int_array(cur, 6)
+
+    is_chanx = rows[:, 0] == graph2.NodeType.CHANX.value
+
+    # CHANX tracks span x in channel y_low, CHANY tracks span y in channel
+    # x_low.
+    channel = numpy.where(is_chanx, rows[:, 3], rows[:, 1])
+    low = numpy.where(is_chanx, rows[:, 1], rows[:, 3])
+    high = numpy.where(is_chanx, rows[:, 2], rows[:, 4])
+
+    order = numpy.lexsort((rows[:, 5], channel, rows[:, 0]))
+    node_type = rows[order, 0]
+    channel = channel[order]
+    tracks = numpy.stack((low[order], high[order], rows[order, 5]), axis=1)
+
+    starts = numpy.flatnonzero(
+        numpy.concatenate(
+            (
+                [True],
+                (node_type[1:] != node_type[:-1]) |
+                (channel[1:] != channel[:-1]),
+            )
         )
+    )
+    ends = numpy.append(starts[1:], len(order))
 
-        data = list(cur)
-        y_channel_models[x] = graph2.process_track(data)
+    return [
+        (
+            (int(node_type[start]), int(channel[start])),
+            [tuple(track) for track in tracks[start:end].tolist()],
+        ) for start, end in zip(starts, ends)
+    ]
 
-    for y in progressbar_utils.progressbar(range(y_min, y_max + 1)):
-        cur.execute(
-            """
-SELECT
-    graph_node.x_low,
-    graph_node.x_high,
-    graph_node.pkey
-FROM graph_node
+
+def build_channels(conn, jobs=None):
+    """ Packs alive tracks into channels and assigns graph_node ptc's.
+
+    Channels are independent, so they are packed in parallel using up to jobs
+    processes (default is the number of CPUs).
+    """
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+SELECT MIN(x_low), MAX(x_high), MIN(y_low), MAX(y_high) FROM graph_node
 INNER JOIN track
 ON track.pkey = graph_node.track_pkey
-WHERE
-    track_pkey IS NOT NULL
-AND
-    track.alive
-AND
-    graph_node_type = ?
-AND
-    y_low = ?;""", (graph2.NodeType.CHANX.value, y)
-        )
+WHERE track.alive;"""
+    )
+    x_min, x_max, y_min, y_max = cur.fetchone()
 
-        data = list(cur)
-        x_channel_models[y] = graph2.process_track(data)
+    channels = load_channel_tracks(conn)
 
-    x_list = []
-    y_list = []
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    jobs = max(1, min(jobs, len(channels)))
 
-    write_cur = conn.cursor()
-    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
-
-    for y in progressbar_utils.progressbar(range(y_max + 1)):
-        if y in x_channel_models:
-            x_list.append(len(x_channel_models[y].trees))
+    x_list = [0 for _ in range(y_max + 1)]
+    y_list = [0 for _ in range(x_max + 1)]
+    ptcs = []
 
-            for idx, tree in enumerate(x_channel_models[y].trees):
-                for i in tree:
-                    write_cur.execute(
-                        'UPDATE graph_node SET ptc = ? WHERE pkey = ?;',
-                        (idx, i[2])
-                    )
+    def add_channel(key, trees):
+        node_type, idx = key
+        if node_type == graph2.NodeType.CHANX.value:
+            x_list[idx] = len(trees)
         else:
-            x_list.append(0)
+            y_list[idx] = len(trees)
 
-    for x in progressbar_utils.progressbar(range(x_max + 1)):
-        if x in y_channel_models:
-            y_list.append(len(y_channel_models[x].trees))
+        for ptc, tree in enumerate(trees):
+            ptcs.extend((ptc, pkey) for pkey in tree)
 
-            for idx, tree in enumerate(y_channel_models[x].trees):
-                for i in tree:
-                    write_cur.execute(
-                        'UPDATE graph_node SET ptc = ? WHERE pkey = ?;',
-                        (idx, i[2])
-                    )
-        else:
-            y_list.append(0)
+    if jobs > 1:
+        with multiprocessing.Pool(jobs) as pool:
+            results = pool.imap_unordered(pack_channel, channels)
+            for key, trees in progressbar_utils.progressbar(
+                    results, max_value=len(channels)):
+                add_channel(key, trees)
+    else:
+        for channel in progressbar_utils.progressbar(channels):
+            add_channel(*pack_channel(channel))
+
+    write_cur = conn.cursor()
+    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
+
+    write_cur.executemany(
+        'UPDATE graph_node SET ptc = ? WHERE pkey = ?;', ptcs
+    )
 
     write_cur.execute(
         """
@@ -1342,17 +1383,15 @@ AND
         (max(max(x_list), max(y_list)), x_min, x_max, y_min, y_max)
     )
 
-    for idx, info in enumerate(x_list):
-        write_cur.execute(
-            """
-        INSERT INTO x_list(idx, info) VALUES (?, ?);""", (idx, info)
-        )
+    write_cur.executemany(
+        """
+        INSERT INTO x_list(idx, info) VALUES (?, ?);""", enumerate(x_list)
+    )
 
-    for idx, info in enumerate(y_list):
-        write_cur.execute(
-            """
-        INSERT INTO y_list(idx, info) VALUES (?, ?);""", (idx, info)
-        )
+    write_cur.executemany(
+        """
+        INSERT INTO y_list(idx, info) VALUES (?, ?);""", enumerate(y_list)
+    )
 
     write_cur.execute("""COMMIT TRANSACTION;""")
 
@@ -1556,174 +1595,201 @@ UPDATE graph_node SET connection_box_wire_pkey = ? WHERE pkey = ?
         )
 
 
-def walk_and_mark_segment(
-        conn, write_cur, graph_node_pkey, forward, segment_pkey, unknown_pkey,
-        pin_graph_node_pkey, tracks, visited_nodes
-):
-    """ Recursive function to walk along a node and mark segments.
+class DeferredWrites(object):
+    """ Collects UPDATE statements to be flushed with executemany.
 
-    This algorithm is used for marking INPINFEED and OUTPINFEED on nodes
-    starting from an IPIN or OPIN edge.
+    Statements are grouped by SQL text, parameters of each statement are
+    applied in the order they were added.  Only use for writes that are not
+    read back before the flush.
+    """
+
+    def __init__(self):
+        self.statements = {}
+
+    def execute(self, sql, parameters):
+        if sql not in self.statements:
+            self.statements[sql] = []
+        self.statements[sql].append(parameters)
+
+    def flush(self, write_cur):
+        for sql, parameters in self.statements.items():
+            write_cur.executemany(sql, parameters)
+        self.statements = {}
 
-    In addition, the canonical location of the connection box IPIN/OPIN nodes
-    is the canonical location of the routing interface.  For example, the
-    CLBLL_R tile is located to the right of the INT_R tile.  The routing
-    lookahead routes to the INT_R (e.g. a x-1 of the CLBLL_R).  So the
-    canonical location of the CLBLL_R IPIN is the INT_R tile, not the CLBLL_R
-    tile.
 
+class GraphWalkView(object):
+    """ In-memory view of graph_node and graph_edge used for graph walks.
+
+    Edges are stored in CSR form in both directions.  Graph node attributes
+    and track segments are arrays indexed by pkey, a missing track is -1.
     """
-    cur = conn.cursor()
 
-    # Update track segment's to segment_pkey (e.g. INPINFEED or OUTPINFEED).
-    cur.execute(
-        """SELECT graph_node_type FROM graph_node WHERE pkey = ?""",
-        (graph_node_pkey, )
-    )
-    graph_node_type = NodeType(cur.fetchone()[0])
-    if graph_node_type in [NodeType.CHANX, NodeType.CHANY]:
-        cur.execute(
-            "SELECT track_pkey FROM graph_node WHERE pkey = ?",
-            (graph_node_pkey, )
-        )
-        track_pkey = cur.fetchone()[0]
-        assert track_pkey is not None
+    def __init__(self, conn):
+        cur = conn.cursor()
 
-        cur.execute(
-            "SELECT segment_pkey FROM track WHERE pkey = ?", (track_pkey, )
+        nodes = fetch_int_array(
+            cur.execute(
+                """
+SELECT pkey, graph_node_type, IFNULL(track_pkey, -1) FROM graph_node"""
+            ), 3
+        )
+        num_nodes = nodes[:, 0].max() + 1 if len(nodes) else 0
+        self.node_type = numpy.full(num_nodes, -1, dtype=numpy.int64)
+        self.node_track = numpy.full(num_nodes, -1, dtype=numpy.int64)
+        self.node_type[nodes[:, 0]] = nodes[:, 1]
+        self.node_track[nodes[:, 0]] = nodes[:, 2]
+
+        self.track_segment = pkey_lookup(
+            cur, "SELECT pkey, IFNULL(segment_pkey, -1) FROM track"
         )
-        old_segment_pkey = cur.fetchone()[0]
-        if old_segment_pkey == unknown_pkey or old_segment_pkey is None:
-            tracks.append(track_pkey)
-            write_cur.execute(
-                "UPDATE track SET segment_pkey = ? WHERE pkey = ?", (
-                    segment_pkey,
-                    track_pkey,
-                )
-            )
-    else:
-        track_pkey = None
 
-    # Traverse to the next graph node.
-    if forward:
-        cur.execute(
-            """
-SELECT
-    graph_edge.dest_graph_node_pkey,
-    graph_node.track_pkey
-FROM
-    graph_edge
-INNER JOIN graph_node ON graph_node.pkey = graph_edge.dest_graph_node_pkey
+        edges = fetch_int_array(
+            cur.execute(
+                """
+SELECT src_graph_node_pkey, dest_graph_node_pkey FROM graph_edge
 WHERE
-    src_graph_node_pkey = ?
-""", (graph_node_pkey, )
+    src_graph_node_pkey IS NOT NULL
+AND
+    dest_graph_node_pkey IS NOT NULL"""
+            ), 2
         )
-        next_nodes = cur.fetchall()
-    else:
-        cur.execute(
-            """
-SELECT
-    graph_edge.src_graph_node_pkey,
-    graph_node.track_pkey
-FROM
-    graph_edge
-INNER JOIN graph_node ON graph_node.pkey = graph_edge.src_graph_node_pkey
-WHERE
-    dest_graph_node_pkey = ?
-""", (graph_node_pkey, )
+
+        self.forward = self._make_csr(edges[:, 0], edges[:, 1], num_nodes)
+        self.backward = self._make_csr(edges[:, 1], edges[:, 0], num_nodes)
+
+        self.tieoff_tracks = set()
+        for vcc_track_pkey, gnd_track_pkey in cur.execute(
+                "SELECT vcc_track_pkey, gnd_track_pkey FROM constant_sources"):
+            self.tieoff_tracks.add(vcc_track_pkey)
+            self.tieoff_tracks.add(gnd_track_pkey)
+        self.tieoff_tracks.discard(None)
+
+    def _make_csr(self, from_nodes, to_nodes, num_nodes):
+        # Edges to graph nodes that do not exist are dropped, like the
+        # INNER JOIN on graph_node did.
+        exists = to_nodes < num_nodes
+        exists[exists] = self.node_type[to_nodes[exists]] != -1
+        from_nodes = from_nodes[exists]
+        to_nodes = to_nodes[exists]
+
+        order = numpy.argsort(from_nodes, kind='stable')
+        offsets = numpy.zeros(num_nodes + 1, dtype=numpy.int64)
+        offsets[1:] = numpy.cumsum(
+            numpy.bincount(from_nodes, minlength=num_nodes)[:num_nodes]
         )
-        next_nodes = cur.fetchall()
 
-    if not forward:
-        # Some nodes simply lead to GND/VCC tieoff pins, these should not
-        # stop the walk, as they are not relevant to connection box.
-        next_non_tieoff_nodes = []
-        for (next_graph_node_pkey, next_track) in next_nodes:
-            cur.execute(
-                """
-SELECT count() FROM constant_sources WHERE
-    vcc_track_pkey = (SELECT track_pkey FROM graph_node WHERE pkey = ?)
-OR
-    gnd_track_pkey = (SELECT track_pkey FROM graph_node WHERE pkey = ?)
-    """, (
-                    next_graph_node_pkey,
-                    next_graph_node_pkey,
-                )
-            )
-            if cur.fetchone()[0] == 0:
-                next_non_tieoff_nodes.append(
-                    (next_graph_node_pkey, next_track)
-                )
+        return offsets, to_nodes[order]
 
-        if len(next_non_tieoff_nodes) == 1:
-            (next_node, next_track) = next_non_tieoff_nodes[0]
+    def has_edges(self, graph_node_pkey, forward):
+        """ Returns true if an edge in the specified direction exists. """
+        offsets, _ = self.forward if forward else self.backward
+        return offsets[graph_node_pkey + 1] > offsets[graph_node_pkey]
 
-        next_nodes = next_non_tieoff_nodes
+    def track(self, graph_node_pkey):
+        track_pkey = int(self.node_track[graph_node_pkey])
+        return track_pkey if track_pkey != -1 else None
 
-    if len(next_nodes) == 1:
-        # This is a simple edge, keep walking.
-        (next_node, next_track) = next_nodes[0]
-    else:
-        next_other_nodes = []
-        for next_node, next_track in next_nodes:
-            # Shorted groups will have edges back to previous nodes, but they
-            # will be in the same track, so ignore these.
-            if next_node in visited_nodes and track_pkey == next_track:
-                continue
-            else:
-                next_other_nodes.append((next_node, next_track))
+    def next_nodes(self, graph_node_pkey, forward):
+        """ Returns list of (graph node, track) across edges. """
+        offsets, targets = self.forward if forward else self.backward
+        return [
+            (next_node, self.track(next_node)) for next_node in
+            targets[offsets[graph_node_pkey]:offsets[graph_node_pkey +
+                                                     1]].tolist()
+        ]
 
-        if len(next_other_nodes) == 1:
-            # This is a simple edge, keep walking.
-            (next_node, next_track) = next_other_nodes[0]
-        else:
-            next_node = None
 
-    if next_node is not None and next_node not in visited_nodes:
-        # If there is a next node, keep walking
-        visited_nodes.add(next_node)
-        walk_and_mark_segment(
-            conn=conn,
-            write_cur=write_cur,
-            graph_node_pkey=next_node,
-            forward=forward,
-            segment_pkey=segment_pkey,
-            unknown_pkey=unknown_pkey,
-            pin_graph_node_pkey=pin_graph_node_pkey,
-            tracks=tracks,
-            visited_nodes=visited_nodes
-        )
-    else:
-        # There is not a next node, update the connection box of the IPIN/OPIN
-        # the walk was started from.
-        set_pin_connection(
-            conn=conn,
-            write_cur=write_cur,
-            pin_graph_node_pkey=pin_graph_node_pkey,
-            forward=forward,
-            graph_node_pkey=graph_node_pkey,
-            tracks=tracks
-        )
+def walk_and_mark_segment(
+        conn, view, writes, graph_node_pkey, forward, segment_pkey,
+        unknown_pkey, pin_graph_node_pkey
+):
+    """ Walk along a node and mark segments.
 
+    This algorithm is used for marking INPINFEED and OUTPINFEED on nodes
+    starting from an IPIN or OPIN edge.
 
-def active_graph_node(conn, graph_node_pkey, forward):
-    """ Returns true if an edge in the specified direction exists. """
-    cur = conn.cursor()
+    In addition, the canonical location of the connection box IPIN/OPIN nodes
+    is the canonical location of the routing interface.  For example, the
+    CLBLL_R tile is located to the right of the INT_R tile.  The routing
+    lookahead routes to the INT_R (e.g. a x-1 of the CLBLL_R).  So the
+    canonical location of the CLBLL_R IPIN is the INT_R tile, not the CLBLL_R
+    tile.
 
-    if forward:
-        cur.execute(
-            """
-SELECT count(*) FROM graph_edge WHERE src_graph_node_pkey = ? LIMIT 1
-            """, (graph_node_pkey, )
-        )
-    else:
-        cur.execute(
-            """
-SELECT count(*) FROM graph_edge WHERE dest_graph_node_pkey = ? LIMIT 1
-            """, (graph_node_pkey, )
-        )
+    The graph is read from the GraphWalkView, which is kept in sync with the
+    track segment updates.  Updates are added to the DeferredWrites.
+
+    """
+    tracks = []
+    visited_nodes = set()
+
+    while True:
+        # Update track segment's to segment_pkey (e.g. INPINFEED or
+        # OUTPINFEED).
+        graph_node_type = NodeType(int(view.node_type[graph_node_pkey]))
+        if graph_node_type in [NodeType.CHANX, NodeType.CHANY]:
+            track_pkey = view.track(graph_node_pkey)
+            assert track_pkey is not None
+
+            old_segment_pkey = view.track_segment[track_pkey]
+            if old_segment_pkey == unknown_pkey or old_segment_pkey == -1:
+                tracks.append(track_pkey)
+                view.track_segment[track_pkey] = segment_pkey
+                writes.execute(
+                    "UPDATE track SET segment_pkey = ? WHERE pkey = ?", (
+                        segment_pkey,
+                        track_pkey,
+                    )
+                )
+        else:
+            track_pkey = None
+
+        # Traverse to the next graph node.
+        next_nodes = view.next_nodes(graph_node_pkey, forward)
+
+        if not forward:
+            # Some nodes simply lead to GND/VCC tieoff pins, these should not
+            # stop the walk, as they are not relevant to connection box.
+            next_nodes = [
+                (next_node, next_track)
+                for (next_node, next_track) in next_nodes
+                if next_track not in view.tieoff_tracks
+            ]
+
+        if len(next_nodes) == 1:
+            # This is a simple edge, keep walking.
+            (next_node, next_track) = next_nodes[0]
+        else:
+            next_other_nodes = []
+            for next_node, next_track in next_nodes:
+                # Shorted groups will have edges back to previous nodes, but
+                # they will be in the same track, so ignore these.
+                if next_node in visited_nodes and track_pkey == next_track:
+                    continue
+                else:
+                    next_other_nodes.append((next_node, next_track))
+
+            if len(next_other_nodes) == 1:
+                # This is a simple edge, keep walking.
+                (next_node, next_track) = next_other_nodes[0]
+            else:
+                next_node = None
 
-    return cur.fetchone()[0] > 0
+        if next_node is not None and next_node not in visited_nodes:
+            # If there is a next node, keep walking
+            visited_nodes.add(next_node)
+            graph_node_pkey = next_node
+        else:
+            # There is not a next node, update the connection box of the
+            # IPIN/OPIN the walk was started from.
+            set_pin_connection(
+                conn=conn,
+                write_cur=writes,
+                pin_graph_node_pkey=pin_graph_node_pkey,
+                forward=forward,
+                graph_node_pkey=graph_node_pkey,
+                tracks=tracks
+            )
+            break
 
 
 def annotate_pin_feeds(conn, ccio_sites):
@@ -1800,15 +1866,16 @@ AND
         for (graph_node_pkey, ) in cur:
             ccio_opins.add(graph_node_pkey)
 
-    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
+    view = GraphWalkView(conn)
+    writes = DeferredWrites()
 
     # Walk from OPIN's first.
     for (graph_node_pkey, node_pkey) in cur.execute("""
 SELECT graph_node.pkey, graph_node.node_pkey
 FROM graph_node
 WHERE graph_node.graph_node_type = ?
-        """, (NodeType.OPIN.value, )):
-        if not active_graph_node(conn, graph_node_pkey, forward=True):
+        """, (NodeType.OPIN.value, )).fetchall():
+        if not view.has_edges(graph_node_pkey, forward=True):
             continue
 
         if graph_node_pkey in bufhce_opins:
@@ -1824,14 +1891,13 @@ WHERE graph_node.graph_node_type = ?
 
         walk_and_mark_segment(
             conn,
-            write_cur,
+            view,
+            writes,
             graph_node_pkey,
             forward=True,
             segment_pkey=segment_pkey,
             unknown_pkey=segments["unknown"],
             pin_graph_node_pkey=graph_node_pkey,
-            tracks=list(),
-            visited_nodes=set()
         )
 
     # Walk from IPIN's next.
@@ -1839,9 +1905,9 @@ WHERE graph_node.graph_node_type = ?
 SELECT graph_node.pkey
 FROM graph_node
 WHERE graph_node.graph_node_type = ?
-        """, (NodeType.IPIN.value, )):
+        """, (NodeType.IPIN.value, )).fetchall():
 
-        if not active_graph_node(conn, graph_node_pkey, forward=False):
+        if not view.has_edges(graph_node_pkey, forward=False):
             continue
 
         if graph_node_pkey in bufg_ipins:
@@ -1853,19 +1919,47 @@ WHERE graph_node.graph_node_type = ?
 
         walk_and_mark_segment(
             conn,
-            write_cur,
+            view,
+            writes,
             graph_node_pkey,
             forward=False,
             segment_pkey=segment_pkey,
             unknown_pkey=segments["unknown"],
             pin_graph_node_pkey=graph_node_pkey,
-            tracks=list(),
-            visited_nodes=set()
         )
 
+    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
+    writes.flush(write_cur)
     write_cur.execute("""COMMIT TRANSACTION;""")
 
 
+def fetch_int_array(cur, columns):
+    """ Returns the rows of an integer-only query as an (N, columns) array. """
+    return numpy.fromiter(
+        itertools.chain.from_iterable(cur), dtype=numpy.int64
+    ).reshape(-1, columns)
+
+
+def pkey_lookup(cur, query, default=-1):
+    """ Returns an array indexed by pkey from a query yielding (pkey, value).
+    """
+    rows = fetch_int_array(cur.execute(query), 2)
+
+    size = rows[:, 0].max() + 1 if len(rows) else 0
+    lookup = numpy.full(size, default, dtype=numpy.int64)
+    lookup[rows[:, 0]] = rows[:, 1]
+
+    return lookup
+
+
+def load_phy_tile_locs(cur):
+    """ Returns grid_x and grid_y arrays indexed by phy_tile pkey. """
+    grid_x = pkey_lookup(cur, "SELECT pkey, grid_x FROM phy_tile")
+    grid_y = pkey_lookup(cur, "SELECT pkey, grid_y FROM phy_tile")
+
+    return grid_x, grid_y
+
+
 def set_track_canonical_loc(conn):
     """ For each track, compute a canonical location.
 
@@ -1875,53 +1969,66 @@ def set_track_canonical_loc(conn):
 
     For bidirection wires (generally long segments), use a consisent
     canonilization.
+
+    The canonical location is the phy_tile of the wire in the track with the
+    lowest (grid_x, grid_y) among the wires that are driven by a pip.  The
+    wire, node and track tables are loaded into arrays once and the minimum
+    is found with a single sort.
     """
 
     write_cur = conn.cursor()
     cur = conn.cursor()
-    cur2 = conn.cursor()
-    cur3 = conn.cursor()
 
-    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
+    # Wire in tile pkeys that are the destination of any pip.
+    pip_dest = numpy.zeros(
+        cur.execute("SELECT max(pkey) FROM wire_in_tile").fetchone()[0] + 1,
+        dtype=bool
+    )
+    pip_dest[fetch_int_array(
+        cur.execute(
+            """
+SELECT DISTINCT dest_wire_in_tile_pkey FROM pip_in_tile
+WHERE dest_wire_in_tile_pkey IS NOT NULL"""
+        ), 1
+    )[:, 0]] = True
 
-    cur.execute("SELECT pkey FROM track WHERE alive")
-    tracks = cur.fetchall()
-    for (track_pkey, ) in progressbar_utils.progressbar(tracks):
-        source_wires = []
-        for (wire_pkey, ) in cur2.execute("""
-SELECT pkey FROM wire WHERE node_pkey IN (
-    SELECT pkey FROM node WHERE track_pkey = ?
-    )""", (track_pkey, )):
-            cur3.execute(
-                """
-SELECT count(*)
-FROM pip_in_tile
+    grid_x, grid_y = load_phy_tile_locs(cur)
+
+    # Wires of nodes belonging to alive tracks.
+    wires = fetch_int_array(
+        cur.execute(
+            """
+SELECT node.track_pkey, wire.wire_in_tile_pkey, wire.phy_tile_pkey
+FROM wire
+INNER JOIN node ON node.pkey = wire.node_pkey
+INNER JOIN track ON track.pkey = node.track_pkey
 WHERE
-    dest_wire_in_tile_pkey = (SELECT wire_in_tile_pkey FROM wire WHERE pkey = ?)
-LIMIT 1
-    """, (wire_pkey, )
-            )
-            pips_to_wire = cur3.fetchone()[0]
-            if pips_to_wire > 0:
-                cur3.execute(
-                    """
-SELECT grid_x, grid_y FROM phy_tile WHERE pkey = (
-    SELECT phy_tile_pkey FROM wire WHERE pkey = ?
-                    )""", (wire_pkey, )
-                )
-                grid_x, grid_y = cur3.fetchone()
-                source_wires.append(((grid_x, grid_y), wire_pkey))
+    track.alive
+AND
+    wire.wire_in_tile_pkey IS NOT NULL
+AND
+    wire.phy_tile_pkey IS NOT NULL"""
+        ), 3
+    )
 
-        if len(source_wires) > 0:
-            source_wire_pkey = min(source_wires, key=lambda x: x[0])[1]
-            write_cur.execute(
-                """
-UPDATE track
-SET canon_phy_tile_pkey = (SELECT phy_tile_pkey FROM wire WHERE pkey = ?)
-WHERE pkey = ?
-            """, (source_wire_pkey, track_pkey)
-            )
+    wires = wires[pip_dest[wires[:, 1]]]
+    track_pkeys = wires[:, 0]
+    phy_tile_pkeys = wires[:, 2]
+
+    # Group-min of (grid_x, grid_y) per track.
+    order = numpy.lexsort(
+        (grid_y[phy_tile_pkeys], grid_x[phy_tile_pkeys], track_pkeys)
+    )
+    track_pkeys = track_pkeys[order]
+    phy_tile_pkeys = phy_tile_pkeys[order]
+    first = numpy.ones(len(track_pkeys), dtype=bool)
+    first[1:] = track_pkeys[1:] != track_pkeys[:-1]
 
+    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
+    write_cur.executemany(
+        "UPDATE track SET canon_phy_tile_pkey = ? WHERE pkey = ?",
+        zip(phy_tile_pkeys[first].tolist(), track_pkeys[first].tolist())
+    )
     write_cur.execute("""COMMIT TRANSACTION;""")
 
 
@@ -1934,69 +2041,101 @@ def get_segment_length(segment_lengths):
     return max(1, median_length)
 
 
-def compute_segment_lengths(conn):
-    """ Determine segment lengths used for cost normalization. """
-    cur = conn.cursor()
-    cur2 = conn.cursor()
-    cur3 = conn.cursor()
-    cur4 = conn.cursor()
+def compute_segment_lengths(conn, chunk_size=1 << 20):
+    """ Determine segment lengths used for cost normalization.
+
+    The length of a track is the largest manhattan distance between its
+    canonical location and the canonical location of any track it drives
+    (at least 1).  The segment length is the median of its track lengths.
 
+    graph_edge is scanned once in chunks of chunk_size edges.
+    """
+    cur = conn.cursor()
     write_cur = conn.cursor()
 
-    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
+    grid_x, grid_y = load_phy_tile_locs(cur)
 
-    for (segment_pkey, ) in cur.execute("SELECT pkey FROM segment"):
+    # Tracks with a canonical location.
+    tracks = fetch_int_array(
+        cur.execute(
+            """
+SELECT pkey, canon_phy_tile_pkey, IFNULL(segment_pkey, -1) FROM track
+WHERE canon_phy_tile_pkey IS NOT NULL"""
+        ), 3
+    )
 
-        segment_lengths = []
+    num_tracks = tracks[:, 0].max() + 1 if len(tracks) else 0
+    canon_x = numpy.full(num_tracks, -1, dtype=numpy.int64)
+    canon_y = numpy.full(num_tracks, -1, dtype=numpy.int64)
+    has_canon = numpy.zeros(num_tracks, dtype=bool)
+    canon_x[tracks[:, 0]] = grid_x[tracks[:, 1]]
+    canon_y[tracks[:, 0]] = grid_y[tracks[:, 1]]
+    has_canon[tracks[:, 0]] = True
 
-        # Get all tracks with this segment
-        for (track_pkey, src_phy_tile_pkey) in cur2.execute("""
-SELECT pkey, canon_phy_tile_pkey FROM track
-WHERE
-    canon_phy_tile_pkey IS NOT NULL
-AND
-    segment_pkey = ?
-        """, (segment_pkey, )):
-            segment_length = 1
-            cur4.execute(
-                "SELECT grid_x, grid_y FROM phy_tile WHERE pkey = ?",
-                (src_phy_tile_pkey, )
-            )
-            src_x, src_y = cur4.fetchone()
-
-            # Get tiles downstream of this track.
-            for (dest_phy_tile_pkey, ) in cur3.execute("""
-SELECT DISTINCT canon_phy_tile_pkey FROM track WHERE pkey IN (
-    SELECT track_pkey FROM graph_node WHERE pkey IN (
-        SELECT dest_graph_node_pkey FROM graph_edge WHERE src_graph_node_pkey IN (
-            SELECT pkey FROM graph_node WHERE track_pkey = ?
-        )
+    track_length = numpy.ones(num_tracks, dtype=numpy.int64)
+
+    node_track = pkey_lookup(
+        cur, """
+SELECT pkey, track_pkey FROM graph_node WHERE track_pkey IS NOT NULL"""
     )
-) AND canon_phy_tile_pkey IS NOT NULL
-            """, (track_pkey, )):
-                if src_phy_tile_pkey == dest_phy_tile_pkey:
-                    continue
 
-                cur4.execute(
-                    "SELECT grid_x, grid_y FROM phy_tile WHERE pkey = ?",
-                    (dest_phy_tile_pkey, )
-                )
-                dest_x, dest_y = cur4.fetchone()
+    def tracks_with_canon(graph_nodes):
+        """ Maps graph nodes to track pkeys, -1 if without canonical loc. """
+        track_pkeys = numpy.full(len(graph_nodes), -1, dtype=numpy.int64)
+        in_range = graph_nodes < len(node_track)
+        track_pkeys[in_range] = node_track[graph_nodes[in_range]]
 
-                segment_length = max(
-                    segment_length,
-                    abs(dest_x - src_x) + abs(dest_y - src_y)
-                )
+        valid = (track_pkeys >= 0) & (track_pkeys < num_tracks)
+        valid[valid] = has_canon[track_pkeys[valid]]
+        track_pkeys[~valid] = -1
 
-            segment_lengths.append(segment_length)
+        return track_pkeys
 
-        write_cur.execute(
-            "UPDATE segment SET length = ? WHERE pkey = ?", (
-                get_segment_length(segment_lengths),
+    cur.execute(
+        """
+SELECT src_graph_node_pkey, dest_graph_node_pkey FROM graph_edge
+WHERE
+    src_graph_node_pkey IS NOT NULL
+AND
+    dest_graph_node_pkey IS NOT NULL"""
+    )
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            break
+
+        edges = numpy.array(rows, dtype=numpy.int64).reshape(-1, 2)
+        src_tracks = tracks_with_canon(edges[:, 0])
+        dest_tracks = tracks_with_canon(edges[:, 1])
+
+        valid = (src_tracks >= 0) & (dest_tracks >= 0)
+        src_tracks = src_tracks[valid]
+        dest_tracks = dest_tracks[valid]
+
+        distance = (
+            numpy.abs(canon_x[dest_tracks] - canon_x[src_tracks]) +
+            numpy.abs(canon_y[dest_tracks] - canon_y[src_tracks])
+        )
+        numpy.maximum.at(track_length, src_tracks, distance)
+
+    lengths_of_tracks = track_length[tracks[:, 0]]
+    segment_of_tracks = tracks[:, 2]
+
+    segment_lengths = []
+    for (segment_pkey, ) in cur.execute("SELECT pkey FROM segment"):
+        segment_lengths.append(
+            (
+                get_segment_length(
+                    lengths_of_tracks[segment_of_tracks == segment_pkey]
+                ),
                 segment_pkey,
             )
         )
 
+    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
+    write_cur.executemany(
+        "UPDATE segment SET length = ? WHERE pkey = ?", segment_lengths
+    )
     write_cur.execute("""COMMIT TRANSACTION;""")
 
 
@@ -2012,6 +2151,9 @@ def commit_edges(write_cur, edges):
     write_cur.execute("""COMMIT TRANSACTION;""")
 
 
+# Bump when the contents of the edge cache change.
+EDGE_CACHE_VERSION = '2'
+
 REMOVE_TRAILING_NUM = re.compile(r'[0-9]+$')
 
 
@@ -2062,9 +2204,18 @@ def create_edge_indices(conn):
     print('{} Indices created, marking track liveness'.format(now()))
 
 
-def create_and_insert_edges(
+def yield_tile_connections(
         db, grid, conn, use_roi, roi, input_only_nodes, output_only_nodes
 ):
+    """ Yields the connections made by the pips of each tile.
+
+    Yields (loc, pip_connections) for each tile, in grid order, where
+    pip_connections is a list of (src_node_pkey, sink_node_pkey, connections)
+    tuples, one per imported pip.  src_node_pkey and sink_node_pkey are the
+    nodes on either side of the pip, connections is the list of graph edge
+    tuples made by make_connection.
+
+    """
     write_cur = conn.cursor()
 
     write_cur.execute(
@@ -2083,11 +2234,7 @@ def create_and_insert_edges(
 
     sorted_pips = {}
 
-    num_edges = 0
-    edges = []
     for loc in progressbar_utils.progressbar(grid.tile_locations()):
-        edge_set = set()
-
         gridinfo = grid.gridinfo_at_loc(loc)
         tile_name = grid.tilename_at_loc(loc)
 
@@ -2100,6 +2247,7 @@ def create_and_insert_edges(
         if tile_type not in sorted_pips:
             sorted_pips[tile_type] = make_sorted_pips(tile_type.get_pips())
 
+        pip_connections = []
         for forward, pip in sorted_pips[tile_type]:
             # FIXME: The PADOUT0/1 connections do not work.
             #
@@ -2130,30 +2278,72 @@ def create_and_insert_edges(
             if "PS72_" in pip.net_to or "PS72_" in pip.net_from:
                 continue
 
-            connections = make_connection(
-                conn=conn,
-                input_only_nodes=input_only_nodes,
-                output_only_nodes=output_only_nodes,
-                find_pip=find_pip,
-                find_wire=find_wire,
-                find_connector=find_connector,
-                get_tile_loc=get_tile_loc,
-                tile_name=tile_name,
-                tile_type=gridinfo.tile_type,
-                pip=pip,
-                delayless_switch=delayless_switch,
-                const_connectors=const_connectors,
-                forward=forward,
+            connections = list(
+                make_connection(
+                    conn=conn,
+                    input_only_nodes=input_only_nodes,
+                    output_only_nodes=output_only_nodes,
+                    find_pip=find_pip,
+                    find_wire=find_wire,
+                    find_connector=find_connector,
+                    get_tile_loc=get_tile_loc,
+                    tile_name=tile_name,
+                    tile_type=gridinfo.tile_type,
+                    pip=pip,
+                    delayless_switch=delayless_switch,
+                    const_connectors=const_connectors,
+                    forward=forward,
+                )
             )
 
             if connections:
-                for connection in connections:
-                    key = tuple(connection[0:3])
-                    if key in edge_set:
-                        continue
+                # Same nodes as make_connection, find_wire is cached.
+                src_node_pkey = find_wire(
+                    tile_name, gridinfo.tile_type, pip.net_from
+                )[3]
+                sink_node_pkey = find_wire(
+                    tile_name, gridinfo.tile_type, pip.net_to
+                )[3]
+                pip_connections.append(
+                    (src_node_pkey, sink_node_pkey, connections)
+                )
+
+        yield loc, pip_connections
+
+
+def unique_tile_edges(connections):
+    """ Returns the edges of a tile, without duplicate (src, dest, switch)
+    edges.
+    """
+    edge_set = set()
+    edges = []
+    for connection in connections:
+        key = tuple(connection[0:3])
+        if key in edge_set:
+            continue
+
+        edge_set.add(key)
+        edges.append(connection)
+
+    return edges
+
+
+def create_and_insert_edges(
+        db, grid, conn, use_roi, roi, input_only_nodes, output_only_nodes
+):
+    write_cur = conn.cursor()
 
-                    edge_set.add(key)
-                    edges.append(connection)
+    num_edges = 0
+    edges = []
+    for _, pip_connections in yield_tile_connections(
+            db, grid, conn, use_roi, roi, input_only_nodes, output_only_nodes):
+        edges.extend(
+            unique_tile_edges(
+                itertools.chain.from_iterable(
+                    connections for _, _, connections in pip_connections
+                )
+            )
+        )
 
         if len(edges) > 1000:
             commit_edges(write_cur, edges)
@@ -2161,9 +2351,356 @@ def create_and_insert_edges(
             num_edges += len(edges)
             edges = []
 
+    commit_edges(write_cur, edges)
+    num_edges += len(edges)
+
     print('{} Created {} edges, inserted'.format(now(), num_edges))
 
 
+def edge_cache_key(connection_database, pin_assignments):
+    """ Returns the key of the edge cache of a connection database.
+
+    Edges only depend on the connection database produced by
+    prjxray_form_channels and on the pin assignments.  The connection
+    database is identified by its size and its 100 byte SQLite header, which
+    holds a change counter that SQLite increments on every write, so copies
+    of a database share a key without reading the whole database.
+    """
+    h = hashlib.sha256()
+    h.update(EDGE_CACHE_VERSION.encode('utf-8'))
+    h.update(str(os.path.getsize(connection_database)).encode('utf-8'))
+    with open(connection_database, 'rb') as f:
+        h.update(f.read(100))
+    with open(pin_assignments, 'rb') as f:
+        h.update(f.read())
+
+    return h.hexdigest()
+
+
+def read_edge_cache_key(edge_cache):
+    """ Returns the key edge_cache was built with.
+
+    Returns None if edge_cache does not exist or is not an edge cache.
+    """
+    try:
+        cache_conn = sqlite3.connect(
+            'file:{}?mode=ro'.format(edge_cache), uri=True
+        )
+    except sqlite3.Error:
+        return None
+
+    try:
+        return cache_conn.execute("SELECT key FROM edge_cache_info;"
+                                  ).fetchone()[0]
+    except (sqlite3.Error, TypeError):
+        return None
+    finally:
+        cache_conn.close()
+
+
+def build_edge_cache(db, grid, conn, edge_cache, key):
+    """ Writes the edges of every pip of the device to edge_cache.
+
+    Edges are stored before any ROI filtering and before removing duplicate
+    edges, with the nodes on either side of their pip, in the order
+    create_and_insert_edges would insert them.
+
+    Connector.find_wire_node adds the site pin graph nodes of the device to
+    conn, so conn should be a copy of the connection database, e.g. a read
+    only DatabaseCache.  The site pin graph nodes are stored in the cache,
+    and insert_cached_edges only adds the ones the edges of a variant use.
+
+    """
+    # Variants of a part may build the cache concurrently, each builds its
+    # own file and moves it into place.
+    tmp_file = temp_file_for(edge_cache)
+    try:
+        write_edge_cache(db, grid, conn, tmp_file, key)
+        os.replace(tmp_file, edge_cache)
+    except BaseException:
+        os.unlink(tmp_file)
+        raise
+
+    print('{} Cached edge candidates in {}'.format(now(), edge_cache))
+
+
+def write_edge_cache(db, grid, conn, fname, key):
+    """ Writes the edge candidates of build_edge_cache to fname. """
+    cache_conn = sqlite3.connect(fname)
+    cache_cur = cache_conn.cursor()
+    cache_cur.execute("CREATE TABLE edge_cache_info(key TEXT);")
+    cache_cur.execute(
+        """
+CREATE TABLE site_pin_graph_node(
+  graph_node_pkey INT,
+  wire_pkey INT,
+  graph_node_type INT,
+  node_pkey INT,
+  x_low INT,
+  x_high INT,
+  y_low INT,
+  y_high INT,
+  capacity INT,
+  capacitance REAL,
+  resistance REAL
+);"""
+    )
+    cache_cur.execute(
+        """
+CREATE TABLE edge_candidate(
+  grid_x INT,
+  grid_y INT,
+  src_node_pkey INT,
+  sink_node_pkey INT,
+  src_graph_node_pkey INT,
+  dest_graph_node_pkey INT,
+  switch_pkey INT,
+  phy_tile_pkey INT,
+  pip_in_tile_pkey INT,
+  backward INT
+);"""
+    )
+
+    # Log the site pin graph nodes created by Connector.find_wire_node, in
+    # creation order.
+    write_cur = conn.cursor()
+    write_cur.execute(
+        """
+CREATE TEMP TABLE site_pin_graph_node_log(
+  wire_pkey INT,
+  graph_node_pkey INT
+);"""
+    )
+    write_cur.execute(
+        """
+CREATE TEMP TRIGGER log_site_pin_graph_node
+AFTER UPDATE OF site_pin_graph_node_pkey ON wire
+BEGIN
+  INSERT INTO site_pin_graph_node_log(wire_pkey, graph_node_pkey)
+    VALUES (NEW.pkey, NEW.site_pin_graph_node_pkey);
+END;"""
+    )
+    conn.commit()
+
+    num_candidates = 0
+    for loc, pip_connections in yield_tile_connections(
+            db, grid, conn, use_roi=False, roi=None, input_only_nodes=set(),
+            output_only_nodes=set()):
+        rows = []
+        for src_node_pkey, sink_node_pkey, connections in pip_connections:
+            for connection in connections:
+                rows.append(
+                    (loc.grid_x, loc.grid_y, src_node_pkey, sink_node_pkey) +
+                    tuple(connection)
+                )
+
+        cache_cur.executemany(
+            "INSERT INTO edge_candidate VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+            rows
+        )
+        num_candidates += len(rows)
+
+    write_cur.execute(
+        """
+SELECT
+  graph_node.pkey,
+  site_pin_graph_node_log.wire_pkey,
+  graph_node.graph_node_type,
+  graph_node.node_pkey,
+  graph_node.x_low,
+  graph_node.x_high,
+  graph_node.y_low,
+  graph_node.y_high,
+  graph_node.capacity,
+  graph_node.capacitance,
+  graph_node.resistance
+FROM
+  site_pin_graph_node_log
+  INNER JOIN graph_node ON graph_node.pkey = site_pin_graph_node_log.graph_node_pkey
+ORDER BY
+  site_pin_graph_node_log.rowid;"""
+    )
+    cache_cur.executemany(
+        """
+INSERT INTO site_pin_graph_node
+  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);""", write_cur
+    )
+
+    write_cur.execute("DROP TRIGGER log_site_pin_graph_node;")
+    write_cur.execute("DROP TABLE site_pin_graph_node_log;")
+    conn.commit()
+
+    cache_cur.execute("INSERT INTO edge_cache_info(key) VALUES (?);", (key, ))
+    cache_conn.commit()
+    cache_conn.close()
+
+    print('{} Found {} edge candidates'.format(now(), num_candidates))
+
+
+def insert_site_pin_graph_node(write_cur, wire_pkey, graph_node):
+    """ Inserts a site pin graph node of the edge cache.
+
+    The track, graph node and wire rows are written the way
+    Connector.find_wire_node writes them.  graph_node is the tuple of
+    graph_node_type, node_pkey, x_low, x_high, y_low, y_high, capacity,
+    capacitance and resistance of the graph node.  Returns the pkey of the
+    new graph node.
+
+    """
+    write_cur.execute("INSERT INTO track DEFAULT VALUES")
+    track_pkey = write_cur.lastrowid
+
+    write_cur.execute(
+        """
+INSERT INTO
+    graph_node(
+        graph_node_type,
+        node_pkey,
+        x_low,
+        x_high,
+        y_low,
+        y_high,
+        capacity,
+        capacitance,
+        resistance,
+        track_pkey)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        tuple(graph_node) + (track_pkey, )
+    )
+    graph_node_pkey = write_cur.lastrowid
+
+    write_cur.execute(
+        """
+UPDATE wire SET site_pin_graph_node_pkey = ?
+WHERE pkey = ?""", (
+            graph_node_pkey,
+            wire_pkey,
+        )
+    )
+
+    write_cur.connection.commit()
+
+    return graph_node_pkey
+
+
+def insert_cached_edges(
+        conn, edge_cache, key, use_roi, roi, input_only_nodes,
+        output_only_nodes
+):
+    """ Inserts the edges of the ROI from edge_cache.
+
+    Yields the same edges as create_and_insert_edges: edges of tiles outside
+    the ROI and of pips that are reserved because of the ROI are dropped, then
+    duplicate edges are removed within each tile.
+
+    Site pin graph nodes are created when an edge first uses them, so they
+    get the pkeys Connector.find_wire_node would give them.
+
+    """
+    write_cur = conn.cursor()
+
+    cache_conn = sqlite3.connect(
+        'file:{}?mode=ro'.format(edge_cache), uri=True
+    )
+    cache_cur = cache_conn.cursor()
+
+    cache_cur.execute("SELECT key FROM edge_cache_info;")
+    cached_key = cache_cur.fetchone()[0]
+    assert cached_key == key, (
+        'Edge cache {} was built for another connection database or pin '
+        'assignments'.format(edge_cache)
+    )
+
+    site_pin_graph_nodes = {}
+    for row in cache_cur.execute("""
+SELECT
+  graph_node_pkey,
+  wire_pkey,
+  graph_node_type,
+  node_pkey,
+  x_low,
+  x_high,
+  y_low,
+  y_high,
+  capacity,
+  capacitance,
+  resistance
+FROM
+  site_pin_graph_node;"""):
+        site_pin_graph_nodes[row[0]] = (row[1], row[2:])
+
+    graph_node_map = {}
+
+    def map_graph_node(graph_node_pkey):
+        if graph_node_pkey not in site_pin_graph_nodes:
+            return graph_node_pkey
+
+        if graph_node_pkey not in graph_node_map:
+            wire_pkey, graph_node = site_pin_graph_nodes[graph_node_pkey]
+            graph_node_map[graph_node_pkey] = insert_site_pin_graph_node(
+                write_cur, wire_pkey, graph_node
+            )
+
+        return graph_node_map[graph_node_pkey]
+
+    num_edges = 0
+    edges = []
+    cache_cur.execute(
+        """
+SELECT
+  grid_x,
+  grid_y,
+  src_node_pkey,
+  sink_node_pkey,
+  src_graph_node_pkey,
+  dest_graph_node_pkey,
+  switch_pkey,
+  phy_tile_pkey,
+  pip_in_tile_pkey,
+  backward
+FROM
+  edge_candidate
+ORDER BY
+  rowid;"""
+    )
+    for (grid_x, grid_y), candidates in itertools.groupby(
+            cache_cur, key=lambda candidate: candidate[0:2]):
+        if use_roi and not roi.tile_in_roi(grid_types.GridLoc(grid_x, grid_y)):
+            continue
+
+        tile_edges = []
+        for candidate in candidates:
+            # Skip pips that are reserved because of ROI, see make_connection.
+            if candidate[2] in input_only_nodes:
+                continue
+
+            if candidate[3] in output_only_nodes:
+                continue
+
+            tile_edges.append(
+                (map_graph_node(candidate[4]), map_graph_node(candidate[5])) +
+                candidate[6:]
+            )
+
+        edges.extend(unique_tile_edges(tile_edges))
+
+        if len(edges) > 1000:
+            commit_edges(write_cur, edges)
+
+            num_edges += len(edges)
+            edges = []
+
+    commit_edges(write_cur, edges)
+    num_edges += len(edges)
+
+    cache_conn.close()
+
+    print(
+        '{} Created {} edges and {} site pin graph nodes from {}, '
+        'inserted'.format(now(), num_edges, len(graph_node_map), edge_cache)
+    )
+
+
 def get_ccio_sites(grid):
     ccio_sites = set()
 
@@ -2178,26 +2715,66 @@ def get_ccio_sites(grid):
     return ccio_sites
 
 
-def create_edges(args):
+def add_pin_graph_nodes(conn, pin_assignments_file):
+    """ Adds the graph nodes of the pins of the pin assignments. """
+    with open(pin_assignments_file) as f:
+        pin_assignments = json.load(f)
+
+    tile_wires = []
+    for tile_type, wire_map in pin_assignments['pin_directions'].items():
+        for wire in wire_map.keys():
+            tile_wires.append((tile_type, wire))
+
+    for tile_type, wire in progressbar_utils.progressbar(tile_wires):
+        pins = [
+            direction_to_enum(pin)
+            for pin in pin_assignments['pin_directions'][tile_type][wire]
+        ]
+        add_graph_nodes_for_pins(conn, tile_type, wire, pins)
+
+
+def create_edge_cache(args):
+    """ Builds args.edge_cache from args.connection_database.
+
+    The connection database is not modified, so the cache of a part can be
+    built once and shared by the create_edges runs of all its variants.
+
+    """
     db = prjxray.db.Database(args.db_root, args.part)
     grid = db.grid()
 
-    with DatabaseCache(args.connection_database) as conn:
+    key = edge_cache_key(args.connection_database, args.pin_assignments)
+
+    with DatabaseCache(args.connection_database, read_only=True) as conn:
+        add_pin_graph_nodes(conn, args.pin_assignments)
+        build_edge_cache(
+            db=db, grid=grid, conn=conn, edge_cache=args.edge_cache, key=key
+        )
 
-        with open(args.pin_assignments) as f:
-            pin_assignments = json.load(f)
 
-        tile_wires = []
-        for tile_type, wire_map in pin_assignments['pin_directions'].items():
-            for wire in wire_map.keys():
-                tile_wires.append((tile_type, wire))
+def create_edges(args):
+    db = prjxray.db.Database(args.db_root, args.part)
+    grid = db.grid()
 
-        for tile_type, wire in progressbar_utils.progressbar(tile_wires):
-            pins = [
-                direction_to_enum(pin)
-                for pin in pin_assignments['pin_directions'][tile_type][wire]
-            ]
-            add_graph_nodes_for_pins(conn, tile_type, wire, pins)
+    edge_cache_key_ = None
+    if args.edge_cache is not None:
+        # The key is computed before any graph node is added.
+        edge_cache_key_ = edge_cache_key(
+            args.connection_database, args.pin_assignments
+        )
+
+        # The cache is built from its own copy of the connection database,
+        # so that only the site pin graph nodes used by this variant are
+        # added to it.
+        if read_edge_cache_key(args.edge_cache) != edge_cache_key_:
+            print(
+                '{} Edge cache {} is missing or out of date, '
+                'rebuilding'.format(now(), args.edge_cache)
+            )
+            create_edge_cache(args)
+
+    with DatabaseCache(args.connection_database) as conn:
+        add_pin_graph_nodes(conn, args.pin_assignments)
 
         if args.overlay:
             assert args.synth_tiles
@@ -2297,15 +2874,26 @@ def create_edges(args):
                                     # This track can be used as a src.
                                     output_only_nodes.add(node_pkey)
 
-        create_and_insert_edges(
-            db=db,
-            grid=grid,
-            conn=conn,
-            use_roi=use_roi,
-            roi=roi if use_roi else None,
-            input_only_nodes=input_only_nodes,
-            output_only_nodes=output_only_nodes
-        )
+        if args.edge_cache is None:
+            create_and_insert_edges(
+                db=db,
+                grid=grid,
+                conn=conn,
+                use_roi=use_roi,
+                roi=roi if use_roi else None,
+                input_only_nodes=input_only_nodes,
+                output_only_nodes=output_only_nodes
+            )
+        else:
+            insert_cached_edges(
+                conn=conn,
+                edge_cache=args.edge_cache,
+                key=edge_cache_key_,
+                use_roi=use_roi,
+                roi=roi if use_roi else None,
+                input_only_nodes=input_only_nodes,
+                output_only_nodes=output_only_nodes
+            )
 
         create_edge_indices(conn)
 
@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+""" Checks that edges derived from the edge cache match the direct path,
+and that the track canonical locations and segment lengths match the per
+track queries they replaced.
+
+Run from xilinx/common/utils, with prjxray and utils in PYTHONPATH.
+"""
+
+from collections import namedtuple
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+
+from prjxray import grid_types
+
+from lib.connection_database import create_tables
+from lib.rr_graph.graph2 import NodeType
+from prjxray_edge_library import (
+    build_edge_cache, compute_segment_lengths, create_and_insert_edges,
+    get_segment_length, insert_cached_edges, read_edge_cache_key,
+    set_track_canonical_loc
+)
+
+TILE_TYPE = 'FIXTURE'
+
+Pip = namedtuple('Pip', 'name net_from net_to is_directional is_pseudo')
+
+# Site pin wires are OUT* and IN*, routing wires are TRK_A and TRK_B.  Pips
+# from OUT0 and to IN0 share a site pin with another pip of the tile.
+PIPS = [
+    Pip('{}.OUT0->>TRK_A'.format(TILE_TYPE), 'OUT0', 'TRK_A', True, False),
+    Pip('{}.OUT0->>TRK_B'.format(TILE_TYPE), 'OUT0', 'TRK_B', True, False),
+    Pip('{}.OUT1->>TRK_B'.format(TILE_TYPE), 'OUT1', 'TRK_B', True, False),
+    Pip('{}.TRK_A->>IN0'.format(TILE_TYPE), 'TRK_A', 'IN0', True, False),
+    Pip('{}.TRK_B->>IN0'.format(TILE_TYPE), 'TRK_B', 'IN0', True, False),
+    Pip('{}.TRK_B->>IN1'.format(TILE_TYPE), 'TRK_B', 'IN1', True, False),
+    Pip(
+        '{}.TRK_A<<->>TRK_B'.format(TILE_TYPE), 'TRK_A', 'TRK_B', False, False
+    ),
+]
+
+SITE_PIN_WIRES = {
+    'OUT0': NodeType.OPIN,
+    'OUT1': NodeType.OPIN,
+    'IN0': NodeType.IPIN,
+    'IN1': NodeType.IPIN,
+}
+
+TRACK_WIRES = ['TRK_A', 'TRK_B']
+
+GridInfo = namedtuple('GridInfo', 'tile_type')
+
+
+class TileType(object):
+    def get_pips(self):
+        return PIPS
+
+
+class Database(object):
+    """ The part of prjxray.db.Database used by yield_tile_connections. """
+
+    def get_tile_type(self, tile_type):
+        assert tile_type == TILE_TYPE, tile_type
+        return TileType()
+
+
+class Grid(object):
+    """ A row of width tiles at grid_y 1, under CHANX tracks at y 1. """
+
+    def __init__(self, width):
+        self.width = width
+
+    def tile_locations(self):
+        for grid_x in range(self.width):
+            yield grid_types.GridLoc(grid_x, 1)
+
+    def gridinfo_at_loc(self, loc):
+        return GridInfo(tile_type=TILE_TYPE)
+
+    def tilename_at_loc(self, loc):
+        return '{}_X{}Y{}'.format(TILE_TYPE, loc.grid_x, loc.grid_y)
+
+
+def create_connection_database(conn, width):
+    """ Fills conn with the tiles of Grid(width).
+
+    Each routing wire is a single node and track spanning the row, each site
+    pin wire is a node with an IPIN or OPIN graph node.  Returns the
+    node_pkey of each site pin wire of each tile.
+    """
+    create_tables(conn)
+    c = conn.cursor()
+
+    c.execute("SELECT pkey FROM switch WHERE name = 'short';")
+    switch_pkey = c.fetchone()[0]
+    c.execute(
+        """
+INSERT INTO switch(name, internal_capacitance, drive_resistance,
+    intrinsic_delay, switch_type)
+VALUES ('site_pin', 0.0, 0.0, 1e-11, 'mux');"""
+    )
+    site_pin_switch_pkey = c.lastrowid
+
+    c.execute("INSERT INTO tile_type(name) VALUES (?);", (TILE_TYPE, ))
+    tile_type_pkey = c.lastrowid
+
+    wire_in_tile_pkeys = {}
+    for idx, wire in enumerate(sorted(SITE_PIN_WIRES) + TRACK_WIRES):
+        is_site_pin = wire in SITE_PIN_WIRES
+        c.execute(
+            """
+INSERT INTO wire_in_tile(name, phy_tile_type_pkey, tile_type_pkey,
+    capacitance, resistance, site_pin_switch_pkey)
+VALUES (?, ?, ?, ?, ?, ?);""", (
+                wire, tile_type_pkey, tile_type_pkey, 1e-15 * (idx + 1),
+                10.0 * (idx + 1), site_pin_switch_pkey if is_site_pin else None
+            )
+        )
+        wire_in_tile_pkeys[wire] = c.lastrowid
+
+    for pip in PIPS:
+        c.execute(
+            """
+INSERT INTO pip_in_tile(name, tile_type_pkey, src_wire_in_tile_pkey,
+    dest_wire_in_tile_pkey, can_invert, is_directional, is_pseudo,
+    is_pass_transistor, switch_pkey, backward_switch_pkey)
+VALUES (?, ?, ?, ?, 0, ?, ?, 0, ?, ?);""", (
+                pip.name, tile_type_pkey, wire_in_tile_pkeys[pip.net_from],
+                wire_in_tile_pkeys[pip.net_to], pip.is_directional,
+                pip.is_pseudo, switch_pkey, switch_pkey
+            )
+        )
+
+    # Empty constant tracks, no fixture wire ties to a constant.
+    c.execute("INSERT INTO track DEFAULT VALUES;")
+    vcc_track_pkey = c.lastrowid
+    c.execute("INSERT INTO track DEFAULT VALUES;")
+    gnd_track_pkey = c.lastrowid
+    c.execute(
+        "INSERT INTO constant_sources(vcc_track_pkey, gnd_track_pkey) "
+        "VALUES (?, ?);", (vcc_track_pkey, gnd_track_pkey)
+    )
+
+    track_nodes = {}
+    for wire in TRACK_WIRES:
+        c.execute("INSERT INTO track DEFAULT VALUES;")
+        track_pkey = c.lastrowid
+        c.execute("INSERT INTO node(track_pkey) VALUES (?);", (track_pkey, ))
+        node_pkey = c.lastrowid
+        c.execute(
+            """
+INSERT INTO graph_node(graph_node_type, track_pkey, node_pkey, x_low, x_high,
+    y_low, y_high, capacity, capacitance, resistance)
+VALUES (?, ?, ?, 0, ?, 1, 1, 1, 0, 0);""",
+            (NodeType.CHANX.value, track_pkey, node_pkey, width - 1)
+        )
+        track_nodes[wire] = (node_pkey, c.lastrowid)
+
+    site_pin_nodes = {}
+    for grid_x in range(width):
+        c.execute(
+            """
+INSERT INTO phy_tile(name, tile_type_pkey, grid_x, grid_y)
+VALUES (?, ?, ?, 1);""", (
+                Grid(width).tilename_at_loc(grid_types.GridLoc(grid_x, 1)),
+                tile_type_pkey, grid_x
+            )
+        )
+        phy_tile_pkey = c.lastrowid
+        c.execute(
+            """
+INSERT INTO tile(phy_tile_pkey, tile_type_pkey, grid_x, grid_y)
+VALUES (?, ?, ?, 1);""", (phy_tile_pkey, tile_type_pkey, grid_x)
+        )
+        tile_pkey = c.lastrowid
+
+        for wire in TRACK_WIRES:
+            node_pkey, graph_node_pkey = track_nodes[wire]
+            c.execute(
+                """
+INSERT INTO wire(node_pkey, phy_tile_pkey, tile_pkey, wire_in_tile_pkey,
+    graph_node_pkey)
+VALUES (?, ?, ?, ?, ?);""", (
+                    node_pkey, phy_tile_pkey, tile_pkey,
+                    wire_in_tile_pkeys[wire], graph_node_pkey
+                )
+            )
+
+        for wire, node_type in sorted(SITE_PIN_WIRES.items()):
+            c.execute("INSERT INTO node DEFAULT VALUES;")
+            node_pkey = c.lastrowid
+            c.execute(
+                """
+INSERT INTO graph_node(graph_node_type, node_pkey, x_low, x_high, y_low,
+    y_high)
+VALUES (?, ?, ?, ?, 1, 1);""", (node_type.value, node_pkey, grid_x, grid_x)
+            )
+            pin_graph_node_pkey = c.lastrowid
+            c.execute(
+                """
+INSERT INTO wire(node_pkey, phy_tile_pkey, tile_pkey, wire_in_tile_pkey,
+    top_graph_node_pkey)
+VALUES (?, ?, ?, ?, ?);""", (
+                    node_pkey, phy_tile_pkey, tile_pkey,
+                    wire_in_tile_pkeys[wire], pin_graph_node_pkey
+                )
+            )
+            c.execute(
+                "UPDATE node SET site_wire_pkey = ? WHERE pkey = ?;",
+                (c.lastrowid, node_pkey)
+            )
+            site_pin_nodes[grid_x, wire] = node_pkey
+
+    conn.commit()
+
+    return site_pin_nodes
+
+
+class XRange(object):
+    """ ROI of the tiles with x_min <= grid_x <= x_max. """
+
+    def __init__(self, x_min, x_max):
+        self.x_min = x_min
+        self.x_max = x_max
+
+    def tile_in_roi(self, loc):
+        return self.x_min <= loc.grid_x <= self.x_max
+
+
+def dump_routing_graph(conn):
+    """ Returns the rows written by create_and_insert_edges. """
+    return [
+        conn.execute("SELECT * FROM {} ORDER BY rowid;".format(table)
+                     ).fetchall()
+        for table in ('graph_edge', 'graph_node', 'track', 'wire')
+    ]
+
+
+class TestEdgeCache(unittest.TestCase):
+    WIDTH = 6
+
+    def connect(self):
+        conn = sqlite3.connect(':memory:')
+        site_pin_nodes = create_connection_database(conn, self.WIDTH)
+        return conn, site_pin_nodes
+
+    def build_edge_cache(self, edge_cache, key='key'):
+        conn, _ = self.connect()
+        build_edge_cache(
+            db=Database(),
+            grid=Grid(self.WIDTH),
+            conn=conn,
+            edge_cache=edge_cache,
+            key=key
+        )
+
+    def check_edges(self, use_roi, roi, input_only, output_only):
+        """ Compares the routing graphs of both paths.
+
+        input_only and output_only are (grid_x, wire) of site pin wires
+        whose nodes are reserved.
+        """
+        direct_conn, site_pin_nodes = self.connect()
+        input_only_nodes = set(site_pin_nodes[wire] for wire in input_only)
+        output_only_nodes = set(site_pin_nodes[wire] for wire in output_only)
+        create_and_insert_edges(
+            db=Database(),
+            grid=Grid(self.WIDTH),
+            conn=direct_conn,
+            use_roi=use_roi,
+            roi=roi,
+            input_only_nodes=input_only_nodes,
+            output_only_nodes=output_only_nodes
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            edge_cache = os.path.join(tmpdir, 'edge_cache.db')
+            self.build_edge_cache(edge_cache)
+
+            cached_conn, _ = self.connect()
+            insert_cached_edges(
+                conn=cached_conn,
+                edge_cache=edge_cache,
+                key='key',
+                use_roi=use_roi,
+                roi=roi,
+                input_only_nodes=input_only_nodes,
+                output_only_nodes=output_only_nodes
+            )
+
+        direct_graph = dump_routing_graph(direct_conn)
+        self.assertGreater(len(direct_graph[0]), 0)
+        self.assertEqual(dump_routing_graph(cached_conn), direct_graph)
+
+        return direct_conn
+
+    def count_site_pin_graph_nodes(self, conn):
+        return conn.execute(
+            "SELECT count(*) FROM wire WHERE site_pin_graph_node_pkey "
+            "IS NOT NULL;"
+        ).fetchone()[0]
+
+    def test_full_device(self):
+        conn = self.check_edges(
+            use_roi=False, roi=None, input_only=(), output_only=()
+        )
+
+        # One site pin graph node per site pin wire of the device.
+        self.assertEqual(
+            self.count_site_pin_graph_nodes(conn),
+            self.WIDTH * len(SITE_PIN_WIRES)
+        )
+
+    def test_roi(self):
+        conn = self.check_edges(
+            use_roi=True, roi=XRange(2, 4), input_only=(), output_only=()
+        )
+
+        self.assertEqual(
+            self.count_site_pin_graph_nodes(conn), 3 * len(SITE_PIN_WIRES)
+        )
+
+    def test_roi_with_reserved_nodes(self):
+        conn = self.check_edges(
+            use_roi=True,
+            roi=XRange(1, 4),
+            input_only=((2, 'OUT0'), (3, 'OUT1')),
+            output_only=((3, 'IN0'), (4, 'IN1'))
+        )
+
+        self.assertEqual(
+            self.count_site_pin_graph_nodes(conn), 4 * len(SITE_PIN_WIRES) - 4
+        )
+
+    def test_empty_roi(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            edge_cache = os.path.join(tmpdir, 'edge_cache.db')
+            self.build_edge_cache(edge_cache)
+
+            conn, _ = self.connect()
+            expected_graph = dump_routing_graph(conn)
+            insert_cached_edges(
+                conn=conn,
+                edge_cache=edge_cache,
+                key='key',
+                use_roi=True,
+                roi=XRange(self.WIDTH, self.WIDTH),
+                input_only_nodes=set(),
+                output_only_nodes=set()
+            )
+
+        self.assertEqual(dump_routing_graph(conn), expected_graph)
+
+    def test_key(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            edge_cache = os.path.join(tmpdir, 'edge_cache.db')
+            self.assertIsNone(read_edge_cache_key(edge_cache))
+
+            with open(edge_cache, 'w') as f:
+                f.write('not a database')
+            self.assertIsNone(read_edge_cache_key(edge_cache))
+            os.unlink(edge_cache)
+
+            self.build_edge_cache(edge_cache)
+            self.assertEqual(read_edge_cache_key(edge_cache), 'key')
+
+            conn, _ = self.connect()
+            with self.assertRaises(AssertionError):
+                insert_cached_edges(
+                    conn=conn,
+                    edge_cache=edge_cache,
+                    key='other',
+                    use_roi=False,
+                    roi=None,
+                    input_only_nodes=set(),
+                    output_only_nodes=set()
+                )
+
+            self.assertEqual(os.listdir(tmpdir), ['edge_cache.db'])
+
+
+def per_track_canonical_loc(conn):
+    """ set_track_canonical_loc before it was computed on arrays. """
+    write_cur = conn.cursor()
+    cur = conn.cursor()
+    cur2 = conn.cursor()
+    cur3 = conn.cursor()
+
+    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
+
+    cur.execute("SELECT pkey FROM track WHERE alive")
+    tracks = cur.fetchall()
+    for (track_pkey, ) in tracks:
+        source_wires = []
+        for (wire_pkey, ) in cur2.execute("""
+SELECT pkey FROM wire WHERE node_pkey IN (
+    SELECT pkey FROM node WHERE track_pkey = ?
+    )""", (track_pkey, )):
+            cur3.execute(
+                """
+SELECT count(*)
+FROM pip_in_tile
+WHERE
+    dest_wire_in_tile_pkey = (SELECT wire_in_tile_pkey FROM wire WHERE pkey = ?)
+LIMIT 1
+    """, (wire_pkey, )
+            )
+            pips_to_wire = cur3.fetchone()[0]
+            if pips_to_wire > 0:
+                cur3.execute(
+                    """
+SELECT grid_x, grid_y FROM phy_tile WHERE pkey = (
+    SELECT phy_tile_pkey FROM wire WHERE pkey = ?
+                    )""", (wire_pkey, )
+                )
+                grid_x, grid_y = cur3.fetchone()
+                source_wires.append(((grid_x, grid_y), wire_pkey))
+
+        if len(source_wires) > 0:
+            source_wire_pkey = min(source_wires, key=lambda x: x[0])[1]
+            write_cur.execute(
+                """
+UPDATE track
+SET canon_phy_tile_pkey = (SELECT phy_tile_pkey FROM wire WHERE pkey = ?)
+WHERE pkey = ?
+            """, (source_wire_pkey, track_pkey)
+            )
+
+    write_cur.execute("""COMMIT TRANSACTION;""")
+
+
+def per_track_segment_lengths(conn):
+    """ compute_segment_lengths before it was computed on arrays. """
+    cur = conn.cursor()
+    cur2 = conn.cursor()
+    cur3 = conn.cursor()
+    cur4 = conn.cursor()
+
+    write_cur = conn.cursor()
+
+    write_cur.execute("""BEGIN EXCLUSIVE TRANSACTION;""")
+
+    for (segment_pkey, ) in cur.execute("SELECT pkey FROM segment"):
+
+        segment_lengths = []
+
+        # Get all tracks with this segment
+        for (track_pkey, src_phy_tile_pkey) in cur2.execute("""
+SELECT pkey, canon_phy_tile_pkey FROM track
+WHERE
+    canon_phy_tile_pkey IS NOT NULL
+AND
+    segment_pkey = ?
+        """, (segment_pkey, )):
+            segment_length = 1
+            cur4.execute(
+                "SELECT grid_x, grid_y FROM phy_tile WHERE pkey = ?",
+                (src_phy_tile_pkey, )
+            )
+            src_x, src_y = cur4.fetchone()
+
+            # Get tiles downstream of this track.
+            for (dest_phy_tile_pkey, ) in cur3.execute("""
+SELECT DISTINCT canon_phy_tile_pkey FROM track WHERE pkey IN (
+    SELECT track_pkey FROM graph_node WHERE pkey IN (
+        SELECT dest_graph_node_pkey FROM graph_edge WHERE src_graph_node_pkey IN (
+            SELECT pkey FROM graph_node WHERE track_pkey = ?
+        )
+    )
+) AND canon_phy_tile_pkey IS NOT NULL
+            """, (track_pkey, )):
+                if src_phy_tile_pkey == dest_phy_tile_pkey:
+                    continue
+
+                cur4.execute(
+                    "SELECT grid_x, grid_y FROM phy_tile WHERE pkey = ?",
+                    (dest_phy_tile_pkey, )
+                )
+                dest_x, dest_y = cur4.fetchone()
+
+                segment_length = max(
+                    segment_length,
+                    abs(dest_x - src_x) + abs(dest_y - src_y)
+                )
+
+            segment_lengths.append(segment_length)
+
+        write_cur.execute(
+            "UPDATE segment SET length = ? WHERE pkey = ?", (
+                get_segment_length(segment_lengths),
+                segment_pkey,
+            )
+        )
+
+    write_cur.execute("""COMMIT TRANSACTION;""")
+
+
+def create_track_database(conn, seed, width=6, height=5):
+    """ Fills conn with random tracks, wires, pips and graph edges. """
+    rng = random.Random(seed)
+
+    create_tables(conn)
+    c = conn.cursor()
+
+    c.execute("INSERT INTO tile_type(name) VALUES ('FIXTURE');")
+    tile_type_pkey = c.lastrowid
+
+    phy_tile_pkeys = []
+    for grid_x in range(width):
+        for grid_y in range(height):
+            c.execute(
+                """
+INSERT INTO phy_tile(name, tile_type_pkey, grid_x, grid_y)
+VALUES (?, ?, ?, ?);""", (
+                    'FIXTURE_X{}Y{}'.format(grid_x, grid_y), tile_type_pkey,
+                    grid_x, grid_y
+                )
+            )
+            phy_tile_pkeys.append(c.lastrowid)
+    rng.shuffle(phy_tile_pkeys)
+
+    wire_in_tile_pkeys = []
+    for idx in range(12):
+        c.execute(
+            "INSERT INTO wire_in_tile(name, phy_tile_type_pkey) VALUES (?, ?);",
+            ('WIRE{}'.format(idx), tile_type_pkey)
+        )
+        wire_in_tile_pkeys.append(c.lastrowid)
+
+    # Only the first wires are pip destinations.
+    for idx in range(20):
+        c.execute(
+            """
+INSERT INTO pip_in_tile(name, tile_type_pkey, src_wire_in_tile_pkey,
+    dest_wire_in_tile_pkey)
+VALUES (?, ?, ?, ?);""", (
+                'PIP{}'.format(idx), tile_type_pkey,
+                rng.choice(wire_in_tile_pkeys),
+                rng.choice(wire_in_tile_pkeys[:7])
+            )
+        )
+
+    segment_pkeys = []
+    for idx in range(3):
+        c.execute(
+            "INSERT INTO segment(name) VALUES (?);", ('SEG{}'.format(idx), )
+        )
+        segment_pkeys.append(c.lastrowid)
+
+    graph_node_pkeys = []
+    for _ in range(60):
+        c.execute(
+            "INSERT INTO track(alive, segment_pkey) VALUES (?, ?);", (
+                rng.random() < 0.8,
+                rng.choice(segment_pkeys + [None]),
+            )
+        )
+        track_pkey = c.lastrowid
+
+        for _ in range(rng.randint(1, 2)):
+            c.execute(
+                "INSERT INTO node(track_pkey) VALUES (?);", (track_pkey, )
+            )
+            node_pkey = c.lastrowid
+
+            for _ in range(rng.randint(1, 5)):
+                c.execute(
+                    """
+INSERT INTO wire(node_pkey, phy_tile_pkey, wire_in_tile_pkey)
+VALUES (?, ?, ?);""", (
+                        node_pkey, rng.choice(phy_tile_pkeys),
+                        rng.choice(wire_in_tile_pkeys)
+                    )
+                )
+
+        for _ in range(rng.randint(1, 3)):
+            c.execute(
+                "INSERT INTO graph_node(graph_node_type, track_pkey) "
+                "VALUES (?, ?);", (NodeType.CHANX.value, track_pkey)
+            )
+            graph_node_pkeys.append(c.lastrowid)
+
+    # Pin graph nodes, without a track.
+    for _ in range(20):
+        c.execute(
+            "INSERT INTO graph_node(graph_node_type) VALUES (?);",
+            (NodeType.IPIN.value, )
+        )
+        graph_node_pkeys.append(c.lastrowid)
+
+    for _ in range(400):
+        c.execute(
+            """
+INSERT INTO graph_edge(src_graph_node_pkey, dest_graph_node_pkey)
+VALUES (?, ?);""",
+            (rng.choice(graph_node_pkeys), rng.choice(graph_node_pkeys))
+        )
+
+    conn.commit()
+
+
+class TestTrackLengths(unittest.TestCase):
+    """ Compares the array based track passes with the per track queries
+    they replaced.
+    """
+
+    def connect(self, seed):
+        conn = sqlite3.connect(':memory:')
+        create_track_database(conn, seed)
+        return conn
+
+    def dump(self, conn, table):
+        return conn.execute("SELECT * FROM {} ORDER BY pkey;".format(table)
+                            ).fetchall()
+
+    def test_canonical_loc(self):
+        for seed in range(5):
+            conn = self.connect(seed)
+            set_track_canonical_loc(conn)
+
+            expected_conn = self.connect(seed)
+            per_track_canonical_loc(expected_conn)
+
+            tracks = self.dump(conn, 'track')
+            self.assertTrue(any(track[3] is not None for track in tracks))
+            self.assertEqual(tracks, self.dump(expected_conn, 'track'))
+
+    def test_segment_lengths(self):
+        for seed in range(5):
+            conn = self.connect(seed)
+            set_track_canonical_loc(conn)
+
+            expected_conn = self.connect(seed)
+            set_track_canonical_loc(expected_conn)
+
+            compute_segment_lengths(conn, chunk_size=7)
+            per_track_segment_lengths(expected_conn)
+
+            segments = self.dump(conn, 'segment')
+            self.assertTrue(any(segment[2] > 1 for segment in segments))
+            self.assertEqual(segments, self.dump(expected_conn, 'segment'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,51 +3,43 @@
 This is useful for examining router behavior.  E.g. what which inode represents
 this wire?
 
+Queries are answered by prjxray_query_daemon.py when --daemon_socket is given.
+
 """
 import argparse
-import pickle
-import sqlite3
 from lib.rr_graph.graph2 import NodeType
+from prjxray_query_daemon import (
+    DaemonClient, NodeLookup, connect_read_only, load_node_map
+)
 
 
 def main():
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument('--rrgraph_node_map', required=True)
-    parser.add_argument('--connection_database', required=True)
+    parser.add_argument('--rrgraph_node_map')
+    parser.add_argument('--connection_database')
+    parser.add_argument('--daemon_socket')
     parser.add_argument('--wire', required=True)
 
     args = parser.parse_args()
 
-    with open(args.rrgraph_node_map, 'rb') as f:
-        node_map = pickle.load(f)
-    conn = sqlite3.connect(
-        'file:{}?mode=ro'.format(args.connection_database), uri=True
-    )
-
-    tile, wire = args.wire.split('/')
-
-    cur = conn.cursor()
-    cur.execute(
-        """
-SELECT pkey, node_pkey FROM wire WHERE
-    wire_in_tile_pkey IN (SELECT pkey FROM wire_in_tile WHERE name = ?)
-AND
-    phy_tile_pkey = (SELECT pkey FROM phy_tile WHERE name = ?)
-    """, (wire, tile)
-    )
-    results = cur.fetchall()
-    assert len(results) == 1
-
-    wire_pkey, node_pkey = results[0]
-
-    print('Wire ({}): {}'.format(wire_pkey, args.wire))
-    for (graph_node_pkey, graph_node_type) in cur.execute("""
-SELECT pkey, graph_node_type FROM graph_node WHERE node_pkey = ?
-        """, (node_pkey, )):
+    if args.daemon_socket is not None:
+        with DaemonClient(args.daemon_socket) as client:
+            result = client.query('find_wire', wire=args.wire)
+    else:
+        assert args.rrgraph_node_map is not None
+        assert args.connection_database is not None
+
+        lookup = NodeLookup(
+            connect_read_only(args.connection_database),
+            load_node_map(args.rrgraph_node_map)
+        )
+        result = lookup.find_wire(args.wire)
+
+    print('Wire ({}): {}'.format(result['wire_pkey'], args.wire))
+    for inode, graph_node_pkey, node_type in result['nodes']:
         print(
             '  Node inode={} pkey={} {}'.format(
-                node_map.get(graph_node_pkey), graph_node_pkey,
-                NodeType(graph_node_type)
+                inode, graph_node_pkey, NodeType[node_type]
             )
         )
 
@@ -31,7 +31,11 @@ prjxray_assign_tile_pin_direction.
 
 """
 import argparse
+from collections import namedtuple
 import csv
+import itertools
+import multiprocessing
+import numpy
 import prjxray.db
 import prjxray.tile
 from prjxray.timing import PvtCorner
@@ -53,38 +57,92 @@ VCC_NET = 'VCC_NET'
 GND_NET = 'GND_NET'
 
 
-def import_site_type(db, write_cur, site_types, site_type_name):
-    assert site_type_name not in site_types
-    site_type = db.get_site_type(site_type_name)
+def get_pip_switch_timing(pip, pip_timing):
+    """ Returns the get_switch_timing arguments of a pip timing.
 
-    if site_type_name in site_types:
-        return
+    Arguments
+    ---------
+    pip : tile.Pip object
+        Pip being modelled
+    pip_timing : tile.PipTiming object
+        Pip timing being modelled
 
-    write_cur.execute(
-        "INSERT INTO site_type(name) VALUES (?)", (site_type_name, )
+    Returns
+    -------
+    (is_pass_transistor, delay, internal_capacitance, drive_resistance)
+
+    """
+    delay = 0.0
+    drive_resistance = 0.0
+    internal_capacitance = 0.0
+
+    if pip_timing is not None:
+        if pip_timing.delays is not None:
+            # Use the largest intristic delay for now.
+            # This conservative on slack timing, but not on hold timing.
+            #
+            # nanosecond -> seconds
+            delay = pip_timing.delays[PvtCorner.SLOW].max / 1e9
+
+        if pip_timing.internal_capacitance is not None:
+            # microFarads -> Farads
+            internal_capacitance = pip_timing.internal_capacitance / 1e6
+
+        if pip_timing.drive_resistance is not None:
+            # milliOhms -> Ohms
+            drive_resistance = pip_timing.drive_resistance / 1e3
+
+    return (
+        pip.is_pass_transistor, delay, internal_capacitance, drive_resistance
     )
-    site_types[site_type_name] = write_cur.lastrowid
 
-    for site_pin in site_type.get_site_pins():
-        pin_info = site_type.get_site_pin(site_pin)
 
-        write_cur.execute(
-            """
-INSERT INTO site_pin(name, site_type_pkey, direction)
-VALUES
-  (?, ?, ?)""", (
-                pin_info.name, site_types[site_type_name],
-                pin_info.direction.value
-            )
-        )
+def get_site_pin_switch_timing(site_pin):
+    """ Returns the get_switch_timing arguments of a site pin.
+
+    Returns
+    -------
+    (is_pass_transistor, delay, internal_capacitance, drive_resistance)
+
+    """
+    intrinsic_delay = 0
+    drive_resistance = 0
+    capacitance = 0
+
+    if site_pin.timing is not None:
+        # Use the largest intristic delay for now.
+        # This conservative on slack timing, but not on hold timing.
+        #
+        # nanosecond -> seconds
+        intrinsic_delay = site_pin.timing.delays[PvtCorner.SLOW].max / 1e9
+
+        if isinstance(site_pin.timing, prjxray.tile.OutPinTiming):
+            # milliOhms -> Ohms
+            drive_resistance = site_pin.timing.drive_resistance / 1e3
+        elif isinstance(site_pin.timing, prjxray.tile.InPinTiming):
+            # microFarads -> Farads
+            capacitance = site_pin.timing.capacitance / 1e6
+        else:
+            assert False, site_pin
+    else:
+        # Use min value instead of 0 to prevent
+        # VPR from freaking out over a zero net delay.
+        #
+        # Note this is the single precision float minimum, because VPR
+        # uses single precision, not double precision.
+        intrinsic_delay = SINGLE_PRECISION_FLOAT_MIN
+
+    return (False, intrinsic_delay, capacitance, drive_resistance)
 
 
 def create_get_switch(conn):
     """ Returns functions to get or create switches with various timing.
 
     Every switch that requires different timing is given it's own switch
-    in VPR.  get_switch returns a switch a pip.  get_switch_timing returns
-    a switch given a particular timing.
+    in VPR.  get_switch_timing returns a switch given a particular timing.
+    New switches are given the primary keys SQLite would assign to them, and
+    are only inserted by insert_switches, so they can be written with the
+    rest of a bulk load.
 
     """
     write_cur = conn.cursor()
@@ -97,6 +155,9 @@ def create_get_switch(conn):
     )
     pip_cache[(False, 0.0, 0.0, 0.0)] = write_cur.fetchone()[0]
 
+    switch_pkeys = next_pkeys(write_cur, 'switch')
+    switch_rows = []
+
     def get_switch_timing(
             is_pass_transistor, delay, internal_capacitance, drive_resistance
     ):
@@ -138,66 +199,35 @@ def create_get_switch(conn):
                 name, drive_resistance, internal_capacitance, delay
             )
 
-            write_cur.execute(
-                """
-INSERT INTO
-    switch(
-        name, internal_capacitance, drive_resistance, intrinsic_delay, switch_type
-    )
-VALUES
-    (?, ?, ?, ?, ?)""", (
-                    name, internal_capacitance, drive_resistance, delay,
-                    switch_type
+            switch_pkey = next(switch_pkeys)
+            switch_rows.append(
+                (
+                    switch_pkey, name, internal_capacitance, drive_resistance,
+                    delay, switch_type
                 )
             )
-            pip_cache[key] = write_cur.lastrowid
-
-            write_cur.connection.commit()
+            pip_cache[key] = switch_pkey
 
         return pip_cache[key]
 
-    def get_switch(pip, pip_timing):
-        """ Return switch_pkey for given pip timing.
-
-        Arguments
-        ---------
-        pip : tile.Pip object
-            Pip being modelled
-        pip_timing : tile.PipTiming object
-            Pip timing being modelled
-
-        Returns
-        -------
-        switch_pkey : int
-            Switch primary key that represents provided arguments.
+    def insert_switches(write_cur):
+        """ Inserts the switches created since the last call.
 
+        The caller commits the switches with the rows that use them.
         """
-        delay = 0.0
-        drive_resistance = 0.0
-        internal_capacitance = 0.0
-
-        if pip_timing is not None:
-            if pip_timing.delays is not None:
-                # Use the largest intristic delay for now.
-                # This conservative on slack timing, but not on hold timing.
-                #
-                # nanosecond -> seconds
-                delay = pip_timing.delays[PvtCorner.SLOW].max / 1e9
-
-            if pip_timing.internal_capacitance is not None:
-                # microFarads -> Farads
-                internal_capacitance = pip_timing.internal_capacitance / 1e6
-
-            if pip_timing.drive_resistance is not None:
-                # milliOhms -> Ohms
-                drive_resistance = pip_timing.drive_resistance / 1e3
-
-        return get_switch_timing(
-            pip.is_pass_transistor, delay, internal_capacitance,
-            drive_resistance
+        write_cur.executemany(
+            """
+INSERT INTO
+    switch(
+        pkey, name, internal_capacitance, drive_resistance, intrinsic_delay,
+        switch_type
+    )
+VALUES
+    (?, ?, ?, ?, ?, ?)""", switch_rows
         )
+        del switch_rows[:]
 
-    return get_switch, get_switch_timing
+    return get_switch_timing, insert_switches
 
 
 def build_pss_object_mask(db, tile_type_name):
@@ -239,10 +269,26 @@ def build_pss_object_mask(db, tile_type_name):
     return masked_sites, masked_wires, masked_pips
 
 
-def import_tile_type(
-        db, write_cur, tile_types, site_types, tile_type_name, get_switch
-):
-    assert tile_type_name not in tile_types
+# Content of a tile type extracted from the prjxray database.
+#
+# wires : list of (name, capacitance, resistance)
+# pips : list of (name, net_from, net_to, can_invert, is_directional,
+#        is_pseudo, is_pass_transistor, switch_timing, backward_switch_timing)
+# site_types : list of the site types of the unmasked sites, in site order.
+# sites : list of (name, x, y, site_type, site_pins), where site_pins is a
+#         list of (name, wire, switch_timing).
+#
+# Switch timings are get_switch_timing arguments.
+TileTypeContent = namedtuple('TileTypeContent', 'wires pips site_types sites')
+
+
+def extract_tile_type(db, tile_type_name):
+    """ Returns the TileTypeContent of a tile type.
+
+    Only reads the prjxray database, so tile types can be extracted in
+    parallel and imported into the connection database afterwards.
+
+    """
     tile_type = db.get_tile_type(tile_type_name)
 
     # For Zynq7 PSS* tiles build a list of sites, wires and PIPs to ignore
@@ -250,18 +296,15 @@ def import_tile_type(
         masked_sites, masked_wires, masked_pips = build_pss_object_mask(
             db, tile_type_name
         )
-
+        masked_sites = set(masked_sites)
+        masked_wires = set(masked_wires)
+        masked_pips = set(masked_pips)
     else:
-        masked_sites = []
-        masked_wires = []
-        masked_pips = []
+        masked_sites = set()
+        masked_wires = set()
+        masked_pips = set()
 
-    write_cur.execute(
-        "INSERT INTO tile_type(name) VALUES (?)", (tile_type_name, )
-    )
-    tile_types[tile_type_name] = write_cur.lastrowid
-
-    wires = {}
+    wires = []
     for wire, wire_rc_element in tile_type.get_wires().items():
         if wire in masked_wires:
             continue
@@ -276,150 +319,65 @@ def import_tile_type(
             # milliOhms -> Ohms
             resistance = wire_rc_element.resistance / 1e3
 
-        write_cur.execute(
-            """
-INSERT INTO wire_in_tile(name, phy_tile_type_pkey, tile_type_pkey, capacitance, resistance)
-VALUES
-  (?, ?, ?, ?, ?)""", (
-                wire, tile_types[tile_type_name], tile_types[tile_type_name],
-                capacitance, resistance
-            )
-        )
-        wires[wire] = write_cur.lastrowid
+        wires.append((wire, capacitance, resistance))
 
+    pips = []
     for pip in tile_type.get_pips():
         if pip.name in masked_pips:
             continue
 
-        switch_pkey = get_switch(pip, pip.timing)
-        backward_switch_pkey = get_switch(pip, pip.backward_timing)
-
-        write_cur.execute(
-            """
-INSERT INTO pip_in_tile(
-  name, tile_type_pkey, src_wire_in_tile_pkey,
-  dest_wire_in_tile_pkey, can_invert, is_directional, is_pseudo,
-  is_pass_transistor, switch_pkey, backward_switch_pkey
-)
-VALUES
-  (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", (
-                pip.name, tile_types[tile_type_name], wires[pip.net_from],
-                wires[pip.net_to
-                      ], pip.can_invert, pip.is_directional, pip.is_pseudo,
-                pip.is_pass_transistor, switch_pkey, backward_switch_pkey
-            )
-        )
-        pip_pkey = write_cur.lastrowid
-
-        write_cur.execute(
-            """
-INSERT INTO undirected_pips(
-    wire_in_tile_pkey, pip_in_tile_pkey, other_wire_in_tile_pkey)
-VALUES
-    (?, ?, ?), (?, ?, ?);""", (
-                wires[pip.net_from],
-                pip_pkey,
-                wires[pip.net_to],
-                wires[pip.net_to],
-                pip_pkey,
-                wires[pip.net_from],
+        pips.append(
+            (
+                pip.name, pip.net_from, pip.net_to, pip.can_invert,
+                pip.is_directional, pip.is_pseudo, pip.is_pass_transistor,
+                get_pip_switch_timing(pip, pip.timing),
+                get_pip_switch_timing(pip, pip.backward_timing)
             )
         )
 
+    site_types = []
+    sites = []
     for site in tile_type.get_sites():
-        if (site.prefix, site.name) in masked_sites:
-            continue
+        if (site.prefix, site.name) not in masked_sites:
+            site_types.append(site.type)
+
+        site_pins = [
+            (
+                site_pin.name, site_pin.wire,
+                get_site_pin_switch_timing(site_pin)
+            ) for site_pin in site.site_pins
+        ]
+        sites.append((site.name, site.x, site.y, site.type, site_pins))
 
-        if site.type not in site_types:
-            import_site_type(db, write_cur, site_types, site.type)
+    return TileTypeContent(
+        wires=wires, pips=pips, site_types=site_types, sites=sites
+    )
 
 
-def add_wire_to_site_relation(
-        db, write_cur, tile_types, site_types, tile_type_name,
-        get_switch_timing
-):
-    tile_type = db.get_tile_type(tile_type_name)
-    for site in tile_type.get_sites():
+def extract_site_type(db, site_type_name):
+    """ Returns the site pins of a site type as a list of (name, direction).
+    """
+    site_type = db.get_site_type(site_type_name)
 
-        if site.type not in site_types:
-            continue
+    site_pins = []
+    for site_pin in site_type.get_site_pins():
+        pin_info = site_type.get_site_pin(site_pin)
+        site_pins.append((pin_info.name, pin_info.direction.value))
 
-        write_cur.execute(
-            """
-INSERT INTO site(name, x_coord, y_coord, site_type_pkey, tile_type_pkey)
-VALUES
-  (?, ?, ?, ?, ?)""", (
-                site.name, site.x, site.y, site_types[site.type],
-                tile_types[tile_type_name]
-            )
-        )
+    return site_pins
 
-        site_pkey = write_cur.lastrowid
 
-        for site_pin in site.site_pins:
-            write_cur.execute(
-                """
-SELECT
-  pkey
-FROM
-  site_pin
-WHERE
-  name = ?
-  AND site_type_pkey = ?""", (site_pin.name, site_types[site.type])
-            )
-            result = write_cur.fetchone()
-            site_pin_pkey = result[0]
-
-            intrinsic_delay = 0
-            drive_resistance = 0
-            capacitance = 0
-
-            if site_pin.timing is not None:
-                # Use the largest intristic delay for now.
-                # This conservative on slack timing, but not on hold timing.
-                #
-                # nanosecond -> seconds
-                intrinsic_delay = site_pin.timing.delays[PvtCorner.SLOW
-                                                         ].max / 1e9
-
-                if isinstance(site_pin.timing, prjxray.tile.OutPinTiming):
-                    # milliOhms -> Ohms
-                    drive_resistance = site_pin.timing.drive_resistance / 1e3
-                elif isinstance(site_pin.timing, prjxray.tile.InPinTiming):
-                    # microFarads -> Farads
-                    capacitance = site_pin.timing.capacitance / 1e6
-                else:
-                    assert False, site_pin
-            else:
-                # Use min value instead of 0 to prevent
-                # VPR from freaking out over a zero net delay.
-                #
-                # Note this is the single precision float minimum, because VPR
-                # uses single precision, not double precision.
-                intrinsic_delay = SINGLE_PRECISION_FLOAT_MIN
-
-            site_pin_switch_pkey = get_switch_timing(
-                is_pass_transistor=False,
-                delay=intrinsic_delay,
-                internal_capacitance=capacitance,
-                drive_resistance=drive_resistance,
-            )
+# prjxray.db.Database of the worker processes of the pool in import_phy_grid.
+_WORKER_DB = None
+
+
+def init_extract_worker(db_root, part):
+    global _WORKER_DB
+    _WORKER_DB = prjxray.db.Database(db_root, part)
 
-            write_cur.execute(
-                """
-UPDATE
-  wire_in_tile
-SET
-  site_pkey = ?,
-  site_pin_pkey = ?,
-  site_pin_switch_pkey = ?
-WHERE
-  name = ?
-  and tile_type_pkey = ?;""", (
-                    site_pkey, site_pin_pkey, site_pin_switch_pkey,
-                    site_pin.wire, tile_types[tile_type_name]
-                )
-            )
+
+def extract_tile_type_worker(tile_type_name):
+    return extract_tile_type(_WORKER_DB, tile_type_name)
 
 
 def build_tile_type_indicies(write_cur):
@@ -463,35 +421,165 @@ def build_other_indicies(write_cur):
     )
 
 
-def import_phy_grid(db, grid, conn, get_switch, get_switch_timing):
+def next_pkeys(write_cur, table):
+    """ Returns an iterator of the primary keys SQLite would assign to the
+    next rows inserted into table.
+    """
+    write_cur.execute("SELECT MAX(pkey) FROM {}".format(table))
+    max_pkey = write_cur.fetchone()[0]
+    return itertools.count(1 if max_pkey is None else max_pkey + 1)
+
+
+def import_phy_grid(
+        db, grid, conn, get_switch_timing, insert_switches, jobs=None
+):
+    """ Imports the tile types, sites and tiles of the grid.
+
+    Tile types are extracted from the prjxray database by jobs processes (all
+    CPUs when None).  Rows are then built in memory with explicit primary
+    keys, assigned in the order of the grid, and bulk inserted before the
+    indicies are created.
+
+    """
+    start = datetime.datetime.now()
     write_cur = conn.cursor()
 
+    # Tile types in the order of the grid.
+    tile_type_names = {}
+    for tile in grid.tiles():
+        gridinfo = grid.gridinfo_at_tilename(tile)
+        tile_type_names.setdefault(gridinfo.tile_type, None)
+    tile_type_names = list(tile_type_names)
+
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    jobs = max(1, min(jobs, len(tile_type_names)))
+
+    if jobs == 1:
+        tile_type_contents = [
+            extract_tile_type(db, tile_type_name)
+            for tile_type_name in tile_type_names
+        ]
+    else:
+        with multiprocessing.Pool(jobs, initializer=init_extract_worker,
+                                  initargs=(db.db_root, db.part)) as pool:
+            tile_type_contents = pool.map(
+                extract_tile_type_worker, tile_type_names
+            )
+
+    print(
+        "{}: Extracted {} tile types".format(
+            datetime.datetime.now(), len(tile_type_names)
+        )
+    )
+
+    tile_type_pkeys = next_pkeys(write_cur, 'tile_type')
+    wire_pkeys = next_pkeys(write_cur, 'wire_in_tile')
+    pip_pkeys = next_pkeys(write_cur, 'pip_in_tile')
+    site_type_pkeys = next_pkeys(write_cur, 'site_type')
+    site_pin_pkeys = next_pkeys(write_cur, 'site_pin')
+    site_pkeys = next_pkeys(write_cur, 'site')
+
     tile_types = {}
     site_types = {}
+    site_pins = {}
+    tile_type_wires = {}
+
+    tile_type_rows = []
+    wire_rows = {}
+    pip_rows = []
+    undirected_pip_rows = []
+    site_type_rows = []
+    site_pin_rows = []
+    site_rows = []
+
+    for tile_type_name, content in zip(tile_type_names, tile_type_contents):
+        tile_type_pkey = next(tile_type_pkeys)
+        tile_types[tile_type_name] = tile_type_pkey
+        tile_type_rows.append((tile_type_pkey, tile_type_name))
+
+        wires = {}
+        for wire, capacitance, resistance in content.wires:
+            wire_pkey = next(wire_pkeys)
+            wires[wire] = wire_pkey
+
+            # Site columns are filled once the sites are known.
+            wire_rows[wire_pkey] = [
+                wire_pkey, wire, tile_type_pkey, tile_type_pkey, None, None,
+                capacitance, resistance, None
+            ]
+
+        tile_type_wires[tile_type_pkey] = wires
+
+        for (name, net_from, net_to, can_invert, is_directional, is_pseudo,
+             is_pass_transistor, switch_timing,
+             backward_switch_timing) in content.pips:
+            pip_pkey = next(pip_pkeys)
+            pip_rows.append(
+                (
+                    pip_pkey, name, tile_type_pkey, wires[net_from],
+                    wires[net_to], can_invert, is_directional, is_pseudo,
+                    is_pass_transistor, get_switch_timing(*switch_timing),
+                    get_switch_timing(*backward_switch_timing)
+                )
+            )
 
-    for tile in grid.tiles():
-        gridinfo = grid.gridinfo_at_tilename(tile)
+            undirected_pip_rows.append(
+                (wires[net_from], pip_pkey, wires[net_to])
+            )
+            undirected_pip_rows.append(
+                (wires[net_to], pip_pkey, wires[net_from])
+            )
 
-        if gridinfo.tile_type not in tile_types:
-            if gridinfo.tile_type in tile_types:
+        for site_type_name in content.site_types:
+            if site_type_name in site_types:
                 continue
 
-            import_tile_type(
-                db, write_cur, tile_types, site_types, gridinfo.tile_type,
-                get_switch
+            site_type_pkey = next(site_type_pkeys)
+            site_types[site_type_name] = site_type_pkey
+            site_type_rows.append((site_type_pkey, site_type_name))
+
+            for name, direction in extract_site_type(db, site_type_name):
+                site_pin_pkey = next(site_pin_pkeys)
+                site_pins.setdefault((site_type_pkey, name), site_pin_pkey)
+                site_pin_rows.append(
+                    (site_pin_pkey, name, site_type_pkey, direction)
+                )
+
+    # Sites may use site types that are only imported by a later tile type,
+    # so sites are added once all tile types are known.
+    sites = {}
+    for tile_type_name, content in zip(tile_type_names, tile_type_contents):
+        tile_type_pkey = tile_types[tile_type_name]
+        wires = tile_type_wires[tile_type_pkey]
+
+        for name, x, y, site_type_name, pins in content.sites:
+            if site_type_name not in site_types:
+                continue
+
+            site_type_pkey = site_types[site_type_name]
+            site_pkey = next(site_pkeys)
+            sites[(tile_type_pkey, name, x, y, site_type_name)] = site_pkey
+            site_rows.append(
+                (site_pkey, name, x, y, site_type_pkey, tile_type_pkey)
             )
 
-    write_cur.connection.commit()
+            for pin_name, wire, switch_timing in pins:
+                site_pin_pkey = site_pins[(site_type_pkey, pin_name)]
+                site_pin_switch_pkey = get_switch_timing(*switch_timing)
 
-    build_tile_type_indicies(write_cur)
-    write_cur.connection.commit()
+                if wire in wires:
+                    wire_rows[wires[wire]][4:6] = site_pkey, site_pin_pkey
+                    wire_rows[wires[wire]][8] = site_pin_switch_pkey
 
-    for tile_type in tile_types:
-        add_wire_to_site_relation(
-            db, write_cur, tile_types, site_types, tile_type, get_switch_timing
-        )
+    clock_region_pkeys = next_pkeys(write_cur, 'clock_region')
+    phy_tile_pkeys = next_pkeys(write_cur, 'phy_tile')
+    site_instance_pkeys = next_pkeys(write_cur, 'site_instance')
 
     clock_regions = {}
+    clock_region_rows = []
+    phy_tile_rows = []
+    site_instance_rows = []
 
     for tile in grid.tiles():
         gridinfo = grid.gridinfo_at_tilename(tile)
@@ -499,78 +587,139 @@ def import_phy_grid(db, grid, conn, get_switch, get_switch_timing):
         clock_region_pkey = None
         if gridinfo.clock_region is not None:
             if gridinfo.clock_region.name not in clock_regions:
-                write_cur.execute(
-                    """
-INSERT INTO clock_region(name, x_coord, y_coord)
-VALUES (?, ?, ?)""", (
+                clock_region_pkey = next(clock_region_pkeys)
+                clock_regions[gridinfo.clock_region.name] = clock_region_pkey
+                clock_region_rows.append(
+                    (
+                        clock_region_pkey,
                         gridinfo.clock_region.name,
                         gridinfo.clock_region.x,
                         gridinfo.clock_region.y,
                     )
                 )
-                clock_regions[gridinfo.clock_region.name] = write_cur.lastrowid
 
             clock_region_pkey = clock_regions[gridinfo.clock_region.name]
 
+        tile_type_pkey = tile_types[gridinfo.tile_type]
         loc = grid.loc_of_tilename(tile)
-        # tile: pkey name tile_type_pkey grid_x grid_y
-        write_cur.execute(
-            """
-INSERT INTO phy_tile(name, tile_type_pkey, grid_x, grid_y, clock_region_pkey)
-VALUES
-  (?, ?, ?, ?, ?)""", (
+        phy_tile_pkey = next(phy_tile_pkeys)
+        phy_tile_rows.append(
+            (
+                phy_tile_pkey,
                 tile,
-                tile_types[gridinfo.tile_type],
+                tile_type_pkey,
                 loc.grid_x,
                 loc.grid_y,
                 clock_region_pkey,
             )
         )
-        phy_tile_pkey = write_cur.lastrowid
 
         tile_type = db.get_tile_type(gridinfo.tile_type)
         for site, instance_site in zip(tile_type.sites,
                                        tile_type.get_instance_sites(gridinfo)):
-            write_cur.execute(
-                """
-INSERT INTO site_instance(name, x_coord, y_coord, site_pkey, phy_tile_pkey)
-SELECT ?, ?, ?, site.pkey, ?
-FROM site
-WHERE
-    site.name = ?
-AND
-    site.x_coord = ?
-AND
-    site.y_coord = ?
-AND
-    site.site_type_pkey = (SELECT pkey FROM site_type WHERE name = ?)
-AND
-    tile_type_pkey = ?;
-                """, (
+            site_pkey = sites.get(
+                (tile_type_pkey, site.name, site.x, site.y, site.type)
+            )
+            if site_pkey is None:
+                continue
+
+            site_instance_rows.append(
+                (
+                    next(site_instance_pkeys),
                     instance_site.name,
                     instance_site.x,
                     instance_site.y,
+                    site_pkey,
                     phy_tile_pkey,
-                    site.name,
-                    site.x,
-                    site.y,
-                    site.type,
-                    tile_types[gridinfo.tile_type],
-                )
-            )
-
-            site_instance_pkey = write_cur.lastrowid
-
-            write_cur.execute(
-                "UPDATE site_instance SET prohibited = ? WHERE pkey = ?", (
                     instance_site.name in gridinfo.prohibited_sites,
-                    site_instance_pkey,
                 )
             )
 
+    insert_switches(write_cur)
+    write_cur.executemany(
+        "INSERT INTO tile_type(pkey, name) VALUES (?, ?)", tile_type_rows
+    )
+    write_cur.executemany(
+        """
+INSERT INTO wire_in_tile(
+  pkey, name, phy_tile_type_pkey, tile_type_pkey, site_pkey, site_pin_pkey,
+  capacitance, resistance, site_pin_switch_pkey
+)
+VALUES
+  (?, ?, ?, ?, ?, ?, ?, ?, ?)""", wire_rows.values()
+    )
+    write_cur.executemany(
+        """
+INSERT INTO pip_in_tile(
+  pkey, name, tile_type_pkey, src_wire_in_tile_pkey,
+  dest_wire_in_tile_pkey, can_invert, is_directional, is_pseudo,
+  is_pass_transistor, switch_pkey, backward_switch_pkey
+)
+VALUES
+  (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", pip_rows
+    )
+    write_cur.executemany(
+        """
+INSERT INTO undirected_pips(
+    wire_in_tile_pkey, pip_in_tile_pkey, other_wire_in_tile_pkey)
+VALUES
+    (?, ?, ?)""", undirected_pip_rows
+    )
+    write_cur.executemany(
+        "INSERT INTO site_type(pkey, name) VALUES (?, ?)", site_type_rows
+    )
+    write_cur.executemany(
+        """
+INSERT INTO site_pin(pkey, name, site_type_pkey, direction)
+VALUES
+  (?, ?, ?, ?)""", site_pin_rows
+    )
+    write_cur.executemany(
+        """
+INSERT INTO site(pkey, name, x_coord, y_coord, site_type_pkey, tile_type_pkey)
+VALUES
+  (?, ?, ?, ?, ?, ?)""", site_rows
+    )
+    write_cur.executemany(
+        """
+INSERT INTO clock_region(pkey, name, x_coord, y_coord)
+VALUES (?, ?, ?, ?)""", clock_region_rows
+    )
+    write_cur.executemany(
+        """
+INSERT INTO phy_tile(
+  pkey, name, tile_type_pkey, grid_x, grid_y, clock_region_pkey
+)
+VALUES
+  (?, ?, ?, ?, ?, ?)""", phy_tile_rows
+    )
+    write_cur.executemany(
+        """
+INSERT INTO site_instance(
+  pkey, name, x_coord, y_coord, site_pkey, phy_tile_pkey, prohibited
+)
+VALUES
+  (?, ?, ?, ?, ?, ?, ?)""", site_instance_rows
+    )
+
+    build_tile_type_indicies(write_cur)
     build_other_indicies(write_cur)
     write_cur.connection.commit()
 
+    rows = sum(
+        len(table_rows) for table_rows in (
+            tile_type_rows, wire_rows, pip_rows, undirected_pip_rows,
+            site_type_rows, site_pin_rows, site_rows, clock_region_rows,
+            phy_tile_rows, site_instance_rows
+        )
+    )
+    elapsed = (datetime.datetime.now() - start).total_seconds()
+    print(
+        "{}: Imported {} rows in {:.1f} s ({:.0f} rows/s)".format(
+            datetime.datetime.now(), rows, elapsed, rows / max(elapsed, 1e-6)
+        )
+    )
+
 
 def import_nodes(db, grid, conn):
     # Some nodes are just 1 wire, so start by enumerating all wires.
@@ -793,127 +942,144 @@ WHERE
     cur.connection.commit()
 
 
-def check_edge_with_mux_timing(
-        conn, get_switch_timing, src_wire_pkey, dest_wire_pkey, pip_pkey
+def fetch_array(cur, columns, dtype=numpy.int64):
+    """ Returns the rows of a query as an (N, columns) array. """
+    return numpy.fromiter(
+        itertools.chain.from_iterable(cur), dtype=dtype
+    ).reshape(-1, columns)
+
+
+def pkey_array(pkeys, values, default):
+    """ Returns an array of values indexed by pkey. """
+    size = pkeys.max() + 1 if len(pkeys) else 0
+    lookup = numpy.full(size, default, dtype=values.dtype)
+    lookup[pkeys] = values
+
+    return lookup
+
+
+def edge_with_mux_timings(
+        conn, get_switch_timing, src_wire_in_tile_pkeys,
+        dest_wire_in_tile_pkeys, switch_pkeys
 ):
     """ Check if edge with mux timing can be "lumped" into the switch.
 
+    Arguments are arrays describing each edge with mux, the wire_in_tile_pkey
+    of the source and destination site wires and the switch of the pip.
+
     Returns
     -------
-    switch_pkey : int
-        Switch primary key to model EDGE_WITH_MUX connection.
+    switch_pkeys : list of int
+        Switch primary key to model each EDGE_WITH_MUX connection.
 
     """
-
     cur = conn.cursor()
 
-    cur.execute(
-        """
-SELECT site_pin_switch_pkey, resistance, capacitance FROM wire_in_tile WHERE pkey = (
-    SELECT wire_in_tile_pkey FROM wire WHERE pkey = ?
-    )""", (src_wire_pkey, )
+    rows = fetch_array(
+        cur.execute(
+            """
+SELECT pkey, IFNULL(site_pin_switch_pkey, -1), resistance, capacitance
+FROM wire_in_tile;"""
+        ), 4, numpy.float64
+    )
+    wire_in_tile_pkeys = rows[:, 0].astype(numpy.int64)
+    site_pin_switch = pkey_array(
+        wire_in_tile_pkeys, rows[:, 1].astype(numpy.int64), -1
     )
+    wire_resistance = pkey_array(wire_in_tile_pkeys, rows[:, 2], numpy.nan)
+    wire_capacitance = pkey_array(wire_in_tile_pkeys, rows[:, 3], numpy.nan)
 
-    src_site_pin_switch_pkey, src_wire_resistance, src_wire_capacitance = cur.fetchone(
+    rows = fetch_array(
+        cur.execute(
+            """
+SELECT pkey, intrinsic_delay, internal_capacitance, drive_resistance
+FROM switch;"""
+        ), 4, numpy.float64
     )
+    pkeys = rows[:, 0].astype(numpy.int64)
+    intrinsic_delay = pkey_array(pkeys, rows[:, 1], numpy.nan)
+    internal_capacitance = pkey_array(pkeys, rows[:, 2], numpy.nan)
+    drive_resistance = pkey_array(pkeys, rows[:, 3], numpy.nan)
 
-    assert src_wire_resistance == 0, src_wire_pkey
+    switch_types = dict(cur.execute("SELECT pkey, switch_type FROM switch;"))
 
-    cur.execute(
-        """
-SELECT intrinsic_delay, drive_resistance FROM switch WHERE pkey = ?
-        """, (src_site_pin_switch_pkey, )
-    )
-    src_site_pin_intrinsic_delay, src_site_pin_drive_resistance = cur.fetchone(
-    )
+    src_site_pin_switch = site_pin_switch[src_wire_in_tile_pkeys]
+    src_wire_resistance = wire_resistance[src_wire_in_tile_pkeys]
+    src_wire_capacitance = wire_capacitance[src_wire_in_tile_pkeys]
+    bad_wires = src_wire_resistance != 0
+    assert not bad_wires.any(), src_wire_in_tile_pkeys[bad_wires]
 
-    cur.execute(
-        """
-SELECT site_pin_switch_pkey, resistance, capacitance FROM wire_in_tile WHERE pkey = (
-    SELECT wire_in_tile_pkey FROM wire WHERE pkey = ?
-    )""", (dest_wire_pkey, )
-    )
+    src_site_pin_intrinsic_delay = intrinsic_delay[src_site_pin_switch]
+    src_site_pin_drive_resistance = drive_resistance[src_site_pin_switch]
 
-    dest_site_pin_switch_pkey, dest_wire_resistance, dest_wire_capacitance = cur.fetchone(
-    )
+    dest_site_pin_switch = site_pin_switch[dest_wire_in_tile_pkeys]
+    dest_wire_resistance = wire_resistance[dest_wire_in_tile_pkeys]
+    dest_wire_capacitance = wire_capacitance[dest_wire_in_tile_pkeys]
+    bad_wires = dest_wire_resistance != 0
+    assert not bad_wires.any(), dest_wire_in_tile_pkeys[bad_wires]
 
-    assert dest_wire_resistance == 0, dest_wire_pkey
+    dest_site_pin_intrinsic_delay = intrinsic_delay[dest_site_pin_switch]
+    dest_site_pin_capacitance = internal_capacitance[dest_site_pin_switch]
 
-    cur.execute(
-        """
-SELECT intrinsic_delay, internal_capacitance FROM switch WHERE pkey = ?
-        """, (dest_site_pin_switch_pkey, )
+    switch_intrinsic_delay = intrinsic_delay[switch_pkeys]
+    switch_internal_capacitance = internal_capacitance[switch_pkeys]
+    switch_drive_resistance = drive_resistance[switch_pkeys]
+
+    is_mux = numpy.zeros(len(switch_pkeys), dtype=bool)
+    for idx, switch_pkey in enumerate(switch_pkeys.tolist()):
+        switch_type = switch_types[switch_pkey]
+        assert switch_type in ["mux", "pass_gate"], (switch_pkey, switch_type)
+        is_mux[idx] = switch_type == "mux"
+
+    zero_delay_to_switch = (src_site_pin_drive_resistance == 0) | (
+        (switch_internal_capacitance == 0) & (src_wire_capacitance == 0)
+    )
+    zero_delay_from_switch = (switch_drive_resistance == 0) | (
+        (dest_wire_capacitance == 0) & (dest_site_pin_capacitance == 0)
     )
-    dest_site_pin_intrinsic_delay, dest_site_pin_capacitance = cur.fetchone()
 
-    cur.execute(
-        """
-SELECT name, switch_pkey FROM pip_in_tile WHERE pkey = ?""", (pip_pkey, )
+    zero_site_pin_delay = (src_site_pin_intrinsic_delay == 0) & (
+        dest_site_pin_intrinsic_delay == 0
     )
-    pip_name, switch_pkey = cur.fetchone()
+    lumped = zero_delay_to_switch & zero_delay_from_switch & zero_site_pin_delay
 
-    cur.execute(
-        """
-SELECT
-    name, intrinsic_delay, internal_capacitance, drive_resistance, switch_type
-FROM switch WHERE pkey = ?
-        """, (switch_pkey, )
+    mux_delay = src_site_pin_intrinsic_delay
+    mux_delay = mux_delay + src_site_pin_drive_resistance * (
+        switch_internal_capacitance + src_wire_capacitance
     )
-    (
-        switch_name, switch_intrinsic_delay, switch_internal_capacitance,
-        switch_drive_resistance, switch_type
-    ) = cur.fetchone()
+    mux_delay = mux_delay + switch_intrinsic_delay
+    mux_delay = mux_delay + switch_drive_resistance * (
+        dest_wire_capacitance + dest_site_pin_capacitance
+    )
+    mux_delay = mux_delay + dest_site_pin_intrinsic_delay
 
-    assert switch_type in ["mux", "pass_gate"], (switch_pkey, switch_type)
+    pass_gate = ~lumped & ~is_mux
+    assert (switch_intrinsic_delay[pass_gate] == 0).all()
+    assert (switch_drive_resistance[pass_gate] == 0).all()
 
-    zero_delay_to_switch = src_site_pin_drive_resistance == 0 or (
-        switch_internal_capacitance == 0 and src_wire_capacitance == 0
+    pass_gate_delay = src_site_pin_intrinsic_delay
+    pass_gate_delay = pass_gate_delay + src_site_pin_drive_resistance * (
+        src_wire_capacitance + switch_internal_capacitance +
+        dest_wire_capacitance + dest_site_pin_capacitance
     )
-    zero_delay_from_switch = switch_drive_resistance == 0 or (
-        dest_wire_capacitance == 0 and dest_site_pin_capacitance == 0
+    pass_gate_delay = pass_gate_delay + dest_site_pin_intrinsic_delay
+
+    switch_delay = numpy.where(
+        lumped, switch_intrinsic_delay,
+        numpy.where(is_mux, mux_delay, pass_gate_delay)
     )
 
-    if zero_delay_to_switch and zero_delay_from_switch and \
-            src_site_pin_intrinsic_delay == 0 and \
-            dest_site_pin_intrinsic_delay == 0:
-        return get_switch_timing(
+    return [
+        get_switch_timing(
             is_pass_transistor=False,
-            delay=switch_intrinsic_delay,
+            delay=delay,
             internal_capacitance=0,
             drive_resistance=0,
-        )
-
-    if switch_type == "mux":
-        switch_delay = src_site_pin_intrinsic_delay
-        switch_delay += src_site_pin_drive_resistance * (
-            switch_internal_capacitance + src_wire_capacitance
-        )
-        switch_delay += switch_intrinsic_delay
-        switch_delay += switch_drive_resistance * (
-            dest_wire_capacitance + dest_site_pin_capacitance
-        )
-        switch_delay += dest_site_pin_intrinsic_delay
-    else:
-        assert switch_type == "pass_gate"
-        assert switch_intrinsic_delay == 0
-        assert switch_drive_resistance == 0
-
-        switch_delay = src_site_pin_intrinsic_delay
-        switch_delay += src_site_pin_drive_resistance * (
-            src_wire_capacitance + switch_internal_capacitance +
-            dest_wire_capacitance + dest_site_pin_capacitance
-        )
-        switch_delay += dest_site_pin_intrinsic_delay
-
-    return get_switch_timing(
-        is_pass_transistor=False,
-        delay=switch_delay,
-        internal_capacitance=0,
-        drive_resistance=0
-    )
+        ) for delay in switch_delay.tolist()
+    ]
 
 
-def classify_nodes(conn, get_switch_timing):
+def classify_nodes(conn, get_switch_timing, insert_switches):
     write_cur = conn.cursor()
 
     # Nodes are NULL if they they only have either a site pin or 1 pip, but
@@ -938,187 +1104,152 @@ UPDATE node SET classification = ?
         (NodeClassification.EDGES_TO_CHANNEL.value, )
     )
 
-    null_nodes = []
-    edges_to_channel = []
-    edge_with_mux = []
-
+    # Nodes with a site pin and a single pip are classified from the node at
+    # the other end of the pip.  Because number_pips counts the non-pseudo
+    # pips of the wires in the node, each of these nodes has exactly one row.
     cur = conn.cursor()
-    cur.execute(
-        """
-SELECT
-  count(pkey)
-FROM
-  node
-WHERE
-  number_pips == 1
-  AND site_wire_pkey IS NOT NULL;"""
-    )
-    num_nodes = cur.fetchone()[0]
-    with progressbar_utils.ProgressBar(max_value=num_nodes) as bar:
-        bar.update(0)
-        for idx, (node, site_wire_pkey) in enumerate(cur.execute("""
-SELECT
-  pkey,
-  site_wire_pkey
-FROM
-  node
-WHERE
-  number_pips == 1
-  AND site_wire_pkey IS NOT NULL;""")):
-            bar.update(idx)
-
-            write_cur.execute(
-                """
-WITH wire_in_node(
-  wire_pkey, phy_tile_pkey, wire_in_tile_pkey
-) AS (
-  SELECT
-    wire.pkey,
-    wire.phy_tile_pkey,
-    wire.wire_in_tile_pkey
-  FROM
-    wire
-  WHERE
-    wire.node_pkey = ?
-)
+    rows = fetch_array(
+        cur.execute(
+            """
 SELECT
+  node.pkey,
+  node.site_wire_pkey,
+  site_wire.wire_in_tile_pkey,
   pip_in_tile.pkey,
-  pip_in_tile.src_wire_in_tile_pkey,
-  pip_in_tile.dest_wire_in_tile_pkey,
-  wire_in_node.wire_pkey,
-  wire_in_node.wire_in_tile_pkey,
-  wire_in_node.phy_tile_pkey
+  pip_in_tile.switch_pkey,
+  pip_in_tile.src_wire_in_tile_pkey = wire.wire_in_tile_pkey,
+  IFNULL(wire.phy_tile_pkey, -1),
+  IFNULL(other_wire.pkey, -1),
+  IFNULL(other_node.pkey, -1),
+  IFNULL(other_node.site_wire_pkey, -1),
+  IFNULL(other_site_wire.wire_in_tile_pkey, -1),
+  IFNULL(other_node.number_pips, -1),
+  (
+    instr(pip_in_tile.name, 'PADOUT0') AND
+    instr(pip_in_tile.name, 'DIFFI_IN1')
+  ) OR (
+    instr(pip_in_tile.name, 'PADOUT1') AND
+    instr(pip_in_tile.name, 'DIFFI_IN0')
+  )
 FROM
-  wire_in_node
+  node
+  INNER JOIN wire ON wire.node_pkey = node.pkey
   INNER JOIN pip_in_tile
+  INNER JOIN wire AS site_wire ON site_wire.pkey = node.site_wire_pkey
+  LEFT JOIN wire AS other_wire ON
+    other_wire.phy_tile_pkey = wire.phy_tile_pkey AND
+    other_wire.wire_in_tile_pkey = (
+      CASE
+        WHEN pip_in_tile.src_wire_in_tile_pkey = wire.wire_in_tile_pkey
+        THEN pip_in_tile.dest_wire_in_tile_pkey
+        ELSE pip_in_tile.src_wire_in_tile_pkey
+      END
+    )
+  LEFT JOIN node AS other_node ON other_node.pkey = other_wire.node_pkey
+  LEFT JOIN wire AS other_site_wire ON
+    other_site_wire.pkey = other_node.site_wire_pkey
 WHERE
-  pip_in_tile.is_pseudo = 0 AND (
-  pip_in_tile.src_wire_in_tile_pkey = wire_in_node.wire_in_tile_pkey
-  OR pip_in_tile.dest_wire_in_tile_pkey = wire_in_node.wire_in_tile_pkey)
-LIMIT
-  1;
-""", (node, )
-            )
-
-            (
-                pip_pkey, src_wire_in_tile_pkey, dest_wire_in_tile_pkey,
-                wire_in_node_pkey, wire_in_tile_pkey, phy_tile_pkey
-            ) = write_cur.fetchone()
-            assert write_cur.fetchone() is None, node
-
-            assert (
-                wire_in_tile_pkey == src_wire_in_tile_pkey
-                or wire_in_tile_pkey == dest_wire_in_tile_pkey
-            ), (wire_in_tile_pkey, pip_pkey)
-
-            if src_wire_in_tile_pkey == wire_in_tile_pkey:
-                other_wire = dest_wire_in_tile_pkey
-            else:
-                other_wire = src_wire_in_tile_pkey
-
-            write_cur.execute(
-                """
-            SELECT node_pkey FROM wire WHERE
-                wire_in_tile_pkey = ? AND
-                phy_tile_pkey = ?;
-                """, (other_wire, phy_tile_pkey)
-            )
-
-            (other_node_pkey, ) = write_cur.fetchone()
-            assert write_cur.fetchone() is None
-            assert other_node_pkey is not None, (other_wire, phy_tile_pkey)
-
-            write_cur.execute(
-                """
-            SELECT site_wire_pkey, number_pips
-                FROM node WHERE pkey = ?;
-                """, (other_node_pkey, )
-            )
-
-            result = write_cur.fetchone()
-            assert result is not None, other_node_pkey
-            other_site_wire_pkey, other_number_pips = result
-            assert write_cur.fetchone() is None
-
-            force_direct = False
-
-            write_cur.execute(
-                """
-            SELECT name
-                FROM pip_in_tile WHERE pkey = ?;
-                """, (pip_pkey, )
-            )
-            pip_name = write_cur.fetchone()[0]
-
-            # A solution for:
-            # https://github.com/SymbiFlow/f4pga-arch-defs/issues/1033
-            if "PADOUT0" in pip_name and "DIFFI_IN1" in pip_name:
-                force_direct = True
-            if "PADOUT1" in pip_name and "DIFFI_IN0" in pip_name:
-                force_direct = True
-
-            if other_site_wire_pkey is not None and (other_number_pips == 1
-                                                     or force_direct):
-                if src_wire_in_tile_pkey == wire_in_tile_pkey:
-                    src_wire_pkey = site_wire_pkey
-                    dest_wire_pkey = other_site_wire_pkey
-                else:
-                    src_wire_pkey = other_site_wire_pkey
-                    dest_wire_pkey = site_wire_pkey
-
-                edge_with_mux.append(
-                    (
-                        (node, other_node_pkey), src_wire_pkey, dest_wire_pkey,
-                        pip_pkey
-                    )
-                )
-            elif other_site_wire_pkey is None and other_number_pips == 1:
-                null_nodes.append(node)
-                null_nodes.append(other_node_pkey)
-                pass
-            else:
-                edges_to_channel.append(node)
+  node.number_pips == 1
+  AND node.site_wire_pkey IS NOT NULL
+  AND pip_in_tile.is_pseudo = 0 AND (
+  pip_in_tile.src_wire_in_tile_pkey = wire.wire_in_tile_pkey
+  OR pip_in_tile.dest_wire_in_tile_pkey = wire.wire_in_tile_pkey)
+ORDER BY
+  node.pkey;"""
+        ), 13
+    )
 
-    for nodes, src_wire_pkey, dest_wire_pkey, pip_pkey in progressbar_utils.progressbar(
-            edge_with_mux):
-        assert len(nodes) == 2
+    (
+        nodes, site_wire_pkeys, site_wire_in_tile_pkeys, pip_pkeys,
+        switch_pkeys, is_src, phy_tile_pkeys, other_wire_pkeys,
+        other_node_pkeys, other_site_wire_pkeys, other_site_wire_in_tile_pkeys,
+        other_number_pips, force_direct
+    ) = rows.T
+
+    assert len(numpy.unique(nodes)) == len(nodes)
+    missing = other_wire_pkeys == -1
+    assert not missing.any(), (pip_pkeys[missing], phy_tile_pkeys[missing])
+
+    missing = other_node_pkeys == -1
+    assert not missing.any(), other_wire_pkeys[missing]
+
+    is_src = is_src != 0
+    other_has_site = other_site_wire_pkeys != -1
+
+    # A solution for:
+    # https://github.com/SymbiFlow/f4pga-arch-defs/issues/1033
+    # is applied through force_direct.
+    is_edge_with_mux = other_has_site & (
+        (other_number_pips == 1) | (force_direct != 0)
+    )
+    is_null = ~other_has_site & (other_number_pips == 1)
+    is_edges_to_channel = ~is_edge_with_mux & ~is_null
+
+    src_wire_pkeys = numpy.where(
+        is_src, site_wire_pkeys, other_site_wire_pkeys
+    )[is_edge_with_mux]
+    dest_wire_pkeys = numpy.where(
+        is_src, other_site_wire_pkeys, site_wire_pkeys
+    )[is_edge_with_mux]
+    src_wire_in_tile_pkeys = numpy.where(
+        is_src, site_wire_in_tile_pkeys, other_site_wire_in_tile_pkeys
+    )[is_edge_with_mux]
+    dest_wire_in_tile_pkeys = numpy.where(
+        is_src, other_site_wire_in_tile_pkeys, site_wire_in_tile_pkeys
+    )[is_edge_with_mux]
+
+    edge_with_mux_switch_pkeys = edge_with_mux_timings(
+        conn, get_switch_timing, src_wire_in_tile_pkeys,
+        dest_wire_in_tile_pkeys, switch_pkeys[is_edge_with_mux]
+    )
+
+    # Later updates take precedence, so the classifications are written as
+    # EDGE_WITH_MUX, then EDGES_TO_CHANNEL, then NULL.
+    edge_with_mux_nodes = numpy.stack(
+        (nodes[is_edge_with_mux], other_node_pkeys[is_edge_with_mux]), axis=1
+    ).reshape(-1)
+    null_nodes = numpy.stack(
+        (nodes[is_null], other_node_pkeys[is_null]), axis=1
+    ).reshape(-1)
 
-        switch_pkey = check_edge_with_mux_timing(
-            conn, get_switch_timing, src_wire_pkey, dest_wire_pkey, pip_pkey
-        )
-        write_cur.execute(
-            """
+    write_cur.executemany(
+        """
         UPDATE node SET classification = ?
-            WHERE pkey IN (?, ?);""",
-            (NodeClassification.EDGE_WITH_MUX.value, nodes[0], nodes[1])
+            WHERE pkey = ?;""", (
+            (NodeClassification.EDGE_WITH_MUX.value, node)
+            for node in edge_with_mux_nodes.tolist()
         )
+    )
 
-        write_cur.execute(
-            """
+    insert_switches(write_cur)
+    write_cur.executemany(
+        """
 INSERT INTO edge_with_mux(src_wire_pkey, dest_wire_pkey, pip_in_tile_pkey, switch_pkey)
 VALUES
-  (?, ?, ?, ?);""", (src_wire_pkey, dest_wire_pkey, pip_pkey, switch_pkey)
+  (?, ?, ?, ?);""",
+        zip(
+            src_wire_pkeys.tolist(), dest_wire_pkeys.tolist(),
+            pip_pkeys[is_edge_with_mux].tolist(), edge_with_mux_switch_pkeys
         )
+    )
 
-    for node in progressbar_utils.progressbar(edges_to_channel):
-        write_cur.execute(
-            """
+    write_cur.executemany(
+        """
         UPDATE node SET classification = ?
             WHERE pkey = ?;""", (
-                NodeClassification.EDGES_TO_CHANNEL.value,
-                node,
-            )
+            (NodeClassification.EDGES_TO_CHANNEL.value, node)
+            for node in nodes[is_edges_to_channel].tolist()
         )
+    )
 
-    for null_node in progressbar_utils.progressbar(null_nodes):
-        write_cur.execute(
-            """
+    write_cur.executemany(
+        """
         UPDATE node SET classification = ?
             WHERE pkey = ?;""", (
-                NodeClassification.NULL.value,
-                null_node,
-            )
+            (NodeClassification.NULL.value, node)
+            for node in null_nodes.tolist()
         )
+    )
 
     write_cur.execute("CREATE INDEX node_type_index ON node(classification);")
     write_cur.execute(
@@ -1871,7 +2002,7 @@ SELECT site_pkey FROM wire_in_tile WHERE tile_type_pkey = ? AND site_pkey IS NOT
             tile_types[tile_type] = tile_type_pkey
             tile_type_names[tile_type_pkey] = tile_type
 
-    vpr_grid = tile_splitter.grid.Grid(
+    vpr_grid = tile_splitter.grid.ArrayGrid(
         grid_loc_map=grid_loc_map, empty_tile_type_pkey=empty_tile_type_pkey
     )
 
@@ -2363,6 +2494,12 @@ def main():
         help='Location of the grid map output',
         required=True
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=None,
+        help="Number of worker processes used to extract the tile types."
+    )
 
     args = parser.parse_args()
     if os.path.exists(args.connection_database):
@@ -2374,8 +2511,10 @@ def main():
         print("{}: About to load database".format(datetime.datetime.now()))
         db = prjxray.db.Database(args.db_root, args.part)
         grid = db.grid()
-        get_switch, get_switch_timing = create_get_switch(conn)
-        import_phy_grid(db, grid, conn, get_switch, get_switch_timing)
+        get_switch_timing, insert_switches = create_get_switch(conn)
+        import_phy_grid(
+            db, grid, conn, get_switch_timing, insert_switches, jobs=args.jobs
+        )
 
         segments = import_segments(conn, db)
 
@@ -2384,7 +2523,7 @@ def main():
         print("{}: Connections made".format(datetime.datetime.now()))
         count_sites_and_pips_on_nodes(conn)
         print("{}: Counted sites and pips".format(datetime.datetime.now()))
-        classify_nodes(conn, get_switch_timing)
+        classify_nodes(conn, get_switch_timing, insert_switches)
         print("{}: Create VPR grid".format(datetime.datetime.now()))
         with open(args.grid_map_output, 'w') as f:
             create_vpr_grid(conn, f)
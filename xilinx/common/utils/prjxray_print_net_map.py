@@ -1,37 +1,44 @@
-""" Utility for printing route mapping from VPR route output to xc7 db. """
+""" Utility for printing route mapping from VPR route output to xc7 db.
+
+Queries are answered by prjxray_query_daemon.py when --daemon_socket is given,
+the daemon must have been started with the same --rr_graph.
+
+"""
 import argparse
-import lib.rr_graph_xml.graph2 as xml_graph2
-from lib.rr_graph_xml.utils import read_xml_file
-from fasm2bels.net_map import create_net_list
 import json
+import os.path
 import sqlite3
 
+from prjxray_query_daemon import DaemonClient, NodeLookup, load_rr_graph
+
 
 def main():
     parser = argparse.ArgumentParser(description=__doc__)
 
-    parser.add_argument(
-        '--connection_db', required=True, help="xc7 connection database."
-    )
+    parser.add_argument('--connection_db', help="xc7 connection database.")
     parser.add_argument(
         '--route_file', required=True, help="VPR route output file."
     )
-    parser.add_argument(
-        '--rr_graph', required=True, help="Real or virt xc7 graph"
-    )
+    parser.add_argument('--rr_graph', help="Real or virt xc7 graph")
+    parser.add_argument('--daemon_socket')
 
     args = parser.parse_args()
 
-    xml_graph = xml_graph2.Graph(
-        read_xml_file(args.rr_graph), need_edges=False
-    )
-    graph = xml_graph.graph
-
-    conn = sqlite3.connect(args.connection_db)
-
-    with open(args.route_file) as f:
-        net_list = create_net_list(conn, graph, f)
-        print(json.dumps([net._asdict() for net in net_list], indent=2))
+    if args.daemon_socket is not None:
+        # The daemon may run in another directory.
+        with DaemonClient(args.daemon_socket) as client:
+            nets = client.query(
+                'net_map', route_file=os.path.abspath(args.route_file)
+            )
+    else:
+        assert args.connection_db is not None
+        assert args.rr_graph is not None
+
+        conn = sqlite3.connect(args.connection_db)
+        lookup = NodeLookup(conn, {}, load_rr_graph(args.rr_graph))
+        nets = lookup.net_map(args.route_file)
+
+    print(json.dumps(nets, indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,338 @@
+""" Read-only query daemon over the connection database and rr node map.
+
+Loading the connection database and the rr node map dominates the runtime of
+the debugging utilities (prjxray_lookup_inode.py, prjxray_find_inode.py,
+annotate_vpr_log.py and prjxray_print_net_map.py).  This daemon loads them
+once, keeping the connection database in memory, and answers queries over a
+Unix socket.  The utilities query the daemon when given --daemon_socket.
+
+Requests and responses are single line JSON objects:
+
+    {"method": "lookup_inodes", "params": {"inodes": [1, 2]}}
+    {"result": [...]} or {"error": "..."}
+
+Every query has a batch form that answers a list of queries with one
+request.
+
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import pickle
+import socket
+import sqlite3
+
+from lib.rr_graph.graph2 import NodeType
+import lib.rr_graph_xml.graph2 as xml_graph2
+from prjxray_db_cache import DatabaseCache
+
+# Requests may carry large batches of queries.
+MAX_LINE_LENGTH = 64 * 1024 * 1024
+
+# Number of inode names kept by NodeLookup.describe_inode.
+INODE_NAME_CACHE_SIZE = 1024 * 1024
+
+
+def load_node_map(rrgraph_node_map):
+    """ Returns the map of graph_node_pkey to rr inode of a pickled node map.
+
+    The node map values are either rr inodes or (rr inode, node type) tuples.
+    """
+    with open(rrgraph_node_map, 'rb') as f:
+        node_map = pickle.load(f)
+
+    for graph_node_pkey, rr_inode in node_map.items():
+        if isinstance(rr_inode, tuple):
+            node_map[graph_node_pkey] = rr_inode[0]
+
+    return node_map
+
+
+def load_rr_graph(rr_graph):
+    """ Returns the graph2.Graph of a real or virtual rr graph. """
+    return xml_graph2.Graph(rr_graph, build_pin_edges=False).graph
+
+
+def connect_read_only(connection_database):
+    return sqlite3.connect(
+        'file:{}?mode=ro'.format(connection_database), uri=True
+    )
+
+
+class NodeLookup(object):
+    """ Answers rr node queries from a connection database and a node map.
+
+    Node types are returned as NodeType names so results can be sent as JSON.
+    The rr graph is only required by net_map queries.
+
+    """
+
+    def __init__(self, conn, node_map, graph=None):
+        self.conn = conn
+        self.cur = conn.cursor()
+        self.graph = graph
+
+        self.node_map = node_map
+        self.inode_to_graph_map = {}
+        for graph_node_pkey, rr_inode in node_map.items():
+            assert rr_inode not in self.inode_to_graph_map
+            self.inode_to_graph_map[rr_inode] = graph_node_pkey
+
+        self.inode_names = functools.lru_cache(maxsize=INODE_NAME_CACHE_SIZE)(
+            self.query_inode_name
+        )
+
+    def lookup_inode(self, inode):
+        """ Returns the graph node, node type and (tile, wire) names of an rr
+        inode.
+        """
+        graph_node_pkey = self.inode_to_graph_map[inode]
+
+        self.cur.execute(
+            """
+SELECT graph_node_type, node_pkey FROM graph_node WHERE pkey = ?
+            """, (graph_node_pkey, )
+        )
+        result = self.cur.fetchone()
+        assert result is not None, graph_node_pkey
+        graph_node_type, node_pkey = result
+
+        self.cur.execute(
+            """
+SELECT phy_tile.name, wire_in_tile.name
+FROM wire
+INNER JOIN wire_in_tile ON wire.wire_in_tile_pkey = wire_in_tile.pkey
+INNER JOIN phy_tile ON wire.phy_tile_pkey = phy_tile.pkey
+WHERE wire.node_pkey = ?
+ORDER BY wire.pkey
+            """, (node_pkey, )
+        )
+
+        return {
+            'inode': inode,
+            'graph_node_pkey': graph_node_pkey,
+            'node_type': NodeType(graph_node_type).name,
+            'wires': self.cur.fetchall(),
+        }
+
+    def find_wire(self, wire):
+        """ Returns the wire pkey and the (inode, graph_node_pkey, node type)
+        of the graph nodes of a TILE/WIRE name.
+        """
+        tile, wire_name = wire.split('/')
+
+        self.cur.execute(
+            """
+SELECT pkey, node_pkey FROM wire WHERE
+    wire_in_tile_pkey IN (SELECT pkey FROM wire_in_tile WHERE name = ?)
+AND
+    phy_tile_pkey = (SELECT pkey FROM phy_tile WHERE name = ?)
+    """, (wire_name, tile)
+        )
+        results = self.cur.fetchall()
+        assert len(results) == 1, (wire, results)
+        wire_pkey, node_pkey = results[0]
+
+        self.cur.execute(
+            """
+SELECT pkey, graph_node_type FROM graph_node WHERE node_pkey = ?
+            """, (node_pkey, )
+        )
+
+        nodes = []
+        for graph_node_pkey, graph_node_type in self.cur.fetchall():
+            nodes.append(
+                (
+                    self.node_map.get(graph_node_pkey), graph_node_pkey,
+                    NodeType(graph_node_type).name
+                )
+            )
+
+        return {
+            'wire': wire,
+            'wire_pkey': wire_pkey,
+            'nodes': nodes,
+        }
+
+    def describe_inode(self, inode):
+        """ Returns "TILE/WIRE (inode)" for an rr inode, or the inode if it is
+        not in the node map.
+        """
+        return self.inode_names(inode)
+
+    def query_inode_name(self, inode):
+        if inode not in self.inode_to_graph_map:
+            name = '{}'.format(inode)
+        else:
+            self.cur.execute(
+                """
+SELECT phy_tile.name, wire_in_tile.name
+FROM graph_node
+INNER JOIN wire ON graph_node.node_pkey = wire.node_pkey
+INNER JOIN wire_in_tile ON wire.wire_in_tile_pkey = wire_in_tile.pkey
+INNER JOIN phy_tile ON wire.phy_tile_pkey = phy_tile.pkey
+WHERE graph_node.pkey = ?
+LIMIT 1;""", (self.inode_to_graph_map[inode], )
+            )
+            tile, wire = self.cur.fetchone()
+            name = '{}/{} ({})'.format(tile, wire, inode)
+
+        return name
+
+    def net_map(self, route_file):
+        """ Returns the nets of a VPR route file mapped to the connection
+        database.
+        """
+        from fasm2bels.net_map import create_net_list
+
+        assert self.graph is not None, 'Net map queries require an rr graph'
+
+        with open(route_file) as f:
+            return [
+                net._asdict()
+                for net in create_net_list(self.conn, self.graph, f)
+            ]
+
+    def lookup_inodes(self, inodes):
+        return [self.lookup_inode(inode) for inode in inodes]
+
+    def find_wires(self, wires):
+        return [self.find_wire(wire) for wire in wires]
+
+    def describe_inodes(self, inodes):
+        return [self.describe_inode(inode) for inode in inodes]
+
+    def ping(self):
+        return 'pong'
+
+    METHODS = (
+        'lookup_inode',
+        'lookup_inodes',
+        'find_wire',
+        'find_wires',
+        'describe_inode',
+        'describe_inodes',
+        'net_map',
+        'ping',
+    )
+
+    def handle_request(self, request):
+        """ Returns the response to a decoded request. """
+        try:
+            method = request['method']
+            if method not in self.METHODS:
+                return {'error': 'Unknown method {}'.format(method)}
+
+            params = request.get('params', {})
+            return {'result': getattr(self, method)(**params)}
+        except Exception as e:
+            return {'error': '{}: {}'.format(type(e).__name__, e)}
+
+
+async def serve_client(lookup, reader, writer):
+    """ Answers the requests of one client until it disconnects. """
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+
+        try:
+            request = json.loads(line.decode('utf-8'))
+        except ValueError as e:
+            response = {'error': 'Malformed request: {}'.format(e)}
+        else:
+            response = lookup.handle_request(request)
+
+        writer.write(json.dumps(response).encode('utf-8') + b'\n')
+        await writer.drain()
+
+    writer.close()
+
+
+def serve(lookup, socket_path):
+    """ Serves queries on a Unix socket until interrupted. """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = loop.run_until_complete(
+        asyncio.start_unix_server(
+            lambda reader, writer: serve_client(lookup, reader, writer),
+            path=socket_path,
+            limit=MAX_LINE_LENGTH,
+        )
+    )
+
+    print('Serving queries on {}'.format(socket_path))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+        os.unlink(socket_path)
+
+
+class DaemonClient(object):
+    """ Blocking client of the query daemon. """
+
+    def __init__(self, socket_path):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path)
+        self.f = self.socket.makefile('rwb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.f.close()
+        self.socket.close()
+
+    def query(self, method, **params):
+        """ Returns the result of a query, raises RuntimeError on failure. """
+        self.f.write(
+            json.dumps({
+                'method': method,
+                'params': params
+            }).encode('utf-8') + b'\n'
+        )
+        self.f.flush()
+
+        line = self.f.readline()
+        assert line, 'Query daemon closed the connection'
+
+        response = json.loads(line.decode('utf-8'))
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+
+        return response['result']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--connection_database', required=True)
+    parser.add_argument('--rrgraph_node_map', required=True)
+    parser.add_argument(
+        '--rr_graph', help='Real or virt xc7 graph, enables net map queries'
+    )
+    parser.add_argument('--socket', required=True, help='Unix socket path')
+
+    args = parser.parse_args()
+
+    node_map = load_node_map(args.rrgraph_node_map)
+
+    graph = None
+    if args.rr_graph is not None:
+        graph = load_rr_graph(args.rr_graph)
+
+    with DatabaseCache(args.connection_database, read_only=True) as conn:
+        serve(NodeLookup(conn, node_map, graph), args.socket)
+
+
+if __name__ == "__main__":
+    main()
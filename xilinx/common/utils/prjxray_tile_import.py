@@ -8,10 +8,23 @@ between tiles and their sites.  prjxray_tile_import generates a VPR pb_type
 that has the correct tile pin names to connect to the routing fabric, and
 connects those tile pins to each site within the tile.
 
+Multiple tile types can be generated by one invocation using --batch.  The
+Project X-Ray database and the connection database are then loaded once per
+worker process instead of once per tile type.  The CMake build runs one
+invocation per tile type (see PROJECT_RAY_TILE), --batch is meant for
+regenerating many tile types by hand, e.g.
+
+    prjxray_tile_import.py --db_root <db> --part <part> --batch tiles.txt
+
+with one line of the remaining arguments (--tile, --site_types, outputs, ...)
+per tile type in tiles.txt.
+
 """
 
 from __future__ import print_function
 import argparse
+import multiprocessing
+import shlex
 import sys
 import prjxray.db
 import prjxray.site_type
@@ -1381,7 +1394,7 @@ WHERE
     write_xml(args.output_pb_type, pb_type_xml)
 
 
-def main():
+def create_parser():
     parser = argparse.ArgumentParser(
         description=__doc__, fromfile_prefix_chars='@', prefix_chars='-~'
     )
@@ -1465,21 +1478,138 @@ connection database in lue of Project X-Ray."""
         help="Comma seperated list of site wires to exclude in this tile."
     )
 
-    args = parser.parse_args()
+    return parser
 
-    db = prjxray.db.Database(args.db_root, args.part)
 
-    ET.register_namespace('xi', XI_URL)
+def import_tile_type(db, conn, args):
+    """ Generate the pb_type and model XML for a single tile type.
+
+    conn is only used when args.connection_database is set.
+    """
     if args.site_as_tile:
         assert not args.fused_sites
         import_site_as_tile(db, args)
     elif args.connection_database:
-        with sqlite3.connect("file:{}?mode=ro".format(
-                args.connection_database), uri=True) as conn:
-            import_tile_from_database(conn, args)
+        import_tile_from_database(conn, args)
     else:
         import_tile(db, args)
 
 
+# Per-process state used by the batch mode.  Each worker loads the Project
+# X-Ray database and the connection database at most once and reuses them for
+# every tile type it is handed.
+_BATCH_DBS = {}
+_BATCH_CONNS = {}
+
+
+def load_connection_database(connection_database):
+    """ Returns an in-memory, read-only copy of the connection database. """
+    conn = sqlite3.connect(":memory:")
+    file_conn = sqlite3.connect(
+        "file:{}?mode=ro".format(connection_database), uri=True
+    )
+    file_conn.backup(conn)
+    file_conn.close()
+
+    return conn
+
+
+def import_tile_batch_entry(argv):
+    """ Import one tile type from a batch manifest line.
+
+    argv is the complete argument list for the tile, as it would be passed
+    to this script when run for a single tile.
+    """
+    args = create_parser().parse_args(argv)
+
+    key = (args.db_root, args.part)
+    if key not in _BATCH_DBS:
+        _BATCH_DBS[key] = prjxray.db.Database(args.db_root, args.part)
+    db = _BATCH_DBS[key]
+
+    conn = None
+    if args.connection_database:
+        if args.connection_database not in _BATCH_CONNS:
+            _BATCH_CONNS[args.connection_database] = load_connection_database(
+                args.connection_database
+            )
+        conn = _BATCH_CONNS[args.connection_database]
+
+    ET.register_namespace('xi', XI_URL)
+    import_tile_type(db, conn, args)
+
+    return args.tile
+
+
+def read_batch_manifest(f, common_argv):
+    """ Reads a batch manifest.
+
+    Each non-empty line of the manifest holds the arguments for one tile type
+    (shell quoting rules apply), lines starting with "#" are ignored.  The
+    common arguments are prepended to every line.
+    """
+    batch = []
+    for line in f:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        batch.append(common_argv + shlex.split(line))
+
+    return batch
+
+
+def import_tile_batch(batch, jobs):
+    """ Imports all tile types in the batch using a pool of workers. """
+    if jobs == 1:
+        for argv in batch:
+            import_tile_batch_entry(argv)
+        return
+
+    with multiprocessing.Pool(jobs) as pool:
+        for tile in pool.imap_unordered(import_tile_batch_entry, batch):
+            print('Imported tile type {}'.format(tile), file=sys.stderr)
+
+
+def main():
+    batch_parser = argparse.ArgumentParser(add_help=False)
+    batch_parser.add_argument(
+        '--batch',
+        type=argparse.FileType('r'),
+        help="""
+Manifest of tile types to import, one line of arguments per tile type.
+All other arguments given on the command line are shared by every line."""
+    )
+    batch_parser.add_argument(
+        '--jobs',
+        type=int,
+        default=None,
+        help="Number of worker processes used in batch mode."
+    )
+    batch_args, common_argv = batch_parser.parse_known_args()
+
+    if batch_args.batch is None:
+        args = create_parser().parse_args(common_argv)
+
+        db = prjxray.db.Database(args.db_root, args.part)
+
+        ET.register_namespace('xi', XI_URL)
+        if args.connection_database:
+            with sqlite3.connect("file:{}?mode=ro".format(
+                    args.connection_database), uri=True) as conn:
+                import_tile_type(db, conn, args)
+        else:
+            import_tile_type(db, None, args)
+    else:
+        with batch_args.batch as f:
+            batch = read_batch_manifest(f, common_argv)
+
+        jobs = batch_args.jobs
+        if jobs is None:
+            jobs = min(len(batch), multiprocessing.cpu_count())
+
+        import_tile_batch(batch, max(jobs, 1))
+
+
 if __name__ == '__main__':
     main()